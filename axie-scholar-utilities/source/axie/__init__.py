@@ -3,15 +3,18 @@ __all__ = [
     'AxiePaymentsManager',
     'AxieClaimsManager',
     'AxieTransferManager',
+    'StreamedPaymentsManager',
+    'StreamedClaimsManager',
+    'StreamedTransferManager',
     'AxieMorphingManager',
     'Axies',
     'AxieBreedManager',
     'QRCodeManager'
 ]
 
-from axie.payments import AxiePaymentsManager
-from axie.claims import AxieClaimsManager
-from axie.transfers import AxieTransferManager
+from axie.payments import AxiePaymentsManager, StreamedPaymentsManager
+from axie.claims import AxieClaimsManager, StreamedClaimsManager
+from axie.transfers import AxieTransferManager, StreamedTransferManager
 from axie.morphing import AxieMorphingManager
 from axie.axies import Axies
 from axie.breeding import AxieBreedManager
@@ -0,0 +1,77 @@
+import sqlite3
+import threading
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS axies (
+    id INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    birth_date INTEGER NOT NULL,
+    body_shape TEXT,
+    updated_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS axies_owner ON axies(owner);
+"""
+
+
+def normalize(account):
+    return account.replace("ronin:", "0x").lower()
+
+
+class AxieIndex:
+    """ Local SQLite index of axie birth dates and body shapes. Birth dates
+    never change and adults stay adults, so morph scans only need to ask the
+    api about axies that are new or could have been morphed since. """
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+
+    def get(self, axie_ids):
+        """ Returns a dict axie id -> (birth_date, body_shape) of the indexed axies """
+        axie_ids = list(axie_ids)
+        details = {}
+        with self.lock:
+            # Stay below the sqlite limit of parameters per query
+            for i in range(0, len(axie_ids), 500):
+                chunk = axie_ids[i:i + 500]
+                rows = self.db.execute(
+                    f"SELECT id, birth_date, body_shape FROM axies WHERE id IN ({','.join('?' * len(chunk))})",
+                    chunk).fetchall()
+                details.update({row["id"]: (row["birth_date"], row["body_shape"]) for row in rows})
+        return details
+
+    def store(self, details, owners):
+        """ Saves a dict axie id -> (birth_date, body_shape), owners maps each axie to its account """
+        now = int(datetime.now().timestamp())
+        with self.lock:
+            self.db.execute("BEGIN")
+            self.db.executemany(
+                "INSERT INTO axies (id, owner, birth_date, body_shape, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET owner = excluded.owner, birth_date = excluded.birth_date, "
+                "body_shape = excluded.body_shape, updated_at = excluded.updated_at",
+                [(axie, normalize(owners[axie]), birth_date, body_shape, now)
+                 for axie, (birth_date, body_shape) in details.items()])
+            self.db.execute("COMMIT")
+
+    def sync(self, owned):
+        """ Takes a dict account -> axie ids currently owned. Moves axies that
+        changed hands between these accounts and evicts the ones they no longer
+        own. Returns the number of evicted axies. """
+        evicted = []
+        with self.lock:
+            self.db.execute("BEGIN")
+            self.db.executemany("UPDATE axies SET owner = ? WHERE id = ?",
+                                [(normalize(acc), axie) for acc, axies in owned.items() for axie in axies])
+            for acc, axies in owned.items():
+                rows = self.db.execute("SELECT id FROM axies WHERE owner = ?", (normalize(acc),)).fetchall()
+                evicted.extend(row["id"] for row in rows if row["id"] not in axies)
+            self.db.executemany("DELETE FROM axies WHERE id = ?", [(axie,) for axie in evicted])
+            self.db.execute("COMMIT")
+        return len(evicted)
+
+    def close(self):
+        with self.lock:
+            self.db.close()
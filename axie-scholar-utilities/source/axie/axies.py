@@ -2,55 +2,199 @@ import json
 import logging
 from datetime import datetime, timedelta
 
+from requests.exceptions import ConnectionError, RetryError
 from web3 import Web3
-import requests
 
-from axie.utils import check_balance, RONIN_PROVIDER, AXIE_CONTRACT
+from axie.calldata import owner_of_data, token_of_owner_by_index_data
+from axie.utils import (
+    check_balance,
+    check_balances,
+    get_contract,
+    get_web3,
+    rate_limited_session,
+    rpc_batch,
+    GRAPHQL_BATCH_SIZE,
+    GRAPHQL_URL,
+    RETRIES,
+    RONIN_PROVIDER,
+    RPC_BATCH_SIZE,
+    AXIE_CONTRACT
+)
+
+graphql_session = rate_limited_session(RETRIES)
+
+
+def get_owned_axies(accounts, chunk_size=RPC_BATCH_SIZE):
+    """ Enumerates the axies of many accounts at once. Balances and then all the
+    tokenOfOwnerByIndex calls are sent as chunked JSON-RPC batch requests, all
+    of them at the same block. Returns a dict account -> set of axie ids """
+    accounts = list(dict.fromkeys(accounts))
+    if not accounts:
+        return {}
+    block = hex(get_web3(RONIN_PROVIDER).eth.block_number)
+    balances = check_balances(accounts, 'axies', chunk_size, block)
+    owned = {acc: set() for acc in accounts}
+    indexes = [(acc, i) for acc in accounts for i in range(balances[acc])]
+    for start in range(0, len(indexes), chunk_size):
+        chunk = indexes[start:start + chunk_size]
+        calls = [("eth_call", [{"to": AXIE_CONTRACT, "data": token_of_owner_by_index_data(acc, i)}, block])
+                 for acc, i in chunk]
+        for (acc, i), response in zip(chunk, rpc_batch(calls, RONIN_PROVIDER)):
+            if not response.get("result"):
+                logging.debug(f"Batched axie lookup failed for {acc} at index {i}, retrying it alone. "
+                              f"Error: {response.get('error')}")
+                owned[acc].add(token_of_owner_by_index(acc, i, block))
+                continue
+            owned[acc].add(int(response["result"], 16))
+    return owned
+
+
+def get_owners(axie_ids, block='latest', chunk_size=RPC_BATCH_SIZE):
+    """ Reads the owner of many axies with chunked JSON-RPC batches of ownerOf
+    calls. Returns a dict axie id -> lowercase 0x address, None for the axies
+    whose owner could not be read """
+    axie_ids = [int(axie) for axie in dict.fromkeys(axie_ids)]
+    owners = {}
+    for i in range(0, len(axie_ids), chunk_size):
+        chunk = axie_ids[i:i + chunk_size]
+        calls = [("eth_call", [{"to": AXIE_CONTRACT, "data": owner_of_data(axie)}, block]) for axie in chunk]
+        for axie, response in zip(chunk, rpc_batch(calls, RONIN_PROVIDER)):
+            result = response.get("result")
+            if not result or len(result) < 42:
+                logging.debug(f"Could not get the owner of axie {axie}. Error: {response.get('error')}")
+                owners[axie] = None
+                continue
+            owners[axie] = "0x" + result[-40:].lower()
+    return owners
+
+
+def token_of_owner_by_index(account, index, block='latest'):
+    contract = get_contract(get_web3(RONIN_PROVIDER), AXIE_CONTRACT, "axie/axie_abi.json")
+    return contract.functions.tokenOfOwnerByIndex(
+        _owner=Web3.toChecksumAddress(account.replace("ronin:", "0x")),
+        _index=index
+    ).call(block_identifier=block)
+
+
+MORPH_DELAY = timedelta(days=5)
+
+
+def morph_date(birth_date):
+    return datetime.fromtimestamp(birth_date) + MORPH_DELAY
+
+
+def morph_date_and_body(axie):
+    if isinstance(axie, dict) and 'bodyShape' in axie and 'birthDate' in axie:
+        return morph_date(axie["birthDate"]), axie["bodyShape"]
+    return None, None
+
+
+def query_axies(axie_ids, fields, chunk_size=GRAPHQL_BATCH_SIZE):
+    """ Each chunk of axies is looked up in a single GraphQL request with one
+    aliased field per axie. Returns a dict axie id -> dict with the requested
+    fields for the axies that were found, chunks that fail are left out """
+    axie_ids = [int(axie) for axie in dict.fromkeys(axie_ids)]
+    found = {}
+    for i in range(0, len(axie_ids), chunk_size):
+        chunk = axie_ids[i:i + chunk_size]
+        aliases = " ".join(f'a{axie}: axie(axieId: "{axie}") {{ ...AxieDetail }}' for axie in chunk)
+        payload = {
+            "operationName": "GetAxieDetails",
+            "variables": {},
+            "query": f"query GetAxieDetails {{ {aliases} }} fragment AxieDetail on Axie "
+            f"{{ id {' '.join(fields)} __typename }}"
+        }
+        try:
+            response = graphql_session.post(GRAPHQL_URL, json=payload)
+        except (RetryError, ConnectionError) as e:
+            logging.critical(f"Could not look up axies {chunk[0]} to {chunk[-1]}, they are left out. Error: {e}")
+            continue
+        try:
+            data = response.json().get("data") or {}
+        except (json.decoder.JSONDecodeError, AttributeError):
+            logging.debug("Response contains no json info")
+            data = {}
+        for axie in chunk:
+            detail = data.get(f"a{axie}")
+            if isinstance(detail, dict) and all(field in detail for field in fields):
+                found[axie] = detail
+    return found
+
+
+def get_axie_details(axie_ids, chunk_size=GRAPHQL_BATCH_SIZE):
+    """ Returns a dict axie id -> (birth_date, body_shape) of the axies that were found """
+    return {axie: (detail["birthDate"], detail["bodyShape"])
+            for axie, detail in query_axies(axie_ids, ["birthDate", "bodyShape"], chunk_size).items()}
+
+
+def get_breed_counts(axie_ids, chunk_size=GRAPHQL_BATCH_SIZE):
+    """ Returns a dict axie id -> number of times it has been bred, for the axies that were found """
+    return {axie: detail["breedCount"]
+            for axie, detail in query_axies(axie_ids, ["breedCount"], chunk_size).items()}
+
+
+def get_morph_dates_and_bodies(axie_ids, chunk_size=GRAPHQL_BATCH_SIZE):
+    """ Bulk version of Axies.get_morph_date_and_body. Returns a dict axie id ->
+    (morph_date, body_shape), (None, None) for the axies that could not be found """
+    details = {axie: (morph_date(birth_date), body_shape)
+               for axie, (birth_date, body_shape) in get_axie_details(axie_ids, chunk_size).items()}
+    return {int(axie): details.get(int(axie), (None, None)) for axie in axie_ids}
+
+
+def morphable_axies(axie_list, details, now):
+    axies = []
+    for axie in sorted(axie_list):
+        morph_date, body_shape = details.get(axie, (None, None))
+        if not morph_date and not body_shape:
+            logging.info(f"Something went wrong getting info for Axie {axie}, skipping it")
+        elif now >= morph_date and not body_shape:
+            axies.append(axie)
+        elif not body_shape:
+            logging.info(f"Axie {axie} cannot be morphed until {morph_date}")
+        else:
+            logging.info(f"Axie {axie} is already an adult!")
+    return axies
+
+
+def find_axies_to_morph(accounts, index=None):
+    """ Finds the axies ready to be morphed of many accounts. Returns a dict
+    account -> list of axie ids. When an AxieIndex is given, only axies that
+    are not in it or could have been morphed since are looked up. """
+    owned = get_owned_axies(accounts)
+    axie_ids = [axie for axies in owned.values() for axie in axies]
+    now = datetime.now()
+    known = index.get(axie_ids) if index else {}
+    # Adults stay adults and axies cannot be morphed before their morph date
+    stale = [axie for axie in axie_ids
+             if axie not in known or not known[axie][1] and now >= morph_date(known[axie][0])]
+    fetched = get_axie_details(stale)
+    if index:
+        index.store(fetched, {axie: acc for acc, axies in owned.items() for axie in axies})
+        evicted = index.sync(owned)
+        logging.info(f"Found {len(axie_ids) - len(stale)} axies in the index, looked up {len(stale)} "
+                     f"and evicted {evicted} no longer owned")
+    details = {axie: (morph_date(birth_date), body_shape)
+               for axie, (birth_date, body_shape) in {**known, **fetched}.items()}
+    return {acc: morphable_axies(axies, details, now) for acc, axies in owned.items()}
 
 
 class Axies:
     def __init__(self, account):
-        self.w3 = Web3(
-            Web3.HTTPProvider(
-                RONIN_PROVIDER,
-                request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}))
+        self.w3 = get_web3(RONIN_PROVIDER)
         self.acc = account.replace("ronin:", "0x")
-        with open("axie/axie_abi.json") as f:
-            axie_abi = json.load(f)
-        self.contract = self.w3.eth.contract(
-            address=Web3.toChecksumAddress(AXIE_CONTRACT),
-            abi=axie_abi
-        )
+        self.contract = get_contract(self.w3, AXIE_CONTRACT, "axie/axie_abi.json")
         self.now = datetime.now()
+        self.request = rate_limited_session()
 
     def number_of_axies(self):
         return check_balance(self.acc, 'axies')
 
     def find_axies_to_morph(self):
         axie_list = self.get_axies()
-        axies = []
-        for axie in axie_list:
-            morph_date, body_shape = self.get_morph_date_and_body(axie)
-            if not morph_date and not body_shape:
-                logging.info(f"Something went wrong getting info for Axie {axie}, skipping it")
-            elif self.now >= morph_date and not body_shape:
-                axies.append(axie)
-            elif not body_shape:
-                logging.info(f"Axie {axie} cannot be morphed until {morph_date}")
-            else:
-                logging.info(f"Axie {axie} is already an adult!")
-        return axies
+        return morphable_axies(axie_list, get_morph_dates_and_bodies(axie_list), self.now)
 
     def get_axies(self):
-        num_axies = self.number_of_axies()
-        axies = []
-        for i in range(num_axies):
-            axie = self.contract.functions.tokenOfOwnerByIndex(
-                _owner=Web3.toChecksumAddress(self.acc),
-                _index=i
-            ).call()
-            axies.append(axie)
-        return axies
+        return get_owned_axies([self.acc])[self.acc]
 
     def get_morph_date_and_body(self, axie_id):
         payload = {
@@ -61,8 +205,7 @@ class Axies:
             "{ ...AxieDetail __typename}} fragment AxieDetail on Axie "
             "{ id birthDate bodyShape __typename }"
         }
-        url = "https://graphql-gateway.axieinfinity.com/graphql"
-        response = requests.post(url, json=payload)
+        response = self.request.post(GRAPHQL_URL, json=payload)
         try:
             json_response = response.json()
         except json.decoder.JSONDecodeError:
@@ -70,10 +213,5 @@ class Axies:
             return None, None
 
         if "data" in json_response and "axie" in json_response['data']:
-            if 'bodyShape' in json_response['data']['axie'] and 'birthDate' in json_response['data']['axie']:
-                # In case we want to check correctly morphed
-                body_shape = json_response["data"]["axie"]["bodyShape"]
-                birth_date = json_response["data"]["axie"]["birthDate"]
-                morph_date = datetime.fromtimestamp(birth_date) + timedelta(days=5)
-                return morph_date, body_shape
+            return morph_date_and_body(json_response['data']['axie'])
         return None, None
@@ -1,23 +1,31 @@
 import sys
-import json
 import logging
-from time import sleep
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from time import monotonic
 
-from jsonschema import validate
-from jsonschema.exceptions import ValidationError
-from web3 import Web3, exceptions
-
-from axie.schemas import breeding_schema
+from axie.schemas import schema_errors
+from axie.axies import get_breed_counts, get_owners
+from axie.calldata import build_transaction, breed_axies_data
+from axie.signing import TransactionSigner, SIGNING_WORKERS
 from axie.utils import (
     get_nonce,
+    is_nonce_error,
+    log_buffer,
+    nonces,
     load_json,
     RONIN_PROVIDER_FREE,
     AXIE_CONTRACT,
-    check_balance,
-    TIMEOUT_MINS,
+    check_balances,
+    get_web3,
+    rpc_batch,
+    RONIN_PROVIDER,
+    RPC_BATCH_SIZE,
+    RECEIPT_SUCCESS,
+    RECEIPT_TIMEOUT,
+    receipt_watcher,
     ImportantLogsFilter,
-    USER_AGENT
+    validation_cache
 )
 from axie.payments import Payment, PaymentsSummary, CREATOR_FEE_ADDRESS
 
@@ -31,72 +39,175 @@ file_handler.setLevel(logging.INFO)
 file_handler.addFilter(ImportantLogsFilter())
 logger.addHandler(file_handler)
 
+# Max number of accounts breeding at the same time
+BREED_CONCURRENCY = 10
+BREED_REJECTED = "rejected"
+BREED_FAILED = "failed"
+BREED_SKIPPED = "skipped"
+RESULTS_HEADERS = ["Account", "Sire", "Matron", "Nonce", "Status", "Latency", "Hash"]
+# SLP paid for each parent depending on how many times it has been bred already
+BREEDING_SLP_COST = [450, 675, 1125, 1800, 2925, 4725, 7650]
+MAX_BREED_COUNT = len(BREEDING_SLP_COST)
+# 0.5 AXS per breed, balances are read in wei
+BREEDING_AXS_COST = 500000000000000000
+AXS_DECIMALS = 1000000000000000000
+
+
+def breeding_costs(breeding_file, breed_counts):
+    """ SLP and AXS each account will pay for its breeds, from the breed counts
+    of the parents read by preflight. Axies bred more than once in the session
+    cost more each time. Returns a dict account -> {"slp": ..., "axs": ...}
+    and the list of problems found, empty when every breed can be paid. """
+    axies = [axie for bf in breeding_file for axie in (bf['Sire'], bf['Matron'])]
+    missing = sorted(set(axies) - set(breed_counts))
+    if missing:
+        return {}, [f"Could not get the breed count of axies {missing}, please try again later."]
+    # Copy, counts go up as the session breeds the same axies again
+    breed_counts = dict(breed_counts)
+    costs = {}
+    errors = []
+    for bf in breeding_file:
+        acc_costs = costs.setdefault(bf['AccountAddress'].lower(), {"slp": 0, "axs": 0})
+        for axie in (bf['Sire'], bf['Matron']):
+            if breed_counts[axie] >= MAX_BREED_COUNT:
+                errors.append(f"Axie {axie} cannot be bred {breed_counts[axie] + 1} times.")
+                continue
+            acc_costs["slp"] += BREEDING_SLP_COST[breed_counts[axie]]
+            breed_counts[axie] += 1
+        acc_costs["axs"] += BREEDING_AXS_COST
+    return costs, errors
+
+
+def preflight(breeding_file, chunk_size=RPC_BATCH_SIZE):
+    """ Checks every pair before anything is sent. Both parents must belong to
+    the breeding account and be under the breed limit, then the breedAxies
+    call is simulated with eth_call. All reads are batched and done at the
+    same block. Pairs that would take an axie past the breed limit within the
+    session are dropped too. Returns the pairs that passed, logging why the
+    rest failed, and the breed counts of their axies. """
+    axies = [axie for bf in breeding_file for axie in (bf['Sire'], bf['Matron'])]
+    block = hex(get_web3(RONIN_PROVIDER).eth.block_number)
+    owners = get_owners(axies, block, chunk_size)
+    breed_counts = get_breed_counts(axies)
+    checked = []
+    for bf in breeding_file:
+        acc = bf['AccountAddress'].replace("ronin:", "0x").lower()
+        problems = []
+        for axie in (bf['Sire'], bf['Matron']):
+            if not owners.get(axie):
+                problems.append(f"could not find axie {axie}")
+            elif owners[axie] != acc:
+                problems.append(f"axie {axie} is not in the account")
+            elif axie not in breed_counts:
+                problems.append(f"could not get the breed count of axie {axie}")
+            elif breed_counts[axie] >= MAX_BREED_COUNT:
+                problems.append(f"axie {axie} has reached the breed limit")
+        if problems:
+            logging.info(f"Important: Dropping breed of {bf['Sire']} with {bf['Matron']} in account "
+                         f"{bf['AccountAddress']}, {' and '.join(problems)}.")
+        else:
+            checked.append(bf)
+    valid = []
+    for i in range(0, len(checked), chunk_size):
+        chunk = checked[i:i + chunk_size]
+        calls = [("eth_call", [{"from": bf['AccountAddress'].replace("ronin:", "0x"), "to": AXIE_CONTRACT,
+                                "data": breed_axies_data(bf['Sire'], bf['Matron'])}, block]) for bf in chunk]
+        for bf, response in zip(chunk, rpc_batch(calls, RONIN_PROVIDER)):
+            error = response.get("error")
+            if error and "revert" in str(error).lower():
+                logging.info(f"Important: Dropping breed of {bf['Sire']} with {bf['Matron']} in account "
+                             f"{bf['AccountAddress']}, it would fail: {error}")
+                continue
+            if error:
+                # Could not be simulated, the pair passed the other checks so keep it
+                logging.debug(f"Could not simulate breed of {bf['Sire']} with {bf['Matron']}. Error: {error}")
+            valid.append(bf)
+    # Every breed of the session counts towards the limit of the axies after it
+    session_counts = dict(breed_counts)
+    ready = []
+    for bf in valid:
+        over = [axie for axie in (bf['Sire'], bf['Matron']) if session_counts[axie] >= MAX_BREED_COUNT]
+        if over:
+            logging.info(f"Important: Dropping breed of {bf['Sire']} with {bf['Matron']} in account "
+                         f"{bf['AccountAddress']}, axie {over[0]} reaches the breed limit earlier in this session.")
+            continue
+        for axie in (bf['Sire'], bf['Matron']):
+            session_counts[axie] += 1
+        ready.append(bf)
+    return ready, breed_counts
+
+
+def has_funds(required):
+    """ Checks every account has the SLP and AXS it needs, given as a dict
+    account -> {"slp": ..., "axs": ...}. Balances are read in a couple of
+    batches at the same block. """
+    accounts = list(required)
+    block = hex(get_web3(RONIN_PROVIDER).eth.block_number)
+    slp = check_balances(accounts, 'slp', block=block)
+    axs = check_balances(accounts, 'axs', block=block)
+    enough = True
+    for acc, costs in required.items():
+        if slp[acc] < costs["slp"] or axs[acc] < costs["axs"]:
+            logging.critical(f"Account {acc} needs {costs['slp']} SLP and {costs['axs'] / AXS_DECIMALS} AXS "
+                             f"but only has {slp[acc]} SLP and {axs[acc] / AXS_DECIMALS} AXS")
+            enough = False
+    return enough
+
+
+def format_breed_results(results):
+    """ Plain text table with one row per breeding pair """
+    rows = [RESULTS_HEADERS] + [[
+        r["account"].replace("0x", "ronin:"), str(r["sire"]), str(r["matron"]), str(r["nonce"]), r["status"],
+        f"{r['latency']:.1f}s" if r["latency"] is not None else "-", r["hash"] or "-"
+    ] for r in results]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(RESULTS_HEADERS))]
+    return "\n".join("  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip() for row in rows)
+
 
 class Breed:
     def __init__(self, sire_axie, matron_axie, address, private_key):
-        self.w3 = Web3(
-            Web3.HTTPProvider(
-                RONIN_PROVIDER_FREE,
-                request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}))
+        self.w3 = get_web3(RONIN_PROVIDER_FREE)
         self.sire_axie = sire_axie
         self.matron_axie = matron_axie
         self.address = address.replace("ronin:", "0x")
         self.private_key = private_key
 
+    def build(self, nonce):
+        return build_transaction(AXIE_CONTRACT, breed_axies_data(self.sire_axie, self.matron_axie), nonce, gas=492874)
+
+    def send_signed(self, raw_transaction):
+        self.w3.eth.send_raw_transaction(raw_transaction)
+
+    def wait_for_receipt(self, hash_, nonce, future=None):
+        # Wait for transaction to finish or timeout, future is given when the hash is already watched
+        if not future:
+            future = receipt_watcher.watch(hash_)
+        logging.info(f"Waiting for transactions '{self}' to finish (Nonce: {nonce})...")
+        status = future.result()
+        if status == RECEIPT_TIMEOUT:
+            logging.info(f"Transaction {self}, timed out!")
+        success = status == RECEIPT_SUCCESS
+
+        if success:
+            logging.info(f"Important: {self} completed successfully")
+        else:
+            logging.info(f"Important: {self} failed")
+        return success
+
     def execute(self):
-        # Prepare transaction
-        with open("axie/axie_abi.json") as f:
-            axie_abi = json.load(f)
-        axie_contract = self.w3.eth.contract(
-            address=Web3.toChecksumAddress(AXIE_CONTRACT),
-            abi=axie_abi
-        )
         # Get Nonce
         nonce = get_nonce(self.address)
-        # Build transaction
-        transaction = axie_contract.functions.breedAxies(
-            self.sire_axie,
-            self.matron_axie
-        ).buildTransaction({
-            "chainId": 2020,
-            "gas": 492874,
-            "gasPrice": self.w3.toWei("0", "gwei"),
-            "nonce": nonce
-        })
         # Sign transaction
         signed = self.w3.eth.account.sign_transaction(
-            transaction,
+            self.build(nonce),
             private_key=self.private_key
         )
         # Send raw transaction
-        self.w3.eth.send_raw_transaction(signed.rawTransaction)
+        self.send_signed(signed.rawTransaction)
         # get transaction hash
         hash_ = self.w3.toHex(self.w3.keccak(signed.rawTransaction))
-        # Wait for transaction to finish or timeout
-        logging.info("{self} about to start!")
-        start_time = datetime.now()
-        while True:
-            # We will wait for max 10minutes for this tx to respond
-            if datetime.now() - start_time > timedelta(minutes=TIMEOUT_MINS):
-                success = False
-                logging.info(f"Transaction {self}, timed out!")
-                break
-            try:
-                recepit = self.w3.eth.get_transaction_receipt(hash_)
-                if recepit["status"] == 1:
-                    success = True
-                else:
-                    success = False
-                break
-            except exceptions.TransactionNotFound:
-                # Sleep 10s while waiting
-                sleep(10)
-                logging.info(f"Waiting for transactions '{self}' to finish (Nonce: {nonce})...")
-
-        if success:
-            logging.info(f"Important: {self} completed successfully")
-        else:
-            logging.info(f"Important: {self} failed")
+        logging.info(f"{self} about to start!")
+        self.wait_for_receipt(hash_, nonce)
 
     def __str__(self):
         return (f"Breeding axie {self.sire_axie} with {self.matron_axie} in account "
@@ -104,18 +215,28 @@ class Breed:
 
 
 class AxieBreedManager:
-    def __init__(self, breeding_file, secrets_file, payment_account):
+    def __init__(self, breeding_file, secrets_file, payment_account, signing_workers=SIGNING_WORKERS,
+                 concurrency=BREED_CONCURRENCY, stop_on_revert=False):
         self.secrets = load_json(secrets_file)
         self.breeding_file = load_json(breeding_file)
         self.payment_account = payment_account
         self.breeding_costs = 0
+        self.account_costs = {}
+        self.breed_counts = {}
+        self.signer = TransactionSigner(signing_workers)
+        self.concurrency = concurrency
+        self.stop_on_revert = stop_on_revert
+        self.results = []
 
     def verify_inputs(self):
-        validation_error = False
         logging.info("Validating file inputs...")
-        try:
-            validate(self.breeding_file, breeding_schema)
-        except ValidationError as ex:
+        cache_key = validation_cache.key("breeding", self.breeding_file, self.secrets, self.payment_account)
+        if validation_cache.passed(cache_key):
+            logging.info("Files did not change since they were last validated, skipping validation.")
+            self.preflight()
+            return
+        validation_error = False
+        for ex in schema_errors(self.breeding_file, "breeding"):
             logging.critical(f'Validation of breeding file failed. Error given: {ex.message}\n'
                              f'For attribute in: {list(ex.path)}')
             validation_error = True
@@ -128,13 +249,33 @@ class AxieBreedManager:
             validation_error = True
         if validation_error:
             sys.exit()
+        else:
+            validation_cache.add(cache_key)
+            self.preflight()
+
+    def preflight(self):
+        logging.info("Checking breeding pairs...")
+        self.breeding_file, self.breed_counts = preflight(self.breeding_file)
+        if not self.breeding_file:
+            logging.critical("None of the breeding pairs can be bred, nothing to do.")
+            sys.exit()
+        logging.info(f"{len(self.breeding_file)} breeding pairs ready")
 
     def calculate_cost(self):
         return self.calculate_fee_cost() + self.breeding_costs
 
     def calculate_breeding_cost(self):
-        # TODO: We need to calculate how much will all breeding cost, pending for the future!
-        return 0
+        self.account_costs, errors = breeding_costs(self.breeding_file, self.breed_counts)
+        for error in errors:
+            logging.critical(error)
+        self.breeding_costs = sum(costs["slp"] for costs in self.account_costs.values())
+        return self.breeding_costs
+
+    def check_funds(self):
+        self.calculate_breeding_cost()
+        required = {acc: dict(costs) for acc, costs in self.account_costs.items()}
+        required.setdefault(self.payment_account.lower(), {"slp": 0, "axs": 0})["slp"] += self.calculate_fee_cost()
+        return has_funds(required)
 
     def calculate_fee_cost(self):
         number_of_breeds = len(self.breeding_file)
@@ -149,19 +290,18 @@ class AxieBreedManager:
         return cost
 
     def execute(self):
-        if check_balance(self.payment_account) < self.calculate_cost():
+        if not self.check_funds():
             logging.critical("Not enough SLP funds to pay for breeding and the fee")
             sys.exit()
 
         logging.info("About to start breeding axies")
-        for bf in self.breeding_file:
-            b = Breed(
-                sire_axie=bf['Sire'],
-                matron_axie=bf['Matron'],
-                address=bf['AccountAddress'],
-                private_key=self.secrets[bf['AccountAddress']]
-            )
-            b.execute()
+        breeds = [Breed(
+            sire_axie=bf['Sire'],
+            matron_axie=bf['Matron'],
+            address=bf['AccountAddress'],
+            private_key=self.secrets[bf['AccountAddress']]
+        ) for bf in self.breeding_file]
+        self.execute_breeds(breeds)
         logging.info("Done breeding axies")
         #fee = self.calculate_fee_cost()
         #logging.info(f"Time to pay the fee for breeding. For this session it is: {fee} SLP")
@@ -175,3 +315,71 @@ class AxieBreedManager:
         #    PaymentsSummary()
         #)
         #p.execute()
+
+    def execute_breeds(self, breeds):
+        # Every breed is signed up front with consecutive nonces per account, so
+        # the chain still runs the breeds of an account in file order
+        nonce_list = [nonces.next_nonce(b.address) for b in breeds]
+        signed = self.signer.sign([(b.build(nonce), b.private_key) for b, nonce in zip(breeds, nonce_list)])
+        self.signer.shutdown()
+        accounts = {}
+        for b, nonce, (raw_tx, hash_) in zip(breeds, nonce_list, signed):
+            accounts.setdefault(b.address, []).append((b, nonce, raw_tx, hash_))
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="breeds") as executor:
+            results = {id(r["breed"]): r for rs in executor.map(self.breed_account, accounts.values()) for r in rs}
+        # Keep the results in file order
+        self.results = [results[id(b)] for b in breeds]
+        logging.info(f"Breeding results:\n{format_breed_results(self.results)}")
+        return self.results
+
+    def breed_account(self, account_breeds):
+        """ Runs the signed breeds of a single account. They are all broadcast back
+        to back, unless stop_on_revert is set, then each breed waits for the
+        previous one and the queue stops at the first failure. Returns one result
+        per breed. """
+        with log_buffer.buffered():
+            results = []
+            watching = []
+            stopped = False
+            for b, nonce, raw_tx, hash_ in account_breeds:
+                result = {"breed": b, "account": b.address, "sire": b.sire_axie, "matron": b.matron_axie,
+                          "nonce": nonce, "hash": None, "status": BREED_SKIPPED, "latency": None}
+                results.append(result)
+                if stopped:
+                    continue
+                try:
+                    b.send_signed(raw_tx)
+                except Exception as e:
+                    # Breeds after this one would only be stuck behind the gap
+                    if isinstance(e, ValueError) and is_nonce_error(e):
+                        logging.info(f"Important: {b} was rejected (Nonce: {nonce}). Error: {e}")
+                        result["status"] = BREED_REJECTED
+                    else:
+                        logging.critical(f"Important: {b} could not be sent (Nonce: {nonce}). Error: {e}")
+                        result["status"] = BREED_FAILED
+                    stopped = True
+                    continue
+                result["hash"] = hash_
+                result["sent_at"] = monotonic()
+                future = receipt_watcher.watch(hash_)
+                # Receipts resolve in any order, time them when they do and not when they are waited on
+                future.add_done_callback(lambda _, r=result: r.update(latency=monotonic() - r["sent_at"]))
+                if self.stop_on_revert:
+                    self.wait_for_breed(result, future)
+                    stopped = result["status"] != RECEIPT_SUCCESS
+                else:
+                    watching.append((result, future))
+            for result, future in watching:
+                self.wait_for_breed(result, future)
+            if any(r["status"] != RECEIPT_SUCCESS for r in results):
+                # Following nonces may now be a gap, get them from the chain again
+                nonces.resync(account_breeds[0][0].address)
+            return results
+
+    @staticmethod
+    def wait_for_breed(result, future):
+        result["breed"].wait_for_receipt(result["hash"], result["nonce"], future)
+        result["status"] = future.result()
+        if result["latency"] is None:
+            # Done callbacks run right after waiters are woken up
+            result["latency"] = monotonic() - result["sent_at"]
@@ -0,0 +1,86 @@
+from functools import lru_cache
+
+from web3 import Web3
+
+RONIN_CHAIN_ID = 2020
+
+
+def function_selector(signature):
+    return Web3.keccak(text=signature)[:4]
+
+
+# Selectors of the only contract calls this package makes, computed once
+TRANSFER_SELECTOR = function_selector("transfer(address,uint256)")
+CHECKPOINT_SELECTOR = function_selector("checkpoint(address,uint256,uint256,bytes)")
+SAFE_TRANSFER_FROM_SELECTOR = function_selector("safeTransferFrom(address,address,uint256)")
+BREED_AXIES_SELECTOR = function_selector("breedAxies(uint256,uint256)")
+TOKEN_OF_OWNER_BY_INDEX_SELECTOR = function_selector("tokenOfOwnerByIndex(address,uint256)")
+OWNER_OF_SELECTOR = function_selector("ownerOf(uint256)")
+
+
+@lru_cache(maxsize=None)
+def checksum(address):
+    return Web3.toChecksumAddress(address)
+
+
+def encode_address(address):
+    value = bytes.fromhex(address.replace("ronin:", "0x")[2:])
+    if len(value) != 20:
+        raise ValueError(f"Address {address} is not 20 bytes long")
+    return value.rjust(32, b"\x00")
+
+
+def encode_uint256(value):
+    # Same as web3, amounts and ids must be actual integers
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise TypeError(f"Value {value!r} is not an integer")
+    return value.to_bytes(32, "big")
+
+
+def encode_bytes(value):
+    """ Tail of a dynamic bytes argument: its length and the data padded to 32 bytes.
+    Like eth_abi, empty values still take a whole zero word. """
+    if isinstance(value, str):
+        value = bytes.fromhex(value[2:] if value.startswith("0x") else value)
+    return encode_uint256(len(value)) + value.ljust(max(32, (len(value) + 31) // 32 * 32), b"\x00")
+
+
+def transfer_data(to_acc, amount):
+    return "0x" + (TRANSFER_SELECTOR + encode_address(to_acc) + encode_uint256(amount)).hex()
+
+
+def checkpoint_data(owner, amount, created_at, signature):
+    # The signature goes after the 4 static head words, so its offset is 4 * 32
+    head = encode_address(owner) + encode_uint256(amount) + encode_uint256(created_at) + encode_uint256(128)
+    return "0x" + (CHECKPOINT_SELECTOR + head + encode_bytes(signature)).hex()
+
+
+def owner_of_data(axie_id):
+    return "0x" + (OWNER_OF_SELECTOR + encode_uint256(axie_id)).hex()
+
+
+def token_of_owner_by_index_data(owner, index):
+    return "0x" + (TOKEN_OF_OWNER_BY_INDEX_SELECTOR + encode_address(owner) + encode_uint256(index)).hex()
+
+
+def safe_transfer_from_data(from_acc, to_acc, axie_id):
+    return "0x" + (SAFE_TRANSFER_FROM_SELECTOR + encode_address(from_acc) + encode_address(to_acc) +
+                   encode_uint256(axie_id)).hex()
+
+
+def breed_axies_data(sire_axie, matron_axie):
+    return "0x" + (BREED_AXIES_SELECTOR + encode_uint256(sire_axie) + encode_uint256(matron_axie)).hex()
+
+
+def build_transaction(contract, data, nonce, gas, gas_price=0):
+    """ Same transaction dict buildTransaction returns for our calls, without going
+    through web3's ABI lookup and argument validation """
+    return {
+        "value": 0,
+        "chainId": RONIN_CHAIN_ID,
+        "gas": gas,
+        "gasPrice": gas_price,
+        "nonce": nonce,
+        "to": checksum(contract),
+        "data": data
+    }
@@ -1,21 +1,27 @@
 import sys
 import asyncio
-import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from functools import partial
 
 
 from requests.exceptions import RetryError
-from web3 import Web3, exceptions
-import requests
 
+from axie.calldata import build_transaction, checkpoint_data
+from axie.schemas import payments_format
+from axie.streaming import STREAM_BATCH_SIZE, SCHOLARS_KEYS, batched, iter_items, read_header
 from axie.utils import (
     check_balance,
     get_nonce,
     ImportantLogsFilter,
     SLP_CONTRACT,
     RONIN_PROVIDER_FREE,
-    AxieGraphQL
+    RECEIPT_SUCCESS,
+    AxieGraphQL,
+    receipt_watcher,
+    get_web3,
+    validation_cache
 )
 
 
@@ -28,23 +34,17 @@ file_handler.setLevel(logging.INFO)
 file_handler.addFilter(ImportantLogsFilter())
 logger.addHandler(file_handler)
 
+# Max number of claims doing blocking work (api calls, signing, sending) at the same time
+CLAIMS_CONCURRENCY = 25
+
 
 class Claim(AxieGraphQL):
-    def __init__(self, acc_name, force, **kwargs):
+    def __init__(self, acc_name, force, executor=None, **kwargs):
         super().__init__(**kwargs)
-        self.w3 = Web3(
-            Web3.HTTPProvider(
-                RONIN_PROVIDER_FREE,
-                request_kwargs={"headers": {"content-type": "application/json", "user-agent": self.user_agent}}))
-        with open("axie/slp_abi.json", encoding='utf-8') as f:
-            slp_abi = json.load(f)
-        self.slp_contract = self.w3.eth.contract(
-            address=Web3.toChecksumAddress(SLP_CONTRACT),
-            abi=slp_abi
-        )
+        self.w3 = get_web3(RONIN_PROVIDER_FREE)
         self.acc_name = acc_name
         self.force = force
-        self.request = requests.Session()
+        self.executor = executor
 
     def localize_date(self, date_utc):
         return date_utc.replace(tzinfo=timezone.utc).astimezone(tz=None)
@@ -77,19 +77,26 @@ class Claim(AxieGraphQL):
                 return in_game_total - wallet_total
         return None
 
-    async def execute(self):
+    async def run_blocking(self, func, *args):
+        """ Runs a blocking call in the claims executor so other claims keep going """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args))
+
+    def send_claim(self):
+        """ Checks, builds and sends the claim transaction. Returns its nonce and hash
+        or None if there was nothing to claim. This blocks, so it runs in the executor. """
         unclaimed = self.has_unclaimed_slp()
         if not unclaimed:
             logging.info(f"Important: Account {self.acc_name} ({self.account.replace('0x', 'ronin:')}) "
                          "has no claimable SLP")
-            return
+            return None
         logging.info(f"Account {self.acc_name} ({self.account.replace('0x', 'ronin:')}) has "
                      f"{unclaimed} unclaimed SLP")
         jwt = self.get_jwt()
         if not jwt:
             logging.critical("Important: Skipping claiming, we could not get the JWT for account "
                              f"{self.account.replace('0x', 'ronin:')}")
-            return
+            return None
         headers = {
             "User-Agent": self.user_agent,
             "authorization": f"Bearer {jwt}"
@@ -100,25 +107,25 @@ class Claim(AxieGraphQL):
         except RetryError as e:
             logging.critical(f"Error! Executing SLP claim API call for account {self.acc_name}"
                              f"({self.account.replace('0x', 'ronin:')}). Error {e}")
-            return
+            return None
         if 200 <= response.status_code <= 299:
             signature = response.json()["blockchain_related"].get("signature")
             if not signature or not signature["signature"]:
                 logging.critical(f"Account {self.acc_name} ({self.account.replace('0x', 'ronin:')}) had no signature "
                                  "in blockchain_related")
-                return
+                return None
         else:
             logging.info(f"Important: Claim for account {self.acc_name} ({self.account.replace('0x', 'ronin:')}) "
                          "had to be skipped")
-            return
+            return None
         nonce = get_nonce(self.account)
         # Build claim
-        claim = self.slp_contract.functions.checkpoint(
-            Web3.toChecksumAddress(self.account),
-            signature['amount'],
-            signature['timestamp'],
-            signature['signature']
-        ).buildTransaction({'gas': 492874, 'gasPrice': 0, 'nonce': nonce})
+        claim = build_transaction(
+            SLP_CONTRACT,
+            checkpoint_data(self.account, signature['amount'], signature['timestamp'], signature['signature']),
+            nonce,
+            gas=492874
+        )
         # Sign claim
         signed_claim = self.w3.eth.account.sign_transaction(
             claim,
@@ -128,32 +135,32 @@ class Claim(AxieGraphQL):
         self.w3.eth.send_raw_transaction(signed_claim.rawTransaction)
         # Get transaction hash
         hash_ = self.w3.toHex(self.w3.keccak(signed_claim.rawTransaction))
+        return nonce, hash_
+
+    async def execute(self):
+        sent = await self.run_blocking(self.send_claim)
+        if not sent:
+            return
+        nonce, hash_ = sent
         # Wait for transaction to finish
-        while True:
-            try:
-                recepit = self.w3.eth.get_transaction_receipt(hash_)
-                if recepit["status"] == 1:
-                    success = True
-                else:
-                    success = False
-                break
-            except exceptions.TransactionNotFound:
-                logging.debug(f"Waiting for claim for {self.acc_name} ({self.account.replace('0x', 'ronin:')}) to "
-                              f"finish (Nonce:{nonce}) (Hash: {hash_})...")
-                # Sleep 5 seconds not to constantly send requests!
-                await asyncio.sleep(5)
+        logging.debug(f"Waiting for claim for {self.acc_name} ({self.account.replace('0x', 'ronin:')}) to "
+                      f"finish (Nonce:{nonce}) (Hash: {hash_})...")
+        status = await asyncio.wrap_future(receipt_watcher.watch(hash_))
+        success = status == RECEIPT_SUCCESS
         if success:
+            balance = await self.run_blocking(check_balance, self.account)
             logging.info(f"Important: SLP Claimed! New balance for account {self.acc_name} "
-                         f"({self.account.replace('0x', 'ronin:')}) is: {check_balance(self.account)}")
+                         f"({self.account.replace('0x', 'ronin:')}) is: {balance}")
         else:
             logging.info(f"Important: Claim for account {self.acc_name} ({self.account.replace('0x', 'ronin:')}) "
                          "failed")
 
 
 class AxieClaimsManager:
-    def __init__(self, payments_file, secrets_file, force=False):
+    def __init__(self, payments_file, secrets_file, force=False, concurrency=CLAIMS_CONCURRENCY):
         self.secrets_file, self.acc_names = self.load_secrets_and_acc_name(secrets_file, payments_file)
         self.force = force
+        self.concurrency = concurrency
 
     def load_secrets_and_acc_name(self, secrets, payments):
         refined_secrets = {}
@@ -171,31 +178,94 @@ class AxieClaimsManager:
         return refined_secrets, acc_names
 
     def verify_inputs(self):
+        cache_key = validation_cache.key("claims", self.secrets_file)
+        if validation_cache.passed(cache_key):
+            logging.info("Files did not change since they were last validated, skipping validation.")
+            return
         validation_success = True
         # Check secrets file is not empty
         if not self.secrets_file:
             logging.warning("No secrets contained in secrets file")
             validation_success = False
+        if not self.verify_secrets(self.secrets_file):
+            validation_success = False
+        if not validation_success:
+            sys.exit()
+        validation_cache.add(cache_key)
+        logging.info("Secret file correctly validated")
+
+    def verify_secrets(self, secrets):
+        validation_success = True
         # Check keys and secrets have proper format
-        for acc in self.secrets_file:
+        for acc in secrets:
             if not acc.startswith("ronin:"):
                 logging.critical(f"Public address {acc} needs to start with ronin:")
                 validation_success = False
-            if len(self.secrets_file[acc]) != 66 or self.secrets_file[acc][:2] != "0x":
+            if len(secrets[acc]) != 66 or secrets[acc][:2] != "0x":
                 logging.critical(f"Private key for account {acc} is not valid, please review it!")
                 validation_success = False
+        return validation_success
+
+    def prepare_claims(self):
+        self.run_claims()
+        logging.info("Claiming completed!")
+
+    def run_claims(self):
+        # Blocking work of all claims shares a bounded pool, waiting for receipts does not take a slot
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="claims") as executor:
+            claims_list = [
+                Claim(
+                    force=self.force,
+                    account=acc,
+                    private_key=self.secrets_file[acc],
+                    acc_name=self.acc_names[acc],
+                    executor=executor) for acc in self.secrets_file]
+            logging.info("Claiming starting...")
+            loop = asyncio.get_event_loop()
+            loop.run_until_complete(asyncio.gather(*[claim.execute() for claim in claims_list]))
+
+
+class StreamedClaimsManager(AxieClaimsManager):
+    """ Claims for the scholars of a payments file that is read from disk a
+    batch at a time. Only the secrets of the current batch are picked out. """
+    def __init__(self, payments_path, secrets_file, force=False, concurrency=CLAIMS_CONCURRENCY,
+                 batch_size=STREAM_BATCH_SIZE):
+        self.payments_path = payments_path
+        self.all_secrets = secrets_file
+        self.secrets_file, self.acc_names = {}, {}
+        self.force = force
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.legacy = None
+
+    def batches(self):
+        """ Yields the secrets and names of the scholars of each batch """
+        for batch in batched(iter_items(self.payments_path, SCHOLARS_KEYS), self.batch_size):
+            payments = {"Manager": None, "Scholars": batch} if self.legacy else {"scholars": batch}
+            yield self.load_secrets_and_acc_name(self.all_secrets, payments)
+
+    def verify_inputs(self):
+        try:
+            self.legacy = payments_format(read_header(self.payments_path, SCHOLARS_KEYS)) == "legacy"
+            validation_success = True
+            accounts = 0
+            for secrets, _ in self.batches():
+                accounts += len(secrets)
+                if not self.verify_secrets(secrets):
+                    validation_success = False
+        except ValueError:
+            logging.critical(f"File in path {self.payments_path} is not a correctly encoded JSON.")
+            sys.exit()
+        # Check secrets file is not empty
+        if not accounts:
+            logging.warning("No secrets contained in secrets file")
+            validation_success = False
         if not validation_success:
             sys.exit()
         logging.info("Secret file correctly validated")
 
     def prepare_claims(self):
-        claims_list = [
-            Claim(
-                force=self.force,
-                account=acc,
-                private_key=self.secrets_file[acc],
-                acc_name=self.acc_names[acc]) for acc in self.secrets_file]
-        logging.info("Claiming starting...")
-        loop = asyncio.get_event_loop()
-        loop.run_until_complete(asyncio.gather(*[claim.execute() for claim in claims_list]))
+        for secrets, acc_names in self.batches():
+            self.secrets_file, self.acc_names = secrets, acc_names
+            self.run_claims()
         logging.info("Claiming completed!")
@@ -0,0 +1,106 @@
+import sqlite3
+import threading
+from datetime import datetime
+
+PLANNED = "planned"
+SIGNED = "signed"
+SENT = "sent"
+SUCCESS = "success"
+FAILED = "failed"
+CANCELED = "canceled"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS payouts (
+    id INTEGER PRIMARY KEY,
+    created_at INTEGER NOT NULL,
+    finished_at INTEGER
+);
+CREATE TABLE IF NOT EXISTS payments (
+    id INTEGER PRIMARY KEY,
+    payout_id INTEGER NOT NULL REFERENCES payouts(id),
+    account TEXT NOT NULL,
+    account_name TEXT NOT NULL,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    to_acc TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    nonce INTEGER,
+    hash TEXT,
+    raw_tx TEXT,
+    updated_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS payments_payout ON payments(payout_id, status);
+"""
+
+
+def now():
+    return int(datetime.now().timestamp())
+
+
+class PayoutJournal:
+    """ Write-ahead journal of payouts kept in a local SQLite file. Every planned
+    payment is stored before anything is sent, and the signed transaction is
+    stored before it is broadcast, so an interrupted run can be resumed
+    without paying anything twice. Private keys are never written. """
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        # Each record must be on disk before the transaction it describes goes out
+        self.db.execute("PRAGMA synchronous=FULL")
+        self.db.executescript(SCHEMA)
+
+    def start(self, plan, payout_id=None):
+        """ Records all payments of a PayoutPlan. Returns the payout id and, for
+        each account of the plan, the list of ids of its payments. Plans of a
+        payout that is done in parts are added to it by passing its id. """
+        with self.lock:
+            self.db.execute("BEGIN")
+            if payout_id is None:
+                payout_id = self.db.execute("INSERT INTO payouts (created_at) VALUES (?)", (now(),)).lastrowid
+            ids = []
+            for acc in plan.accounts:
+                ids.append([self.db.execute(
+                    "INSERT INTO payments (payout_id, account, account_name, name, type, to_acc, amount, status, "
+                    "updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (payout_id, acc['ronin'], acc['name'], p['name'], p['type'], p['to'], p['amount'], PLANNED, now())
+                ).lastrowid for p in acc['payments']])
+            self.db.execute("COMMIT")
+        return payout_id, ids
+
+    def signed(self, payment_id, nonce, hash_, raw_tx):
+        with self.lock:
+            self.db.execute("UPDATE payments SET status = ?, nonce = ?, hash = ?, raw_tx = ?, updated_at = ? "
+                            "WHERE id = ?", (SIGNED, nonce, hash_, raw_tx, now(), payment_id))
+
+    def update(self, payment_id, status):
+        with self.lock:
+            self.db.execute("UPDATE payments SET status = ?, updated_at = ? WHERE id = ?", (status, now(), payment_id))
+
+    def cancel(self, payment_ids):
+        with self.lock:
+            self.db.executemany("UPDATE payments SET status = ?, updated_at = ? WHERE id = ?",
+                                [(CANCELED, now(), i) for i in payment_ids])
+
+    def finish(self, payout_id):
+        with self.lock:
+            self.db.execute("UPDATE payouts SET finished_at = ? WHERE id = ?", (now(), payout_id))
+
+    def last_payout(self):
+        with self.lock:
+            row = self.db.execute("SELECT id FROM payouts ORDER BY id DESC LIMIT 1").fetchone()
+        return row["id"] if row else None
+
+    def outstanding(self, payout_id):
+        """ Payments of the payout that are not known to be done, in the order they were planned """
+        with self.lock:
+            rows = self.db.execute("SELECT * FROM payments WHERE payout_id = ? AND status NOT IN (?, ?) ORDER BY id",
+                                   (payout_id, SUCCESS, CANCELED)).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -1,27 +1,40 @@
 import sys
-import json
 import logging
-from datetime import datetime, timedelta
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from time import sleep
 
-from jsonschema import validate
-from jsonschema.exceptions import ValidationError
-from web3 import Web3, exceptions
+from web3 import Web3
 
-from axie.schemas import payments_schema, legacy_payments_schema
+from axie.schemas import payments_format, schema_errors
+from axie.calldata import build_transaction, transfer_data
+from axie.journal import SENT, SUCCESS, FAILED
+from axie.payout_plan import PayoutPlan
+from axie.signing import TransactionSigner, SIGNING_WORKERS
+from axie.streaming import STREAM_BATCH_SIZE, MAX_REPORTED_ERRORS, SCHOLARS_KEYS, batched, iter_items, read_header
 from axie.utils import (
     check_balance,
+    check_balances,
+    check_receipts,
     get_nonce,
+    is_nonce_error,
+    log_buffer,
+    nonces,
+    receipt_watcher,
     Singleton,
     ImportantLogsFilter,
     SLP_CONTRACT,
     RONIN_PROVIDER_FREE,
-    TIMEOUT_MINS,
-    USER_AGENT
+    RECEIPT_SUCCESS,
+    RECEIPT_TIMEOUT,
+    get_web3,
+    validation_cache
 )
 
 
 CREATOR_FEE_ADDRESS = "ronin:xxx"
+PAYOUT_WORKERS = 1
 
 now = int(datetime.now().timestamp())
 log_file = f'logs/results_{now}.log'
@@ -35,10 +48,7 @@ logger.addHandler(file_handler)
 
 class Payment:
     def __init__(self, name, payment_type, from_acc, from_private, to_acc, amount, summary):
-        self.w3 = Web3(
-            Web3.HTTPProvider(
-                RONIN_PROVIDER_FREE,
-                request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}))
+        self.w3 = get_web3(RONIN_PROVIDER_FREE)
         self.name = name
         self.payment_type = payment_type
         self.from_acc = from_acc.replace("ronin:", "0x")
@@ -46,27 +56,27 @@ class Payment:
         self.to_acc = to_acc.replace("ronin:", "0x")
         self.amount = amount
         self.summary = summary
-        with open("axie/slp_abi.json", encoding='utf-8') as f:
-            slb_abi = json.load(f)
-        self.contract = self.w3.eth.contract(
-            address=Web3.toChecksumAddress(SLP_CONTRACT),
-            abi=slb_abi
-        )
+        # Set when the payout is journaled, see PayoutJournal
+        self.journal = None
+        self.journal_id = None
+        # (nonce, raw_tx, hash) when it was signed along with the rest of the run
+        self.signed = None
+
+    def record_signed(self, nonce, hash_, raw_transaction):
+        if self.journal:
+            raw_tx = raw_transaction if isinstance(raw_transaction, str) else Web3.toHex(raw_transaction)
+            self.journal.signed(self.journal_id, nonce, hash_, raw_tx)
+
+    def record(self, status):
+        if self.journal:
+            self.journal.update(self.journal_id, status)
 
     def send_replacement_tx(self, nonce):
         # check nonce is still available, do nothing if nonce is not available anymore
         if nonce != get_nonce(self.from_acc):
             return
         # build replacement tx
-        replacement_tx = self.contract.functions.transfer(
-            Web3.toChecksumAddress(self.from_acc),
-            0
-        ).buildTransaction({
-            "chainId": 2020,
-            "gas": 492874,
-            "gasPrice": self.w3.toWei("0", "gwei"),
-            "nonce": nonce
-        })
+        replacement_tx = build_transaction(SLP_CONTRACT, transfer_data(self.from_acc, 0), nonce, gas=492874)
         # Sign Transaction
         signed = self.w3.eth.account.sign_transaction(
             replacement_tx,
@@ -77,76 +87,56 @@ class Payment:
         # get transaction hash
         new_hash = self.w3.toHex(self.w3.keccak(signed.rawTransaction))
         # Wait for transaction to finish or timeout
-        start_time = datetime.now()
-        while True:
-            # We will wait for max 5min for this replacement tx to happen
-            if datetime.now() - start_time > timedelta(minutes=TIMEOUT_MINS):
-                success = False
-                logging.info("Replacement transaction, timed out!")
-                break
-            try:
-                receipt = self.w3.eth.get_transaction_receipt(new_hash)
-                if receipt['status'] == 1:
-                    success = True
-                else:
-                    success = False
-                break
-            except exceptions.TransactionNotFound:
-                sleep(10)
-                logging.info(f"Waiting for replacement tx to finish (Nonce: {nonce})")
+        logging.info(f"Waiting for replacement tx to finish (Nonce: {nonce})")
+        status = receipt_watcher.watch(new_hash).result()
+        if status == RECEIPT_TIMEOUT:
+            logging.info("Replacement transaction, timed out!")
+        success = status == RECEIPT_SUCCESS
 
         if success:
             logging.info(f"Successfuly replaced transaction with nonce: {nonce}")
             logging.info(f"Trying again to execute transaction {self} in 10 seconds")
             sleep(10)
-            self.execute()
+            # Later payments of the account may already hold pending nonces, take the next free one
+            nonces.resync(self.from_acc)
+            self.execute(nonces.next_nonce(self.from_acc))
         else:
             logging.info(f"Important: Replacement transaction failed. Means we could not complete tx {self}")
             logging.info(f"Important: Please fix account ({self.name}) transactions manually before launching again.")
 
-    def execute(self):
-        # Get Nonce
-        nonce = get_nonce(self.from_acc)
-        # Build transaction
-        transaction = self.contract.functions.transfer(
-            Web3.toChecksumAddress(self.to_acc),
-            self.amount
-        ).buildTransaction({
-            "chainId": 2020,
-            "gas": 246437,
-            "gasPrice": self.w3.toWei("0", "gwei"),
-            "nonce": nonce
-        })
-        # Sign Transaction
+    def build(self, nonce):
+        return build_transaction(SLP_CONTRACT, transfer_data(self.to_acc, self.amount), nonce, gas=246437)
+
+    def send_signed(self, raw_transaction):
+        self.w3.eth.send_raw_transaction(raw_transaction)
+
+    def send(self, nonce):
+        # Build and sign transaction
         signed = self.w3.eth.account.sign_transaction(
-            transaction,
+            self.build(nonce),
             private_key=self.from_private
         )
-        # Send raw transaction
-        self.w3.eth.send_raw_transaction(signed.rawTransaction)
         # get transaction hash
         hash_ = self.w3.toHex(self.w3.keccak(signed.rawTransaction))
-        # Wait for transaction to finish or timeout
-        start_time = datetime.now()
-        while True:
-            # We will wait for max 10minutes for this tx to respond, if it does not, we will re-try
-            if datetime.now() - start_time > timedelta(minutes=TIMEOUT_MINS):
-                success = False
-                logging.info(f"Transaction {self}, timed out!")
-                break
-            try:
-                recepit = self.w3.eth.get_transaction_receipt(hash_)
-                if recepit["status"] == 1:
-                    success = True
-                else:
-                    success = False
-                break
-            except exceptions.TransactionNotFound:
-                # Sleep 10s while waiting
-                sleep(10)
-                logging.info(f"Waiting for transaction '{self}' to finish (Nonce:{nonce})...")
-
+        # Send raw transaction
+        self.record_signed(nonce, hash_, signed.rawTransaction)
+        self.send_signed(signed.rawTransaction)
+        self.record(SENT)
+        return hash_
+
+    def wait_for_receipt(self, hash_, nonce, future=None):
+        # Wait for transaction to finish or timeout, future is given when the hash is already watched
+        if not future:
+            future = receipt_watcher.watch(hash_)
+        logging.info(f"Waiting for transaction '{self}' to finish (Nonce:{nonce})...")
+        status = future.result()
+        if status == RECEIPT_TIMEOUT:
+            logging.info(f"Transaction {self}, timed out!")
+        return status == RECEIPT_SUCCESS
+
+    def finish(self, success, hash_, nonce):
         if success:
+            self.record(SUCCESS)
             logging.info(f"Important: Transaction {self} completed! Hash: {hash_} - "
                          f"Explorer: https://explorer.roninchain.com/tx/{str(hash_)}")
             self.summary.increase_payout(
@@ -154,15 +144,25 @@ class Payment:
                 address=self.to_acc.replace('0x', 'ronin:'),
                 payout_type=self.payment_type)
         else:
+            self.record(FAILED)
             logging.info(f"Important: Transaction {self} failed. Trying to replace it with a 0 value tx and re-try.")
             self.send_replacement_tx(nonce)
 
+    def execute(self, nonce=None):
+        # Get Nonce
+        if nonce is None:
+            nonce = get_nonce(self.from_acc)
+        hash_ = self.send(nonce)
+        success = self.wait_for_receipt(hash_, nonce)
+        self.finish(success, hash_, nonce)
+
     def __str__(self):
         return f"{self.name}({self.to_acc.replace('0x', 'ronin:')}) for the amount of {self.amount} SLP"
 
 
 class AxiePaymentsManager:
-    def __init__(self, payments_file, secrets_file, auto=False):
+    def __init__(self, payments_file, secrets_file, auto=False, signing_workers=SIGNING_WORKERS,
+                 workers=PAYOUT_WORKERS, journal=None):
         self.payments_file = payments_file
         self.secrets_file = secrets_file
         self.manager_acc = None
@@ -171,6 +171,14 @@ class AxiePaymentsManager:
         self.type = None
         self.auto = auto
         self.summary = PaymentsSummary()
+        self.balances = {}
+        self.signer = TransactionSigner(signing_workers)
+        self.workers = workers
+        self.executor = None
+        self.payouts = []
+        # Confirmed accounts waiting to be signed together, see pay_queued
+        self.queued = None
+        self.journal = journal
 
     def legacy_verify(self):
         validation_success = True
@@ -191,8 +199,7 @@ class AxiePaymentsManager:
 
         # Check we have private keys for all accounts
         for acc in self.payments_file["Scholars"]:
-            if acc["AccountAddress"] not in self.secrets_file:
-                logging.critical(f"Account '{acc['Name']}' is not present in secret file, please add it.")
+            if not self.legacy_verify_scholar(acc):
                 validation_success = False
         if not validation_success:
             logging.critical("Please make sure your payments.json file looks like the legacy one in the wiki or the sample files.\n"
@@ -201,6 +208,28 @@ class AxiePaymentsManager:
             sys.exit()
         return
 
+    def legacy_verify_scholar(self, acc):
+        # Check we have private keys for all accounts
+        if acc["AccountAddress"] not in self.secrets_file:
+            logging.critical(f"Account '{acc['Name']}' is not present in secret file, please add it.")
+            return False
+        return True
+
+    def verify_scholar(self, acc):
+        validation_success = True
+        # Check we have private keys for all accounts
+        if acc["ronin"] not in self.secrets_file:
+            logging.critical(f"Account '{acc['name']}' is not present in secret file, please add it.")
+            validation_success = False
+        # Check all splits have a "manager" persona
+        personas = []
+        for split in acc["splits"]:
+            personas.append(split["persona"].lower())
+        if "manager" not in personas:
+            logging.critical(f"Account '{acc['name']}' has no manager in its splits. Please review it!")
+            validation_success = False
+        return validation_success
+
     def verify(self):
         validation_success = True
         # check donations do not exceed 100%
@@ -215,16 +244,7 @@ class AxiePaymentsManager:
             self.donations = self.payments_file["donations"]
 
         for acc in self.payments_file["scholars"]:
-            # Check we have private keys for all accounts
-            if acc["ronin"] not in self.secrets_file:
-                logging.critical(f"Account '{acc['name']}' is not present in secret file, please add it.")
-                validation_success = False
-            # Check all splits have a "manager" persona
-            personas = []
-            for split in acc["splits"]:
-                personas.append(split["persona"].lower())
-            if "manager" not in personas:
-                logging.critical(f"Account '{acc['name']}' has no manager in its splits. Please review it!")
+            if not self.verify_scholar(acc):
                 validation_success = False
         
         if not validation_success:
@@ -236,37 +256,27 @@ class AxiePaymentsManager:
 
     def verify_inputs(self):
         logging.info("Validating file inputs...")
+        cache_key = validation_cache.key("payments", self.payments_file, self.secrets_file)
+        if validation_cache.passed(cache_key):
+            self.type = payments_format(self.payments_file)
+            self.load_accounts()
+            logging.info("Files did not change since they were last validated, skipping validation.")
+            return
         validation_success = True
-        # Validate payments file
-        legacy_msg = None
-        new_msg = None
-
-        try:
-            validate(self.payments_file, payments_schema)
-            self.type = "new"
-        except ValidationError as ex:
-            new_msg = ("If you were tyring to pay using the current format:\n"
-                       f"Error given: {ex.message}\n"
-                       f"For attribute in: {list(ex.path)}\n")
+        # Validate payments file, against the schema of the format it is written in
+        payments_type = payments_format(self.payments_file)
+        errors = schema_errors(self.payments_file, "legacy_payments" if payments_type == "legacy" else "payments")
+        if errors:
             validation_success = False
-
-        if not self.type:
-            try:
-                validate(self.payments_file, legacy_payments_schema)
-                self.type = "legacy"
-                validation_success = True
-            except ValidationError as ex:
-                legacy_msg = ("If you were tyring to pay using the legacy format:\n"
-                              f"Error given: {ex.message}\n"
-                              f"For attribute in: {list(ex.path)}\n")
-                validation_success = False
+        else:
+            self.type = payments_type
 
         if not validation_success:
-            msg = "Payments file failed validation. Please review it.\n"
-            if new_msg:
-                msg += new_msg
-            if legacy_msg:
-                msg += legacy_msg
+            msg = ("Payments file failed validation. Please review it.\n"
+                   f"If you were tyring to pay using the {'legacy' if payments_type == 'legacy' else 'current'} "
+                   "format:\n")
+            for ex in errors:
+                msg += f"Error given: {ex.message}\nFor attribute in: {list(ex.path)}\n"
             logging.critical(msg)
             sys.exit()
 
@@ -278,25 +288,40 @@ class AxiePaymentsManager:
             # This should not be reachable!
             logging.critical(f"Unexpected error! Unrecognized payments mode")
 
-        for sf in self.secrets_file:
-            if len(self.secrets_file[sf]) != 66 or self.secrets_file[sf][:2] != "0x":
-                logging.critical(f"Private key for account {sf} is not valid, please review it!")
-                validation_success = False
+        if not self.verify_secrets():
+            validation_success = False
 
         if not validation_success:
             logging.critical("There is a problem with your secrets.json, delete it and re-generate the file starting with an empty secrets file."
                              "Or open it and see what is wrong with the keys of the accounts reported above.")
             sys.exit()
 
+        self.load_accounts()
+        validation_cache.add(cache_key)
+        logging.info("Files correctly validated!")
+
+    def verify_secrets(self):
+        validation_success = True
+        for sf in self.secrets_file:
+            if len(self.secrets_file[sf]) != 66 or self.secrets_file[sf][:2] != "0x":
+                logging.critical(f"Private key for account {sf} is not valid, please review it!")
+                validation_success = False
+        return validation_success
+
+    def load_accounts(self):
         if self.type == "legacy":
             self.manager_acc = self.payments_file["Manager"]
             self.scholar_accounts = self.payments_file["Scholars"]
         elif self.type == "new":
             self.scholar_accounts = self.payments_file["scholars"]
-        logging.info("Files correctly validated!")
+        donations = self.payments_file.get("Donations" if self.type == "legacy" else "donations")
+        if donations:
+            self.donations = donations
 
     def check_acc_has_enough_balance(self, account, balance):
-        account_balance = check_balance(account)
+        account_balance = self.balances.get(account)
+        if account_balance is None:
+            account_balance = check_balance(account)
         if account_balance < balance:
             logging.critical(f"Balance in account {account} is "
                              "inssuficient to cover all planned payments!")
@@ -314,162 +339,181 @@ class AxiePaymentsManager:
         else:
             logging.critical(f"Unexpected error! Unrecognized payments mode {self.type}")
 
+    def new_payout_plan(self):
+        self.balances = check_balances([acc['ronin'] for acc in self.scholar_accounts])
+        return PayoutPlan.from_new_payments(self.scholar_accounts, self.donations, self.balances)
+
+    def old_payout_plan(self):
+        self.balances = check_balances([acc['AccountAddress'] for acc in self.scholar_accounts])
+        return PayoutPlan.from_legacy_payments(self.scholar_accounts, self.manager_acc, self.donations, self.balances)
+
+    def build_plan(self):
+        if self.type == "new":
+            return self.new_payout_plan()
+        if self.type == "legacy":
+            return self.old_payout_plan()
+        logging.critical(f"Unexpected error! Unrecognized payments mode {self.type}")
+        return None
+
     def prepare_new_payout(self):
-        for acc in self.scholar_accounts:
-            acc_balance = check_balance(acc['ronin'])
-            total_payments = 0
-            acc_payments = []
-            deductable_fees = 1
-            if self.donations:
-                for dono in self.donations:
-                    deductable_fees += dono['percentage']
-            # Split payments
-            for sacc in acc['splits']:
-                if sacc['persona'].lower() == 'manager':
-                    amount = round(acc_balance * ((sacc['percentage'] - deductable_fees)/100))
-                else:
-                    amount = round(acc_balance * (sacc['percentage']/100))
-                if amount < 1:
-                    logging.info(f'Important: Skipping payment to {sacc["persona"]} as it would be less than 1SLP')
-                    continue
-                total_payments += amount
-                # define type
-                if sacc['persona'].lower() == 'manager':
-                    t = 'manager'
-                elif sacc['persona'].lower() == 'scholar':
-                    t = 'scholar'
-                elif sacc['persona'].lower() in ['trainer', 'investor', 'trainer/investor', 'investor/trainer']:
-                    t = 'trainer'
-                else:
-                    t = 'other'
-                acc_payments.append(Payment(
-                    f"Payment to {sacc['persona']} of {acc['name']}",
-                    t,
-                    acc['ronin'],
-                    self.secrets_file[acc['ronin']],
-                    sacc['ronin'],
-                    amount,
-                    self.summary
-                ))
-            # Donation Payments
-            if self.donations:
-                for dono in self.donations:
-                    dono_amount = round(acc_balance * (dono["percentage"]/100))
-                    if dono_amount > 0:
-                        acc_payments.append(Payment(
-                                f"Donation to {dono['name']} for {acc['name']}",
-                                "donation",
-                                acc["ronin"],
-                                self.secrets_file[acc["ronin"]],
-                                dono["ronin"],
-                                dono_amount,
-                                self.summary
-                            ))
-            # Fee Payments
-            #fee_amount = round(acc_balance * 0.01)
-            #if fee_amount > 0:
-            #    acc_payments.append(Payment(
-            #                f"Donation to software creator for {acc['name']}",
-            #                "donation",
-            #                acc["ronin"],
-            #                self.secrets_file[acc["ronin"]],
-            #                CREATOR_FEE_ADDRESS,
-            #                fee_amount,
-            #                self.summary
-            #            ))
-            if self.check_acc_has_enough_balance(acc['ronin'], total_payments) and acc_balance > 0:
-                self.payout_account(acc['name'], acc_payments)
-            else:
+        self.execute_plan(self.new_payout_plan())
+
+    def prepare_old_payout(self):
+        self.execute_plan(self.old_payout_plan())
+
+    def verify_plan(self, plan):
+        """ Leaves out of the plan the accounts whose payments do not add up,
+        like a payout skips an account without enough funds. """
+        missing = [acc for acc in plan.accounts if acc['payments'] and acc['ronin'] not in self.secrets_file]
+        if missing:
+            for acc in missing:
+                logging.critical(f"Account '{acc['name']}' is not present in secret file, please add it.")
+            logging.critical("Payout plan failed verification, no payments were made. Please review it.")
+            sys.exit()
+        accounts = []
+        for acc in plan.accounts:
+            errors = PayoutPlan.account_errors(acc)
+            if errors:
+                for error in errors:
+                    logging.critical(error)
                 logging.info(f"Important: Skipping payments for account '{acc['name']}'. "
-                             "Insufficient funds!")
+                             "Payout plan failed verification for it!")
+                continue
+            accounts.append(acc)
+        plan.accounts = accounts
+
+    def start_workers(self):
+        if self.workers > 1:
+            logging.info(f"Paying up to {self.workers} accounts at the same time")
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="payouts")
+
+    def finish_payout(self, payout_id=None):
+        self.wait_for_payouts()
+        self.signer.shutdown()
+        if self.journal and payout_id:
+            self.journal.finish(payout_id)
         logging.info(f"Important: Transactions Summary:\n {self.summary}")
 
-    def prepare_old_payout(self):
-        for acc in self.scholar_accounts:
-            acc_balance = check_balance(acc['AccountAddress'])
-            total_payments = 0
-            acc_payments = []
-            # Scholar Payment
-            scholar_amount = acc_balance * (acc["ScholarPercent"]/100)
-            scholar_amount += acc.get("ScholarPayout", 0)
-            scholar_amount = round(scholar_amount)
-            acc_payments.append(Payment(
-                f"Payment to scholar of {acc['Name']}",
-                "scholar",
-                acc["AccountAddress"],
-                self.secrets_file[acc["AccountAddress"]],
-                acc["ScholarPayoutAddress"],
-                scholar_amount,
+    def journal_payment(self, row):
+        p = Payment(
+            row['name'],
+            row['type'],
+            row['account'],
+            self.secrets_file[row['account']],
+            row['to_acc'],
+            row['amount'],
+            self.summary
+        )
+        p.journal = self.journal
+        p.journal_id = row['id']
+        return p
+
+    def cancel_payments(self, payment_list):
+        if self.journal:
+            self.journal.cancel([p.journal_id for p in payment_list])
+
+    def execute_plan(self, plan):
+        self.verify_plan(plan)
+        if not self.balances:
+            # Plan loaded from a file, its balances could be old
+            self.balances = check_balances([acc['ronin'] for acc in plan.accounts])
+        payout_id, journal_ids = self.journal.start(plan) if self.journal else (None, [])
+        self.signer.start()
+        self.start_workers()
+        self.pay_plan(plan, journal_ids)
+        self.finish_payout(payout_id)
+
+    def pay_plan(self, plan, journal_ids):
+        self.queued = []
+        for i, acc in enumerate(plan.accounts):
+            if acc['balance'] == 0:
+                logging.info(f"Important: Skipping payments for account '{acc['name']}'. "
+                             "Insufficient funds!")
+                continue
+            for skipped in acc['skipped']:
+                logging.info(f"Important: {skipped['reason']}")
+            acc_payments = [Payment(
+                p['name'],
+                p['type'],
+                acc['ronin'],
+                self.secrets_file[acc['ronin']],
+                p['to'],
+                p['amount'],
                 self.summary
-            ))
-            total_payments += scholar_amount
-            if acc.get("TrainerPayoutAddress"):
-                # Trainer Payment
-                trainer_amount = acc_balance * (acc["TrainerPercent"]/100)
-                trainer_amount += acc.get("TrainerPayout", 0)
-                trainer_amount = round(trainer_amount)
-                if trainer_amount > 0:
-                    acc_payments.append(Payment(
-                        f"Payment to trainer of {acc['Name']}",
-                        "trainer",
-                        acc["AccountAddress"],
-                        self.secrets_file[acc["AccountAddress"]],
-                        acc["TrainerPayoutAddress"],
-                        trainer_amount,
-                        self.summary
-                    ))
-                    total_payments += trainer_amount
-            manager_payout = acc_balance - total_payments
-            if self.donations:
-                # Extra Donations
-                for dono in self.donations:
-                    dono_amount = round(acc_balance * (dono["Percent"]/100))
-                    if dono_amount > 1:
-                        acc_payments.append(Payment(
-                                f"Donation to {dono['Name']} for {acc['Name']}",
-                                "donation",
-                                acc["AccountAddress"],
-                                self.secrets_file[acc["AccountAddress"]],
-                                dono["AccountAddress"],
-                                dono_amount,
-                                self.summary
-                            ))
-                        manager_payout -= dono_amount
-                        total_payments += dono_amount
-            # Fee Payments
-            #fee_amount = round(acc_balance * 0.01)
-            #if fee_amount > 0:
-            #    acc_payments.append(Payment(
-            #                f"Donation to software creator for {acc['Name']}",
-            #                "donation",
-            #                acc["AccountAddress"],
-            #                self.secrets_file[acc["AccountAddress"]],
-            #                CREATOR_FEE_ADDRESS,
-            #                fee_amount,
-            #                self.summary
-            #            ))
-            #    manager_payout -= fee_amount
-            #    total_payments += fee_amount
-            # Manager Payment
-            if manager_payout > 0:
-                acc_payments.append(Payment(
-                    f"Payment to manager of {acc['Name']}",
-                    "manager",
-                    acc["AccountAddress"],
-                    self.secrets_file[acc["AccountAddress"]],
-                    self.manager_acc,
-                    manager_payout,
-                    self.summary
-                ))
-                total_payments += manager_payout
+            ) for p in acc['payments']]
+            if self.journal:
+                for p, journal_id in zip(acc_payments, journal_ids[i]):
+                    p.journal = self.journal
+                    p.journal_id = journal_id
+            if self.check_acc_has_enough_balance(acc['ronin'], PayoutPlan.total(acc)):
+                self.payout_account(acc['name'], acc_payments)
             else:
-                logging.info("Important: Skipping manager payout as it resulted in 0 SLP.")
-            if self.check_acc_has_enough_balance(acc['AccountAddress'], total_payments) and acc_balance > 0:
-                self.payout_account(acc['Name'], acc_payments)
+                logging.info(f"Important: Skipping payments for account '{acc['name']}'. "
+                             "Insufficient funds!")
+                self.cancel_payments(acc_payments)
+        self.pay_queued()
+
+    def resume_payout(self):
+        """ Picks up the last journaled payout. Payments whose transaction made it
+        on chain are only recorded, transactions still waiting in the pool are
+        broadcast again as they were signed, and everything else is paid. """
+        payout_id = self.journal.last_payout()
+        rows = self.journal.outstanding(payout_id) if payout_id else []
+        if not rows:
+            logging.info("Nothing to resume, every journaled payment is done.")
+            return
+        missing = {row['account'] for row in rows if row['account'] not in self.secrets_file}
+        if missing:
+            for acc in missing:
+                logging.critical(f"Account '{acc}' is not present in secret file, please add it.")
+            sys.exit()
+        self.signer.start()
+        hashed = [row for row in rows if row['hash']]
+        # Nonces go first: a transaction mined after its receipt was checked would
+        # otherwise look like it was dropped and get paid a second time
+        chain_nonces = {acc: get_nonce(acc) for acc in {row['account'] for row in hashed}}
+        statuses = check_receipts([row['hash'] for row in hashed])
+        in_flight = []
+        outstanding = {}
+        for row in rows:
+            p = self.journal_payment(row)
+            if row['hash']:
+                if row['hash'] not in statuses:
+                    logging.critical(f"Could not check transaction {row['hash']} of {p}, "
+                                     "run the resume again to pay it.")
+                    continue
+                if statuses[row['hash']] == RECEIPT_SUCCESS:
+                    p.finish(True, row['hash'], row['nonce'])
+                    continue
+                if statuses[row['hash']] is None and row['nonce'] >= chain_nonces[row['account']]:
+                    # Nonce not used yet, the signed transaction can still go through as it is
+                    in_flight.append((p, row))
+                    continue
+            outstanding.setdefault(row['account'], (row['account_name'], []))[1].append(p)
+        for p, row in in_flight:
+            logging.info(f"Re-sending transaction {p} (Nonce: {row['nonce']})")
+            try:
+                p.send_signed(Web3.toBytes(hexstr=row['raw_tx']))
+            except ValueError as e:
+                # Most likely still in the transactions pool
+                logging.info(f"Transaction {row['hash']} not re-sent: {e}")
+        futures = [receipt_watcher.watch(row['hash']) for _, row in in_flight]
+        results = [p.wait_for_receipt(row['hash'], row['nonce'], future)
+                   for (p, row), future in zip(in_flight, futures)]
+        for (p, row), success in zip(in_flight, results):
+            p.finish(success, row['hash'], row['nonce'])
+        self.balances = check_balances(list(outstanding))
+        self.start_workers()
+        self.queued = []
+        for acc, (acc_name, acc_payments) in outstanding.items():
+            if self.check_acc_has_enough_balance(acc, sum(p.amount for p in acc_payments)):
+                self.payout_account(acc_name, acc_payments)
             else:
-                logging.info(f"Important: Skipping payments for account '{acc['Name']}'. "
+                logging.info(f"Important: Skipping payments for account '{acc_name}'. "
                              "Insufficient funds!")
-        logging.info(f"Important: Transactions Summary:\n {self.summary}")
+                self.cancel_payments(acc_payments)
+        self.pay_queued()
+        self.finish_payout(payout_id)
 
     def payout_account(self, acc_name, payment_list):
         logging.info(f"Payments for {acc_name}:")
@@ -478,16 +522,179 @@ class AxiePaymentsManager:
         while accept not in ["y", "n", "Y", "N"]:
             accept = input("Do you want to proceed with these transactions?(y/n): ")
         if accept.lower() == "y":
-            for p in payment_list:
-                p.execute()
-            logging.info(f"Transactions completed for account: '{acc_name}'")
+            if self.queued is not None:
+                self.queued.append((acc_name, payment_list))
+            else:
+                self.pay(acc_name, payment_list)
         else:
             logging.info(f"Transactions canceled for account: '{acc_name}'")
+            self.cancel_payments(payment_list)
+
+    def pay_queued(self):
+        """ Signs the payments of every confirmed account in a single batch, so
+        the signing pool gets enough work to pay off, then pays each account """
+        queued, self.queued = self.queued, None
+        self.sign_payments([p for _, payment_list in queued for p in payment_list])
+        for acc_name, payment_list in queued:
+            self.pay(acc_name, payment_list)
+
+    def pay(self, acc_name, payment_list):
+        if self.executor:
+            self.payouts.append(self.executor.submit(self.pay_account, acc_name, payment_list))
+        else:
+            self.execute_payments(payment_list)
+            logging.info(f"Transactions completed for account: '{acc_name}'")
+
+    def pay_account(self, acc_name, payment_list):
+        # Runs in the payouts pool, the account logs come out in one piece once it is done
+        with log_buffer.buffered():
+            self.execute_payments(payment_list)
+            logging.info(f"Transactions completed for account: '{acc_name}'")
+
+    def wait_for_payouts(self):
+        if not self.executor:
+            return
+        self.executor.shutdown(wait=True)
+        self.executor = None
+        payouts, self.payouts = self.payouts, []
+        for payout in payouts:
+            # Re-raise whatever failed in a worker, now that every account is done
+            payout.result()
+
+
+    def sign_payments(self, payment_list):
+        # Give each payment its own consecutive nonce and sign them all as a batch
+        if not payment_list:
+            return
+        nonce_list = [nonces.next_nonce(p.from_acc) for p in payment_list]
+        signed = self.signer.sign([(p.build(nonce), p.from_private) for p, nonce in zip(payment_list, nonce_list)])
+        for p, nonce, (raw_tx, hash_) in zip(payment_list, nonce_list, signed):
+            p.signed = (nonce, raw_tx, hash_)
+
+    def send_payments(self, payment_list, retry=True):
+        # Payments of a plan come signed already, the rest are signed here
+        self.sign_payments([p for p in payment_list if p.signed is None])
+        sent = []
+        for i, p in enumerate(payment_list):
+            nonce, raw_tx, hash_ = p.signed
+            p.record_signed(nonce, hash_, raw_tx)
+            try:
+                p.send_signed(raw_tx)
+            except ValueError as e:
+                if not retry or not is_nonce_error(e):
+                    raise
+                logging.info(f"Nonce {nonce} was rejected for {p.from_acc.replace('0x', 'ronin:')} ({e}), "
+                             "resyncing it and re-trying.")
+                nonces.resync(p.from_acc)
+                # The rest of the batch was signed with stale nonces too
+                for rest in payment_list[i:]:
+                    rest.signed = None
+                return sent + self.send_payments(payment_list[i:], retry=False)
+            p.record(SENT)
+            sent.append((p, nonce, hash_))
+        return sent
+
+    def execute_payments(self, payment_list):
+        # Broadcast all payments of the account back to back, each one with its own
+        # consecutive nonce, and only then wait for their receipts.
+        sent = self.send_payments(payment_list)
+        futures = [receipt_watcher.watch(hash_) for _, _, hash_ in sent]
+        # Every receipt is in before finishing any payment, replacing a failed one
+        # takes minutes and must not eat the wait of the ones behind it
+        results = [(p, nonce, hash_, p.wait_for_receipt(hash_, nonce, future))
+                   for (p, nonce, hash_), future in zip(sent, futures)]
+        if not all(success for _, _, _, success in results):
+            # Following nonces may now be a gap, get them from the chain again
+            nonces.resync(results[0][0].from_acc)
+        for p, nonce, hash_, success in results:
+            p.finish(success, hash_, nonce)
+
+
+class StreamedPaymentsManager(AxiePaymentsManager):
+    """ Pays the scholars of a payments file that is read from disk a batch at
+    a time, for rosters too big to be loaded at once. Validation and payouts
+    go through the file entry by entry, only the current batch is kept. """
+    def __init__(self, payments_path, secrets_file, batch_size=STREAM_BATCH_SIZE, **kwargs):
+        super().__init__({}, secrets_file, **kwargs)
+        self.payments_path = payments_path
+        self.batch_size = batch_size
+
+    def scholars(self):
+        return iter_items(self.payments_path, SCHOLARS_KEYS)
+
+    def verify_inputs(self):
+        logging.info("Validating file inputs...")
+        try:
+            header = read_header(self.payments_path, SCHOLARS_KEYS)
+            payments_type = payments_format(header)
+            name = "legacy_payments" if payments_type == "legacy" else "payments"
+            key = "Scholars" if payments_type == "legacy" else "scholars"
+            # The rest of the file is checked with an empty list of scholars, then each scholar on its own
+            errors = [(list(ex.path), ex.message) for ex in schema_errors(header, name)]
+            for i, acc in enumerate(self.scholars()):
+                errors.extend(([key, i] + list(ex.path), ex.message) for ex in schema_errors(acc, name, item=True))
+                if len(errors) >= MAX_REPORTED_ERRORS:
+                    break
+        except ValueError:
+            logging.critical(f"File in path {self.payments_path} is not a correctly encoded JSON.")
+            sys.exit()
+        if errors:
+            msg = ("Payments file failed validation. Please review it.\n"
+                   f"If you were tyring to pay using the {'legacy' if payments_type == 'legacy' else 'current'} "
+                   "format:\n")
+            for path, message in errors[:MAX_REPORTED_ERRORS]:
+                msg += f"Error given: {message}\nFor attribute in: {path}\n"
+            if len(errors) >= MAX_REPORTED_ERRORS:
+                msg += f"Stopped after {MAX_REPORTED_ERRORS} errors.\n"
+            logging.critical(msg)
+            sys.exit()
+        self.type = payments_type
+        self.payments_file = header
+        # Checks the manager and donations, scholars are read again from the file below
+        if self.type == "legacy":
+            self.legacy_verify()
+        else:
+            self.verify()
+        verify_scholar = self.legacy_verify_scholar if self.type == "legacy" else self.verify_scholar
+        validation_success = True
+        for acc in self.scholars():
+            if not verify_scholar(acc):
+                validation_success = False
+        if not validation_success:
+            logging.critical("Please make sure your payments file looks like the one in the wiki or the sample files.\n"
+                             "Find it here: https://ferranmarin.github.io/axie-scholar-utilities/ \n"
+                             "Make sure you have configured all secrets too!")
+            sys.exit()
+        if not self.verify_secrets():
+            logging.critical("There is a problem with your secrets.json, delete it and re-generate the file starting "
+                             "with an empty secrets file. Or open it and see what is wrong with the keys of the "
+                             "accounts reported above.")
+            sys.exit()
+        self.load_accounts()
+        logging.info("Files correctly validated!")
+
+    def prepare_payout(self):
+        payout_id = None
+        self.signer.start()
+        for batch in batched(self.scholars(), self.batch_size):
+            self.scholar_accounts = batch
+            plan = self.build_plan()
+            self.verify_plan(plan)
+            journal_ids = []
+            if self.journal:
+                # All batches go in the same journaled payout, so it can be resumed as one
+                payout_id, journal_ids = self.journal.start(plan, payout_id)
+            self.start_workers()
+            self.pay_plan(plan, journal_ids)
+            # Finish the batch before reading the next one
+            self.wait_for_payouts()
+        self.finish_payout(payout_id)
 
 
 class PaymentsSummary(Singleton):
 
     def __init__(self):
+        self.lock = threading.Lock()
         self.manager = {"accounts": [], "slp": 0}
         self.trainer = {"accounts": [], "slp": 0}
         self.scholar = {"accounts": [], "slp": 0}
@@ -495,16 +702,18 @@ class PaymentsSummary(Singleton):
         self.donations = {"accounts": [], "slp": 0}
 
     def increase_payout(self, amount, address, payout_type):
-        if payout_type == "manager":
-            self.increase_manager_payout(amount, address)
-        elif payout_type == "scholar":
-            self.increase_scholar_payout(amount, address)
-        elif payout_type == "donation":
-            self.increase_donations_payout(amount, address)
-        elif payout_type == "trainer":
-            self.increase_trainer_payout(amount, address)
-        elif payout_type == "other":
-            self.increase_other_payout(amount, address)
+        # Accounts can be paid concurrently, only one payment updates the totals at a time
+        with self.lock:
+            if payout_type == "manager":
+                self.increase_manager_payout(amount, address)
+            elif payout_type == "scholar":
+                self.increase_scholar_payout(amount, address)
+            elif payout_type == "donation":
+                self.increase_donations_payout(amount, address)
+            elif payout_type == "trainer":
+                self.increase_trainer_payout(amount, address)
+            elif payout_type == "other":
+                self.increase_other_payout(amount, address)
 
     def increase_manager_payout(self, amount, address):
         self.manager["slp"] += amount
@@ -0,0 +1,207 @@
+import csv
+import sys
+import json
+import logging
+from datetime import datetime
+from fractions import Fraction
+
+from axie.schemas import schema_errors
+
+CREATOR_FEE_PERCENT = 1
+CSV_HEADERS = ["AccountName", "AccountAddress", "Balance", "Name", "Type", "ReceiverAddress", "Amount", "Skipped"]
+
+
+def percent_of(balance, percentage, extra=0):
+    """ Exact round(balance * percentage / 100 + extra). Percentages come as
+    decimal numbers from the payments file, so they go through str to keep
+    33.3 as 333/10 instead of its binary approximation. """
+    return round(Fraction(balance) * Fraction(str(percentage)) / 100 + Fraction(str(extra)))
+
+
+def csv_int(value):
+    """ Numbers in a plan CSV, left as they are when they are not one so validation reports them """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def payout_type(persona):
+    persona = persona.lower()
+    if persona == 'manager':
+        return 'manager'
+    if persona == 'scholar':
+        return 'scholar'
+    if persona in ['trainer', 'investor', 'trainer/investor', 'investor/trainer']:
+        return 'trainer'
+    return 'other'
+
+
+class PayoutPlan:
+    """ Every payment of a payout, computed up front from a snapshot of the
+    account balances. Can be verified and exported before any transaction is
+    sent, and executed later by AxiePaymentsManager.execute_plan. """
+    def __init__(self, accounts=None, created_at=None):
+        self.accounts = accounts if accounts else []
+        self.created_at = created_at if created_at else int(datetime.now().timestamp())
+
+    @staticmethod
+    def account(name, ronin, balance):
+        return {"name": name, "ronin": ronin, "balance": balance, "payments": [], "skipped": []}
+
+    @classmethod
+    def from_new_payments(cls, scholar_accounts, donations, balances):
+        donations = donations if donations else []
+        deductable_fees = CREATOR_FEE_PERCENT + sum(dono['percentage'] for dono in donations)
+        accounts = []
+        for acc in scholar_accounts:
+            balance = balances[acc['ronin']]
+            plan_acc = cls.account(acc['name'], acc['ronin'], balance)
+            accounts.append(plan_acc)
+            if balance == 0:
+                continue
+            for sacc in acc['splits']:
+                t = payout_type(sacc['persona'])
+                if t == 'manager':
+                    amount = percent_of(balance, Fraction(str(sacc['percentage'])) - Fraction(str(deductable_fees)))
+                else:
+                    amount = percent_of(balance, sacc['percentage'])
+                payment = {"name": f"Payment to {sacc['persona']} of {acc['name']}", "type": t,
+                           "to": sacc['ronin'], "amount": amount}
+                if amount < 1:
+                    payment["reason"] = f'Skipping payment to {sacc["persona"]} as it would be less than 1SLP'
+                    plan_acc["skipped"].append(payment)
+                    continue
+                plan_acc["payments"].append(payment)
+            for dono in donations:
+                amount = percent_of(balance, dono["percentage"])
+                if amount > 0:
+                    plan_acc["payments"].append({"name": f"Donation to {dono['name']} for {acc['name']}",
+                                                 "type": "donation", "to": dono["ronin"], "amount": amount})
+        return cls(accounts)
+
+    @classmethod
+    def from_legacy_payments(cls, scholar_accounts, manager_acc, donations, balances):
+        donations = donations if donations else []
+        accounts = []
+        for acc in scholar_accounts:
+            balance = balances[acc['AccountAddress']]
+            plan_acc = cls.account(acc['Name'], acc['AccountAddress'], balance)
+            accounts.append(plan_acc)
+            if balance == 0:
+                continue
+            payments = plan_acc["payments"]
+            scholar = {"name": f"Payment to scholar of {acc['Name']}", "type": "scholar",
+                       "to": acc["ScholarPayoutAddress"],
+                       "amount": percent_of(balance, acc["ScholarPercent"], acc.get("ScholarPayout", 0))}
+            if scholar["amount"] < 1:
+                scholar["reason"] = "Skipping payment to scholar as it would be less than 1SLP"
+                plan_acc["skipped"].append(scholar)
+            else:
+                payments.append(scholar)
+            if acc.get("TrainerPayoutAddress"):
+                amount = percent_of(balance, acc["TrainerPercent"], acc.get("TrainerPayout", 0))
+                if amount > 0:
+                    payments.append({"name": f"Payment to trainer of {acc['Name']}", "type": "trainer",
+                                     "to": acc["TrainerPayoutAddress"], "amount": amount})
+            for dono in donations:
+                amount = percent_of(balance, dono["Percent"])
+                if amount > 1:
+                    payments.append({"name": f"Donation to {dono['Name']} for {acc['Name']}", "type": "donation",
+                                     "to": dono["AccountAddress"], "amount": amount})
+            # Manager gets whatever is left
+            manager = {"name": f"Payment to manager of {acc['Name']}", "type": "manager", "to": manager_acc,
+                       "amount": balance - sum(p["amount"] for p in payments)}
+            if manager["amount"] > 0:
+                payments.append(manager)
+            else:
+                manager["reason"] = "Skipping manager payout as it resulted in 0 SLP."
+                plan_acc["skipped"].append(manager)
+        return cls(accounts)
+
+    @staticmethod
+    def total(account):
+        return sum(p["amount"] for p in account["payments"])
+
+    @classmethod
+    def account_errors(cls, account):
+        """ Returns the list of problems found in the payments of one account """
+        errors = []
+        if any(not isinstance(p["amount"], int) or p["amount"] < 1 for p in account["payments"]):
+            errors.append(f"Account '{account['name']}' has payments of less than 1 SLP")
+        total = cls.total(account)
+        if total > account["balance"]:
+            errors.append(f"Account '{account['name']}' pays {total} SLP but only has {account['balance']} SLP")
+        return errors
+
+    def verify(self):
+        """ Returns the list of problems found in the plan, empty when it is fine """
+        return [error for acc in self.accounts for error in self.account_errors(acc)]
+
+    def summary(self):
+        total = sum(self.total(acc) for acc in self.accounts)
+        balance = sum(acc["balance"] for acc in self.accounts)
+        payments = sum(len(acc["payments"]) for acc in self.accounts)
+        skipped = sum(len(acc["skipped"]) for acc in self.accounts)
+        return (f"{len(self.accounts)} accounts, {payments} payments for {total} SLP out of {balance} SLP, "
+                f"{skipped} payments skipped")
+
+    def to_dict(self):
+        accounts = [dict(acc, total=self.total(acc), remainder=acc["balance"] - self.total(acc))
+                    for acc in self.accounts]
+        return {"created_at": self.created_at, "accounts": accounts}
+
+    def csv_rows(self):
+        for acc in self.accounts:
+            for p in acc["payments"] + acc["skipped"]:
+                yield [acc["name"], acc["ronin"], acc["balance"], p["name"], p["type"], p["to"], p["amount"],
+                       p.get("reason", "")]
+
+    def save(self, path):
+        if path.lower().endswith(".csv"):
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(CSV_HEADERS)
+                writer.writerows(self.csv_rows())
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False, indent=4)
+
+    @classmethod
+    def read(cls, path):
+        """ Plan file as the dict to_dict gives, without checking its contents """
+        if path.lower().endswith(".csv"):
+            accounts = {}
+            with open(path, encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    if row["AccountAddress"] not in accounts:
+                        accounts[row["AccountAddress"]] = cls.account(
+                            row["AccountName"], row["AccountAddress"], csv_int(row["Balance"]))
+                    payment = {"name": row["Name"], "type": row["Type"], "to": row["ReceiverAddress"],
+                               "amount": csv_int(row["Amount"])}
+                    if row["Skipped"]:
+                        payment["reason"] = row["Skipped"]
+                        accounts[row["AccountAddress"]]["skipped"].append(payment)
+                    else:
+                        accounts[row["AccountAddress"]]["payments"].append(payment)
+            return {"accounts": list(accounts.values())}
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    @classmethod
+    def load(cls, path):
+        try:
+            data = cls.read(path)
+        except (ValueError, KeyError) as e:
+            logging.critical(f"Payout plan file in path {path} is not correctly formatted. Error given: {e}")
+            sys.exit()
+        errors = schema_errors(data, "plan")
+        if errors:
+            msg = "Payout plan file failed validation. Please review it.\n"
+            for ex in errors:
+                msg += f"Error given: {ex.message}\nFor attribute in: {list(ex.path)}\n"
+            logging.critical(msg)
+            sys.exit()
+        accounts = [{k: acc[k] for k in ["name", "ronin", "balance", "payments", "skipped"]}
+                    for acc in data["accounts"]]
+        return cls(accounts, data.get("created_at"))
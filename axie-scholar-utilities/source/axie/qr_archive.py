@@ -0,0 +1,133 @@
+import io
+import os
+import json
+import zlib
+import zipfile
+from datetime import datetime
+
+from PIL import Image
+
+ARCHIVE_FORMATS = ["zip", "pdf"]
+MANIFEST_NAME = "manifest.json"
+PDF_MARGIN = 36
+
+
+def archive_format(path):
+    """ Returns the archive format a file name asks for, None if it is not one """
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    return extension if extension in ARCHIVE_FORMATS else None
+
+
+def entry_name(acc_name, extension, used):
+    """ File name of an account inside the archive, unique among the used ones """
+    base = "".join(c if c.isalnum() or c in "-_" else "_" for c in acc_name.lower().replace(" ", "-")) or "account"
+    name, i = f"{base}.{extension}", 1
+    while name in used:
+        i += 1
+        name = f"{base}-{i}.{extension}"
+    used.add(name)
+    return name
+
+
+def pdf_string(text):
+    text = text.encode("latin-1", "replace").decode("latin-1")
+    return "(" + text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+
+class QRZipWriter:
+    """ Writes QR codes into a ZIP archive one entry at a time, as they are
+    rendered. A manifest.json entry maps each account to its file. """
+    def __init__(self, path, fmt="png"):
+        self.path = path
+        self.extension = "svg" if fmt == "svg" else "png"
+        self.zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+        self.manifest = []
+        self.used = {MANIFEST_NAME}
+
+    def add(self, acc_name, account, content):
+        name = entry_name(acc_name, self.extension, self.used)
+        # PNG data is already compressed, deflating it again only costs time
+        compression = zipfile.ZIP_STORED if self.extension == "png" else zipfile.ZIP_DEFLATED
+        self.zip.writestr(name, content, compress_type=compression)
+        self.manifest.append({"name": acc_name, "account": account, "entry": name})
+        return name
+
+    def close(self):
+        self.zip.writestr(MANIFEST_NAME, json.dumps({
+            "created_at": int(datetime.now().timestamp()),
+            "accounts": self.manifest
+        }, ensure_ascii=False, indent=4))
+        self.zip.close()
+
+
+class QRPdfWriter:
+    """ Writes QR codes into a PDF, one page per account labeled with its
+    name. Every page is written to the file as soon as it is added, only the
+    object offsets are kept until the end. As a PDF has no room for it, the
+    manifest is saved next to it, mapping each account to its page. """
+    def __init__(self, path, fmt="png"):
+        if fmt != "png":
+            raise ValueError(f"QR codes in a PDF need to be rendered as png, got: {fmt}")
+        self.path = path
+        self.manifest_path = f"{os.path.splitext(path)[0]}-{MANIFEST_NAME}"
+        self.file = open(path, "wb")
+        self.offsets = {}
+        self.pages = []
+        self.manifest = []
+        # Catalog and page tree are written last, when all the pages are known
+        self.catalog, self.page_tree, self.font = 1, 2, 3
+        self.next_obj = 4
+        self.file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self.write_obj(self.font, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    def new_obj(self):
+        self.next_obj += 1
+        return self.next_obj - 1
+
+    def write_obj(self, number, body, stream=None):
+        self.offsets[number] = self.file.tell()
+        self.file.write(f"{number} 0 obj\n".encode() + body)
+        if stream is not None:
+            self.file.write(b"\nstream\n" + stream + b"\nendstream")
+        self.file.write(b"\nendobj\n")
+
+    def add(self, acc_name, account, content):
+        image = Image.open(io.BytesIO(content)).convert("1")
+        width, height = image.size
+        data = zlib.compress(image.tobytes())
+        image_obj, content_obj, page_obj = self.new_obj(), self.new_obj(), self.new_obj()
+        self.write_obj(image_obj, (
+            f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} /ColorSpace /DeviceGray "
+            f"/BitsPerComponent 1 /Filter /FlateDecode /Length {len(data)} >>").encode(), data)
+        page_width, page_height = width + 2 * PDF_MARGIN, height + 3 * PDF_MARGIN
+        draw = (f"q {width} 0 0 {height} {PDF_MARGIN} {PDF_MARGIN} cm /QR Do Q\n"
+                f"BT /F1 14 Tf {PDF_MARGIN} {height + 2 * PDF_MARGIN} Td {pdf_string(acc_name)} Tj ET").encode()
+        self.write_obj(content_obj, f"<< /Length {len(draw)} >>".encode(), draw)
+        self.write_obj(page_obj, (
+            f"<< /Type /Page /Parent {self.page_tree} 0 R /MediaBox [0 0 {page_width} {page_height}] "
+            f"/Resources << /Font << /F1 {self.font} 0 R >> /XObject << /QR {image_obj} 0 R >> >> "
+            f"/Contents {content_obj} 0 R >>").encode())
+        self.pages.append(page_obj)
+        self.manifest.append({"name": acc_name, "account": account, "page": len(self.pages)})
+        return len(self.pages)
+
+    def close(self):
+        kids = " ".join(f"{page} 0 R" for page in self.pages)
+        self.write_obj(self.page_tree, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.pages)} >>".encode())
+        self.write_obj(self.catalog, f"<< /Type /Catalog /Pages {self.page_tree} 0 R >>".encode())
+        xref = self.file.tell()
+        self.file.write(f"xref\n0 {self.next_obj}\n0000000000 65535 f \n".encode())
+        for number in range(1, self.next_obj):
+            self.file.write(f"{self.offsets[number]:010d} 00000 n \n".encode())
+        self.file.write(f"trailer\n<< /Size {self.next_obj} /Root {self.catalog} 0 R >>\n"
+                        f"startxref\n{xref}\n%%EOF\n".encode())
+        self.file.close()
+        with open(self.manifest_path, "w", encoding="utf-8") as f:
+            json.dump({"created_at": int(datetime.now().timestamp()), "file": os.path.basename(self.path),
+                       "accounts": self.manifest}, f, ensure_ascii=False, indent=4)
+
+
+def open_qr_archive(path, fmt="png"):
+    if archive_format(path) == "pdf":
+        return QRPdfWriter(path, fmt)
+    return QRZipWriter(path, fmt)
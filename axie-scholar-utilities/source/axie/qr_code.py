@@ -1,33 +1,129 @@
+import io
 import os
 import sys
 import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
+from time import monotonic
 
 import qrcode
+from qrcode.image.svg import SvgPathImage
 
+from axie.qr_archive import open_qr_archive
+from axie.signing import can_fork, fork_context
 from axie.utils import AxieGraphQL
 
+QR_FORMATS = ["png", "svg", "terminal"]
+# Max number of access tokens requested at the same time
+QR_CONCURRENCY = 10
+RENDER_WORKERS = min(4, os.cpu_count() or 1)
+RENDER_WINDOW = 64
 
-class QRCode(AxieGraphQL):
 
-    def __init__(self, acc_name, path, **kwargs):
-        self.acc_name = acc_name
-        self.path = os.path.join(path, f'{self.acc_name.lower()}-{int(datetime.timestamp(datetime.now()))}.png')
-        super().__init__(**kwargs)
+def render_qr(data, fmt="png"):
+    """ Renders a QR code as PNG or SVG bytes, or as text for the terminal.
+    Runs in the worker processes so it has to stay a module level function. """
+    if fmt == "terminal":
+        qr = qrcode.QRCode(border=1)
+        qr.add_data(data)
+        out = io.StringIO()
+        qr.print_ascii(out=out)
+        return out.getvalue()
+    image = qrcode.make(data, image_factory=SvgPathImage) if fmt == "svg" else qrcode.make(data)
+    out = io.BytesIO()
+    image.save(out)
+    return out.getvalue()
+
+
+def render_all(jwts, fmt, workers=RENDER_WORKERS):
+    """ Renders many QR codes in a pool of worker processes. Yields them in
+    order as they are done, so they can be written out one at a time. They are
+    rendered in process when other threads run and forking is not safe. """
+    if len(jwts) <= 1 or not can_fork(workers):
+        yield from (render_qr(jwt, fmt) for jwt in jwts)
+        return
+    with ProcessPoolExecutor(max_workers=workers, mp_context=fork_context()) as executor:
+        # Submitted in windows so finished codes do not pile up waiting to be written
+        for i in range(0, len(jwts), RENDER_WINDOW):
+            window = jwts[i:i + RENDER_WINDOW]
+            yield from executor.map(render_qr, window, [fmt] * len(window),
+                                    chunksize=max(1, len(window) // (workers * 4)))
+
+
+def generate_qr_codes(qrcode_list, fmt="png", concurrency=QR_CONCURRENCY, render_workers=RENDER_WORKERS,
+                      output=None):
+    """ Gets the access tokens of all accounts, with up to `concurrency` at the
+    same time, renders their QR codes in a process pool and saves each one as
+    soon as it is rendered. With an output ZIP or PDF file they all go into it
+    instead of one file per account. Logs how long each stage took. """
+    start = monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="qr") as executor:
+        jwts = list(executor.map(lambda qr: qr.get_jwt(), qrcode_list))
+    ready = []
+    for qr, jwt in zip(qrcode_list, jwts):
+        if jwt:
+            ready.append((qr, jwt))
+        else:
+            logging.info(f"Important: Could not get an access token for account {qr.acc_name}, skipping its QR code")
+    fetched = monotonic()
+    archive = open_qr_archive(output, fmt) if output else None
+    try:
+        for (qr, _), content in zip(ready, render_all([jwt for _, jwt in ready], fmt, render_workers)):
+            if archive:
+                archive.add(qr.acc_name, qr.account, content)
+            else:
+                qr.save(content)
+    finally:
+        if archive:
+            archive.close()
+    if archive:
+        logging.info(f"Saved {len(ready)} QR codes at {output}")
+    logging.info(f"Generated {len(ready)} out of {len(qrcode_list)} QR codes. Access tokens took "
+                 f"{fetched - start:.2f}s, rendering and saving {monotonic() - fetched:.2f}s")
+    return len(ready)
+
+
+class QRCodeSaver:
+    """ Where and how a rendered QR code is output, shared by the QR code classes """
+    fmt = "png"
+
+    def qr_path(self, path):
+        extension = "svg" if self.fmt == "svg" else "png"
+        return os.path.join(path, f'{self.acc_name.lower()}-{int(datetime.timestamp(datetime.now()))}.{extension}')
+
+    def save(self, content):
+        if self.fmt == "terminal":
+            print(f"QR Code for account {self.acc_name}:\n{content}")
+            return
+        logging.info(f'Saving QR Code for account {self.acc_name} at {self.path}')
+        with open(self.path, 'wb') as f:
+            f.write(content)
 
     def generate_qr(self):
         jwt = self.get_jwt()
         logging.info('Create QR Code')
-        qr = qrcode.make(jwt)
-        logging.info(f'Saving QR Code for account {self.acc_name} at {self.path}')
-        qr.save(self.path)
+        self.save(render_qr(jwt, self.fmt))
+
+
+class QRCode(QRCodeSaver, AxieGraphQL):
+
+    def __init__(self, acc_name, path, fmt="png", **kwargs):
+        self.acc_name = acc_name
+        self.fmt = fmt
+        self.path = self.qr_path(path)
+        super().__init__(**kwargs)
 
 
 class QRCodeManager:
 
-    def __init__(self, payments_file, secrets_file, path):
+    def __init__(self, payments_file, secrets_file, path, fmt="png", concurrency=QR_CONCURRENCY,
+                 render_workers=RENDER_WORKERS, output=None):
         self.secrets_file, self.acc_names = self.load_secrets_and_acc_name(secrets_file, payments_file)
         self.path = path
+        self.fmt = fmt
+        self.output = output
+        self.concurrency = concurrency
+        self.render_workers = render_workers
 
     def load_secrets_and_acc_name(self, secrets, payments):
         refined_secrets = {}
@@ -68,8 +164,8 @@ class QRCodeManager:
                 account=acc,
                 private_key=self.secrets_file[acc],
                 acc_name=self.acc_names[acc],
-                path=self.path
+                path=self.path,
+                fmt=self.fmt
             ) for acc in self.secrets_file
         ]
-        for qr in qrcode_list:
-            qr.generate_qr()
+        generate_qr_codes(qrcode_list, self.fmt, self.concurrency, self.render_workers, self.output)
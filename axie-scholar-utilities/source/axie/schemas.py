@@ -1,3 +1,9 @@
+import json
+import hashlib
+from functools import lru_cache
+
+from jsonschema.validators import validator_for
+
 payments_schema = {
     "type": "object",
     "required": [
@@ -238,3 +244,124 @@ breeding_schema = {
         }
     }
 }
+
+plan_payment_schema = {
+    "type": "object",
+    "required": [
+        "name",
+        "type",
+        "to",
+        "amount"
+    ],
+    "properties": {
+        "name": {
+            "type": "string"
+        },
+        "type": {
+            "enum": ["manager", "scholar", "trainer", "other", "donation"]
+        },
+        "to": {
+            "type": "string",
+            "pattern": "^ronin:[0-9a-fA-F]{40}$"
+        },
+        "amount": {
+            "type": "integer",
+            "minimum": 1
+        },
+        "reason": {
+            "type": "string"
+        }
+    }
+}
+
+plan_schema = {
+    "type": "object",
+    "required": [
+        "accounts"
+    ],
+    "properties": {
+        "created_at": {
+            "type": "integer"
+        },
+        "accounts": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": [
+                    "name",
+                    "ronin",
+                    "balance",
+                    "payments",
+                    "skipped"
+                ],
+                "properties": {
+                    "name": {
+                        "type": "string"
+                    },
+                    "ronin": {
+                        "type": "string",
+                        "pattern": "^ronin:[0-9a-fA-F]{40}$"
+                    },
+                    "balance": {
+                        "type": "integer",
+                        "minimum": 0
+                    },
+                    "payments": {
+                        "type": "array",
+                        "items": plan_payment_schema
+                    },
+                    "skipped": {
+                        "type": "array",
+                        "items": {
+                            # Skipped payments were never going to be sent, any amount goes
+                            **plan_payment_schema,
+                            "properties": {**plan_payment_schema["properties"], "amount": {"type": "integer"}}
+                        }
+                    }
+                }
+            }
+        }
+    }
+}
+
+SCHEMAS = {
+    "payments": payments_schema,
+    "legacy_payments": legacy_payments_schema,
+    "transfers": transfers_schema,
+    "breeding": breeding_schema,
+    "plan": plan_schema
+}
+
+# Changes whenever any schema does, so files validated with an older one are checked again
+SCHEMA_VERSION = hashlib.sha256(json.dumps(SCHEMAS, sort_keys=True).encode()).hexdigest()[:16]
+
+
+# Schema of a single entry of the list each file holds, for files read one entry at a time
+ITEM_SCHEMAS = {
+    "payments": payments_schema["properties"]["scholars"]["items"],
+    "legacy_payments": legacy_payments_schema["properties"]["Scholars"]["items"],
+    "transfers": transfers_schema["items"],
+    "breeding": breeding_schema["items"]
+}
+
+
+@lru_cache(maxsize=None)
+def get_validator(name, item=False):
+    """ Validator for one of the schemas above, or for a single entry of it. The
+    schema is checked and the validator built the first time it is needed, then reused. """
+    schema = ITEM_SCHEMAS[name] if item else SCHEMAS[name]
+    cls = validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema)
+
+
+def schema_errors(instance, name, item=False):
+    """ Returns every problem found in instance in a single pass, empty when it is valid """
+    return list(get_validator(name, item).iter_errors(instance))
+
+
+def payments_format(payments):
+    """ Tells legacy payments files from current ones by their keys, so only one schema needs to run """
+    if isinstance(payments, dict) and ("Manager" in payments or "Scholars" in payments):
+        return "legacy"
+    return "new"
@@ -0,0 +1,77 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from eth_account import Account
+from web3 import Web3
+
+SIGNING_WORKERS = min(4, os.cpu_count() or 1)
+
+
+def sign_transaction(transaction, private_key):
+    """ Signs a single transaction, returns its raw bytes and hash. Runs in the
+    worker processes so it has to stay a module level function. """
+    signed = Account.sign_transaction(transaction, private_key=private_key)
+    return signed.rawTransaction, Web3.toHex(Web3.keccak(signed.rawTransaction))
+
+
+def fork_context():
+    # Spawned workers would re-import the axie package, whose modules open the
+    # results log file in write mode and would wipe it. Only fork is safe here.
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return None
+
+
+def can_fork(workers):
+    """ Forking copies into the workers the locks other threads hold at that
+    moment, which could deadlock them. Only fork while no other thread runs. """
+    return workers > 1 and fork_context() is not None and threading.active_count() == 1
+
+
+class TransactionSigner:
+    """ Signs batches of transactions offline in a pool of worker processes.
+    The pool is started ahead with start() or on the first batch that needs
+    it, and kept until shutdown. Batches of a single transaction, or batches
+    that would need to fork while other threads run, are signed in place. """
+    def __init__(self, workers=SIGNING_WORKERS):
+        self.workers = workers
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def get_executor(self):
+        with self.lock:
+            if not self.executor:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=fork_context())
+            return self.executor
+
+    def can_fork(self):
+        return can_fork(self.workers)
+
+    def start(self):
+        """ Starts the worker processes ahead of time. Managers call it before they
+        start any thread, so the pool is there for every batch they sign later. """
+        if not self.can_fork():
+            return
+        # Workers of a fork pool are all created with its first task
+        self.get_executor().submit(int).result()
+
+    def sign(self, transactions):
+        """ Takes a list of (transaction, private_key) and returns a list of
+        (raw_transaction, hash) in the same order """
+        if not transactions:
+            return []
+        with self.lock:
+            started = self.executor is not None
+        if self.workers <= 1 or len(transactions) == 1 or not (started or self.can_fork()):
+            return [sign_transaction(tx, key) for tx, key in transactions]
+        txs, keys = zip(*transactions)
+        chunksize = max(1, len(transactions) // (self.workers * 4))
+        return list(self.get_executor().map(sign_transaction, txs, keys, chunksize=chunksize))
+
+    def shutdown(self):
+        with self.lock:
+            if self.executor:
+                self.executor.shutdown()
+                self.executor = None
@@ -0,0 +1,136 @@
+import json
+from collections import deque
+from collections.abc import Iterator
+from itertools import islice
+
+CHUNK_SIZE = 64 * 1024
+# Entries of a streamed file that are loaded and processed together
+STREAM_BATCH_SIZE = 500
+# Validation of a streamed file stops after this many errors
+MAX_REPORTED_ERRORS = 100
+# Where the scholars are in current and legacy payments files
+SCHOLARS_KEYS = ("scholars", "Scholars")
+WHITESPACE = " \t\n\r"
+NUMBER_CHARS = "0123456789+-.eE"
+
+
+class JSONStream:
+    """ Reads a JSON document from a file a chunk at a time. Values are decoded
+    one by one while the document is walked, so only the chunk being read and
+    the value being decoded are kept in memory. """
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def read_more(self):
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # What was already decoded is not needed anymore
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """ Returns the next character that is not whitespace, empty at the end of the file """
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.read_more():
+                return ""
+
+    def expect(self, chars):
+        c = self.peek()
+        if not c or c not in chars:
+            raise json.JSONDecodeError(f"Expecting one of '{chars}'", self.buf, self.pos)
+        self.pos += 1
+        return c
+
+    def value(self):
+        """ Decodes the next value, reading more of the file until it is complete """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A number cut by the end of the buffer could go on in the next chunk
+                if self.eof or (end < len(self.buf) and self.buf[end] not in NUMBER_CHARS):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.read_more()
+
+    def items(self):
+        """ Yields the values of the array that starts here """
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(",]") == "]":
+                return
+
+    def members(self, streamed=()):
+        """ Yields the keys and values of the object that starts here. Arrays under
+        the streamed keys come as an iterator of their values, which has to be
+        used up before going on to the next member. """
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            if key in streamed and self.peek() == "[":
+                yield key, self.items()
+            else:
+                yield key, self.value()
+            if self.expect(",}") == "}":
+                return
+
+
+def iter_items(path, keys=None):
+    """ Yields one at a time the entries of the array a JSON file holds. With
+    keys, the file holds an object and the entries are the ones of the array
+    under the first of those keys found in it. """
+    with open(path, encoding='utf-8') as f:
+        stream = JSONStream(f)
+        if keys is None:
+            yield from stream.items()
+            return
+        for key, value in stream.members(streamed=keys):
+            if key in keys:
+                if isinstance(value, Iterator):
+                    yield from value
+                return
+
+
+def read_header(path, keys):
+    """ Returns the object a JSON file holds leaving out the arrays under keys,
+    which are read through without being kept and replaced by empty ones. """
+    header = {}
+    with open(path, encoding='utf-8') as f:
+        for key, value in JSONStream(f).members(streamed=keys):
+            if isinstance(value, Iterator):
+                deque(value, maxlen=0)
+                value = []
+            header[key] = value
+    return header
+
+
+def batched(iterable, size=STREAM_BATCH_SIZE):
+    """ Yields lists of up to size consecutive entries """
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
@@ -1,23 +1,27 @@
 import sys
 import logging
-import json
-from datetime import datetime, timedelta
-from time import sleep
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
-from jsonschema import validate
-from jsonschema.exceptions import ValidationError
-from web3 import Web3, exceptions
-
-from axie.schemas import transfers_schema
-from axie.axies import Axies
+from axie.schemas import schema_errors
+from axie.axies import get_owned_axies
+from axie.calldata import build_transaction, safe_transfer_from_data
+from axie.signing import TransactionSigner, SIGNING_WORKERS
+from axie.streaming import STREAM_BATCH_SIZE, MAX_REPORTED_ERRORS, batched, iter_items
 from axie.utils import (
     get_nonce,
+    is_nonce_error,
+    nonces,
     load_json,
+    log_buffer,
     ImportantLogsFilter,
     RONIN_PROVIDER_FREE,
     AXIE_CONTRACT,
-    TIMEOUT_MINS,
-    USER_AGENT
+    RECEIPT_SUCCESS,
+    RECEIPT_TIMEOUT,
+    receipt_watcher,
+    get_web3,
+    validation_cache
 )
 
 
@@ -30,73 +34,58 @@ file_handler.setLevel(logging.INFO)
 file_handler.addFilter(ImportantLogsFilter())
 logger.addHandler(file_handler)
 
+# Max number of source accounts sending their transfers at the same time
+TRANSFER_CONCURRENCY = 10
+
 
 class Transfer:
     def __init__(self, from_acc, from_private, to_acc, axie_id):
-        self.w3 = Web3(
-            Web3.HTTPProvider(
-                RONIN_PROVIDER_FREE,
-                request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}))
+        self.w3 = get_web3(RONIN_PROVIDER_FREE)
         self.from_acc = from_acc.replace("ronin:", "0x")
         self.from_private = from_private
         self.to_acc = to_acc.replace("ronin:", "0x")
         self.axie_id = axie_id
 
-    def execute(self):
-        # Load ABI
-        with open('axie/axie_abi.json', encoding='utf-8') as f:
-            axie_abi = json.load(f)
-        axie_contract = self.w3.eth.contract(
-            address=Web3.toChecksumAddress(AXIE_CONTRACT),
-            abi=axie_abi
+    def build(self, nonce):
+        return build_transaction(
+            AXIE_CONTRACT,
+            safe_transfer_from_data(self.from_acc, self.to_acc, self.axie_id),
+            nonce,
+            gas=492874
         )
+
+    def send_signed(self, raw_transaction):
+        self.w3.eth.send_raw_transaction(raw_transaction)
+
+    def wait_for_receipt(self, hash_, nonce, future=None):
+        # Wait for transaction to finish or timeout, future is given when the hash is already watched
+        if not future:
+            future = receipt_watcher.watch(hash_)
+        logging.info(f"Waiting for transfer '{self}' to finish (Nonce:{nonce})...")
+        status = future.result()
+        if status == RECEIPT_TIMEOUT:
+            logging.info(f"Important: Transfer {self}, timed out!")
+        success = status == RECEIPT_SUCCESS
+        if success:
+            logging.info(f"Important: {self} completed! Hash: {hash_} - "
+                         f"Explorer: https://explorer.roninchain.com/tx/{str(hash_)}")
+        else:
+            logging.info(f"Important: {self} failed")
+        return success
+
+    def execute(self):
         # Get Nonce
         nonce = get_nonce(self.from_acc)
-        # Build transaction
-        transaction = axie_contract.functions.safeTransferFrom(
-            Web3.toChecksumAddress(self.from_acc),
-            Web3.toChecksumAddress(self.to_acc),
-            self.axie_id
-        ).buildTransaction({
-            "chainId": 2020,
-            "gas": 492874,
-            "gasPrice": self.w3.toWei("0", "gwei"),
-            "value": 0,
-            "nonce": nonce
-        })
         # Sign Transaction
         signed = self.w3.eth.account.sign_transaction(
-            transaction,
+            self.build(nonce),
             private_key=self.from_private
         )
         # Send raw transaction
-        self.w3.eth.send_raw_transaction(signed.rawTransaction)
+        self.send_signed(signed.rawTransaction)
         # get transaction hash
         hash_ = self.w3.toHex(self.w3.keccak(signed.rawTransaction))
-        # Wait for transaction to finish or timeout
-        start_time = datetime.now()
-        while True:
-            # We will wait for max 10min for this transfer to happen
-            if datetime.now() - start_time > timedelta(minutes=TIMEOUT_MINS):
-                success = False
-                logging.info(f"Important: Transfer {self}, timed out!")
-                break
-            try:
-                recepit = self.w3.eth.get_transaction_receipt(hash_)
-                if recepit["status"] == 1:
-                    success = True
-                else:
-                    success = False
-                break
-            except exceptions.TransactionNotFound:
-                logging.info(f"Waiting for transfer '{self}' to finish (Nonce:{nonce})...")
-                # Sleep 10 seconds not to constantly send requests!
-                sleep(10)
-        if success:
-            logging.info(f"Important: {self} completed! Hash: {hash_} - "
-                         f"Explorer: https://explorer.roninchain.com/tx/{str(hash_)}")
-        else:
-            logging.info(f"Important: {self} failed")
+        self.wait_for_receipt(hash_, nonce)
 
     def __str__(self):
         return (f"Axie Transfer of axie ({self.axie_id}) from account ({self.from_acc.replace('0x', 'ronin:')}) "
@@ -104,18 +93,23 @@ class Transfer:
 
 
 class AxieTransferManager:
-    def __init__(self, transfers_file, secrets_file, secure=None):
+    def __init__(self, transfers_file, secrets_file, secure=None, signing_workers=SIGNING_WORKERS,
+                 concurrency=TRANSFER_CONCURRENCY):
         self.transfers_file = load_json(transfers_file)
         self.secrets_file = load_json(secrets_file)
         self.secure = secure
+        self.signer = TransactionSigner(signing_workers)
+        self.concurrency = concurrency
 
     def verify_inputs(self):
         logging.info("Validating file inputs...")
+        cache_key = validation_cache.key("transfers", self.transfers_file, self.secrets_file)
+        if validation_cache.passed(cache_key):
+            logging.info("Files did not change since they were last validated, skipping validation.")
+            return
         validation_success = True
         # Validate transfers file
-        try:
-            validate(self.transfers_file, transfers_schema)
-        except ValidationError as ex:
+        for ex in schema_errors(self.transfers_file, "transfers"):
             logging.critical("Transfers file failed validation. Please review it. "
                              f"Error given: {ex.message}. "
                              f"For attribute in: {list(ex.path)}")
@@ -125,23 +119,39 @@ class AxieTransferManager:
             if acc["AccountAddress"] not in self.secrets_file:
                 logging.critical(f"Account '{acc['AccountAddress']}' is not present in secret file, please add it.")
                 validation_success = False
+        if not self.verify_secrets():
+            validation_success = False
+        if not validation_success:
+            self.validation_failed()
+        validation_cache.add(cache_key)
+        logging.info("Files correctly validated!")
+
+    def verify_secrets(self):
+        validation_success = True
         for sf in self.secrets_file:
             if len(self.secrets_file[sf]) != 66 or self.secrets_file[sf][:2] != "0x":
                 logging.critical(f"Private key for account {sf} is not valid, please review it!")
                 validation_success = False
-        if not validation_success:
-            logging.critical("Please make sure your transfers.json file looks like the one in the README.md\n"
-                             "Find it here: https://ferranmarin.github.io/axie-scholar-utilities/")
-            logging.critical("If your problem is with secrets.json, "
-                             "delete it and re-generate the file starting with an empty secrets file.")
-            sys.exit()
-        logging.info("Files correctly validated!")
+        return validation_success
+
+    def validation_failed(self):
+        logging.critical("Please make sure your transfers.json file looks like the one in the README.md\n"
+                         "Find it here: https://ferranmarin.github.io/axie-scholar-utilities/")
+        logging.critical("If your problem is with secrets.json, "
+                         "delete it and re-generate the file starting with an empty secrets file.")
+        sys.exit()
 
     def prepare_transfers(self):
+        self.signer.start()
+        self.run_transfers()
+        self.signer.shutdown()
+
+    def run_transfers(self):
         transfers = []
         logging.info("Preparing transfers")
+        owned_axies = get_owned_axies([acc['AccountAddress'] for acc in self.transfers_file])
         for acc in self.transfers_file:
-            axies_in_acc = Axies(acc['AccountAddress']).get_axies()
+            axies_in_acc = owned_axies[acc['AccountAddress']]
             for axie in acc['Transfers']:
                 if not self.secure or (self.secure and axie['ReceiverAddress'] in self.secrets_file):
                     # Check axie in account
@@ -162,6 +172,93 @@ class AxieTransferManager:
 
     def execute_transfers(self, transfers):
         logging.info("Starting to transfer axies")
-        for t in transfers:
-            t.execute()
-        logging.info("Axie transfers finished")
+        # Sign every transfer up front with consecutive nonces per account
+        nonce_list = [nonces.next_nonce(t.from_acc) for t in transfers]
+        signed = self.signer.sign([(t.build(nonce), t.from_private) for t, nonce in zip(transfers, nonce_list)])
+        accounts = {}
+        for t, nonce, (raw_tx, hash_) in zip(transfers, nonce_list, signed):
+            accounts.setdefault(t.from_acc, []).append((t, nonce, raw_tx, hash_))
+        # Each account broadcasts its own transfers in nonce order, accounts run side by side
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="transfers") as executor:
+            completed = sum(executor.map(self.transfer_account, accounts.values()))
+        logging.info(f"Axie transfers finished, {completed} out of {len(transfers)} completed")
+
+    def transfer_account(self, account_transfers):
+        """ Sends the signed transfers of a single account back to back, then waits
+        for their receipts. Returns the number of completed transfers. """
+        with log_buffer.buffered():
+            futures = []
+            for t, nonce, raw_tx, hash_ in account_transfers:
+                try:
+                    t.send_signed(raw_tx)
+                except Exception as e:
+                    # Transfers after this one would only be stuck behind the gap
+                    left = len(account_transfers) - len(futures) - 1
+                    if isinstance(e, ValueError) and is_nonce_error(e):
+                        logging.info(f"Important: {t} was rejected (Nonce:{nonce}), skipping it and the "
+                                     f"{left} transfers after it. Error: {e}")
+                    else:
+                        logging.critical(f"Important: {t} could not be sent (Nonce:{nonce}), it and the "
+                                         f"{left} transfers after it failed. Error: {e}")
+                    break
+                futures.append(receipt_watcher.watch(hash_))
+            completed = 0
+            for (t, nonce, _, hash_), future in zip(account_transfers, futures):
+                if t.wait_for_receipt(hash_, nonce, future):
+                    completed += 1
+            if completed < len(account_transfers):
+                # Following nonces may now be a gap, get them from the chain again
+                nonces.resync(account_transfers[0][0].from_acc)
+            return completed
+
+
+class StreamedTransferManager(AxieTransferManager):
+    """ Runs the transfers of a transfers file that is read from disk a batch
+    of accounts at a time, for files too big to be loaded at once. """
+    def __init__(self, transfers_path, secrets_file, secure=None, signing_workers=SIGNING_WORKERS,
+                 concurrency=TRANSFER_CONCURRENCY, batch_size=STREAM_BATCH_SIZE):
+        self.transfers_path = transfers_path
+        self.transfers_file = []
+        self.secrets_file = load_json(secrets_file)
+        self.secure = secure
+        self.signer = TransactionSigner(signing_workers)
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+
+    def verify_inputs(self):
+        logging.info("Validating file inputs...")
+        validation_success = True
+        errors = 0
+        try:
+            # Each account is validated on its own as it is read
+            for i, acc in enumerate(iter_items(self.transfers_path)):
+                for ex in schema_errors(acc, "transfers", item=True):
+                    logging.critical("Transfers file failed validation. Please review it. "
+                                     f"Error given: {ex.message}. "
+                                     f"For attribute in: {[i] + list(ex.path)}")
+                    validation_success = False
+                    errors += 1
+                if errors >= MAX_REPORTED_ERRORS:
+                    logging.critical(f"Stopped after {MAX_REPORTED_ERRORS} errors.")
+                    break
+                # Check we have private keys for all accounts
+                if isinstance(acc, dict) and acc.get("AccountAddress") not in self.secrets_file:
+                    logging.critical(f"Account '{acc.get('AccountAddress')}' is not present in secret file, "
+                                     "please add it.")
+                    validation_success = False
+        except ValueError:
+            logging.critical(f"File in path {self.transfers_path} is not a correctly encoded JSON.")
+            sys.exit()
+        if not self.verify_secrets():
+            validation_success = False
+        if not validation_success:
+            self.validation_failed()
+        logging.info("Files correctly validated!")
+
+    def prepare_transfers(self):
+        # The signing pool is started once and serves every batch
+        self.signer.start()
+        for batch in batched(iter_items(self.transfers_path), self.batch_size):
+            self.transfers_file = batch
+            self.run_transfers()
+        self.signer.shutdown()
@@ -1,14 +1,25 @@
 import os
 import json
+import base64
+import hashlib
 import logging
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from functools import lru_cache
+from time import monotonic, sleep, time
+from urllib.parse import urlparse
 
 from eth_account.messages import encode_defunct
 import requests
 from requests.adapters import HTTPAdapter
 from requests.exceptions import RetryError
+from requests.packages.urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 from requests.packages.urllib3.util.retry import Retry
-from web3 import Web3
+from web3 import Web3, HTTPProvider
 
+from axie.schemas import SCHEMA_VERSION
 
 
 USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_9_2) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/36.0.1944.0 Safari/537.36" # noqa
@@ -19,6 +30,35 @@ SLP_CONTRACT = "0xa8754b9fa15fc18bb59458815510e40a12cd2014"
 WETH_CONTRACT = "0xc99a6a985ed2cac1ef41640596c5a5f9f4e19ef5"
 RONIN_PROVIDER_FREE = "https://proxy.roninchain.com/free-gas-rpc"
 RONIN_PROVIDER = "https://api.roninchain.com/rpc"
+RPC_TIMEOUT = 10
+RPC_POOL_SIZE = 10
+RPC_BATCH_SIZE = 100
+GRAPHQL_URL = "https://graphql-gateway.axieinfinity.com/graphql"
+GRAPHQL_BATCH_SIZE = 50
+RECEIPT_SUCCESS = "success"
+RECEIPT_REVERTED = "reverted"
+RECEIPT_TIMEOUT = "timeout"
+RONIN_BLOCK_TIME = 3
+MIN_POLL_INTERVAL = 1
+MAX_POLL_INTERVAL = 10
+BALANCE_OF_SELECTOR = "0x70a08231"
+TOKEN_CONTRACTS = {
+    "slp": SLP_CONTRACT,
+    "axs": AXS_CONTRACT,
+    "axies": AXIE_CONTRACT,
+    "weth": WETH_CONTRACT
+}
+# Seconds before expiry at which a cached access token is considered stale
+JWT_REFRESH_MARGIN = 300
+# Bump when the checks done on input files change, so cached results are dropped
+VALIDATION_CACHE_VERSION = 1
+VALIDATION_CACHE_SIZE = 100
+# Requests per second and burst size allowed against each api host
+RATE_LIMITS = {
+    "graphql-gateway.axieinfinity.com": (5, 10),
+    "game-api.skymavis.com": (5, 10),
+    "api.axie.management": (1, 2)
+}
 RETRIES = Retry(
     total=5,
     backoff_factor=2,
@@ -50,22 +90,158 @@ BALANCE_ABI = [
 ]
 
 
+class CountingHTTPConnectionPool(HTTPConnectionPool):
+    """ Connection pool that reports every new connection it opens """
+    def _new_conn(self):
+        providers.count_connection(self.host)
+        return super()._new_conn()
+
+
+class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    """ Connection pool that reports every new connection it opens """
+    def _new_conn(self):
+        providers.count_connection(self.host)
+        return super()._new_conn()
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """ HTTPAdapter whose pools keep track of the connections they open """
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CountingHTTPConnectionPool,
+            "https": CountingHTTPSConnectionPool
+        }
+
+
+class PooledHTTPProvider(HTTPProvider):
+    """ HTTPProvider that sends all its requests through a shared session
+    instead of the per thread session web3 keeps internally """
+    def __init__(self, endpoint_uri, session, **kwargs):
+        super().__init__(endpoint_uri, **kwargs)
+        self.session = session
+
+    def make_request(self, method, params):
+        request_data = self.encode_rpc_request(method, params)
+        kwargs = self.get_request_kwargs()
+        kwargs.setdefault("timeout", RPC_TIMEOUT)
+        response = self.session.post(self.endpoint_uri, data=request_data, **kwargs)
+        response.raise_for_status()
+        return self.decode_rpc_response(response.content)
+
+
+class ProviderRegistry:
+    """ Process wide registry of Web3 instances. Each RPC endpoint gets a single
+    keep-alive connection pool that is reused by every manager """
+    def __init__(self, pool_sizes=None):
+        self.pool_sizes = pool_sizes if pool_sizes else {}
+        self.sessions = {}
+        self.web3s = {}
+        self.connections = Counter()
+        self.lock = threading.Lock()
+
+    def configure(self, pool_size=None, **pool_sizes):
+        """ Sets the pool size for all endpoints (pool_size) or for specific ones
+        (endpoint=size). Only affects sessions created afterwards. """
+        if pool_size:
+            for endpoint in (RONIN_PROVIDER, RONIN_PROVIDER_FREE):
+                self.pool_sizes[endpoint] = pool_size
+        self.pool_sizes.update(pool_sizes)
+
+    def get_session(self, endpoint):
+        with self.lock:
+            if endpoint not in self.sessions:
+                pool_size = self.pool_sizes.get(endpoint, RPC_POOL_SIZE)
+                session = requests.Session()
+                session.headers.update({"content-type": "application/json", "user-agent": USER_AGENT})
+                session.mount("https://", PooledHTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+                session.mount("http://", PooledHTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+                self.sessions[endpoint] = session
+            return self.sessions[endpoint]
+
+    def get_web3(self, endpoint):
+        session = self.get_session(endpoint)
+        with self.lock:
+            if endpoint not in self.web3s:
+                self.web3s[endpoint] = Web3(PooledHTTPProvider(endpoint, session))
+            return self.web3s[endpoint]
+
+    def count_connection(self, host):
+        with self.lock:
+            self.connections[host] += 1
+
+    def connections_opened(self):
+        with self.lock:
+            return dict(self.connections)
+
+    def reset(self):
+        # Closes all pooled connections, used at the end of a run and in tests.
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions = {}
+            self.web3s = {}
+            self.connections = Counter()
+
+
+providers = ProviderRegistry()
+
+
+def get_web3(endpoint=RONIN_PROVIDER):
+    return providers.get_web3(endpoint)
+
+
+@lru_cache(maxsize=None)
+def load_abi(abi_file):
+    """ Parses each ABI file only once per process, callers must not modify it """
+    with open(abi_file, encoding='utf-8') as f:
+        return json.load(f)
+
+
+class ContractCache:
+    """ Contract objects by web3 instance, contract address and ABI file. Building
+    one processes its whole ABI, so each of them is only built once per process """
+    def __init__(self):
+        self.contracts = {}
+        self.lock = threading.Lock()
+
+    def get(self, w3, address, abi_file):
+        key = (w3, address.lower(), abi_file)
+        with self.lock:
+            if key not in self.contracts:
+                self.contracts[key] = w3.eth.contract(
+                    address=Web3.toChecksumAddress(address),
+                    abi=load_abi(abi_file)
+                )
+            return self.contracts[key]
+
+    def clear(self):
+        # Used in tests, where ABI files and contracts are mocked
+        load_abi.cache_clear()
+        with self.lock:
+            self.contracts = {}
+
+
+contracts = ContractCache()
+
+
+def get_contract(w3, address, abi_file):
+    return contracts.get(w3, address, abi_file)
+
+
+def log_connections_opened():
+    opened = providers.connections_opened()
+    if opened:
+        details = ", ".join(f"{host}: {count}" for host, count in opened.items())
+        logging.info(f"Opened {sum(opened.values())} RPC connections during this run ({details})")
+
+
 def check_balance(account, token='slp'):
-    if token == 'slp':
-        contract = SLP_CONTRACT
-    elif token == 'axs':
-        contract = AXS_CONTRACT
-    elif token == "axies":
-        contract = AXIE_CONTRACT
-    elif token == "weth":
-        contract = WETH_CONTRACT
-    else:
+    contract = TOKEN_CONTRACTS.get(token)
+    if not contract:
         return 0
 
-    w3 = Web3(
-            Web3.HTTPProvider(
-                RONIN_PROVIDER,
-                request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}))
+    w3 = get_web3(RONIN_PROVIDER)
     ctr = w3.eth.contract(
         address=Web3.toChecksumAddress(contract),
         abi=BALANCE_ABI
@@ -78,17 +254,288 @@ def check_balance(account, token='slp'):
     return int(balance)
 
 
-def get_nonce(account):
-    w3 = Web3(
-            Web3.HTTPProvider(
-                RONIN_PROVIDER_FREE,
-                request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}))
-    nonce = w3.eth.get_transaction_count(
-        Web3.toChecksumAddress(account.replace("ronin:", "0x"))
-    )
+def rpc_batch(calls, endpoint=RONIN_PROVIDER):
+    """ Sends a list of (method, params) calls as a single JSON-RPC batch request.
+    Returns the response objects in the same order as the calls. When the node
+    rejects the whole batch with a single error object, every call gets that
+    error so callers fall back to their one by one path. """
+    if not calls:
+        return []
+    payload = [
+        {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+        for i, (method, params) in enumerate(calls)
+    ]
+    response = providers.get_session(endpoint).post(endpoint, json=payload, timeout=RPC_TIMEOUT)
+    response.raise_for_status()
+    body = response.json()
+    if not isinstance(body, list):
+        error = body.get("error", body) if isinstance(body, dict) else body
+        logging.debug(f"Batch of {len(calls)} calls to {endpoint} was rejected. Error: {error}")
+        return [{"error": error} for _ in calls]
+    by_id = {r.get("id"): r for r in body if isinstance(r, dict)}
+    return [by_id.get(i, {"error": "Missing response"}) for i in range(len(calls))]
+
+
+def balance_of_data(account):
+    return BALANCE_OF_SELECTOR + "0" * 24 + account.replace("ronin:", "0x")[2:].lower()
+
+
+def check_balances(accounts, token='slp', chunk_size=RPC_BATCH_SIZE, block=None):
+    """ Bulk version of check_balance. All balances are read at the same block
+    number (the latest one unless given) using chunked JSON-RPC batch requests.
+    Returns a dict account -> balance """
+    contract = TOKEN_CONTRACTS.get(token)
+    accounts = list(dict.fromkeys(accounts))
+    if not contract:
+        return {acc: 0 for acc in accounts}
+    if not accounts:
+        return {}
+    block = block if block else hex(get_web3(RONIN_PROVIDER).eth.block_number)
+    balances = {}
+    for i in range(0, len(accounts), chunk_size):
+        chunk = accounts[i:i + chunk_size]
+        calls = [("eth_call", [{"to": contract, "data": balance_of_data(acc)}, block]) for acc in chunk]
+        for acc, response in zip(chunk, rpc_batch(calls, RONIN_PROVIDER)):
+            if response.get("result") is None:
+                logging.debug(f"Batched balance call failed for {acc}, retrying it alone. "
+                              f"Error: {response.get('error')}")
+                balances[acc] = check_balance(acc, token)
+                continue
+            balance = int(response["result"], 16) if response["result"] != "0x" else 0
+            balances[acc] = float(balance/1000000000000000000) if token == 'weth' else balance
+    return balances
+
+
+def check_receipts(hashes, endpoint=RONIN_PROVIDER_FREE, chunk_size=RPC_BATCH_SIZE):
+    """ Looks up the receipts of many transactions with chunked JSON-RPC batch
+    requests. Returns a dict hash -> RECEIPT_SUCCESS, RECEIPT_REVERTED or None
+    when the transaction has no receipt. Hashes that could not be checked are
+    left out. """
+    hashes = list(dict.fromkeys(hashes))
+    statuses = {}
+    for i in range(0, len(hashes), chunk_size):
+        chunk = hashes[i:i + chunk_size]
+        responses = rpc_batch([("eth_getTransactionReceipt", [h]) for h in chunk], endpoint)
+        for hash_, response in zip(chunk, responses):
+            if "error" in response:
+                logging.debug(f"Could not get receipt for {hash_}. Error: {response['error']}")
+                continue
+            receipt = response.get("result")
+            if not receipt:
+                statuses[hash_] = None
+            else:
+                statuses[hash_] = RECEIPT_SUCCESS if int(receipt["status"], 16) == 1 else RECEIPT_REVERTED
+    return statuses
+
+
+def get_nonce(account, pending=False):
+    w3 = get_web3(RONIN_PROVIDER_FREE)
+    address = Web3.toChecksumAddress(account.replace("ronin:", "0x"))
+    if pending:
+        return w3.eth.get_transaction_count(address, "pending")
+    nonce = w3.eth.get_transaction_count(address)
     return nonce
 
 
+def is_nonce_error(error):
+    msg = str(error).lower()
+    return "nonce too low" in msg or "nonce too high" in msg
+
+
+class NonceManager:
+    """ Hands out consecutive nonces for each account locally. The pending nonce
+    is only fetched from the chain the first time an account is used or after a
+    resync (nonce too low errors, gaps left by failed transactions) """
+    def __init__(self):
+        self.nonces = {}
+        # Each account has its own lock, so fetching one account's nonce does not hold up the others
+        self.locks = defaultdict(threading.Lock)
+        self.lock = threading.Lock()
+
+    def account_lock(self, key):
+        with self.lock:
+            return self.locks[key]
+
+    def next_nonce(self, account):
+        key = account.replace("ronin:", "0x").lower()
+        with self.account_lock(key):
+            if key not in self.nonces:
+                self.nonces[key] = get_nonce(key, pending=True)
+            nonce = self.nonces[key]
+            self.nonces[key] += 1
+            return nonce
+
+    def resync(self, account):
+        key = account.replace("ronin:", "0x").lower()
+        with self.account_lock(key):
+            self.nonces.pop(key, None)
+
+
+nonces = NonceManager()
+
+
+class ReceiptWatcher:
+    """ Waits for many transactions at once. A single background thread polls the
+    receipts of every watched hash with batched eth_getTransactionReceipt requests,
+    at an interval that follows the block time observed on Ronin """
+    def __init__(self, endpoint=RONIN_PROVIDER_FREE, chunk_size=RPC_BATCH_SIZE):
+        self.endpoint = endpoint
+        self.chunk_size = chunk_size
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.thread = None
+        self.block_time = RONIN_BLOCK_TIME
+        self.last_block = None
+
+    def watch(self, hash_, timeout=TIMEOUT_MINS * 60, callback=None):
+        """ Returns a Future that resolves to RECEIPT_SUCCESS, RECEIPT_REVERTED or
+        RECEIPT_TIMEOUT. The optional callback gets the finished future. """
+        future = Future()
+        if callback:
+            future.add_done_callback(callback)
+        with self.lock:
+            self.pending.setdefault(hash_, []).append((future, monotonic() + timeout))
+            if not self.thread or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name="receipt-watcher", daemon=True)
+                self.thread.start()
+        return future
+
+    @property
+    def poll_interval(self):
+        return min(max(self.block_time, MIN_POLL_INTERVAL), MAX_POLL_INTERVAL)
+
+    def update_block_time(self, block_number, now):
+        if self.last_block and block_number > self.last_block[0]:
+            observed = (now - self.last_block[1]) / (block_number - self.last_block[0])
+            # Smooth it, a single late poll should not slow everything down
+            self.block_time = 0.7 * self.block_time + 0.3 * observed
+        if not self.last_block or block_number > self.last_block[0]:
+            self.last_block = (block_number, now)
+
+    def resolve(self, hash_, status):
+        with self.lock:
+            watchers = self.pending.pop(hash_, [])
+        for future, _ in watchers:
+            if not future.done():
+                future.set_result(status)
+
+    def poll(self):
+        with self.lock:
+            hashes = list(self.pending)
+        for i in range(0, len(hashes), self.chunk_size):
+            chunk = hashes[i:i + self.chunk_size]
+            calls = [("eth_blockNumber", [])] + [("eth_getTransactionReceipt", [h]) for h in chunk]
+            try:
+                responses = rpc_batch(calls, self.endpoint)
+                if responses[0].get("result"):
+                    self.update_block_time(int(responses[0]["result"], 16), monotonic())
+            except Exception as e:
+                logging.debug(f"Failed polling transaction receipts, will re-try. Error: {e}")
+                continue
+            for hash_, response in zip(chunk, responses[1:]):
+                try:
+                    receipt = response.get("result")
+                    if receipt:
+                        status = RECEIPT_SUCCESS if int(receipt["status"], 16) == 1 else RECEIPT_REVERTED
+                        self.resolve(hash_, status)
+                except Exception as e:
+                    # Left pending, it is read again next poll or times out
+                    logging.debug(f"Could not read the receipt of {hash_}, will re-try. Error: {e}")
+        # Time out whatever is still pending past its deadline
+        now = monotonic()
+        with self.lock:
+            expired = []
+            for hash_, watchers in self.pending.items():
+                expired += [f for f, deadline in watchers if deadline < now]
+                self.pending[hash_] = [(f, d) for f, d in watchers if d >= now]
+            self.pending = {h: w for h, w in self.pending.items() if w}
+        for future in expired:
+            if not future.done():
+                future.set_result(RECEIPT_TIMEOUT)
+
+    def run(self):
+        while True:
+            sleep(self.poll_interval)
+            try:
+                self.poll()
+            except Exception as e:
+                # Keep the thread alive, watched transactions still resolve or time out
+                logging.critical(f"Unexpected error polling transaction receipts, will re-try. Error: {e}")
+            with self.lock:
+                if not self.pending:
+                    self.thread = None
+                    return
+
+
+receipt_watcher = ReceiptWatcher()
+
+
+class TokenBucket:
+    """ Token bucket allowing `rate` requests per second with bursts of up to
+    `burst` requests. Callers reserve their token and sleep outside the lock,
+    so they go out in arrival order and as soon as they are allowed to. """
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """ Takes a token and returns how long the caller must wait to use it """
+        with self.lock:
+            now = monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return -self.tokens / self.rate if self.tokens < 0 else 0
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait:
+            sleep(wait)
+        return wait
+
+
+class RateLimiter:
+    """ Process wide per host token buckets, hosts without a limit are not throttled """
+    def __init__(self, limits=None):
+        self.limits = dict(limits if limits is not None else RATE_LIMITS)
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def configure(self, host, rate, burst):
+        with self.lock:
+            self.limits[host] = (rate, burst)
+            self.buckets.pop(host, None)
+
+    def get_bucket(self, host):
+        with self.lock:
+            if host not in self.buckets and host in self.limits:
+                self.buckets[host] = TokenBucket(*self.limits[host])
+            return self.buckets.get(host)
+
+    def acquire(self, url):
+        bucket = self.get_bucket(urlparse(url).hostname)
+        return bucket.acquire() if bucket else 0
+
+
+rate_limiter = RateLimiter()
+
+
+class RateLimitedHTTPAdapter(HTTPAdapter):
+    """ HTTPAdapter that waits for the host rate limiter before each request """
+    def send(self, request, **kwargs):
+        rate_limiter.acquire(request.url)
+        return super().send(request, **kwargs)
+
+
+def rate_limited_session(max_retries=0):
+    session = requests.Session()
+    session.mount('https://', RateLimitedHTTPAdapter(max_retries=max_retries))
+    return session
+
+
 def load_json(json_file):
     # This is a safeguard, it should never raise as we check this in the CLI.
     if not os.path.isfile(json_file):
@@ -109,6 +556,38 @@ class ImportantLogsFilter(logging.Filter):
         return record.getMessage().startswith('Important:')
 
 
+class LogBuffer(logging.Filter):
+    """ Root logger filter that holds back the records of threads running inside
+    buffered(), and emits them all together once the block is done. Keeps the
+    output of concurrent workers from interleaving. """
+    def __init__(self):
+        super().__init__()
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        records = getattr(self.local, "records", None)
+        if records is None:
+            return True
+        records.append(record)
+        return False
+
+    @contextmanager
+    def buffered(self):
+        self.local.records = []
+        try:
+            yield
+        finally:
+            records, self.local.records = self.local.records, None
+            with self.lock:
+                for record in records:
+                    logging.getLogger().handle(record)
+
+
+log_buffer = LogBuffer()
+logging.getLogger().addFilter(log_buffer)
+
+
 class Singleton:
     _instance = None
 
@@ -126,13 +605,131 @@ class Singleton:
             pass
 
 
+def jwt_expiry(token):
+    """ Returns the exp claim of a JWT or None if it can not be read """
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return int(claims["exp"])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class JWTCache:
+    """ Access tokens by account, reused until shortly before they expire. Kept in
+    memory and, once persist() is called, also in a file only the user can read. """
+    def __init__(self, margin=JWT_REFRESH_MARGIN):
+        self.margin = margin
+        self.tokens = {}
+        self.path = None
+        self.lock = threading.Lock()
+
+    def persist(self, path):
+        """ Loads the tokens stored in path and keeps it updated from now on """
+        with self.lock:
+            self.path = path
+            if os.path.isfile(path):
+                try:
+                    with open(path, encoding='utf-8') as f:
+                        self.tokens.update(json.load(f))
+                except json.decoder.JSONDecodeError:
+                    logging.warning(f"Ignoring JWT cache file {path}, it is not a correctly encoded JSON.")
+
+    def save(self):
+        # Tokens grant access to the accounts, the file must not be readable by others
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.chmod(self.path, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.tokens, f)
+
+    def get(self, account):
+        with self.lock:
+            token = self.tokens.get(account.lower())
+        expiry = jwt_expiry(token)
+        if expiry and expiry - self.margin > time():
+            return token
+        return None
+
+    def set(self, account, token):
+        # Tokens with no readable expiry can not be safely reused
+        if not jwt_expiry(token):
+            return
+        with self.lock:
+            self.tokens[account.lower()] = token
+            if self.path:
+                self.save()
+
+    def clear(self):
+        with self.lock:
+            self.tokens = {}
+            self.path = None
+
+
+jwt_cache = JWTCache()
+
+
+def content_hash(content):
+    """ Hash of a loaded json file that does not depend on its key order or formatting """
+    return hashlib.sha256(json.dumps(content, sort_keys=True, separators=(',', ':')).encode()).hexdigest()
+
+
+class ValidationCache:
+    """ Remembers which input files passed validation, so unchanged files are
+    not validated again on the next run. Entries are keyed by the hash of
+    every file involved and of the schemas, and only hashes are written.
+    Does nothing until persist() is called. """
+    def __init__(self, size=VALIDATION_CACHE_SIZE):
+        self.size = size
+        self.entries = {}
+        self.path = None
+        self.lock = threading.Lock()
+
+    def persist(self, path):
+        """ Loads the entries stored in path and keeps it updated from now on """
+        with self.lock:
+            self.path = path
+            if os.path.isfile(path):
+                try:
+                    with open(path, encoding='utf-8') as f:
+                        self.entries.update(json.load(f))
+                except json.decoder.JSONDecodeError:
+                    logging.warning(f"Ignoring validation cache file {path}, it is not a correctly encoded JSON.")
+
+    @staticmethod
+    def key(kind, *files):
+        parts = [kind, SCHEMA_VERSION, str(VALIDATION_CACHE_VERSION)] + [content_hash(f) for f in files]
+        return hashlib.sha256(":".join(parts).encode()).hexdigest()
+
+    def passed(self, key):
+        with self.lock:
+            return self.path is not None and key in self.entries
+
+    def add(self, key):
+        with self.lock:
+            if not self.path:
+                return
+            self.entries[key] = int(time())
+            # Keep only the most recent entries
+            if len(self.entries) > self.size:
+                self.entries = dict(sorted(self.entries.items(), key=lambda e: e[1])[-self.size:])
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f)
+
+    def clear(self):
+        with self.lock:
+            self.entries = {}
+            self.path = None
+
+
+validation_cache = ValidationCache()
+
+
 class AxieGraphQL:
 
     def __init__(self, **kwargs):
         self.account = kwargs.get('account').replace("ronin:", "0x")
         self.private_key = kwargs.get('private_key')
-        self.request = requests.Session()
-        self.request.mount('https://', HTTPAdapter(max_retries=RETRIES))
+        self.request = rate_limited_session(RETRIES)
         self.user_agent = USER_AGENT
 
     def create_random_msg(self):
@@ -153,6 +750,13 @@ class AxieGraphQL:
         return None
 
     def get_jwt(self):
+        jwt = jwt_cache.get(self.account)
+        if not jwt:
+            jwt = self.create_jwt()
+            jwt_cache.set(self.account, jwt)
+        return jwt
+
+    def create_jwt(self):
         msg = self.create_random_msg()
         if not msg:
             return None
@@ -1,23 +1,36 @@
 """ Axie Scholar Utilities CLI.
 This tool will help you perform various actions.
-They are: payout, claim, generate_secrets, mass_update_secrets, generate_payments, generate_QR,
-transfer_axies, axie_morphing, axie_breeding, generate_breedings
+They are: payout, generate_payout_plan, plan_payout, resume_payout, claim, generate_secrets, mass_update_secrets,
+generate_payments, generate_QR, transfer_axies, axie_morphing, axie_breeding, generate_breedings
 
 Usage:
-    axie_scholar_cli.py payout <payments_file> <secrets_file> [-y]
-    axie_scholar_cli.py managed_payout <secrets_file> <token> [-y]
-    axie_scholar_cli.py claim <payments_file> <secrets_file> [--force]
-    axie_scholar_cli.py managed_claim <secrets_file> <token> [--force]
+    axie_scholar_cli.py payout <payments_file> <secrets_file> [-y] [--workers=<n>] [--journal=<file>]
+                        [--validation-cache=<file>] [--stream] [--pool-size=<n>] [--signing-workers=<n>]
+    axie_scholar_cli.py managed_payout <secrets_file> <token> [-y] [--workers=<n>] [--journal=<file>]
+                        [--validation-cache=<file>] [--pool-size=<n>] [--signing-workers=<n>]
+    axie_scholar_cli.py generate_payout_plan <payments_file> <secrets_file> <plan_file>
+    axie_scholar_cli.py plan_payout <plan_file> <secrets_file> [-y] [--workers=<n>] [--journal=<file>] [--pool-size=<n>]
+                        [--signing-workers=<n>]
+    axie_scholar_cli.py resume_payout <journal_file> <secrets_file> [-y] [--workers=<n>] [--pool-size=<n>]
+                        [--signing-workers=<n>]
+    axie_scholar_cli.py claim <payments_file> <secrets_file> [--force] [--jwt-cache=<file>] [--workers=<n>]
+                        [--validation-cache=<file>] [--stream] [--pool-size=<n>]
+    axie_scholar_cli.py managed_claim <secrets_file> <token> [--force] [--jwt-cache=<file>] [--workers=<n>]
+                        [--validation-cache=<file>] [--pool-size=<n>]
     axie_scholar_cli.py generate_secrets <payments_file> [<secrets_file>]
     axie_scholar_cli.py managed_generate_secrets <secrets_file> <token>
     axie_scholar_cli.py mass_update_secrets <csv_file> <secrets_file>
     axie_scholar_cli.py generate_payments <csv_file> [<payments_file>]
-    axie_scholar_cli.py generate_QR <payments_file> <secrets_file>
-    axie_scholar_cli.py managed_generate_QR <secrets_file> <token>
-    axie_scholar_cli.py axie_morphing <secrets_file> <list_of_accounts>
-    axie_scholar_cli.py axie_breeding <breedings_file> <secrets_file>
+    axie_scholar_cli.py generate_QR <payments_file> <secrets_file> [--jwt-cache=<file>]
+                        [--format=<format>] [--output=<file>]
+    axie_scholar_cli.py managed_generate_QR <secrets_file> <token> [--jwt-cache=<file>]
+                        [--format=<format>] [--output=<file>]
+    axie_scholar_cli.py axie_morphing <secrets_file> <list_of_accounts> [--jwt-cache=<file>] [--axie-index=<file>]
+    axie_scholar_cli.py axie_breeding <breedings_file> <secrets_file> [--stop-on-revert]
+                        [--validation-cache=<file>] [--pool-size=<n>] [--signing-workers=<n>]
     axie_scholar_cli.py generate_breedings <csv_file> [<breedings_file>]
     axie_scholar_cli.py transfer_axies <transfers_file> <secrets_file> [--safe-mode]
+                        [--validation-cache=<file>] [--stream] [--pool-size=<n>] [--signing-workers=<n>]
     axie_scholar_cli.py generate_transfer_axies <csv_file> [<transfers_file>]
     axie_scholar_cli.py -h | --help
     axie_scholar_cli.py --version
@@ -26,6 +39,17 @@ Options:
     -h --help   Shows this extra help options
     -y --yes    Automatically say "yes" to all confirmation promts (they will not appear).
     --force     Forces claim even if last claim was less than 14 days ago. (Used to bypass possible issues)
+    --jwt-cache=<file>  Keeps account access tokens in this file to reuse them across runs.
+    --axie-index=<file>     Keeps axie birth dates and shapes in this file so morph scans skip known axies.
+    --validation-cache=<file>   Remembers validated input files in this file, so unchanged ones are not re-validated.
+    --pool-size=<n>     Connections kept open to each RPC endpoint, 10 if not given.
+    --signing-workers=<n>   Processes signing transactions at the same time, up to 4 (one per CPU) if not given.
+    --format=<format>   QR codes are saved as png or svg files, or printed in the terminal [default: png].
+    --output=<file>     Saves all QR codes in this ZIP or PDF file instead of one file per account.
+    --stop-on-revert    Breeds of an account wait for the previous one and stop at the first one that fails.
+    --workers=<n>   Number of scholar accounts paid (1 if not given) or claimed (25 if not given) at the same time.
+    --journal=<file>    Records every payment in this file so an interrupted payout can be resumed.
+    --stream    Reads the payments or transfers file a batch of accounts at a time instead of all at once.
     --version   Show version.
 """
 import os
@@ -35,18 +59,34 @@ import json
 import logging
 
 from docopt import docopt
-import requests
 
 from axie import (
     AxiePaymentsManager,
     AxieClaimsManager,
     AxieTransferManager,
-    Axies,
+    StreamedPaymentsManager,
+    StreamedClaimsManager,
+    StreamedTransferManager,
     AxieMorphingManager,
     AxieBreedManager,
     QRCodeManager
 )
-from axie.utils import load_json
+from axie.axie_index import AxieIndex
+from axie.axies import find_axies_to_morph
+from axie.claims import CLAIMS_CONCURRENCY
+from axie.qr_archive import archive_format
+from axie.signing import SIGNING_WORKERS
+from axie.qr_code import QR_FORMATS
+from axie.journal import PayoutJournal
+from axie.payout_plan import PayoutPlan
+from axie.utils import (
+    load_json,
+    log_connections_opened,
+    rate_limited_session,
+    jwt_cache,
+    validation_cache,
+    providers
+)
 
 # Setup logger
 os.makedirs('logs', exist_ok=True)
@@ -91,7 +131,7 @@ def generate_transfers_file(csv_file_path, transfer_file_path=None):
 
 def load_payments_file(token):
     url = "https://api.axie.management/external/epithslayer/user/scholars"
-    r = requests.post(url, json={"accessToken": token})
+    r = rate_limited_session().post(url, json={"accessToken": token})
     if r.status_code == 500:
         logging.critical('Something went wrong on axie.management side. Go to their Discord see what is it about!')
     if r.status_code == 426:
@@ -234,9 +274,54 @@ def check_file(file):
     return True
 
 
+def parse_workers(workers, default=1):
+    if workers is None:
+        return default
+    if not workers.isdigit() or int(workers) < 1:
+        logging.critical(f"Number of workers must be a positive integer, got: {workers}")
+        sys.exit()
+    return int(workers)
+
+
+def open_journal(journal_file):
+    return PayoutJournal(journal_file) if journal_file else None
+
+
+def parse_qr_format(fmt):
+    if fmt not in QR_FORMATS:
+        logging.critical(f"QR code format must be one of {', '.join(QR_FORMATS)}, got: {fmt}")
+        sys.exit()
+    return fmt
+
+
+def parse_qr_output(output, fmt):
+    if not output:
+        return None
+    if archive_format(output) is None:
+        logging.critical(f"QR codes can only be saved in a .zip or .pdf file, got: {output}")
+        sys.exit()
+    if fmt == "terminal" or archive_format(output) == "pdf" and fmt != "png":
+        logging.critical(f"QR codes in {fmt} format can not be saved in {output}")
+        sys.exit()
+    return output
+
+
+def parse_pool_size(pool_size):
+    if not pool_size.isdigit() or int(pool_size) < 1:
+        logging.critical(f"Pool size must be a positive integer, got: {pool_size}")
+        sys.exit()
+    return int(pool_size)
+
+
 def run_cli():
     """ Wrapper function for testing purposes"""
     args = docopt(__doc__, version='Axie Scholar Payments CLI v2.0.3')
+    if args['--jwt-cache']:
+        jwt_cache.persist(args['--jwt-cache'])
+    if args['--validation-cache']:
+        validation_cache.persist(args['--validation-cache'])
+    if args['--pool-size']:
+        providers.configure(pool_size=parse_pool_size(args['--pool-size']))
     if args['payout']:
         logging.info("I shall help you pay!")
         payments_file_path = args['<payments_file>']
@@ -245,7 +330,17 @@ def run_cli():
             logging.info('I shall pay my scholars!')
             if args['--yes']:
                 logging.info("Automatic acceptance active, it won't ask before each execution")
-            apm = AxiePaymentsManager(load_json(payments_file_path), load_json(secrets_file_path), auto=args['--yes'])
+            if args['--stream']:
+                apm = StreamedPaymentsManager(payments_file_path, load_json(secrets_file_path), auto=args['--yes'],
+                                              workers=parse_workers(args['--workers']),
+                                              signing_workers=parse_workers(args['--signing-workers'],
+                                                                            SIGNING_WORKERS),
+                                              journal=open_journal(args['--journal']))
+            else:
+                apm = AxiePaymentsManager(load_json(payments_file_path), load_json(secrets_file_path),
+                                          auto=args['--yes'], workers=parse_workers(args['--workers']),
+                                          signing_workers=parse_workers(args['--signing-workers'], SIGNING_WORKERS),
+                                          journal=open_journal(args['--journal']))
             apm.verify_inputs()
             apm.prepare_payout()
         else:
@@ -259,11 +354,54 @@ def run_cli():
             logging.info('I shall pay my scholars!')
             if args['--yes']:
                 logging.info("Automatic acceptance active, it won't ask before each execution")
-            apm = AxiePaymentsManager(payments, load_json(secrets_file_path), auto=args['--yes'])
+            apm = AxiePaymentsManager(payments, load_json(secrets_file_path), auto=args['--yes'],
+                                      workers=parse_workers(args['--workers']),
+                                      signing_workers=parse_workers(args['--signing-workers'], SIGNING_WORKERS),
+                                      journal=open_journal(args['--journal']))
             apm.verify_inputs()
             apm.prepare_payout()
         else:
             logging.critical("Please review your file paths and re-try.")
+    elif args['generate_payout_plan']:
+        payments_file_path = args['<payments_file>']
+        secrets_file_path = args['<secrets_file>']
+        plan_file_path = args['<plan_file>']
+        if check_file(payments_file_path) and check_file(secrets_file_path):
+            apm = AxiePaymentsManager(load_json(payments_file_path), load_json(secrets_file_path))
+            apm.verify_inputs()
+            plan = apm.build_plan()
+            for error in plan.verify():
+                logging.critical(error)
+            plan.save(plan_file_path)
+            logging.info(f"Payout plan saved to {plan_file_path}: {plan.summary()}")
+        else:
+            logging.critical("Please review your file paths and re-try.")
+    elif args['plan_payout']:
+        plan_file_path = args['<plan_file>']
+        secrets_file_path = args['<secrets_file>']
+        if check_file(plan_file_path) and check_file(secrets_file_path):
+            logging.info('I shall pay my scholars!')
+            if args['--yes']:
+                logging.info("Automatic acceptance active, it won't ask before each execution")
+            apm = AxiePaymentsManager({}, load_json(secrets_file_path), auto=args['--yes'],
+                                      workers=parse_workers(args['--workers']),
+                                      signing_workers=parse_workers(args['--signing-workers'], SIGNING_WORKERS),
+                                      journal=open_journal(args['--journal']))
+            apm.execute_plan(PayoutPlan.load(plan_file_path))
+        else:
+            logging.critical("Please review your file paths and re-try.")
+    elif args['resume_payout']:
+        journal_file_path = args['<journal_file>']
+        secrets_file_path = args['<secrets_file>']
+        if check_file(journal_file_path) and check_file(secrets_file_path):
+            logging.info('I shall finish paying my scholars!')
+            apm = AxiePaymentsManager({}, load_json(secrets_file_path), auto=args['--yes'],
+                                      workers=parse_workers(args['--workers']),
+                                      signing_workers=parse_workers(args['--signing-workers'], SIGNING_WORKERS),
+                                      journal=open_journal(journal_file_path))
+            apm.resume_payout()
+        else:
+            logging.critical("Please review your file paths and re-try.")
     elif args['claim']:
         payments_file_path = args['<payments_file>']
         secrets_file_path = args['<secrets_file>']
@@ -271,7 +409,12 @@ def run_cli():
         if check_file(payments_file_path) and check_file(secrets_file_path):
             # Claim SLP
             logging.info('I shall claim SLP')
-            acm = AxieClaimsManager(load_json(payments_file_path), load_json(secrets_file_path), force)
+            if args['--stream']:
+                acm = StreamedClaimsManager(payments_file_path, load_json(secrets_file_path), force,
+                                            concurrency=parse_workers(args['--workers'], CLAIMS_CONCURRENCY))
+            else:
+                acm = AxieClaimsManager(load_json(payments_file_path), load_json(secrets_file_path), force,
+                                        concurrency=parse_workers(args['--workers'], CLAIMS_CONCURRENCY))
             acm.verify_inputs()
             acm.prepare_claims()
         else:
@@ -284,7 +427,8 @@ def run_cli():
         if check_file(secrets_file_path):
             # Claim SLP
             logging.info('I shall claim SLP')
-            acm = AxieClaimsManager(payments, load_json(secrets_file_path), force)
+            acm = AxieClaimsManager(payments, load_json(secrets_file_path), force,
+                                    concurrency=parse_workers(args['--workers'], CLAIMS_CONCURRENCY))
             acm.verify_inputs()
             acm.prepare_claims()
         else:
@@ -338,8 +482,14 @@ def run_cli():
         transfers_file_path = args['<transfers_file>']
         secrets_file_path = args['<secrets_file>']
         secure = args.get("--safe-mode", None)
+        signing_workers = parse_workers(args['--signing-workers'], SIGNING_WORKERS)
         if check_file(transfers_file_path) and check_file(secrets_file_path):
-            atm = AxieTransferManager(transfers_file_path, secrets_file_path, secure=secure)
+            if args['--stream']:
+                atm = StreamedTransferManager(transfers_file_path, secrets_file_path, secure=secure,
+                                              signing_workers=signing_workers)
+            else:
+                atm = AxieTransferManager(transfers_file_path, secrets_file_path, secure=secure,
+                                          signing_workers=signing_workers)
             atm.verify_inputs()
             atm.prepare_transfers()
         else:
@@ -361,8 +511,13 @@ def run_cli():
         secrets_file_path = args['<secrets_file>']
         if check_file(secrets_file_path):
             accs_list = accs.split(',')
+            # Look up the axies of every account at once
+            index = AxieIndex(args['--axie-index']) if args['--axie-index'] else None
+            morphable = find_axies_to_morph(accs_list, index)
+            if index:
+                index.close()
             for acc in accs_list:
-                axies_to_morph = Axies(acc).find_axies_to_morph()
+                axies_to_morph = morphable[acc]
                 if axies_to_morph:
                     axm = AxieMorphingManager(axies_to_morph, acc, secrets_file_path)
                     axm.verify_inputs()
@@ -389,7 +544,9 @@ def run_cli():
                     payment_account = msg
                 else:
                     logging.info(f'Ronin provided ({msg}) looks wrong, try again.')
-            abm = AxieBreedManager(breedings_file_path, secrets_file_path, payment_account)
+            abm = AxieBreedManager(breedings_file_path, secrets_file_path, payment_account,
+                                   stop_on_revert=args['--stop-on-revert'],
+                                   signing_workers=parse_workers(args['--signing-workers'], SIGNING_WORKERS))
             abm.verify_inputs()
             abm.execute()
         else:
@@ -410,7 +567,10 @@ def run_cli():
         payments_file_path = args['<payments_file>']
         secrets_file_path = args['<secrets_file>']
         if check_file(payments_file_path) and check_file(secrets_file_path):
-            qr = QRCodeManager(load_json(payments_file_path), load_json(secrets_file_path), os.path.dirname(secrets_file_path))
+            qr = QRCodeManager(load_json(payments_file_path), load_json(secrets_file_path),
+                               os.path.dirname(secrets_file_path),
+                               fmt=parse_qr_format(args['--format']),
+                               output=parse_qr_output(args['--output'], args['--format']))
             qr.execute()
         else:
             logging.critical("Please review your file paths and re-try.")
@@ -421,7 +581,9 @@ def run_cli():
         payments = load_payments_file(token)
         secrets_file_path = args['<secrets_file>']
         if check_file(secrets_file_path):
-            qr = QRCodeManager(payments, load_json(secrets_file_path), os.path.dirname(secrets_file_path))
+            qr = QRCodeManager(payments, load_json(secrets_file_path), os.path.dirname(secrets_file_path),
+                               fmt=parse_qr_format(args['--format']),
+                               output=parse_qr_output(args['--output'], args['--format']))
             qr.execute()
         else:
             logging.critical("Please review your file paths and re-try.")
@@ -429,3 +591,4 @@ def run_cli():
 
 if __name__ == '__main__':
     run_cli()
+    log_connections_opened()
@@ -0,0 +1,72 @@
+""" Compares building transactions through web3's contract functions with the
+precomputed encoders in axie.calldata.
+
+Usage (from the source folder):
+    python benchmarks/calldata_benchmark.py [<number_of_transactions>]
+"""
+import os
+import sys
+import json
+from timeit import timeit
+
+from web3 import Web3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from axie.calldata import (  # noqa: E402
+    build_transaction,
+    transfer_data,
+    checkpoint_data,
+    safe_transfer_from_data,
+    breed_axies_data
+)
+from axie.utils import SLP_CONTRACT, AXIE_CONTRACT  # noqa: E402
+
+FROM_ACC = "0x" + "ab" * 20
+TO_ACC = "0x" + "cd" * 20
+
+
+def load_contract(address, abi_file):
+    with open(abi_file, encoding='utf-8') as f:
+        abi = json.load(f)
+    return Web3().eth.contract(address=Web3.toChecksumAddress(address), abi=abi)
+
+
+def main(number=5000):
+    contract = load_contract(SLP_CONTRACT, "axie/slp_abi.json")
+    axie_contract = load_contract(AXIE_CONTRACT, "axie/axie_abi.json")
+    checksum_from = Web3.toChecksumAddress(FROM_ACC)
+    checksum_to = Web3.toChecksumAddress(TO_ACC)
+    cases = {
+        "transfer": (
+            lambda: contract.functions.transfer(checksum_to, 100).buildTransaction(
+                {"chainId": 2020, "gas": 246437, "gasPrice": 0, "nonce": 1}),
+            lambda: build_transaction(SLP_CONTRACT, transfer_data(TO_ACC, 100), 1, gas=246437)
+        ),
+        "checkpoint": (
+            lambda: contract.functions.checkpoint(checksum_to, 100, 1639000000, "0x" + "11" * 65).buildTransaction(
+                {"chainId": 2020, "gas": 492874, "gasPrice": 0, "nonce": 1}),
+            lambda: build_transaction(SLP_CONTRACT, checkpoint_data(TO_ACC, 100, 1639000000, "0x" + "11" * 65), 1,
+                                      gas=492874)
+        ),
+        "safeTransferFrom": (
+            lambda: axie_contract.functions.safeTransferFrom(checksum_from, checksum_to, 123456).buildTransaction(
+                {"chainId": 2020, "gas": 492874, "gasPrice": 0, "value": 0, "nonce": 1}),
+            lambda: build_transaction(AXIE_CONTRACT, safe_transfer_from_data(FROM_ACC, TO_ACC, 123456), 1, gas=492874)
+        ),
+        "breedAxies": (
+            lambda: axie_contract.functions.breedAxies(123, 456).buildTransaction(
+                {"chainId": 2020, "gas": 492874, "gasPrice": 0, "nonce": 1}),
+            lambda: build_transaction(AXIE_CONTRACT, breed_axies_data(123, 456), 1, gas=492874)
+        )
+    }
+    for name, (web3_build, fast_build) in cases.items():
+        assert web3_build() == fast_build()
+        web3_time = timeit(web3_build, number=number)
+        fast_time = timeit(fast_build, number=number)
+        print(f"{name}: {number} txs, web3 {web3_time:.3f}s, calldata {fast_time:.3f}s "
+              f"({web3_time / fast_time:.0f}x faster)")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,39 @@
+""" Compares signing a batch of payments with 1, 2, 4 and 8 worker processes.
+Pool start up is included, it is paid once per run of the managers.
+
+Usage (from the source folder):
+    python benchmarks/signing_benchmark.py [<number_of_transactions>]
+"""
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from axie.calldata import build_transaction, transfer_data  # noqa: E402
+from axie.signing import TransactionSigner  # noqa: E402
+from axie.utils import SLP_CONTRACT  # noqa: E402
+
+
+def main(number=2000):
+    keys = ["0x" + f"{i:02x}" * 32 for i in range(1, 51)]
+    transactions = [
+        (build_transaction(SLP_CONTRACT, transfer_data("0x" + "cd" * 20, 100), i, gas=246437), keys[i % len(keys)])
+        for i in range(number)
+    ]
+    print(f"{os.cpu_count()} cpus available")
+    baseline = None
+    for workers in [1, 2, 4, 8]:
+        signer = TransactionSigner(workers)
+        start = perf_counter()
+        signed = signer.sign(transactions)
+        elapsed = perf_counter() - start
+        signer.shutdown()
+        assert len(signed) == number
+        baseline = baseline or elapsed
+        print(f"{workers} workers: {number} txs in {elapsed:.2f}s ({number / elapsed:.0f} tx/s, "
+              f"{baseline / elapsed:.1f}x)")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
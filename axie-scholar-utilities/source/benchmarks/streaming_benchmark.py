@@ -0,0 +1,74 @@
+""" Compares the peak memory and time of validating a payments file loaded at
+once with streaming it through axie.streaming, for rosters of 10k and 100k
+scholars (or the sizes given).
+
+Usage (from the source folder):
+    python benchmarks/streaming_benchmark.py [<number_of_scholars> ...]
+"""
+import os
+import sys
+import json
+import tempfile
+import tracemalloc
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from axie.schemas import schema_errors  # noqa: E402
+from axie.streaming import SCHOLARS_KEYS, iter_items, read_header  # noqa: E402
+from axie.utils import load_json  # noqa: E402
+
+
+def payments(count):
+    return {
+        "scholars": [{
+            "name": f"Scholar {i}",
+            "ronin": "ronin:" + f"{i:040x}",
+            "splits": [
+                {"persona": "Manager", "percentage": 60, "ronin": "ronin:" + "a" * 40},
+                {"persona": "Scholar", "percentage": 40, "ronin": "ronin:" + f"{i:040x}"[::-1]}
+            ]} for i in range(count)],
+        "donations": [{"name": "Entity 1", "ronin": "ronin:" + "b" * 40, "percentage": 1}]
+    }
+
+
+def loaded(path):
+    payments_file = load_json(path)
+    errors = schema_errors(payments_file, "payments")
+    return len(errors) + sum(1 for _ in payments_file["scholars"])
+
+
+def streamed(path):
+    errors = len(schema_errors(read_header(path, SCHOLARS_KEYS), "payments"))
+    for acc in iter_items(path, SCHOLARS_KEYS):
+        errors += len(schema_errors(acc, "payments", item=True))
+    return errors
+
+
+def measure(function, path):
+    tracemalloc.start()
+    start = perf_counter()
+    function(path)
+    elapsed = perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2 ** 20, elapsed
+
+
+def main(sizes=(10000, 100000)):
+    with tempfile.TemporaryDirectory() as folder:
+        for count in sizes:
+            path = os.path.join(folder, f"payments_{count}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(payments(count), f)
+            assert loaded(path) == count and streamed(path) == 0
+            loaded_mb, loaded_time = measure(loaded, path)
+            streamed_mb, streamed_time = measure(streamed, path)
+            print(f"{count} scholars ({os.path.getsize(path) / 2 ** 20:.1f} MB file): "
+                  f"loaded peak {loaded_mb:.1f} MB in {loaded_time:.2f}s, "
+                  f"streamed peak {streamed_mb:.1f} MB in {streamed_time:.2f}s "
+                  f"({loaded_mb / streamed_mb:.0f}x less memory)")
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or (10000, 100000))
@@ -0,0 +1,15 @@
+import pytest
+
+from axie.calldata import checksum
+from axie.utils import contracts
+
+
+@pytest.fixture(autouse=True)
+def clear_contract_cache():
+    """ Most tests mock the ABI files and contracts, make sure those do not
+    leak from test to test through the process wide contract cache """
+    contracts.clear()
+    checksum.cache_clear()
+    yield
+    contracts.clear()
+    checksum.cache_clear()
@@ -1,28 +1,27 @@
 import builtins
 from datetime import datetime, timedelta
 
-from mock import patch, call, mock_open
+from mock import patch, mock_open
 from freezegun import freeze_time
 import requests_mock
+from requests.exceptions import RetryError
 import pytest
 
 from axie import Axies
-from axie.utils import AXIE_CONTRACT, RONIN_PROVIDER, USER_AGENT
+from axie.axies import find_axies_to_morph, get_morph_dates_and_bodies, get_owned_axies
+from axie.utils import AXIE_CONTRACT, BALANCE_OF_SELECTOR, GRAPHQL_URL, RONIN_PROVIDER, get_web3, providers
 
 
 @freeze_time('2021-01-14 01:10:05')
 @patch("web3.eth.Eth.contract", return_value="contract")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("web3.Web3.HTTPProvider", return_value="provider")
-def test_axies_init(mocked_provider, mocked_checksum, mocked_contract):
+@patch("axie.axies.get_web3", wraps=get_web3)
+def test_axies_init(mocked_get_web3, mocked_checksum, mocked_contract):
     with patch.object(builtins,
                       "open",
                       mock_open(read_data='{"foo": "bar"}')):
         a = Axies("ronin:abc1")
-    mocked_provider.assert_called_with(
-        RONIN_PROVIDER,
-        request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-    )
+    mocked_get_web3.assert_called_with(RONIN_PROVIDER)
     mocked_checksum.assert_called_with(AXIE_CONTRACT)
     mocked_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
     assert a.acc == "0xabc1"
@@ -45,122 +44,132 @@ def test_number_of_axies(mocked_checksum, mocked_contract, mocked_balance_of):
     mocked_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
 
 
-@patch("web3.eth.Eth.contract.functions.tokenOfOwnerByIndex")
+@patch("axie.axies.get_owned_axies", return_value={"0xabc1": {1, 2, 3, 4, 5}})
 @patch("web3.eth.Eth.contract")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("axie.Axies.number_of_axies", return_value=5)
-def test_get_axies(mocked_number_of_axies, mocked_checksum, mocked_contract, _):
+def test_get_axies(mocked_checksum, mocked_contract, mocked_owned_axies):
     with patch.object(builtins,
                       "open",
                       mock_open(read_data='{"foo": "bar"}')):
         a = Axies("ronin:abc1")
     axies = a.get_axies()
     mocked_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
-    mocked_number_of_axies.assert_called()
-    mocked_checksum.assert_has_calls(calls=[
-        call(AXIE_CONTRACT), call(a.acc)
-    ])
-    assert len(axies) == 5
+    mocked_owned_axies.assert_called_with(["0xabc1"])
+    assert axies == {1, 2, 3, 4, 5}
+
+
+@patch("axie.axies.get_web3", wraps=get_web3)
+def test_get_owned_axies_batches_in_chunks(_):
+    providers.reset()
+    owned = {"0x" + "a" * 40: [10, 11, 12], "0x" + "b" * 40: [], "0x" + "c" * 40: [30]}
+
+    def callback(request, context):
+        body = request.json()
+        if isinstance(body, dict):
+            return {"jsonrpc": "2.0", "id": body["id"], "result": "0x10"}
+        responses = []
+        for call_ in body:
+            assert call_["params"][1] == "0x10"
+            data = call_["params"][0]["data"]
+            account = "0x" + data[34:74]
+            if data.startswith(BALANCE_OF_SELECTOR):
+                result = hex(len(owned[account]))
+            else:
+                result = "0x" + owned[account][int(data[-64:], 16)].to_bytes(32, "big").hex()
+            responses.append({"jsonrpc": "2.0", "id": call_["id"], "result": result})
+        return responses
+    with requests_mock.Mocker() as req_mocker:
+        req_mocker.post(RONIN_PROVIDER, json=callback)
+        result = get_owned_axies(list(owned), chunk_size=2)
+    assert result == {"0x" + "a" * 40: {10, 11, 12}, "0x" + "b" * 40: set(), "0x" + "c" * 40: {30}}
+    # 1 block number call, 2 balance batches and 2 batches for the 4 axies
+    assert req_mocker.call_count == 5
+    assert [len(r.json()) for r in req_mocker.request_history[3:]] == [2, 2]
+    providers.reset()
+
+
+@patch("axie.axies.token_of_owner_by_index", return_value=99)
+def test_get_owned_axies_retries_failed_calls(mocked_token_of_owner):
+    providers.reset()
+    acc = "0x" + "a" * 40
+    with requests_mock.Mocker() as req_mocker:
+        req_mocker.post(RONIN_PROVIDER, [
+            {"json": {"jsonrpc": "2.0", "id": 0, "result": "0x10"}},
+            {"json": [{"jsonrpc": "2.0", "id": 0, "result": "0x2"}]},
+            {"json": [{"jsonrpc": "2.0", "id": 0, "result": "0x" + "0" * 63 + "1"},
+                      {"jsonrpc": "2.0", "id": 1, "error": {"code": -32000, "message": "boom"}}]}])
+        result = get_owned_axies([acc])
+    mocked_token_of_owner.assert_called_with(acc, 1, "0x10")
+    assert result == {acc: {1, 99}}
+    providers.reset()
 
 
 @freeze_time('2021-01-14 01:10:05')
-@patch("web3.eth.Eth.contract.functions.tokenOfOwnerByIndex")
-@patch("axie.Axies.get_morph_date_and_body", return_value=(None, None))
+@patch("axie.axies.get_morph_dates_and_bodies", return_value={1: (None, None)})
 @patch("web3.eth.Eth.contract")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("axie.Axies.number_of_axies", return_value=1)
-def test_find_axies_to_morph_none_morph_date_shape(mocked_number_of_axies,
-                                                   mocked_checksum,
-                                                   mocked_contract,
-                                                   mocked_get_data,
-                                                   _):
+@patch("axie.Axies.get_axies", return_value={1})
+def test_find_axies_to_morph_none_morph_date_shape(mocked_get_axies, mocked_checksum, mocked_contract, mocked_get_data):
     with patch.object(builtins,
                       "open",
                       mock_open(read_data='{"foo": "bar"}')):
         a = Axies("ronin:abc1")
     axies_to_morph = a.find_axies_to_morph()
     mocked_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
-    mocked_number_of_axies.assert_called()
-    mocked_checksum.assert_has_calls(calls=[
-        call(AXIE_CONTRACT), call(a.acc)
-    ])
-    mocked_get_data.assert_called()
+    mocked_get_axies.assert_called()
+    mocked_get_data.assert_called_with({1})
     assert axies_to_morph == []
 
 
 @freeze_time('2021-01-14 01:10:05')
-@patch("web3.eth.Eth.contract.functions.tokenOfOwnerByIndex")
-@patch("axie.Axies.get_morph_date_and_body", return_value=(datetime(2021, 1, 14, 1, 0, 0), "Normal"))
+@patch("axie.axies.get_morph_dates_and_bodies", return_value={1: (datetime(2021, 1, 14, 1, 0, 0), "Normal")})
 @patch("web3.eth.Eth.contract")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("axie.Axies.number_of_axies", return_value=1)
-def test_find_axies_to_morph_already_adult(mocked_number_of_axies,
-                                           mocked_checksum,
-                                           mocked_contract,
-                                           mocked_get_data,
-                                           _):
+@patch("axie.Axies.get_axies", return_value={1})
+def test_find_axies_to_morph_already_adult(mocked_get_axies, mocked_checksum, mocked_contract, mocked_get_data):
     with patch.object(builtins,
                       "open",
                       mock_open(read_data='{"foo": "bar"}')):
         a = Axies("ronin:abc1")
     axies_to_morph = a.find_axies_to_morph()
     mocked_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
-    mocked_number_of_axies.assert_called()
-    mocked_checksum.assert_has_calls(calls=[
-        call(AXIE_CONTRACT), call(a.acc)
-    ])
-    mocked_get_data.assert_called()
+    mocked_get_axies.assert_called()
+    mocked_get_data.assert_called_with({1})
     assert axies_to_morph == []
 
 
 @freeze_time('2021-01-14 01:10:05')
-@patch("web3.eth.Eth.contract.functions.tokenOfOwnerByIndex")
-@patch("axie.Axies.get_morph_date_and_body", return_value=(datetime(2021, 1, 14, 1, 10, 5)+timedelta(days=2), None))
+@patch("axie.axies.get_morph_dates_and_bodies", return_value={1: (datetime(2021, 1, 14, 1, 10, 5)+timedelta(days=2), None)})
 @patch("web3.eth.Eth.contract")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("axie.Axies.number_of_axies", return_value=1)
-def test_find_axies_to_morph_not_hatch_time(mocked_number_of_axies,
-                                            mocked_checksum,
-                                            mocked_contract,
-                                            mocked_get_data,
-                                            _):
+@patch("axie.Axies.get_axies", return_value={1})
+def test_find_axies_to_morph_not_hatch_time(mocked_get_axies, mocked_checksum, mocked_contract, mocked_get_data):
     with patch.object(builtins,
                       "open",
                       mock_open(read_data='{"foo": "bar"}')):
         a = Axies("ronin:abc1")
     axies_to_morph = a.find_axies_to_morph()
     mocked_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
-    mocked_number_of_axies.assert_called()
-    mocked_checksum.assert_has_calls(calls=[
-        call(AXIE_CONTRACT), call(a.acc)
-    ])
-    mocked_get_data.assert_called()
+    mocked_get_axies.assert_called()
+    mocked_get_data.assert_called_with({1})
     assert axies_to_morph == []
 
 
-@patch("web3.eth.Eth.contract.functions.tokenOfOwnerByIndex")
-@patch("axie.Axies.get_morph_date_and_body", return_value=(datetime(2021, 1, 14, 0, 0, 0), None))
+@freeze_time('2021-01-14 01:10:05')
+@patch("axie.axies.get_morph_dates_and_bodies", return_value={1: (datetime(2021, 1, 14, 0, 0, 0), None)})
 @patch("web3.eth.Eth.contract")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("axie.Axies.number_of_axies", return_value=1)
-@freeze_time('2021-01-14 01:10:05')
-def test_find_axies_to_morph(mocked_number_of_axies,
-                             mocked_checksum,
-                             mocked_contract,
-                             mocked_get_data,
-                             _):
+@patch("axie.Axies.get_axies", return_value={1})
+def test_find_axies_to_morph(mocked_get_axies, mocked_checksum, mocked_contract, mocked_get_data):
     with patch.object(builtins,
                       "open",
                       mock_open(read_data='{"foo": "bar"}')):
         a = Axies("ronin:abc1")
     axies_to_morph = a.find_axies_to_morph()
     mocked_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
-    mocked_number_of_axies.assert_called()
-    mocked_checksum.assert_has_calls(calls=[
-        call(AXIE_CONTRACT), call(a.acc)
-    ])
-    mocked_get_data.assert_called()
-    assert len(axies_to_morph) == 1
+    mocked_get_axies.assert_called()
+    mocked_get_data.assert_called_with({1})
+    assert axies_to_morph == [1]
 
 
 @freeze_time('2021-01-14 01:10:05')
@@ -204,3 +213,52 @@ def test_get_morph_date_body_malformed_json(mocked_json):
         resp = a.get_morph_date_and_body(123)
     
     assert resp == (None, None)
+
+
+@freeze_time('2021-01-14 01:10:05')
+def test_get_morph_dates_and_bodies_aliases_chunks():
+    birth_date = datetime.timestamp(datetime.now())
+    morph_date = datetime.fromtimestamp(birth_date) + timedelta(days=5)
+    with requests_mock.Mocker() as req_mocker:
+        req_mocker.post(GRAPHQL_URL, [
+            {"json": {"data": {"a1": {"id": "1", "bodyShape": None, "birthDate": birth_date},
+                               "a2": {"id": "2", "bodyShape": "Normal", "birthDate": birth_date}}}},
+            {"json": {"data": {"a3": None}, "errors": [{"message": "Axie not found"}]}}])
+        resp = get_morph_dates_and_bodies([1, 2, 2, 3], chunk_size=2)
+    assert resp == {1: (morph_date, None), 2: (morph_date, "Normal"), 3: (None, None)}
+    assert req_mocker.call_count == 2
+    query = req_mocker.request_history[0].json()["query"]
+    assert 'a1: axie(axieId: "1")' in query and 'a2: axie(axieId: "2")' in query
+    assert 'a3: axie(axieId: "3")' in req_mocker.request_history[1].json()["query"]
+
+
+def test_get_morph_dates_and_bodies_no_json():
+    with requests_mock.Mocker() as req_mocker:
+        req_mocker.post(GRAPHQL_URL)
+        resp = get_morph_dates_and_bodies([1, 2])
+    assert resp == {1: (None, None), 2: (None, None)}
+
+
+def test_get_morph_dates_and_bodies_failed_chunk(caplog):
+    with requests_mock.Mocker() as req_mocker:
+        req_mocker.post(GRAPHQL_URL, [
+            {"exc": RetryError("Max retries exceeded")},
+            {"json": {"data": {"a3": {"id": "3", "bodyShape": "Normal", "birthDate": 0}}}}])
+        resp = get_morph_dates_and_bodies([1, 2, 3], chunk_size=2)
+    assert resp == {1: (None, None), 2: (None, None), 3: (datetime.fromtimestamp(0) + timedelta(days=5), "Normal")}
+    assert "Could not look up axies 1 to 2, they are left out. Error: Max retries exceeded" in caplog.text
+
+
+@freeze_time('2021-01-14 01:10:05')
+@patch("axie.axies.get_axie_details", return_value={
+    1: (datetime(2021, 1, 9, 0, 0, 0).timestamp(), None),
+    2: (datetime(2021, 1, 11, 0, 0, 0).timestamp(), None),
+    3: (datetime(2021, 1, 9, 0, 0, 0).timestamp(), None)})
+@patch("axie.axies.get_owned_axies", return_value={"ronin:abc1": {2, 1}, "ronin:abc2": {3}, "ronin:abc3": set()})
+def test_find_axies_to_morph_many_accounts(mocked_owned_axies, mocked_get_data):
+    axies_to_morph = find_axies_to_morph(["ronin:abc1", "ronin:abc2", "ronin:abc3"])
+    mocked_owned_axies.assert_called_with(["ronin:abc1", "ronin:abc2", "ronin:abc3"])
+    # A single lookup for the axies of every account
+    mocked_get_data.assert_called_once()
+    assert sorted(mocked_get_data.call_args[0][0]) == [1, 2, 3]
+    assert axies_to_morph == {"ronin:abc1": [1], "ronin:abc2": [3], "ronin:abc3": []}
@@ -3,11 +3,24 @@ import json
 import builtins
 
 from mock import patch, mock_open, call
+import pytest
+import requests_mock
 
 from axie import AxieBreedManager
-from axie.breeding import Breed, AXIE_CONTRACT
+from axie.breeding import (
+    Breed,
+    AXIE_CONTRACT,
+    BREED_FAILED,
+    BREED_REJECTED,
+    BREED_SKIPPED,
+    BREEDING_AXS_COST,
+    breeding_costs,
+    preflight
+)
+from axie.calldata import breed_axies_data, owner_of_data
 from axie.payments import PaymentsSummary, CREATOR_FEE_ADDRESS
-from axie.utils import RONIN_PROVIDER_FREE, USER_AGENT
+from axie.utils import RONIN_PROVIDER, RONIN_PROVIDER_FREE, RECEIPT_SUCCESS, RECEIPT_REVERTED, get_web3, nonces, providers
+from tests.test_utils import resolved_future
 
 
 @patch("axie.breeding.load_json", return_value={"foo": "bar"})
@@ -26,7 +39,8 @@ def test_breed_manager_init(mock_load):
     assert abm.breeding_costs == 0
 
 
-def test_breed_manager_verify_inputs_succcess(tmpdir):
+@patch("axie.breeding.AxieBreedManager.preflight")
+def test_breed_manager_verify_inputs_succcess(mocked_preflight, tmpdir):
     acc = 'ronin:<accountfoo_address>' + "".join([str(x) for x in range(10)]*4)
     private_acc = '0x<accountfoo_private_address>012345' + "".join([str(x) for x in range(10)]*3)
     s_file = tmpdir.join("s.json")
@@ -41,6 +55,7 @@ def test_breed_manager_verify_inputs_succcess(tmpdir):
     abm = AxieBreedManager(b_file, s_file, acc)
     abm.verify_inputs()
     assert abm.secrets == {acc: private_acc}
+    mocked_preflight.assert_called_once()
 
 
 def test_breed_manager_verify_inputs_fail_validation(tmpdir, caplog):
@@ -156,13 +171,51 @@ def test_breed_manager_calculate_breeding_cost(tmpdir):
     }]
     b_file.write(json.dumps(data))
     abm = AxieBreedManager(b_file, s_file, acc)
-    assert abm.calculate_breeding_cost() == 0
-    abm.breeding_file = list(range(75))
-    assert abm.calculate_breeding_cost() == 0
+    abm.breed_counts = {1234: 0, 5678: 2, 42: 6}
+    assert abm.calculate_breeding_cost() == 450 + 1125
+    assert abm.account_costs == {acc.lower(): {"slp": 450 + 1125, "axs": BREEDING_AXS_COST}}
+    # Each breed makes the next one of the same axie more expensive
+    abm.breeding_file = [{"Sire": 1234, "Matron": 5678, "AccountAddress": acc},
+                         {"Sire": 1234, "Matron": 5678, "AccountAddress": acc}]
+    assert abm.calculate_breeding_cost() == 450 + 1125 + 675 + 1800
+    assert abm.account_costs[acc.lower()]["axs"] == 2 * BREEDING_AXS_COST
+
+
+def test_breeding_costs_max_breeds():
+    acc = "ronin:abc1"
+    breeding_file = [{"Sire": 1234, "Matron": 5678, "AccountAddress": acc},
+                     {"Sire": 42, "Matron": 5678, "AccountAddress": acc}]
+    costs, errors = breeding_costs(breeding_file, {1234: 0, 5678: 6, 42: 0})
+    assert errors == ["Axie 5678 cannot be bred 8 times."]
+    assert costs == {acc: {"slp": 450 + 7650 + 450, "axs": 2 * BREEDING_AXS_COST}}
+
+
+def test_breeding_costs_missing_breed_count():
+    breeding_file = [{"Sire": 1234, "Matron": 5678, "AccountAddress": "ronin:abc1"}]
+    assert breeding_costs(breeding_file, {1234: 0}) == (
+        {}, ["Could not get the breed count of axies [5678], please try again later."])
+
 
+@patch("axie.breeding.check_balances", side_effect=lambda accounts, token, block: {
+    "slp": {"ronin:abc1": 2000, "ronin:fee": 100}, "axs": {"ronin:abc1": BREEDING_AXS_COST, "ronin:fee": 0}}[token])
+@patch("axie.breeding.get_web3")
+@patch("axie.breeding.load_json")
+def test_breed_manager_check_funds(mocked_load_json, mocked_get_web3, mocked_check_balances, caplog):
+    mocked_get_web3.return_value.eth.block_number = 16
+    abm = AxieBreedManager("b.json", "s.json", "ronin:fee")
+    abm.breed_counts = {1: 0, 2: 0, 3: 1, 4: 1}
+    abm.breeding_file = [{"Sire": 1, "Matron": 2, "AccountAddress": "ronin:abc1"}]
+    assert abm.check_funds() is True
+    # Balances of the breeding and payment accounts are read together at the same block
+    mocked_check_balances.assert_has_calls([call(["ronin:abc1", "ronin:fee"], "slp", block="0x10"),
+                                            call(["ronin:abc1", "ronin:fee"], "axs", block="0x10")])
+    abm.breeding_file.append({"Sire": 3, "Matron": 4, "AccountAddress": "ronin:abc1"})
+    assert abm.check_funds() is False
+    assert "Account ronin:abc1 needs 2250 SLP and 1.0 AXS but only has 2000 SLP and 0.5 AXS" in caplog.text
 
-@patch("axie.breeding.check_balance", return_value=1000)
-@patch("axie.breeding.Breed.execute")
+
+@patch("axie.breeding.AxieBreedManager.check_funds", return_value=True)
+@patch("axie.breeding.AxieBreedManager.execute_breeds")
 @patch("axie.breeding.Breed.__init__", return_value=None)
 @patch("axie.payments.Payment.execute")
 @patch("axie.payments.Payment.__init__", return_value=None)
@@ -170,7 +223,7 @@ def test_breed_manager_execute(mock_payments_init,
                                mock_payments_execute,
                                mock_breed_init,
                                mock_bree_execute,
-                               mock_check_balance,
+                               mock_check_funds,
                                tmpdir):
     acc = 'ronin:<accountfoo_address>' + "".join([str(x) for x in range(10)]*4)
     private_acc = '0x<accountfoo_private_address>012345' + "".join([str(x) for x in range(10)]*3)
@@ -189,12 +242,12 @@ def test_breed_manager_execute(mock_payments_init,
     b_file.write(json.dumps(data))
     abm = AxieBreedManager(b_file, s_file, acc)
     abm.execute()
-    mock_check_balance.assert_called_once()
+    mock_check_funds.assert_called_once()
     mock_breed_init.assert_has_calls(calls=[
         call(sire_axie=1234, matron_axie=5678, address=acc, private_key=private_acc),
         call(sire_axie=123, matron_axie=456, address=acc, private_key=private_acc)
     ])
-    assert mock_bree_execute.call_count == 2
+    assert len(mock_bree_execute.call_args[0][0]) == 2
     mock_payments_init.assert_called_with(
         "Breeding Fee",
         "donation",
@@ -207,11 +260,11 @@ def test_breed_manager_execute(mock_payments_init,
 
 
 @patch("axie.payments.Payment.execute")
-@patch("axie.breeding.Breed.execute")
+@patch("axie.breeding.AxieBreedManager.execute_breeds")
 @patch("axie.payments.Payment.__init__", return_value=None)
 @patch("axie.breeding.Breed.__init__", return_value=None)
-@patch("axie.breeding.check_balance", return_value=0)
-def test_breed_manager_execute_not_enough_slp(mock_check_balance, _, __, ___, ____, tmpdir, caplog):
+@patch("axie.breeding.AxieBreedManager.check_funds", return_value=False)
+def test_breed_manager_execute_not_enough_slp(mock_check_funds, _, __, ___, ____, tmpdir, caplog):
     acc = 'ronin:<accountfoo_address>' + "".join([str(x) for x in range(10)]*4)
     private_acc = '0x<accountfoo_private_address>012345' + "".join([str(x) for x in range(10)]*3)
     s_file = tmpdir.join("s.json")
@@ -231,7 +284,7 @@ def test_breed_manager_execute_not_enough_slp(mock_check_balance, _, __, ___, __
     with patch.object(sys, "exit") as mocked_sys:
         abm.execute()
     mocked_sys.assert_called_once()
-    mock_check_balance.assert_called_once()
+    mock_check_funds.assert_called_once()
     assert "Not enough SLP funds to pay for breeding and the fee" in caplog.text
 
 
@@ -247,14 +300,14 @@ def test_breed_init():
 
 @patch("web3.Web3.toHex", return_value="transaction_hash")
 @patch("web3.Web3.keccak", return_value='result_of_keccak')
-@patch("web3.eth.Eth.get_transaction_receipt", return_value={'status': 1})
+@patch("axie.utils.ReceiptWatcher.watch", return_value=resolved_future(RECEIPT_SUCCESS))
 @patch("web3.eth.Eth.send_raw_transaction", return_value="raw_tx")
 @patch("web3.eth.Eth.account.sign_transaction")
 @patch("axie.breeding.get_nonce", return_value=1)
 @patch("web3.eth.Eth.contract")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("web3.Web3.HTTPProvider", return_value="provider")
-def test_breed_execute(mocked_provider,
+@patch("axie.breeding.get_web3", wraps=get_web3)
+def test_breed_execute(mocked_get_web3,
                        mocked_checksum,
                        mocked_contract,
                        mock_get_nonce,
@@ -262,7 +315,8 @@ def test_breed_execute(mocked_provider,
                        mock_raw_send,
                        mock_receipt,
                        mock_keccak,
-                       mock_to_hex):
+                       mock_to_hex,
+                       caplog):
     acc = 'ronin:<accountfoo_address>' + "".join([str(x) for x in range(10)]*4)
     private_acc = '0x<accountfoo_private_address>012345' + "".join([str(x) for x in range(10)]*3)
     with patch.object(builtins,
@@ -271,14 +325,200 @@ def test_breed_execute(mocked_provider,
         b = Breed(sire_axie=123, matron_axie=456, address=acc, private_key=private_acc)
         b.execute()
     mock_get_nonce.assert_called_once()
-    mocked_provider.assert_called_with(
-        RONIN_PROVIDER_FREE,
-        request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-    )
+    mocked_get_web3.assert_called_with(RONIN_PROVIDER_FREE)
     mocked_checksum.assert_called_with(AXIE_CONTRACT)
-    mocked_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
+    mocked_contract.assert_not_called()
+    assert mocked_sign_transaction.call_args[0][0]["data"] == breed_axies_data(123, 456)
     mocked_sign_transaction.assert_called_once()
     mock_raw_send.assert_called_once()
     mock_keccak.assert_called_once()
     mock_to_hex.assert_called_with("result_of_keccak")
     mock_receipt.assert_called_with("transaction_hash")
+    assert f"Breeding axie 123 with 456 in account {acc} about to start!" in caplog.text
+
+
+@patch("axie.utils.ReceiptWatcher.watch", side_effect=lambda hash_: resolved_future(RECEIPT_REVERTED))
+@patch("axie.utils.get_nonce", side_effect=[1, 5])
+@patch("axie.breeding.Breed.send_signed")
+@patch("axie.breeding.load_json")
+def test_breed_manager_execute_breeds_signs_batch(_, mocked_send_signed, mocked_get_nonce, mocked_watch, caplog):
+    acc = 'ronin:<accountfoo_address>' + "".join([str(x) for x in range(10)]*4)
+    nonces.resync(acc)
+    abm = AxieBreedManager("b.json", "s.json", acc)
+    breeds = [Breed(sire_axie=1, matron_axie=2, address=acc, private_key="0xkey"),
+              Breed(sire_axie=3, matron_axie=4, address=acc, private_key="0xkey")]
+    with patch.object(abm.signer, "sign", return_value=[("raw_1", "hash_1"), ("raw_2", "hash_2")]) as mocked_sign:
+        abm.execute_breeds(breeds)
+    signed_txs = mocked_sign.call_args[0][0]
+    assert [tx["nonce"] for tx, _ in signed_txs] == [1, 2]
+    assert [tx["data"] for tx, _ in signed_txs] == [breed_axies_data(1, 2), breed_axies_data(3, 4)]
+    mocked_send_signed.assert_has_calls([call("raw_1"), call("raw_2")])
+    mocked_watch.assert_has_calls([call("hash_1"), call("hash_2")])
+    assert "Important: Breeding axie 1 with 2 in account" in caplog.text
+    # Failed breeds leave a gap, next nonce comes from the chain again
+    assert nonces.next_nonce(acc) == 5
+    nonces.resync(acc)
+
+
+@patch("axie.utils.get_nonce", return_value=1)
+@patch("axie.breeding.load_json")
+def test_breed_manager_execute_breeds_results_by_account(_, mocked_get_nonce, caplog):
+    acc_1, acc_2 = "ronin:" + "ab" * 20, "ronin:" + "ef" * 20
+    nonces.resync(acc_1)
+    nonces.resync(acc_2)
+    abm = AxieBreedManager("b.json", "s.json", acc_1, concurrency=2)
+    breeds = [Breed(sire_axie=1, matron_axie=2, address=acc_1, private_key="0xkey1"),
+              Breed(sire_axie=3, matron_axie=4, address=acc_2, private_key="0xkey2"),
+              Breed(sire_axie=5, matron_axie=6, address=acc_1, private_key="0xkey1"),
+              Breed(sire_axie=7, matron_axie=8, address=acc_1, private_key="0xkey1")]
+    statuses = {"hash_1": RECEIPT_REVERTED, "hash_2": RECEIPT_SUCCESS, "hash_3": RECEIPT_SUCCESS,
+                "hash_4": RECEIPT_SUCCESS}
+    with patch("axie.utils.ReceiptWatcher.watch", side_effect=lambda hash_: resolved_future(statuses[hash_])), \
+         patch("axie.breeding.Breed.send_signed") as mocked_send_signed, \
+         patch.object(abm.signer, "sign", return_value=[(f"raw_{i}", f"hash_{i}") for i in range(1, 5)]):
+        results = abm.execute_breeds(breeds)
+    # Without stop_on_revert every breed is broadcast
+    assert mocked_send_signed.call_count == 4
+    assert [(r["sire"], r["nonce"], r["hash"], r["status"]) for r in results] == [
+        (1, 1, "hash_1", RECEIPT_REVERTED), (3, 1, "hash_2", RECEIPT_SUCCESS),
+        (5, 2, "hash_3", RECEIPT_SUCCESS), (7, 3, "hash_4", RECEIPT_SUCCESS)]
+    assert all(r["latency"] is not None for r in results)
+    assert "Breeding results:" in caplog.text
+    assert "ronin:" + "ab" * 20 + "  1     2       1      reverted" in caplog.text
+    nonces.resync(acc_1)
+    nonces.resync(acc_2)
+
+
+@patch("axie.utils.get_nonce", return_value=1)
+@patch("axie.breeding.load_json")
+def test_breed_manager_execute_breeds_stop_on_revert(_, mocked_get_nonce):
+    acc = "ronin:" + "ab" * 20
+    nonces.resync(acc)
+    abm = AxieBreedManager("b.json", "s.json", acc, stop_on_revert=True)
+    breeds = [Breed(sire_axie=i, matron_axie=i + 1, address=acc, private_key="0xkey") for i in [1, 3, 5]]
+    statuses = {"hash_1": RECEIPT_SUCCESS, "hash_2": RECEIPT_REVERTED}
+    with patch("axie.utils.ReceiptWatcher.watch", side_effect=lambda hash_: resolved_future(statuses[hash_])), \
+         patch("axie.breeding.Breed.send_signed") as mocked_send_signed, \
+         patch.object(abm.signer, "sign", return_value=[(f"raw_{i}", f"hash_{i}") for i in range(1, 4)]):
+        results = abm.execute_breeds(breeds)
+    mocked_send_signed.assert_has_calls([call("raw_1"), call("raw_2")])
+    assert mocked_send_signed.call_count == 2
+    assert [r["status"] for r in results] == [RECEIPT_SUCCESS, RECEIPT_REVERTED, BREED_SKIPPED]
+    assert results[2]["hash"] is None and results[2]["latency"] is None
+    # The skipped breed did not use its nonce
+    assert nonces.next_nonce(acc) == 1
+    nonces.resync(acc)
+
+
+@patch("axie.utils.ReceiptWatcher.watch", side_effect=lambda hash_: resolved_future(RECEIPT_SUCCESS))
+@patch("axie.utils.get_nonce", return_value=1)
+@patch("axie.breeding.load_json")
+def test_breed_manager_execute_breeds_rejected_nonce(_, mocked_get_nonce, mocked_watch):
+    acc = "ronin:" + "ab" * 20
+    nonces.resync(acc)
+    abm = AxieBreedManager("b.json", "s.json", acc)
+    breeds = [Breed(sire_axie=i, matron_axie=i + 1, address=acc, private_key="0xkey") for i in [1, 3]]
+    with patch("axie.breeding.Breed.send_signed", side_effect=ValueError("nonce too low")), \
+         patch.object(abm.signer, "sign", return_value=[("raw_1", "hash_1"), ("raw_2", "hash_2")]):
+        results = abm.execute_breeds(breeds)
+    assert [r["status"] for r in results] == [BREED_REJECTED, BREED_SKIPPED]
+    mocked_watch.assert_not_called()
+    nonces.resync(acc)
+
+
+@patch("axie.utils.ReceiptWatcher.watch", side_effect=lambda hash_: resolved_future(RECEIPT_SUCCESS))
+@patch("axie.utils.get_nonce", return_value=1)
+@patch("axie.breeding.load_json")
+def test_breed_manager_execute_breeds_send_error(_, mocked_get_nonce, mocked_watch, caplog):
+    acc_1, acc_2 = "ronin:" + "ab" * 20, "ronin:" + "cd" * 20
+    nonces.resync(acc_1)
+    nonces.resync(acc_2)
+    abm = AxieBreedManager("b.json", "s.json", acc_1, concurrency=2)
+    breeds = [Breed(sire_axie=1, matron_axie=2, address=acc_1, private_key="0xkey"),
+              Breed(sire_axie=3, matron_axie=4, address=acc_1, private_key="0xkey"),
+              Breed(sire_axie=5, matron_axie=6, address=acc_2, private_key="0xkey")]
+
+    def send_signed(raw_tx):
+        if raw_tx == "raw_1":
+            raise ConnectionError("Connection reset by peer")
+    with patch("axie.breeding.Breed.send_signed", side_effect=send_signed), \
+         patch.object(abm.signer, "sign", return_value=[(f"raw_{i}", f"hash_{i}") for i in range(1, 4)]):
+        results = abm.execute_breeds(breeds)
+    # Only the account that failed stops, the results table is still logged
+    assert [r["status"] for r in results] == [BREED_FAILED, BREED_SKIPPED, RECEIPT_SUCCESS]
+    mocked_watch.assert_called_once_with("hash_3")
+    assert "could not be sent (Nonce: 1). Error: Connection reset by peer" in caplog.text
+    assert "Breeding results:" in caplog.text
+    nonces.resync(acc_1)
+    nonces.resync(acc_2)
+
+
+@patch("axie.breeding.get_breed_counts", return_value={1: 0, 2: 7, 3: 0, 4: 0, 5: 0, 6: 0, 7: 0, 8: 0, 9: 0})
+def test_breeding_preflight(_, caplog):
+    providers.reset()
+    acc = "ronin:" + "ab" * 20
+    owners = {1: acc, 2: acc, 3: acc, 4: "ronin:" + "cd" * 20, 5: acc, 6: acc, 7: acc, 8: acc, 9: acc, 10: acc}
+
+    def callback(request, context):
+        body = request.json()
+        if isinstance(body, dict):
+            return {"jsonrpc": "2.0", "id": body["id"], "result": "0x10"}
+        responses = []
+        for call_ in body:
+            assert call_["params"][1] == "0x10"
+            data = call_["params"][0]["data"]
+            if data[:10] == owner_of_data(0)[:10]:
+                owner = owners[int(data[-64:], 16)].replace("ronin:", "")
+                responses.append({"jsonrpc": "2.0", "id": call_["id"], "result": "0x" + "0" * 24 + owner})
+            elif data == breed_axies_data(5, 6):
+                responses.append({"jsonrpc": "2.0", "id": call_["id"],
+                                  "error": {"code": -32000, "message": "execution reverted"}})
+            else:
+                assert call_["params"][0]["from"] == acc.replace("ronin:", "0x")
+                responses.append({"jsonrpc": "2.0", "id": call_["id"], "result": "0x"})
+        return responses
+    breeding_file = [{"Sire": s, "Matron": m, "AccountAddress": acc}
+                     for s, m in [(1, 2), (3, 4), (5, 6), (7, 8), (9, 10)]]
+    with requests_mock.Mocker() as req_mocker:
+        req_mocker.post(RONIN_PROVIDER, json=callback)
+        valid, breed_counts = preflight(breeding_file, chunk_size=3)
+    assert valid == [breeding_file[3]]
+    assert breed_counts[7] == 0 and breed_counts[8] == 0
+    assert f"Dropping breed of 1 with 2 in account {acc}, axie 2 has reached the breed limit." in caplog.text
+    assert f"Dropping breed of 3 with 4 in account {acc}, axie 4 is not in the account." in caplog.text
+    assert f"Dropping breed of 5 with 6 in account {acc}, it would fail" in caplog.text
+    assert f"Dropping breed of 9 with 10 in account {acc}, could not get the breed count of axie 10." in caplog.text
+    # Block number, 4 batches of owners for 10 axies and 1 batch of simulations
+    assert req_mocker.call_count == 6
+    providers.reset()
+
+
+@patch("axie.breeding.preflight", return_value=([], {}))
+@patch("axie.breeding.load_json")
+def test_breed_manager_preflight_nothing_left(_, mocked_preflight, caplog):
+    abm = AxieBreedManager("b.json", "s.json", "ronin:abc1")
+    with pytest.raises(SystemExit):
+        abm.preflight()
+    assert "None of the breeding pairs can be bred, nothing to do." in caplog.text
+
+
+@patch("axie.breeding.rpc_batch", side_effect=lambda calls, endpoint: [{"result": "0x"} for _ in calls])
+@patch("axie.breeding.get_owners", side_effect=lambda axies, block, chunk_size: {a: "0xabc1" for a in axies})
+@patch("axie.breeding.get_breed_counts", return_value={1: 6, 2: 0, 3: 0, 4: 0})
+@patch("axie.breeding.get_web3")
+@patch("axie.breeding.load_json")
+def test_breed_manager_preflight_breeds_past_limit(mocked_load_json, mocked_get_web3, mocked_breed_counts, _, __,
+                                                   caplog):
+    mocked_get_web3.return_value.eth.block_number = 16
+    pairs = [{"Sire": 1, "Matron": 2, "AccountAddress": "ronin:abc1"},
+             {"Sire": 1, "Matron": 3, "AccountAddress": "ronin:abc1"},
+             {"Sire": 3, "Matron": 4, "AccountAddress": "ronin:abc1"}]
+    abm = AxieBreedManager("b.json", "s.json", "ronin:abc1")
+    abm.breeding_file = pairs
+    abm.preflight()
+    # Axie 1 reaches its 7th and last breed with the first pair, only that pair is dropped
+    assert abm.breeding_file == [pairs[0], pairs[2]]
+    assert "Dropping breed of 1 with 3 in account ronin:abc1, axie 1 reaches the breed limit earlier" in caplog.text
+    assert abm.calculate_breeding_cost() == 7650 + 450 + 450 + 450
+    # Breed counts come from preflight, they are not looked up again
+    mocked_breed_counts.assert_called_once()
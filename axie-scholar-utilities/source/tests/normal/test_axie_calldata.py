@@ -0,0 +1,88 @@
+import json
+
+import pytest
+from web3 import Web3
+
+from axie.calldata import (
+    build_transaction,
+    transfer_data,
+    checkpoint_data,
+    safe_transfer_from_data,
+    breed_axies_data,
+    encode_uint256
+)
+from axie.utils import SLP_CONTRACT, AXIE_CONTRACT
+
+FROM_ACC = "0x" + "ab" * 20
+TO_ACC = "0x" + "cd" * 20
+PRIVATE_KEY = "0x" + "12" * 32
+
+
+def web3_contract(address, abi_file):
+    with open(abi_file, encoding='utf-8') as f:
+        abi = json.load(f)
+    return Web3().eth.contract(address=Web3.toChecksumAddress(address), abi=abi)
+
+
+def assert_same_transaction(expected, actual):
+    assert actual == expected
+    signed_expected = Web3().eth.account.sign_transaction(expected, private_key=PRIVATE_KEY)
+    signed_actual = Web3().eth.account.sign_transaction(actual, private_key=PRIVATE_KEY)
+    assert signed_actual.rawTransaction == signed_expected.rawTransaction
+
+
+@pytest.mark.parametrize("amount", [0, 1, 10, 2**256 - 1])
+def test_transfer_same_as_web3(amount):
+    expected = web3_contract(SLP_CONTRACT, "axie/slp_abi.json").functions.transfer(
+        Web3.toChecksumAddress(TO_ACC),
+        amount
+    ).buildTransaction({"chainId": 2020, "gas": 246437, "gasPrice": 0, "nonce": 7})
+    assert_same_transaction(expected, build_transaction(SLP_CONTRACT, transfer_data(TO_ACC, amount), 7, gas=246437))
+
+
+@pytest.mark.parametrize("signature", ["0x", "0x" + "11" * 32, "0x" + "22" * 65, "0x" + "33" * 100])
+def test_checkpoint_same_as_web3(signature):
+    expected = web3_contract(SLP_CONTRACT, "axie/slp_abi.json").functions.checkpoint(
+        Web3.toChecksumAddress(FROM_ACC),
+        456,
+        1639000000,
+        signature
+    ).buildTransaction({"chainId": 2020, "gas": 492874, "gasPrice": 0, "nonce": 1})
+    data = checkpoint_data(FROM_ACC, 456, 1639000000, signature)
+    assert_same_transaction(expected, build_transaction(SLP_CONTRACT, data, 1, gas=492874))
+
+
+@pytest.mark.parametrize("axie_id", [0, 123456, 2**256 - 1])
+def test_safe_transfer_from_same_as_web3(axie_id):
+    expected = web3_contract(AXIE_CONTRACT, "axie/axie_abi.json").functions.safeTransferFrom(
+        Web3.toChecksumAddress(FROM_ACC),
+        Web3.toChecksumAddress(TO_ACC),
+        axie_id
+    ).buildTransaction({"chainId": 2020, "gas": 492874, "gasPrice": 0, "value": 0, "nonce": 3})
+    data = safe_transfer_from_data(FROM_ACC, TO_ACC, axie_id)
+    assert_same_transaction(expected, build_transaction(AXIE_CONTRACT, data, 3, gas=492874))
+
+
+@pytest.mark.parametrize("sire, matron", [(123, 456), (0, 1), (2**256 - 1, 2**255)])
+def test_breed_axies_same_as_web3(sire, matron):
+    expected = web3_contract(AXIE_CONTRACT, "axie/axie_abi.json").functions.breedAxies(
+        sire,
+        matron
+    ).buildTransaction({"chainId": 2020, "gas": 492874, "gasPrice": 0, "nonce": 9})
+    data = breed_axies_data(sire, matron)
+    assert_same_transaction(expected, build_transaction(AXIE_CONTRACT, data, 9, gas=492874))
+
+
+def test_ronin_addresses_accepted():
+    assert transfer_data("ronin:" + "cd" * 20, 1) == transfer_data(TO_ACC, 1)
+
+
+@pytest.mark.parametrize("value", ["10", 1.5, True, None])
+def test_encode_uint256_rejects_non_integers(value):
+    with pytest.raises(TypeError):
+        encode_uint256(value)
+
+
+def test_encode_address_rejects_wrong_length():
+    with pytest.raises(ValueError):
+        transfer_data("0xabcd", 1)
@@ -1,6 +1,7 @@
 import sys
 import json
 import builtins
+import threading
 from glob import glob
 from datetime import datetime, timedelta
 
@@ -10,10 +11,10 @@ import requests_mock
 from hexbytes import HexBytes
 from eth_account.messages import encode_defunct
 
-from axie import AxieClaimsManager
+from axie import AxieClaimsManager, StreamedClaimsManager
 from axie.claims import Claim
-from axie.utils import SLP_CONTRACT, RONIN_PROVIDER_FREE, USER_AGENT
-from tests.test_utils import async_cleanup_log_file, LOG_FILE_PATH
+from axie.utils import SLP_CONTRACT, RONIN_PROVIDER_FREE, RECEIPT_SUCCESS, get_web3
+from tests.test_utils import async_cleanup_log_file, LOG_FILE_PATH, resolved_future
 
 
 @patch("axie.AxieClaimsManager.load_secrets_and_acc_name", return_value=("foo", "bar"))
@@ -177,20 +178,64 @@ def test_claims_manager_prepare_claims(mocked_claim_execute):
     mocked_claim_execute.assert_called_once()
 
 
+@patch("web3.eth.Eth.contract")
+@patch("axie.claims.Claim.send_claim")
+def test_claims_manager_prepare_claims_concurrently(mocked_send_claim, _):
+    scholars = ['ronin:<account_s{}_address>'.format(i) + "".join([str(x) for x in range(10)]*4) for i in range(3)]
+    p_file = {"scholars": [{"name": f"Scholar {i}", "ronin": acc} for i, acc in enumerate(scholars)]}
+    s_file = {acc: '0x<account_private_address>012345' + "".join([str(x) for x in range(10)]*3) for acc in scholars}
+    # Every claim waits for the others, this only finishes if the three run at the same time
+    barrier = threading.Barrier(3, timeout=5)
+    mocked_send_claim.side_effect = lambda: barrier.wait() and None
+    with patch.object(builtins, "open", mock_open(read_data='{"foo": "bar"}')):
+        axc = AxieClaimsManager(p_file, s_file, concurrency=3)
+        axc.prepare_claims()
+    assert mocked_send_claim.call_count == 3
+    assert not barrier.broken
+
+
+def test_streamed_claims_manager_verify_inputs(tmpdir, caplog):
+    scholars = ['ronin:<account_s{}_address>'.format(i) + "".join([str(x) for x in range(10)]*4) for i in range(3)]
+    f = tmpdir.join("payments.json")
+    f.write(json.dumps({
+        "Manager": "ronin:<manager_address>",
+        "Scholars": [{"Name": f"Scholar {i}", "AccountAddress": acc} for i, acc in enumerate(scholars)]
+    }))
+    s_file = {acc: '0x' + '1' * 64 for acc in scholars}
+    s_file[scholars[2]] = "0xfoo"
+    s_file["ronin:<not_in_payments>"] = "0xfoo"
+    with patch.object(sys, "exit") as mocked_sys:
+        axc = StreamedClaimsManager(str(f), s_file, batch_size=2)
+        axc.verify_inputs()
+    mocked_sys.assert_called()
+    assert f"Private key for account {scholars[2]} is not valid, please review it!" in caplog.text
+    assert "ronin:<not_in_payments>" not in caplog.text
+
+
+@patch("axie.claims.AxieClaimsManager.run_claims")
+def test_streamed_claims_manager_prepare_claims(mocked_run_claims, tmpdir):
+    scholars = ['ronin:<account_s{}_address>'.format(i) + "".join([str(x) for x in range(10)]*4) for i in range(3)]
+    f = tmpdir.join("payments.json")
+    f.write(json.dumps({"scholars": [{"name": f"Scholar {i}", "ronin": acc} for i, acc in enumerate(scholars)]}))
+    s_file = {acc: '0x' + '1' * 64 for acc in scholars}
+    batches = []
+    mocked_run_claims.side_effect = lambda: batches.append(dict(axc.acc_names))
+    axc = StreamedClaimsManager(str(f), s_file, batch_size=2)
+    axc.verify_inputs()
+    axc.prepare_claims()
+    assert batches == [{scholars[0]: "Scholar 0", scholars[1]: "Scholar 1"}, {scholars[2]: "Scholar 2"}]
+
+
 @patch("web3.eth.Eth.contract")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("web3.Web3.HTTPProvider", return_value="provider")
-def test_claim_init(mocked_provider, mocked_checksum, mocked_contract):
+@patch("axie.claims.get_web3", wraps=get_web3)
+def test_claim_init(mocked_get_web3, mocked_checksum, mocked_contract):
     with patch.object(builtins,
                       "open",
                       mock_open(read_data='{"foo": "bar"}')):
         c = Claim(account="ronin:foo", private_key="bar", acc_name="test_acc", force=False)
-    mocked_provider.assert_called_with(
-        RONIN_PROVIDER_FREE,
-        request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-    )
-    mocked_checksum.assert_called_with(SLP_CONTRACT)
-    mocked_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
+    mocked_get_web3.assert_called_with(RONIN_PROVIDER_FREE)
+    mocked_contract.assert_not_called()
     assert c.private_key == "bar"
     assert c.account == "0xfoo"
     assert c.acc_name == "test_acc"
@@ -199,18 +244,14 @@ def test_claim_init(mocked_provider, mocked_checksum, mocked_contract):
 
 @patch("web3.eth.Eth.contract")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("web3.Web3.HTTPProvider", return_value="provider")
-def test_claim_init_force(mocked_provider, mocked_checksum, mocked_contract):
+@patch("axie.claims.get_web3", wraps=get_web3)
+def test_claim_init_force(mocked_get_web3, mocked_checksum, mocked_contract):
     with patch.object(builtins,
                       "open",
                       mock_open(read_data='{"foo": "bar"}')):
         c = Claim(account="ronin:foo", private_key="bar", acc_name="test_acc", force=True)
-    mocked_provider.assert_called_with(
-        RONIN_PROVIDER_FREE,
-        request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-    )
-    mocked_checksum.assert_called_with(SLP_CONTRACT)
-    mocked_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
+    mocked_get_web3.assert_called_with(RONIN_PROVIDER_FREE)
+    mocked_contract.assert_not_called()
     assert c.private_key == "bar"
     assert c.account == "0xfoo"
     assert c.acc_name == "test_acc"
@@ -220,8 +261,8 @@ def test_claim_init_force(mocked_provider, mocked_checksum, mocked_contract):
 @patch("axie.claims.check_balance", return_value=10)
 @patch("web3.eth.Eth.contract")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("web3.Web3.HTTPProvider", return_value="provider")
-def test_has_unclaimed_slp(mocked_provider, mocked_checksum, mocked_contract, mocked_check):
+@patch("axie.claims.get_web3", wraps=get_web3)
+def test_has_unclaimed_slp(mocked_get_web3, mocked_checksum, mocked_contract, mocked_check):
     last_claimed_date = datetime.utcnow() - timedelta(days=15)
     with requests_mock.Mocker() as req_mocker:
         req_mocker.get("https://game-api.skymavis.com/game-api/clients/0xfoo/items/1",
@@ -235,19 +276,15 @@ def test_has_unclaimed_slp(mocked_provider, mocked_checksum, mocked_contract, mo
             unclaimed = c.has_unclaimed_slp()
             assert unclaimed == 2
         mocked_check.assert_called_with("0xfoo")
-        mocked_provider.assert_called_with(
-            RONIN_PROVIDER_FREE,
-            request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-        )
-        mocked_checksum.assert_called_with(SLP_CONTRACT)
-        mocked_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
+        mocked_get_web3.assert_called_with(RONIN_PROVIDER_FREE)
+        mocked_contract.assert_not_called()
 
 
 @patch("axie.claims.check_balance", return_value=10)
 @patch("web3.eth.Eth.contract")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("web3.Web3.HTTPProvider", return_value="provider")
-def test_has_unclaimed_failed_date(mocked_provider, mocked_checksum, mocked_contract, mocked_check):
+@patch("axie.claims.get_web3", wraps=get_web3)
+def test_has_unclaimed_failed_date(mocked_get_web3, mocked_checksum, mocked_contract, mocked_check):
     last_claimed_date = datetime.utcnow() - timedelta(days=14) + timedelta(minutes=1)
     with requests_mock.Mocker() as req_mocker:
         req_mocker.get("https://game-api.skymavis.com/game-api/clients/0xfoo/items/1",
@@ -260,20 +297,16 @@ def test_has_unclaimed_failed_date(mocked_provider, mocked_checksum, mocked_cont
             c = Claim(account="ronin:foo", private_key="0xbar", acc_name="test_acc", force=False)
             unclaimed = c.has_unclaimed_slp()
             assert unclaimed is None
-        mocked_provider.assert_called_with(
-            RONIN_PROVIDER_FREE,
-            request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-        )
-        mocked_checksum.assert_called_with(SLP_CONTRACT)
+        mocked_get_web3.assert_called_with(RONIN_PROVIDER_FREE)
         mocked_check.assert_not_called()
-        mocked_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
+        mocked_contract.assert_not_called()
 
 
 @patch("axie.claims.check_balance", return_value=10)
 @patch("web3.eth.Eth.contract")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("web3.Web3.HTTPProvider", return_value="provider")
-def test_has_unclaimed_date_force(mocked_provider, mocked_checksum, mocked_contract, mocked_check):
+@patch("axie.claims.get_web3", wraps=get_web3)
+def test_has_unclaimed_date_force(mocked_get_web3, mocked_checksum, mocked_contract, mocked_check):
     last_claimed_date = datetime.utcnow() - timedelta(days=14) + timedelta(minutes=1)
     with requests_mock.Mocker() as req_mocker:
         req_mocker.get("https://game-api.skymavis.com/game-api/clients/0xfoo/items/1",
@@ -286,19 +319,15 @@ def test_has_unclaimed_date_force(mocked_provider, mocked_checksum, mocked_contr
             c = Claim(account="ronin:foo", private_key="0xbar", acc_name="test_acc", force=True)
             unclaimed = c.has_unclaimed_slp()
             assert unclaimed == 2
-        mocked_provider.assert_called_with(
-            RONIN_PROVIDER_FREE,
-            request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-        )
-        mocked_checksum.assert_called_with(SLP_CONTRACT)
+        mocked_get_web3.assert_called_with(RONIN_PROVIDER_FREE)
         mocked_check.assert_called()
-        mocked_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
+        mocked_contract.assert_not_called()
 
 
 @patch("web3.eth.Eth.contract")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("web3.Web3.HTTPProvider", return_value="provider")
-def test_has_unclaimed_slp_failed_req(mocked_provider, mocked_checksum, mocked_contract):
+@patch("axie.claims.get_web3", wraps=get_web3)
+def test_has_unclaimed_slp_failed_req(mocked_get_web3, mocked_checksum, mocked_contract):
     with requests_mock.Mocker() as req_mocker:
         req_mocker.get("https://game-api.skymavis.com/game-api/clients/0xfoo/items/1",
                        status_code=500)
@@ -308,12 +337,8 @@ def test_has_unclaimed_slp_failed_req(mocked_provider, mocked_checksum, mocked_c
             c = Claim(account="ronin:foo", private_key="0xbar", acc_name="test_acc", force=False)
             unclaimed = c.has_unclaimed_slp()
             assert unclaimed is None
-        mocked_provider.assert_called_with(
-            RONIN_PROVIDER_FREE,
-            request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-        )
-        mocked_checksum.assert_called_with(SLP_CONTRACT)
-        mocked_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
+        mocked_get_web3.assert_called_with(RONIN_PROVIDER_FREE)
+        mocked_contract.assert_not_called()
 
 
 def test_create_random_msg():
@@ -355,8 +380,8 @@ def test_create_random_msg_fail_wrong_data_req():
 @patch("web3.eth.Eth.account.sign_message", return_value={"signature": HexBytes(b"123")})
 @patch("axie.claims.Claim.create_random_msg", return_value="random_msg")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("web3.Web3.HTTPProvider", return_value="provider")
-def test_get_jwt(mocked_provider, mocked_checksum, mocked_random_msg, mock_sign_message, _):
+@patch("axie.claims.get_web3", wraps=get_web3)
+def test_get_jwt(mocked_get_web3, mocked_checksum, mocked_random_msg, mock_sign_message, _):
     with requests_mock.Mocker() as req_mocker:
         req_mocker.post("https://graphql-gateway.axieinfinity.com/graphql",
                         json={"data": {"createAccessTokenWithSignature": {"accessToken": "test-token"}}})
@@ -378,11 +403,7 @@ def test_get_jwt(mocked_provider, mocked_checksum, mocked_random_msg, mock_sign_
              "{newAccount result accessToken __typename}}"
         }
         assert req_mocker.request_history[0].json() == expected_payload
-    mocked_provider.assert_called_with(
-        RONIN_PROVIDER_FREE,
-        request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-    )
-    mocked_checksum.assert_called_with(SLP_CONTRACT)
+    mocked_get_web3.assert_called_with(RONIN_PROVIDER_FREE)
     mocked_random_msg.assert_called_once()
     mock_sign_message.assert_called_with(encode_defunct(text="random_msg"), private_key=c.private_key)
 
@@ -391,19 +412,15 @@ def test_get_jwt(mocked_provider, mocked_checksum, mocked_random_msg, mock_sign_
 @patch("web3.eth.Eth.account.sign_message", return_value={"signature": HexBytes(b"123")})
 @patch("axie.claims.Claim.create_random_msg", return_value="random_msg")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("web3.Web3.HTTPProvider", return_value="provider")
-def test_get_jwt_fail_req(mocked_provider, mocked_checksum, mocked_random_msg, mock_sign_message, _):
+@patch("axie.claims.get_web3", wraps=get_web3)
+def test_get_jwt_fail_req(mocked_get_web3, mocked_checksum, mocked_random_msg, mock_sign_message, _):
     with requests_mock.Mocker() as req_mocker:
         req_mocker.post("https://graphql-gateway.axieinfinity.com/graphql",
                         status_code=500)
         c = Claim(account="ronin:foo", private_key="0xbar", acc_name="test_acc", force=False)
         jwt = c.get_jwt()
         assert jwt is None
-        mocked_provider.assert_called_with(
-            RONIN_PROVIDER_FREE,
-            request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-        )
-        mocked_checksum.assert_called_with(SLP_CONTRACT)
+        mocked_get_web3.assert_called_with(RONIN_PROVIDER_FREE)
         mocked_random_msg.assert_called_once()
         mock_sign_message.assert_called_with(encode_defunct(text="random_msg"), private_key=c.private_key)
         expected_payload = {
@@ -427,8 +444,8 @@ def test_get_jwt_fail_req(mocked_provider, mocked_checksum, mocked_random_msg, m
 @patch("web3.eth.Eth.account.sign_message", return_value={"signature": HexBytes(b"123")})
 @patch("axie.claims.Claim.create_random_msg", return_value="random_msg")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("web3.Web3.HTTPProvider", return_value="provider")
-def test_jwq_fail_req_content(mocked_provider, mocked_checksum, mocked_random_msg, mock_sign_message, _):
+@patch("axie.claims.get_web3", wraps=get_web3)
+def test_jwq_fail_req_content(mocked_get_web3, mocked_checksum, mocked_random_msg, mock_sign_message, _):
     with requests_mock.Mocker() as req_mocker:
         req_mocker.post("https://graphql-gateway.axieinfinity.com/graphql", json={"data": {}})
         c = Claim(account="ronin:foo", private_key="0xbar", acc_name="test_acc", force=False)
@@ -449,11 +466,7 @@ def test_jwq_fail_req_content(mocked_provider, mocked_checksum, mocked_random_ms
         }
         assert jwt is None
         assert req_mocker.request_history[0].json() == expected_payload
-        mocked_provider.assert_called_with(
-            RONIN_PROVIDER_FREE,
-            request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-        )
-        mocked_checksum.assert_called_with(SLP_CONTRACT)
+        mocked_get_web3.assert_called_with(RONIN_PROVIDER_FREE)
         mocked_random_msg.assert_called_once()
         mock_sign_message.assert_called_with(encode_defunct(text="random_msg"), private_key=c.private_key)
 
@@ -462,8 +475,8 @@ def test_jwq_fail_req_content(mocked_provider, mocked_checksum, mocked_random_ms
 @patch("web3.eth.Eth.account.sign_message", return_value={"signature": HexBytes(b"123")})
 @patch("axie.claims.Claim.create_random_msg", return_value="random_msg")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("web3.Web3.HTTPProvider", return_value="provider")
-def test_jwq_fail_req_content_2(mocked_provider, mocked_checksum, mocked_random_msg, mock_sign_message, _):
+@patch("axie.claims.get_web3", wraps=get_web3)
+def test_jwq_fail_req_content_2(mocked_get_web3, mocked_checksum, mocked_random_msg, mock_sign_message, _):
     with requests_mock.Mocker() as req_mocker:
         req_mocker.post("https://graphql-gateway.axieinfinity.com/graphql",
                         json={"data": {"createAccessTokenWithSignature": {}}})
@@ -485,11 +498,7 @@ def test_jwq_fail_req_content_2(mocked_provider, mocked_checksum, mocked_random_
         }
         assert req_mocker.request_history[0].json() == expected_payload
         assert jwt is None
-        mocked_provider.assert_called_with(
-            RONIN_PROVIDER_FREE,
-            request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-        )
-        mocked_checksum.assert_called_with(SLP_CONTRACT)
+        mocked_get_web3.assert_called_with(RONIN_PROVIDER_FREE)
         mocked_random_msg.assert_called_once()
         mock_sign_message.assert_called_with(encode_defunct(text="random_msg"), private_key=c.private_key)
 
@@ -497,7 +506,7 @@ def test_jwq_fail_req_content_2(mocked_provider, mocked_checksum, mocked_random_
 @pytest.mark.asyncio
 @patch("web3.Web3.toHex", return_value="transaction_hash")
 @patch("web3.Web3.keccak", return_value='result_of_keccak')
-@patch("web3.eth.Eth.get_transaction_receipt", return_value={'status': 1})
+@patch("axie.utils.ReceiptWatcher.watch", return_value=resolved_future(RECEIPT_SUCCESS))
 @patch("web3.eth.Eth.send_raw_transaction", return_value="raw_tx")
 @patch("web3.eth.Eth.account.sign_transaction")
 @patch("axie.claims.get_nonce", return_value=1)
@@ -506,8 +515,10 @@ def test_jwq_fail_req_content_2(mocked_provider, mocked_checksum, mocked_random_
 @patch("axie.claims.check_balance", return_value=123)
 @patch("web3.eth.Eth.contract")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("web3.Web3.HTTPProvider", return_value="provider")
-async def test_claim_execution(mocked_provider,
+@patch("axie.claims.get_web3", wraps=get_web3)
+@patch("axie.claims.checkpoint_data", return_value="0xdata")
+async def test_claim_execution(mocked_checkpoint_data,
+                               mocked_get_web3,
                                mocked_checksum,
                                mocked_contract,
                                moocked_check_balance,
@@ -541,12 +552,9 @@ async def test_claim_execution(mocked_provider,
             )
             c = Claim(account="ronin:foo", private_key="0x00003A01C01173D676B64123", acc_name="test_acc", force=False)
             await c.execute()
-    mocked_provider.assert_called_with(
-        RONIN_PROVIDER_FREE,
-        request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-    )
-    mocked_checksum.assert_has_calls([call(SLP_CONTRACT), call("0xfoo")])
-    mocked_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
+    mocked_get_web3.assert_called_with(RONIN_PROVIDER_FREE)
+    assert mocked_checkpoint_data.call_args[0][0] == "0xfoo"
+    mocked_contract.assert_not_called()
     moocked_check_balance.assert_called_with("0xfoo")
     mocked_unclaimed_slp.assert_called_once()
     assert c.private_key == "0x00003A01C01173D676B64123"
@@ -570,7 +578,7 @@ async def test_claim_execution(mocked_provider,
 @pytest.mark.asyncio
 @patch("web3.Web3.toHex", return_value="transaction_hash")
 @patch("web3.Web3.keccak", return_value='result_of_keccak')
-@patch("web3.eth.Eth.get_transaction_receipt", return_value={'status': 1})
+@patch("axie.utils.ReceiptWatcher.watch", return_value=resolved_future(RECEIPT_SUCCESS))
 @patch("web3.eth.Eth.send_raw_transaction", return_value="raw_tx")
 @patch("web3.eth.Eth.account.sign_transaction")
 @patch("axie.claims.get_nonce", return_value=1)
@@ -579,8 +587,10 @@ async def test_claim_execution(mocked_provider,
 @patch("axie.claims.check_balance", return_value=123)
 @patch("web3.eth.Eth.contract")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("web3.Web3.HTTPProvider", return_value="provider")
-async def test_execution_failed_get_blockchain(mocked_provider,
+@patch("axie.claims.get_web3", wraps=get_web3)
+@patch("axie.claims.checkpoint_data", return_value="0xdata")
+async def test_execution_failed_get_blockchain(mocked_checkpoint_data,
+                                               mocked_get_web3,
                                                mocked_checksum,
                                                mocked_contract,
                                                moocked_check_balance,
@@ -610,12 +620,9 @@ async def test_execution_failed_get_blockchain(mocked_provider,
             )
             c = Claim(account="ronin:foo", private_key="0x00003A01C01173D676B64123", acc_name="test_acc", force=False)
             await c.execute()
-        mocked_provider.assert_called_with(
-            RONIN_PROVIDER_FREE,
-            request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-        )
-        mocked_checksum.assert_called_with('0xa8754b9fa15fc18bb59458815510e40a12cd2014')
-        mocked_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
+        mocked_get_web3.assert_called_with(RONIN_PROVIDER_FREE)
+        mocked_checkpoint_data.assert_not_called()
+        mocked_contract.assert_not_called()
         moocked_check_balance.assert_not_called()
         mocked_unclaimed_slp.assert_called_once()
         assert c.private_key == "0x00003A01C01173D676B64123"
@@ -0,0 +1,52 @@
+from datetime import datetime
+
+from mock import patch
+from freezegun import freeze_time
+
+from axie.axie_index import AxieIndex
+from axie.axies import find_axies_to_morph
+
+BIRTH = int(datetime(2021, 1, 1).timestamp())
+
+
+def test_index_store_and_get(tmpdir):
+    index = AxieIndex(str(tmpdir.join("axies.db")))
+    index.store({1: (BIRTH, None), 2: (BIRTH, "Normal")}, {1: "ronin:abc", 2: "ronin:abc"})
+    index.store({1: (BIRTH, "Curly")}, {1: "ronin:abc"})
+    assert index.get([1, 2, 3]) == {1: (BIRTH, "Curly"), 2: (BIRTH, "Normal")}
+    assert index.get([]) == {}
+    index.close()
+    # Entries persist across runs
+    index = AxieIndex(str(tmpdir.join("axies.db")))
+    assert index.get([2]) == {2: (BIRTH, "Normal")}
+    index.close()
+
+
+def test_index_sync_evicts_axies_no_longer_owned(tmpdir):
+    index = AxieIndex(str(tmpdir.join("axies.db")))
+    index.store({1: (BIRTH, None), 2: (BIRTH, None), 3: (BIRTH, None), 4: (BIRTH, None)},
+                {1: "ronin:abc", 2: "ronin:abc", 3: "0xdef", 4: "0x123"})
+    # Axie 2 moved to def, axie 3 was sold and 0x123 was not scanned
+    evicted = index.sync({"ronin:abc": {1}, "ronin:def": {2}})
+    assert evicted == 1
+    assert set(index.get([1, 2, 3, 4])) == {1, 2, 4}
+    assert index.sync({"0xdef": set()}) == 1
+    assert set(index.get([1, 2, 3, 4])) == {1, 4}
+    index.close()
+
+
+@freeze_time('2021-01-14 01:10:05')
+@patch("axie.axies.get_owned_axies", return_value={"ronin:abc": {1, 2, 3, 4}})
+def test_find_axies_to_morph_uses_index(_, tmpdir):
+    index = AxieIndex(str(tmpdir.join("axies.db")))
+    details = {1: (BIRTH, None), 2: (BIRTH, "Normal"), 3: (int(datetime(2021, 1, 13).timestamp()), None),
+               4: (BIRTH, None)}
+    with patch("axie.axies.get_axie_details", return_value=details) as mocked_details:
+        assert find_axies_to_morph(["ronin:abc"], index) == {"ronin:abc": [1, 4]}
+    assert sorted(mocked_details.call_args[0][0]) == [1, 2, 3, 4]
+    # Axie 4 got morphed, only the ones that could have been morphed are looked up again
+    with patch("axie.axies.get_axie_details", return_value={1: (BIRTH, None), 4: (BIRTH, "Big")}) as mocked_details:
+        assert find_axies_to_morph(["ronin:abc"], index) == {"ronin:abc": [1]}
+    assert sorted(mocked_details.call_args[0][0]) == [1, 4]
+    assert index.get([4]) == {4: (BIRTH, "Big")}
+    index.close()
@@ -0,0 +1,156 @@
+import builtins
+
+from mock import patch, call
+
+from axie import AxiePaymentsManager
+from axie.journal import PayoutJournal, PLANNED, SENT, SUCCESS, FAILED, CANCELED
+from axie.payments import Payment, PaymentsSummary
+from axie.payout_plan import PayoutPlan
+from axie.utils import RECEIPT_SUCCESS, RECEIPT_REVERTED, nonces
+from tests.test_utils import resolved_future
+
+SCHOLAR_1 = "ronin:" + "1" * 40
+SCHOLAR_2 = "ronin:" + "2" * 40
+PRIVATE_KEY = "0x" + "4" * 64
+
+
+def plan():
+    accounts = []
+    for name, ronin in [("Scholar 1", SCHOLAR_1), ("Scholar 2", SCHOLAR_2)]:
+        acc = PayoutPlan.account(name, ronin, 100)
+        acc["payments"] = [
+            {"name": f"Payment to Manager of {name}", "type": "manager", "to": "ronin:" + "a" * 40, "amount": 60},
+            {"name": f"Payment to Scholar of {name}", "type": "scholar", "to": "ronin:" + "b" * 40, "amount": 40}
+        ]
+        accounts.append(acc)
+    return PayoutPlan(accounts)
+
+
+def statuses(journal, payout_id):
+    rows = journal.db.execute("SELECT id, status, nonce, hash FROM payments WHERE payout_id = ? ORDER BY id",
+                              (payout_id,)).fetchall()
+    return [tuple(row) for row in rows]
+
+
+def test_journal_records_payments(tmpdir):
+    journal = PayoutJournal(str(tmpdir.join("journal.db")))
+    payout_id, ids = journal.start(plan())
+    assert journal.last_payout() == payout_id
+    assert ids == [[1, 2], [3, 4]]
+    journal.signed(1, 5, "0xhash1", "0xraw1")
+    journal.update(1, SENT)
+    journal.update(2, SUCCESS)
+    journal.cancel([3])
+    assert statuses(journal, payout_id) == [
+        (1, SENT, 5, "0xhash1"), (2, SUCCESS, None, None), (3, CANCELED, None, None), (4, PLANNED, None, None)]
+    outstanding = journal.outstanding(payout_id)
+    assert [row["id"] for row in outstanding] == [1, 4]
+    assert outstanding[0]["raw_tx"] == "0xraw1"
+    assert outstanding[1]["account"] == SCHOLAR_2
+    assert outstanding[1]["amount"] == 40
+    journal.close()
+    # Everything is on disk
+    assert PayoutJournal(str(tmpdir.join("journal.db"))).last_payout() == payout_id
+
+
+
+def test_journal_start_adds_to_payout(tmpdir):
+    journal = PayoutJournal(str(tmpdir.join("journal.db")))
+    payout_id, _ = journal.start(plan())
+    same_id, ids = journal.start(plan(), payout_id)
+    assert same_id == payout_id
+    assert ids == [[5, 6], [7, 8]]
+    assert len(statuses(journal, payout_id)) == 8
+
+@patch("axie.utils.ReceiptWatcher.watch", side_effect=lambda hash_: resolved_future(RECEIPT_SUCCESS))
+@patch("axie.utils.get_nonce", return_value=3)
+@patch("axie.payments.Payment.send_signed")
+@patch("axie.payments.check_balances", side_effect=lambda accounts: {acc: 100 for acc in accounts})
+def test_execute_plan_journals_payments(_, mocked_send_signed, __, ___, tmpdir):
+    nonces.resync(SCHOLAR_1)
+    journal = PayoutJournal(str(tmpdir.join("journal.db")))
+    PaymentsSummary().clear()
+    axp = AxiePaymentsManager({}, {SCHOLAR_1: PRIVATE_KEY, SCHOLAR_2: PRIVATE_KEY}, journal=journal)
+    answers = iter(["y", "n"])
+    with patch.object(axp.signer, "sign",
+                      side_effect=lambda txs: [(f"0xraw{tx['nonce']}", f"0xhash{tx['nonce']}") for tx, _ in txs]):
+        with patch.object(builtins, 'input', lambda _: next(answers)):
+            axp.execute_plan(plan())
+    mocked_send_signed.assert_has_calls([call("0xraw3"), call("0xraw4")])
+    payout_id = journal.last_payout()
+    assert statuses(journal, payout_id) == [
+        (1, SUCCESS, 3, "0xhash3"), (2, SUCCESS, 4, "0xhash4"), (3, CANCELED, None, None), (4, CANCELED, None, None)]
+    assert journal.outstanding(payout_id) == []
+    assert journal.db.execute("SELECT finished_at FROM payouts").fetchone()[0] is not None
+    nonces.resync(SCHOLAR_1)
+
+
+@patch("axie.AxiePaymentsManager.payout_account")
+@patch("axie.payments.check_balances", side_effect=lambda accounts: {acc: 100 for acc in accounts})
+@patch("axie.utils.ReceiptWatcher.watch", side_effect=lambda hash_: resolved_future(RECEIPT_SUCCESS))
+@patch("axie.payments.Payment.send_signed")
+@patch("axie.payments.get_nonce", side_effect=lambda acc: {SCHOLAR_1: 10, SCHOLAR_2: 20}[acc])
+@patch("axie.payments.check_receipts")
+def test_resume_payout(mocked_check_receipts, mocked_get_nonce, mocked_send_signed, mocked_watch, mocked_balances,
+                       mocked_payout, tmpdir, caplog):
+    journal = PayoutJournal(str(tmpdir.join("journal.db")))
+    payout_id, _ = journal.start(plan())
+    # Scholar 1: first payment landed, second is still waiting in the pool
+    journal.signed(1, 9, "0xlanded", "0x01")
+    journal.signed(2, 10, "0xpending", "0x02")
+    # Scholar 2: first one reverted, second one was dropped and its nonce used by something else
+    journal.signed(3, 18, "0xreverted", "0x03")
+    journal.update(3, FAILED)
+    journal.signed(4, 19, "0xdropped", "0x04")
+    mocked_check_receipts.return_value = {"0xlanded": RECEIPT_SUCCESS, "0xpending": None,
+                                          "0xreverted": RECEIPT_REVERTED, "0xdropped": None}
+    PaymentsSummary().clear()
+    axp = AxiePaymentsManager({}, {SCHOLAR_1: PRIVATE_KEY, SCHOLAR_2: PRIVATE_KEY}, auto=True, journal=journal)
+    axp.resume_payout()
+    mocked_check_receipts.assert_called_once_with(["0xlanded", "0xpending", "0xreverted", "0xdropped"])
+    assert mocked_get_nonce.call_count == 2
+    # The pending one goes out again exactly as it was signed
+    mocked_send_signed.assert_called_once_with(b"\x02")
+    mocked_watch.assert_called_once_with("0xpending")
+    assert statuses(journal, payout_id)[:2] == [(1, SUCCESS, 9, "0xlanded"), (2, SUCCESS, 10, "0xpending")]
+    # Only Scholar 2 payments are paid again
+    mocked_balances.assert_called_once_with([SCHOLAR_2])
+    mocked_payout.assert_called_once()
+    assert mocked_payout.call_args[0][0] == "Scholar 2"
+    payments = mocked_payout.call_args[0][1]
+    assert [(p.name, p.amount, p.journal_id) for p in payments] == [
+        ("Payment to Manager of Scholar 2", 60, 3), ("Payment to Scholar of Scholar 2", 40, 4)]
+    assert all(isinstance(p, Payment) and p.from_private == PRIVATE_KEY for p in payments)
+    assert "Payment to Manager of Scholar 1(ronin:" + "a" * 40 + ") for the amount of 60 SLP completed!" in caplog.text
+
+
+@patch("axie.AxiePaymentsManager.payout_account")
+@patch("axie.payments.check_balances", side_effect=lambda accounts: {acc: 100 for acc in accounts})
+@patch("axie.payments.get_nonce")
+@patch("axie.payments.check_receipts")
+def test_resume_payout_transaction_mined_while_checking(mocked_check_receipts, mocked_get_nonce, mocked_balances,
+                                                        mocked_payout, tmpdir):
+    journal = PayoutJournal(str(tmpdir.join("journal.db")))
+    journal.start(plan())
+    journal.signed(1, 10, "0xslow", "0x01")
+    mined = []
+
+    def get_nonce(acc):
+        # The transaction lands on chain right after its account nonce is read
+        mined.append(acc)
+        return 10
+
+    mocked_get_nonce.side_effect = get_nonce
+    mocked_check_receipts.side_effect = lambda hashes: {h: RECEIPT_SUCCESS if mined else None for h in hashes}
+    PaymentsSummary().clear()
+    axp = AxiePaymentsManager({}, {SCHOLAR_1: PRIVATE_KEY, SCHOLAR_2: PRIVATE_KEY}, auto=True, journal=journal)
+    axp.resume_payout()
+    assert journal.db.execute("SELECT status FROM payments WHERE id = 1").fetchone()[0] == SUCCESS
+    payments = [p for c in mocked_payout.call_args_list for p in c[0][1]]
+    assert 1 not in [p.journal_id for p in payments]
+
+
+def test_resume_payout_nothing_to_do(tmpdir, caplog):
+    journal = PayoutJournal(str(tmpdir.join("journal.db")))
+    AxiePaymentsManager({}, {}, journal=journal).resume_payout()
+    assert "Nothing to resume, every journaled payment is done." in caplog.text
@@ -1,16 +1,20 @@
 import os
 import sys
+import json
 import builtins
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import sleep
 
-from mock import patch, call, mock_open
+from mock import patch, call, mock_open, Mock
 from glob import glob
 import pytest
 
-from axie import AxiePaymentsManager
+from axie import AxiePaymentsManager, StreamedPaymentsManager
 from axie.payments import Payment, PaymentsSummary
-from axie.utils import SLP_CONTRACT
-from tests.test_utils import LOG_FILE_PATH, cleanup_log_file
+from axie.utils import SLP_CONTRACT, RECEIPT_SUCCESS, RECEIPT_REVERTED, nonces, validation_cache
+from tests.test_utils import LOG_FILE_PATH, cleanup_log_file, resolved_future
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -252,6 +256,75 @@ def test_payments_manager_verify_input_donations_exceed_max(caplog):
     assert "Error given: 100 is greater than the maximum of 98\nFor attribute in: ['Donations', 0, 'Percent']" in caplog.text
 
 
+@patch("axie.payments.schema_errors", return_value=[])
+def test_payments_manager_verify_input_validation_cache(mocked_schema_errors, tmpdir, caplog):
+    manager_acc = 'ronin:<manager_address>000' + "".join([str(x) for x in range(10)]*2)
+    scholar_acc = 'ronin:<account_s1_address>' + "".join([str(x) for x in range(10)]*2)
+    scholar_private_acc = '0x<account_s1_private_address>012345' + "".join([str(x) for x in range(10)]*3)
+    p_file = {
+        "Manager": manager_acc,
+        "Scholars": [
+            {
+                "Name": "Scholar 1",
+                "AccountAddress": scholar_acc,
+                "ScholarPayoutAddress": "ronin:<scholar_address>",
+                "ScholarPercent": 50
+            }]
+    }
+    s_file = {scholar_acc: scholar_private_acc}
+    validation_cache.persist(str(tmpdir.join("validated.json")))
+    try:
+        AxiePaymentsManager(p_file, s_file).verify_inputs()
+        assert mocked_schema_errors.call_count == 1
+        axp = AxiePaymentsManager(p_file, s_file)
+        axp.verify_inputs()
+        # Unchanged files are not validated again, but the accounts are still loaded
+        assert mocked_schema_errors.call_count == 1
+        assert "Files did not change since they were last validated, skipping validation." in caplog.text
+        assert axp.type == "legacy"
+        assert axp.manager_acc == manager_acc
+        assert axp.scholar_accounts == p_file["Scholars"]
+        # Any change in either file validates them again
+        p_file["Scholars"][0]["ScholarPercent"] = 60
+        AxiePaymentsManager(p_file, s_file).verify_inputs()
+        assert mocked_schema_errors.call_count == 2
+        AxiePaymentsManager(p_file, {scholar_acc: scholar_private_acc[:-1] + "0"}).verify_inputs()
+        assert mocked_schema_errors.call_count == 3
+    finally:
+        validation_cache.clear()
+
+
+def test_payments_manager_verify_input_reports_all_errors(caplog):
+    manager_acc = 'ronin:<manager_address>000' + "".join([str(x) for x in range(10)]*2)
+    scholar_acc = 'ronin:<account_s1_address>' + "".join([str(x) for x in range(10)]*2)
+    scholar_private_acc = '0x<account_s1_private_address>012345' + "".join([str(x) for x in range(10)]*3)
+    p_file = {
+        "Manager": manager_acc,
+        "Scholars": [
+            {
+                "Name": "Scholar 1",
+                "AccountAddress": scholar_acc,
+                "ScholarPayoutAddress": "ronin:<scholar_address>",
+                "ScholarPercent": 101
+            }],
+        "Donations": [
+            {
+                "Name": "Entity 1",
+                "AccountAddress": "foo",
+                "Percent": 1
+            }]
+    }
+    s_file = {scholar_acc: scholar_private_acc}
+    with patch.object(sys, "exit") as mocked_sys:
+        axp = AxiePaymentsManager(p_file, s_file)
+        axp.verify_inputs()
+    mocked_sys.assert_called()
+    assert "If you were tyring to pay using the legacy format" in caplog.text
+    assert "current format" not in caplog.text
+    assert "For attribute in: ['Scholars', 0, 'ScholarPercent']" in caplog.text
+    assert "Error given: 'foo' does not match '^ronin:'\nFor attribute in: ['Donations', 0, 'AccountAddress']" in caplog.text
+
+
 def test_payments_manager_verify_input_missing_private_key(caplog):
     scholar_acc = 'ronin:<account_s1_address>' + "".join([str(x) for x in range(10)]*2)
     manager_acc = 'ronin:<manager_address>000' + "".join([str(x) for x in range(10)]*2)
@@ -337,7 +410,7 @@ def test_payments_manager_prepare_payout_check_correct_calcs_new(mocked_prepare_
     mocked_prepare_new_payout.assert_called_once()
 
 
-@patch("axie.payments.check_balance", return_value=1000)
+@patch("axie.payments.check_balances", side_effect=lambda accounts: {acc: 1000 for acc in accounts})
 @patch("axie.AxiePaymentsManager.payout_account")
 @patch("axie.AxiePaymentsManager.check_acc_has_enough_balance", return_value=True)
 def test_payments_manager_prepare_payout_check_correct_payments_legacy(mocked_enough_balance,
@@ -402,7 +475,7 @@ def test_payments_manager_prepare_payout_check_correct_payments_legacy(mocked_en
     assert len(mocked_payout.call_args[0][1]) == 5
 
 
-@patch("axie.payments.check_balance", return_value=1000)
+@patch("axie.payments.check_balances", side_effect=lambda accounts: {acc: 1000 for acc in accounts})
 @patch("axie.AxiePaymentsManager.payout_account")
 @patch("axie.AxiePaymentsManager.check_acc_has_enough_balance", return_value=True)
 def test_payments_manager_prepare_payout_check_correct_payments_new(mocked_enough_balance,
@@ -486,7 +559,7 @@ def test_payments_manager_prepare_payout_check_correct_payments_new(mocked_enoug
     assert len(mocked_payout.call_args[0][1]) == 6
 
 
-@patch("axie.payments.check_balance", return_value=0)
+@patch("axie.payments.check_balances", side_effect=lambda accounts: {acc: 0 for acc in accounts})
 @patch("axie.AxiePaymentsManager.payout_account")
 @patch("axie.AxiePaymentsManager.check_acc_has_enough_balance", return_value=True)
 def test_payments_manager_prepare_payout_check_correct_payments_percent_no_balance(mocked_enough_balance,
@@ -518,12 +591,12 @@ def test_payments_manager_prepare_payout_check_correct_payments_percent_no_balan
     axp = AxiePaymentsManager(p_file, s_file)
     axp.verify_inputs()
     axp.prepare_payout()
-    mocked_check_balance.assert_called()
-    mocked_enough_balance.assert_called_with(scholar_acc, 0)
+    mocked_check_balance.assert_called_with([scholar_acc])
+    mocked_enough_balance.assert_not_called()
     mocked_payout.assert_not_called()
 
 
-@patch("axie.payments.check_balance", return_value=100)
+@patch("axie.payments.check_balances", side_effect=lambda accounts: {acc: 100 for acc in accounts})
 @patch("axie.AxiePaymentsManager.payout_account")
 @patch("axie.AxiePaymentsManager.check_acc_has_enough_balance", return_value=False)
 def test_payments_manager_prepare_no_payout_not_enough_balance(mocked_check_balance,
@@ -559,11 +632,24 @@ def test_payments_manager_prepare_no_payout_not_enough_balance(mocked_check_bala
     mocked_payout.assert_not_called()
 
 
-@patch("axie.payments.check_balance", return_value=1000)
-@patch("axie.payments.Payment.execute", return_value=("abc123", True))
+@patch("axie.payments.check_balance")
+def test_payments_manager_check_enough_balance_uses_prefetched(mocked_check_balance, caplog):
+    axp = AxiePaymentsManager({}, {})
+    axp.balances = {"ronin:abc": 100}
+    assert axp.check_acc_has_enough_balance("ronin:abc", 90) is True
+    assert axp.check_acc_has_enough_balance("ronin:abc", 110) is False
+    mocked_check_balance.assert_not_called()
+    assert "Balance in account ronin:abc is inssuficient to cover all planned payments!" in caplog.text
+
+
+@patch("axie.payments.check_balances", side_effect=lambda accounts: {acc: 1000 for acc in accounts})
+@patch("axie.payments.Payment.finish")
+@patch("axie.payments.Payment.wait_for_receipt", return_value=True)
+@patch("axie.AxiePaymentsManager.send_payments", side_effect=lambda payments: [(p, 1, "abc123") for p in payments])
 @patch("axie.AxiePaymentsManager.check_acc_has_enough_balance", return_value=True)
-@patch("axie.payments.get_nonce", return_value=1)
-def test_payments_manager_payout_account_accept(_, mocked_check_balance, mocked_execute, __, caplog):
+@patch("axie.utils.get_nonce", return_value=1)
+def test_payments_manager_payout_account_accept(_, mocked_check_balance, mocked_send, mocked_wait, mocked_finish, __,
+                                                caplog):
     scholar_acc = 'ronin:<account_s1_address>' + "".join([str(x) for x in range(10)]*2)
     manager_acc = 'ronin:<manager_address>000' + "".join([str(x) for x in range(10)]*2)
     dono_acc = 'ronin:<donations_address>0' + "".join([str(x) for x in range(10)]*2)
@@ -593,7 +679,9 @@ def test_payments_manager_payout_account_accept(_, mocked_check_balance, mocked_
         with patch.object(builtins, 'input', lambda _: 'y'):
             axp.prepare_payout()
         mocked_check_balance.assert_called_with(scholar_acc, 1000)
-        assert mocked_execute.call_count == 5
+        assert len(mocked_send.call_args[0][0]) == 5
+        assert mocked_wait.call_count == 5
+        assert mocked_finish.call_count == 5
         assert "Payment to scholar of Scholar 1(ronin:<scholar_address>) for the amount of 500 SLP" in caplog.text
         assert "Payment to trainer of Scholar 1(ronin:<trainer_address>) for the amount of 100 SLP" in caplog.text
         assert (f"Donation to Entity 1 for Scholar 1({dono_acc}) for the amount of 10 SLP" in caplog.text)
@@ -603,11 +691,13 @@ def test_payments_manager_payout_account_accept(_, mocked_check_balance, mocked_
         assert "Transactions completed for account: 'Scholar 1'" in caplog.text
 
 
-@patch("axie.payments.check_balance", return_value=1000)
-@patch("axie.payments.Payment.execute", return_value=("abc123", True))
+@patch("axie.payments.check_balances", side_effect=lambda accounts: {acc: 1000 for acc in accounts})
+@patch("axie.payments.Payment.finish")
+@patch("axie.payments.Payment.wait_for_receipt", return_value=True)
+@patch("axie.AxiePaymentsManager.send_payments", side_effect=lambda payments: [(p, 1, "abc123") for p in payments])
 @patch("axie.AxiePaymentsManager.check_acc_has_enough_balance", return_value=True)
-@patch("axie.payments.get_nonce", return_value=1)
-def test_payments_manager_payout_auto_yes(_, mocked_check_balance, mocked_execute, __, caplog):
+@patch("axie.utils.get_nonce", return_value=1)
+def test_payments_manager_payout_auto_yes(_, mocked_check_balance, mocked_send, mocked_wait, mocked_finish, __, caplog):
     scholar_acc = 'ronin:<account_s1_address>' + "".join([str(x) for x in range(10)]*2)
     manager_acc = 'ronin:<manager_address>000' + "".join([str(x) for x in range(10)]*2)
     dono_acc = 'ronin:<donations_address>0' + "".join([str(x) for x in range(10)]*2)
@@ -636,7 +726,9 @@ def test_payments_manager_payout_auto_yes(_, mocked_check_balance, mocked_execut
     with caplog.at_level(logging.INFO):
         axp.prepare_payout()
         mocked_check_balance.assert_called_with(scholar_acc, 1000)
-        assert mocked_execute.call_count == 5
+        assert len(mocked_send.call_args[0][0]) == 5
+        assert mocked_wait.call_count == 5
+        assert mocked_finish.call_count == 5
         assert "Payment to scholar of Scholar 1(ronin:<scholar_address>) for the amount of 500 SLP" in caplog.text
         assert "Payment to trainer of Scholar 1(ronin:<trainer_address>) for the amount of 100 SLP" in caplog.text
         assert (f"Donation to Entity 1 for Scholar 1({dono_acc}) for the amount "
@@ -648,11 +740,11 @@ def test_payments_manager_payout_auto_yes(_, mocked_check_balance, mocked_execut
         assert "Transactions Summary:" in caplog.text
 
 
-@patch("axie.payments.check_balance", return_value=1000)
-@patch("axie.payments.Payment.execute")
+@patch("axie.payments.check_balances", side_effect=lambda accounts: {acc: 1000 for acc in accounts})
+@patch("axie.AxiePaymentsManager.send_payments")
 @patch("axie.AxiePaymentsManager.check_acc_has_enough_balance", return_value=True)
-@patch("axie.payments.get_nonce", return_value=1)
-def test_payments_manager_payout_account_deny(_, mocked_check_balance, mocked_execute, __, caplog):
+@patch("axie.utils.get_nonce", return_value=1)
+def test_payments_manager_payout_account_deny(_, mocked_check_balance, mocked_send, __, caplog):
     scholar_acc = 'ronin:<account_s1_address>' + "".join([str(x) for x in range(10)]*2)
     manager_acc = 'ronin:<manager_address>000' + "".join([str(x) for x in range(10)]*2)
     dono_acc = 'ronin:<donations_address>0' + "".join([str(x) for x in range(10)]*2)
@@ -681,7 +773,7 @@ def test_payments_manager_payout_account_deny(_, mocked_check_balance, mocked_ex
     with patch.object(builtins, 'input', lambda _: 'n'):
         axp.prepare_payout()
     mocked_check_balance.assert_called_with(scholar_acc, 1000)
-    mocked_execute.assert_not_called()
+    mocked_send.assert_not_called()
     assert "Transactions canceled for account: 'Scholar 1'" in caplog.text
 
 
@@ -700,10 +792,9 @@ def test_payment_get_nonce_calls_w3_low_nonce(mocked_checksum, mock_contract):
             "ronin:to_ronin",
             10,
             s)
-    mock_file.assert_called_with("axie/slp_abi.json", encoding='utf-8')
-    mocked_checksum.assert_called_with(SLP_CONTRACT)
-    mock_contract.assert_called()
-    assert p.contract == "contract"
+    mock_file.assert_not_called()
+    mocked_checksum.assert_not_called()
+    mock_contract.assert_not_called()
     assert p.name == "random_account"
     assert p.payment_type == "manager"
     assert p.from_acc == "0xfrom_ronin"
@@ -720,8 +811,10 @@ def test_payment_get_nonce_calls_w3_low_nonce(mocked_checksum, mock_contract):
 @patch("web3.Web3.toHex", return_value="transaction_hash")
 @patch("web3.Web3.keccak", return_value='result_of_keccak')
 @patch("web3.eth.Eth.contract")
-@patch("web3.eth.Eth.get_transaction_receipt", return_value={'status': 1})
-def test_execute_calls_web3_functions(mock_transaction_receipt,
+@patch("axie.utils.ReceiptWatcher.watch", return_value=resolved_future(RECEIPT_SUCCESS))
+@patch("axie.payments.transfer_data", return_value="0xdata")
+def test_execute_calls_web3_functions(mock_transfer_data,
+                                      mock_transaction_receipt,
                                       mock_contract,
                                       mock_keccak,
                                       mock_to_hex,
@@ -747,17 +840,15 @@ def test_execute_calls_web3_functions(mock_transaction_receipt,
             10,
             s)
         p.execute()
-    mock_file.assert_called_with("axie/slp_abi.json", encoding='utf-8')
-    mock_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
+    mock_file.assert_not_called()
+    mock_contract.assert_not_called()
+    mock_transfer_data.assert_called_with('0xto_ronin', 10)
     mock_keccak.assert_called_once()
     mock_to_hex.assert_called_with("result_of_keccak")
     mock_send.assert_called_once()
     mock_sign.assert_called_once()
     assert mock_sign.call_args[1]['private_key'] == "ronin:from_private_ronin"
-    mock_checksum.assert_has_calls(calls=[
-        call(SLP_CONTRACT),
-        call('0xfrom_ronin'),
-        call('0xto_ronin')])
+    mock_checksum.assert_called_with(SLP_CONTRACT)
     mock_transaction_receipt.assert_called_with("transaction_hash")
     assert ('Transaction random_account(ronin:to_ronin) for the amount of 10 SLP completed! Hash: transaction_hash - '
             'Explorer: https://explorer.roninchain.com/tx/transaction_hash' in caplog.text)
@@ -778,8 +869,10 @@ def test_execute_calls_web3_functions(mock_transaction_receipt,
 @patch("web3.Web3.toHex", return_value="transaction_hash")
 @patch("web3.Web3.keccak", return_value='result_of_keccak')
 @patch("web3.eth.Eth.contract")
-@patch("web3.eth.Eth.get_transaction_receipt", return_value={'status': 0})
-def test_execute_calls_web3_functions_retry(mock_transaction_receipt,
+@patch("axie.utils.ReceiptWatcher.watch", return_value=resolved_future(RECEIPT_REVERTED))
+@patch("axie.payments.transfer_data", return_value="0xdata")
+def test_execute_calls_web3_functions_retry(mock_transfer_data,
+                                            mock_transaction_receipt,
                                             mock_contract,
                                             mock_keccak,
                                             mock_to_hex,
@@ -806,17 +899,15 @@ def test_execute_calls_web3_functions_retry(mock_transaction_receipt,
             10,
             s)
         p.execute()
-    mock_file.assert_called_with("axie/slp_abi.json", encoding='utf-8')
-    mock_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
+    mock_file.assert_not_called()
+    mock_contract.assert_not_called()
+    mock_transfer_data.assert_called_with('0xto_ronin', 10)
     mock_keccak.assert_called_once()
     mock_to_hex.assert_called_with("result_of_keccak")
     mock_send.assert_called_once()
     mock_sign.assert_called_once()
     assert mock_sign.call_args[1]['private_key'] == "ronin:from_private_ronin"
-    mock_checksum.assert_has_calls(calls=[
-        call(SLP_CONTRACT),
-        call('0xfrom_ronin'),
-        call('0xto_ronin')])
+    mock_checksum.assert_called_with(SLP_CONTRACT)
     mock_transaction_receipt.assert_called_with("transaction_hash")
     mock_replacement_tx.assert_called_with(123)
     assert ("Important: Transaction random_account(ronin:to_ronin) for the amount of 10 SLP failed. "
@@ -828,3 +919,256 @@ def test_execute_calls_web3_functions_retry(mock_transaction_receipt,
             "Trying to replace it with a 0 value tx and re-try.") in lf[0]
     assert str(s) == "No payments made!"
     cleanup_log_file(log_file)
+
+
+@patch("axie.utils.ReceiptWatcher.watch", return_value=resolved_future(RECEIPT_SUCCESS))
+@patch("axie.utils.get_nonce", return_value=7)
+def test_payments_manager_execute_payments_pipelines_account(mocked_get_nonce, mocked_watch):
+    nonces.resync("ronin:from_ronin")
+    s = PaymentsSummary()
+    payments = [Payment(f"payment_{i}", "manager", "ronin:from_ronin", "0xkey", "ronin:to_ronin", 10, s) for i in range(3)]
+    calls = []
+    for p in payments:
+        p.build = lambda nonce, p=p: {"nonce": nonce, "name": p.name}
+        p.send_signed = lambda raw_tx, p=p: calls.append(("send", p.name, raw_tx))
+        p.wait_for_receipt = lambda hash_, nonce, future, p=p: calls.append(("wait", p.name, hash_)) or True
+        p.finish = lambda success, hash_, nonce, p=p: calls.append(("finish", p.name, success))
+    axp = AxiePaymentsManager({}, {})
+    with patch.object(axp.signer, "sign",
+                      side_effect=lambda txs: [(f"raw_{tx['nonce']}", f"hash_{tx['nonce']}") for tx, _ in txs]) as mocked_sign:
+        axp.execute_payments(payments)
+    # Nonce is only fetched once, the whole account is signed as one batch,
+    # every payment is sent before waiting for any receipt and every receipt is
+    # in before a failed payment gets replaced
+    mocked_get_nonce.assert_called_once_with("0xfrom_ronin", pending=True)
+    mocked_sign.assert_called_once_with([({"nonce": n, "name": f"payment_{i}"}, "0xkey") for i, n in enumerate([7, 8, 9])])
+    assert calls == [
+        ("send", "payment_0", "raw_7"), ("send", "payment_1", "raw_8"), ("send", "payment_2", "raw_9"),
+        ("wait", "payment_0", "hash_7"), ("wait", "payment_1", "hash_8"), ("wait", "payment_2", "hash_9"),
+        ("finish", "payment_0", True), ("finish", "payment_1", True), ("finish", "payment_2", True)]
+    mocked_watch.assert_has_calls([call("hash_7"), call("hash_8"), call("hash_9")])
+    nonces.resync("ronin:from_ronin")
+
+
+@patch("axie.utils.get_nonce", side_effect=[3, 5])
+def test_payments_manager_send_payments_resyncs_nonce_too_low(mocked_get_nonce, caplog):
+    nonces.resync("ronin:from_ronin")
+    payments = [Payment(f"payment_{i}", "manager", "ronin:from_ronin", "0xkey", "ronin:to_ronin", 10, PaymentsSummary())
+                for i in range(2)]
+    sent = []
+
+    def send_signed(raw_tx):
+        if raw_tx == "raw_3":
+            raise ValueError({'code': -32000, 'message': 'nonce too low'})
+        sent.append(raw_tx)
+    for p in payments:
+        p.build = lambda nonce: {"nonce": nonce}
+        p.send_signed = send_signed
+    axp = AxiePaymentsManager({}, {})
+    with patch.object(axp.signer, "sign",
+                      side_effect=lambda txs: [(f"raw_{tx['nonce']}", f"hash_{tx['nonce']}") for tx, _ in txs]) as mocked_sign:
+        result = axp.send_payments(payments)
+    # Both payments are signed again with the resynced nonces
+    assert result == [(payments[0], 5, "hash_5"), (payments[1], 6, "hash_6")]
+    assert sent == ["raw_5", "raw_6"]
+    assert mocked_sign.call_count == 2
+    assert mocked_get_nonce.call_count == 2
+    assert "Nonce 3 was rejected for ronin:from_ronin" in caplog.text
+    assert nonces.next_nonce("ronin:from_ronin") == 7
+    nonces.resync("ronin:from_ronin")
+
+
+@patch("axie.utils.get_nonce", return_value=9)
+@patch("axie.payments.sleep")
+@patch("axie.payments.Payment.execute")
+@patch("axie.utils.ReceiptWatcher.watch", return_value=resolved_future(RECEIPT_SUCCESS))
+@patch("axie.payments.get_nonce", return_value=4)
+def test_send_replacement_tx_retries_with_next_free_nonce(_, __, mocked_execute, ___, mocked_pending_nonce):
+    acc = "ronin:" + "a" * 40
+    nonces.next_nonce(acc)
+    p = Payment("payment", "manager", acc, "0x" + "1" * 64, "ronin:to_ronin", 10, PaymentsSummary())
+    p.w3 = Mock()
+    p.send_replacement_tx(4)
+    # Pending nonces of the account are fetched again and the retry takes the next one
+    mocked_execute.assert_called_with(9)
+    assert nonces.next_nonce(acc) == 10
+    nonces.resync(acc)
+
+
+@patch("axie.utils.get_nonce", side_effect=[3, 5])
+def test_payments_manager_send_payments_retries_only_once(mocked_get_nonce):
+    nonces.resync("ronin:from_ronin")
+    p = Payment("payment", "manager", "ronin:from_ronin", "0xkey", "ronin:to_ronin", 10, PaymentsSummary())
+    p.build = lambda nonce: {"nonce": nonce}
+    p.send_signed = Mock(side_effect=ValueError({'code': -32000, 'message': 'nonce too low'}))
+    axp = AxiePaymentsManager({}, {})
+    with patch.object(axp.signer, "sign", return_value=[("raw", "hash")]):
+        with pytest.raises(ValueError):
+            axp.send_payments([p])
+    assert p.send_signed.call_count == 2
+    nonces.resync("ronin:from_ronin")
+
+
+@patch("axie.utils.ReceiptWatcher.watch", return_value=resolved_future(RECEIPT_REVERTED))
+@patch("axie.utils.get_nonce", side_effect=[3, 4])
+def test_payments_manager_execute_payments_resyncs_after_failure(mocked_get_nonce, _):
+    nonces.resync("ronin:from_ronin")
+    p = Payment("payment", "manager", "ronin:from_ronin", "0xkey", "ronin:to_ronin", 10, PaymentsSummary())
+    p.build = lambda nonce: {"nonce": nonce}
+    p.send_signed = lambda raw_tx: None
+    p.wait_for_receipt = lambda hash_, nonce, future: False
+    p.finish = lambda success, hash_, nonce: None
+    axp = AxiePaymentsManager({}, {})
+    with patch.object(axp.signer, "sign", return_value=[("raw", "hash")]):
+        axp.execute_payments([p])
+    assert nonces.next_nonce("ronin:from_ronin") == 4
+    nonces.resync("ronin:from_ronin")
+
+
+@patch("axie.payments.check_balances", side_effect=lambda accounts: {acc: 1000 for acc in accounts})
+@patch("axie.AxiePaymentsManager.check_acc_has_enough_balance", return_value=True)
+def test_payments_manager_pays_accounts_concurrently(_, __, caplog):
+    scholars = [{
+        "name": f"Scholar {i}",
+        "ronin": f"ronin:{i}" * 40,
+        "splits": [
+            {"persona": "Manager", "percentage": 50, "ronin": "ronin:<manager_address>"},
+            {"persona": "Scholar", "percentage": 50, "ronin": f"ronin:<scholar_{i}_address>"}
+        ]} for i in range(1, 3)]
+    axp = AxiePaymentsManager({"scholars": scholars}, {s["ronin"]: "0x" + "1" * 64 for s in scholars},
+                              auto=True, workers=2)
+    axp.verify_inputs()
+    # Both accounts have to be paying at the same time to get past the barrier
+    barrier = threading.Barrier(2, timeout=5)
+
+    def execute_payments(payment_list):
+        barrier.wait()
+        for p in payment_list:
+            logging.info(f"Sent {p.name}")
+            sleep(0.01)
+            p.summary.increase_payout(p.amount, p.to_acc, p.payment_type)
+    PaymentsSummary().clear()
+    with patch.object(axp, "execute_payments", side_effect=execute_payments) as mocked_execute, \
+            patch.object(axp, "sign_payments"):
+        with caplog.at_level(logging.INFO):
+            axp.prepare_payout()
+    assert mocked_execute.call_count == 2
+    assert str(axp.summary) == "Paid 1 managers, 980 SLP.\nPaid 2 scholars, 1000 SLP.\n"
+    # Each account logs come out together
+    messages = [r.getMessage() for r in caplog.records if r.getMessage().startswith(("Sent", "Transactions completed"))]
+    assert len(messages) == 6
+    for i in range(0, 6, 3):
+        name = messages[i].split(" of ")[1]
+        assert messages[i:i + 3] == [f"Sent Payment to Manager of {name}",
+                                     f"Sent Payment to Scholar of {name}",
+                                     f"Transactions completed for account: '{name}'"]
+    assert axp.executor is None
+    assert caplog.records[-1].getMessage().startswith("Important: Transactions Summary:")
+
+
+@patch("axie.payments.Payment.finish")
+@patch("axie.utils.ReceiptWatcher.watch", return_value=resolved_future(RECEIPT_SUCCESS))
+@patch("axie.payments.Payment.send_signed")
+@patch("axie.utils.get_nonce", return_value=1)
+@patch("axie.payments.check_balances", side_effect=lambda accounts: {acc: 1000 for acc in accounts})
+@patch("axie.AxiePaymentsManager.check_acc_has_enough_balance", return_value=True)
+def test_payments_manager_signs_whole_payout_at_once(_, __, ___, mocked_send_signed, ____, mocked_finish):
+    scholars = [{
+        "name": f"Scholar {i}",
+        "ronin": "ronin:" + str(i) * 40,
+        "splits": [
+            {"persona": "Manager", "percentage": 50, "ronin": "ronin:" + "a" * 40},
+            {"persona": "Scholar", "percentage": 50, "ronin": "ronin:" + "b" * 40}
+        ]} for i in range(1, 4)]
+    axp = AxiePaymentsManager({"scholars": scholars}, {s["ronin"]: "0x" + "1" * 64 for s in scholars}, auto=True)
+    axp.verify_inputs()
+    for s in scholars:
+        nonces.resync(s["ronin"])
+    with patch.object(axp.signer, "sign", side_effect=lambda txs: [(f"raw_{i}", f"hash_{i}") for i in range(len(txs))]) \
+            as mocked_sign:
+        axp.prepare_payout()
+    # Payments of every account go to the signing pool in a single batch
+    mocked_sign.assert_called_once()
+    assert len(mocked_sign.call_args[0][0]) == mocked_send_signed.call_count == mocked_finish.call_count
+    assert mocked_send_signed.call_count > len(scholars)
+    for s in scholars:
+        nonces.resync(s["ronin"])
+
+
+def test_payments_manager_wait_for_payouts_raises_worker_errors():
+    axp = AxiePaymentsManager({}, {}, auto=True, workers=2)
+    axp.executor = ThreadPoolExecutor(max_workers=2)
+    with patch.object(axp, "execute_payments", side_effect=[None, ValueError("boom")]) as mocked_execute:
+        axp.payout_account("Scholar 1", [])
+        axp.payout_account("Scholar 2", [])
+        with pytest.raises(ValueError):
+            axp.wait_for_payouts()
+    assert mocked_execute.call_count == 2
+    assert axp.executor is None
+    assert axp.payouts == []
+
+
+def streamed_payments(count):
+    manager_acc = 'ronin:<manager_address>000' + "".join([str(x) for x in range(10)]*2)
+    scholars = ['ronin:<account_s{}_address>'.format(i) + "".join([str(x) for x in range(10)]*2) for i in range(count)]
+    p_file = {
+        "scholars": [{
+            "name": f"Scholar {i}",
+            "ronin": acc,
+            "splits": [
+                {"persona": "Manager", "percentage": 60, "ronin": manager_acc},
+                {"persona": "Scholar", "percentage": 40, "ronin": "ronin:<scholar_address>"}
+            ]} for i, acc in enumerate(scholars)]
+    }
+    s_file = {acc: '0x' + '1' * 64 for acc in scholars}
+    return p_file, s_file
+
+
+def test_streamed_payments_manager_verify_input_success(tmpdir, caplog):
+    p_file, s_file = streamed_payments(3)
+    f = tmpdir.join("payments.json")
+    f.write(json.dumps(p_file))
+    axp = StreamedPaymentsManager(str(f), s_file)
+    axp.verify_inputs()
+    assert axp.type == "new"
+    assert axp.payments_file == {"scholars": []}
+    assert "Files correctly validated!" in caplog.text
+
+
+def test_streamed_payments_manager_verify_input_reports_scholar_errors(tmpdir, caplog):
+    p_file, s_file = streamed_payments(3)
+    p_file["scholars"][1]["splits"][0]["ronin"] = "foo"
+    del s_file[p_file["scholars"][2]["ronin"]]
+    f = tmpdir.join("payments.json")
+    f.write(json.dumps(p_file))
+    with patch.object(sys, "exit") as mocked_sys:
+        axp = StreamedPaymentsManager(str(f), s_file)
+        axp.verify_inputs()
+    mocked_sys.assert_called()
+    assert "For attribute in: ['scholars', 1, 'splits', 0, 'ronin']" in caplog.text
+    assert "Account 'Scholar 2' is not present in secret file, please add it." in caplog.text
+
+
+def test_streamed_payments_manager_verify_input_bad_json(tmpdir, caplog):
+    f = tmpdir.join("payments.json")
+    f.write('{"scholars": [{"name": "Scholar 1"},')
+    with pytest.raises(SystemExit):
+        axp = StreamedPaymentsManager(str(f), {})
+        axp.verify_inputs()
+    assert f"File in path {f} is not a correctly encoded JSON." in caplog.text
+
+
+@patch("axie.payments.AxiePaymentsManager.finish_payout")
+@patch("axie.payments.AxiePaymentsManager.pay_plan")
+@patch("axie.payments.check_balances", side_effect=lambda accounts: {acc: 100 for acc in accounts})
+def test_streamed_payments_manager_prepare_payout_batches(_, mocked_pay_plan, mocked_finish_payout, tmpdir):
+    p_file, s_file = streamed_payments(5)
+    f = tmpdir.join("payments.json")
+    f.write(json.dumps(p_file))
+    axp = StreamedPaymentsManager(str(f), s_file, batch_size=2)
+    axp.verify_inputs()
+    axp.prepare_payout()
+    plans = [c.args[0] for c in mocked_pay_plan.call_args_list]
+    assert [[acc["name"] for acc in plan.accounts] for plan in plans] == [
+        ["Scholar 0", "Scholar 1"], ["Scholar 2", "Scholar 3"], ["Scholar 4"]]
+    mocked_finish_payout.assert_called_once_with(None)
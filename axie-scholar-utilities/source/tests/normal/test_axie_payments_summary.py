@@ -1,3 +1,5 @@
+import threading
+
 import pytest
 
 from axie.payments import PaymentsSummary
@@ -62,3 +64,19 @@ def test_summary_correct_output(payouts, expected_output):
     for p in payouts:
         s.increase_payout(p[0], p[1], p[2])
     assert str(s) == expected_output
+
+
+def test_summary_concurrent_increases():
+    PaymentsSummary().clear()
+    s = PaymentsSummary()
+
+    def pay(i):
+        for _ in range(100):
+            s.increase_payout(amount=1, address=f"ronin:scholar_{i}", payout_type="scholar")
+    threads = [threading.Thread(target=pay, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert s.scholar["slp"] == 800
+    assert sorted(s.scholar["accounts"]) == [f"ronin:scholar_{i}" for i in range(8)]
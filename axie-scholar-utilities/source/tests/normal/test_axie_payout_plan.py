@@ -0,0 +1,190 @@
+import sys
+
+import pytest
+from mock import patch
+
+from axie import AxiePaymentsManager
+from axie.payout_plan import PayoutPlan, percent_of
+
+SCHOLAR_ACC = "ronin:" + "1" * 40
+MANAGER_ACC = "ronin:" + "2" * 40
+DONO_ACC = "ronin:" + "3" * 40
+SCHOLAR_PAYOUT_ACC = "ronin:" + "6" * 40
+OTHER_ACC = "ronin:" + "7" * 40
+TRAINER_ACC = "ronin:" + "8" * 40
+PRIVATE_KEY = "0x" + "4" * 64
+
+
+def new_scholars(manager_percent=44):
+    return [{
+        "name": "Scholar 1",
+        "ronin": SCHOLAR_ACC,
+        "splits": [
+            {"persona": "Manager", "percentage": manager_percent, "ronin": MANAGER_ACC},
+            {"persona": "Scholar", "percentage": 40, "ronin": SCHOLAR_PAYOUT_ACC},
+            {"persona": "Other Person", "percentage": 6, "ronin": OTHER_ACC},
+            {"persona": "Investor", "percentage": 10, "ronin": TRAINER_ACC}
+        ]
+    }]
+
+
+@pytest.mark.parametrize("balance, percentage, extra, expected",
+                         [
+                            (1000, 43, 0, 430),
+                            (30, 15, 0, 4),
+                            (50, 7, 0, 4),
+                            (3, 50, 0, 2),
+                            (1000, 33.3, 0, 333),
+                            (1000, 50, 5, 505),
+                            (0, 50, 0, 0)
+                         ])
+def test_percent_of(balance, percentage, extra, expected):
+    assert percent_of(balance, percentage, extra) == expected
+
+
+def test_plan_new_payments():
+    donations = [{"name": "Entity 1", "ronin": DONO_ACC, "percentage": 1}]
+    plan = PayoutPlan.from_new_payments(new_scholars(), donations, {SCHOLAR_ACC: 1000})
+    acc = plan.accounts[0]
+    assert [(p["name"], p["type"], p["to"], p["amount"]) for p in acc["payments"]] == [
+        ("Payment to Manager of Scholar 1", "manager", MANAGER_ACC, 420),
+        ("Payment to Scholar of Scholar 1", "scholar", SCHOLAR_PAYOUT_ACC, 400),
+        ("Payment to Other Person of Scholar 1", "other", OTHER_ACC, 60),
+        ("Payment to Investor of Scholar 1", "trainer", TRAINER_ACC, 100),
+        ("Donation to Entity 1 for Scholar 1", "donation", DONO_ACC, 10)
+    ]
+    assert acc["skipped"] == []
+    assert PayoutPlan.total(acc) == 990
+    assert plan.to_dict()["accounts"][0]["remainder"] == 10
+    assert plan.verify() == []
+
+
+def test_plan_new_payments_reports_skips():
+    plan = PayoutPlan.from_new_payments(new_scholars(), None, {SCHOLAR_ACC: 5})
+    acc = plan.accounts[0]
+    assert [p["amount"] for p in acc["payments"]] == [2, 2]
+    # 0.3 and 0.5 SLP, both round to 0
+    assert [(p["name"], p["amount"], p["reason"]) for p in acc["skipped"]] == [
+        ("Payment to Other Person of Scholar 1", 0, "Skipping payment to Other Person as it would be less than 1SLP"),
+        ("Payment to Investor of Scholar 1", 0, "Skipping payment to Investor as it would be less than 1SLP")
+    ]
+    assert plan.summary() == "1 accounts, 2 payments for 4 SLP out of 5 SLP, 2 payments skipped"
+
+
+def test_plan_legacy_payments_sums_balance():
+    scholars = [{
+        "Name": "Scholar 1",
+        "AccountAddress": SCHOLAR_ACC,
+        "ScholarPayoutAddress": SCHOLAR_PAYOUT_ACC,
+        "ScholarPercent": 45,
+        "ScholarPayout": 10,
+        "TrainerPayoutAddress": TRAINER_ACC,
+        "TrainerPercent": 10
+    }, {
+        "Name": "Scholar 2",
+        "AccountAddress": "ronin:" + "5" * 40,
+        "ScholarPayoutAddress": "ronin:scholar2",
+        "ScholarPercent": 50
+    }]
+    donations = [{"Name": "Entity 1", "AccountAddress": DONO_ACC, "Percent": 1}]
+    plan = PayoutPlan.from_legacy_payments(scholars, MANAGER_ACC, donations, {SCHOLAR_ACC: 777, "ronin:" + "5" * 40: 0})
+    acc = plan.accounts[0]
+    assert [(p["type"], p["amount"]) for p in acc["payments"]] == [
+        ("scholar", 360), ("trainer", 78), ("donation", 8), ("manager", 331)]
+    assert PayoutPlan.total(acc) == 777
+    assert plan.accounts[1]["payments"] == []
+    assert plan.verify() == []
+
+
+def test_plan_verify():
+    plan = PayoutPlan.from_new_payments(new_scholars(manager_percent=60), None, {SCHOLAR_ACC: 1000})
+    assert plan.verify() == ["Account 'Scholar 1' pays 1150 SLP but only has 1000 SLP"]
+    plan.accounts[0]["payments"][0]["amount"] = 0
+    assert "Account 'Scholar 1' has payments of less than 1 SLP" in plan.verify()
+
+
+@pytest.mark.parametrize("file_name", ["plan.json", "plan.csv"])
+def test_plan_save_load(file_name, tmpdir):
+    plan = PayoutPlan.from_new_payments(new_scholars(), None, {SCHOLAR_ACC: 5})
+    path = str(tmpdir.join(file_name))
+    plan.save(path)
+    loaded = PayoutPlan.load(path)
+    assert loaded.accounts == plan.accounts
+
+
+@pytest.mark.parametrize("field, value, expected", [
+    ("amount", -10, "-10 is less than the minimum of 1"),
+    ("to", "ronin:scholar", "'ronin:scholar' does not match '^ronin:[0-9a-fA-F]{40}$'"),
+])
+@pytest.mark.parametrize("file_name", ["plan.json", "plan.csv"])
+def test_plan_load_rejects_invalid_payments(file_name, field, value, expected, tmpdir, caplog):
+    plan = PayoutPlan.from_new_payments(new_scholars(), None, {SCHOLAR_ACC: 1000})
+    plan.accounts[0]["payments"][1][field] = value
+    path = str(tmpdir.join(file_name))
+    plan.save(path)
+    with patch.object(sys, "exit", side_effect=SystemExit) as mocked_exit:
+        with pytest.raises(SystemExit):
+            PayoutPlan.load(path)
+    mocked_exit.assert_called_once()
+    assert "Payout plan file failed validation. Please review it." in caplog.text
+    assert f"Error given: {expected}\nFor attribute in: ['accounts', 0, 'payments', 1, '{field}']" in caplog.text
+
+
+@pytest.mark.parametrize("file_name, content", [
+    ("plan.json", '{"accounts": ['),
+    ("plan.csv", "AccountName,Balance\nScholar 1,1000\n"),
+])
+def test_plan_load_malformed_file(file_name, content, tmpdir, caplog):
+    path = str(tmpdir.join(file_name))
+    with open(path, "w") as f:
+        f.write(content)
+    with patch.object(sys, "exit", side_effect=SystemExit) as mocked_exit:
+        with pytest.raises(SystemExit):
+            PayoutPlan.load(path)
+    mocked_exit.assert_called_once()
+    assert f"Payout plan file in path {path} is not correctly formatted." in caplog.text
+
+
+@patch("axie.payments.check_balances", side_effect=lambda accounts: {acc: 1000 for acc in accounts})
+@patch("axie.AxiePaymentsManager.payout_account")
+def test_payments_manager_execute_loaded_plan(mocked_payout, mocked_balances, tmpdir):
+    path = str(tmpdir.join("plan.csv"))
+    PayoutPlan.from_new_payments(new_scholars(), None, {SCHOLAR_ACC: 1000}).save(path)
+    axp = AxiePaymentsManager({}, {SCHOLAR_ACC: PRIVATE_KEY}, auto=True)
+    axp.execute_plan(PayoutPlan.load(path))
+    mocked_balances.assert_called_once_with([SCHOLAR_ACC])
+    assert mocked_payout.call_args[0][0] == "Scholar 1"
+    payments = mocked_payout.call_args[0][1]
+    assert [(p.name, p.to_acc, p.amount) for p in payments] == [
+        ("Payment to Manager of Scholar 1", MANAGER_ACC.replace("ronin:", "0x"), 430),
+        ("Payment to Scholar of Scholar 1", SCHOLAR_PAYOUT_ACC.replace("ronin:", "0x"), 400),
+        ("Payment to Other Person of Scholar 1", OTHER_ACC.replace("ronin:", "0x"), 60),
+        ("Payment to Investor of Scholar 1", TRAINER_ACC.replace("ronin:", "0x"), 100)
+    ]
+    assert all(p.from_private == PRIVATE_KEY for p in payments)
+
+
+@patch("axie.AxiePaymentsManager.payout_account")
+def test_payments_manager_execute_plan_fails_verification(mocked_payout, caplog):
+    plan = PayoutPlan.from_new_payments(new_scholars(), None, {SCHOLAR_ACC: 1000})
+    axp = AxiePaymentsManager({}, {})
+    with patch.object(sys, "exit", side_effect=SystemExit) as mocked_exit:
+        with pytest.raises(SystemExit):
+            axp.execute_plan(plan)
+    mocked_exit.assert_called_once()
+    mocked_payout.assert_not_called()
+    assert "Account 'Scholar 1' is not present in secret file, please add it." in caplog.text
+
+
+@patch("axie.payments.check_balances", side_effect=lambda accounts: {acc: 1000 for acc in accounts})
+@patch("axie.AxiePaymentsManager.payout_account")
+def test_payments_manager_execute_plan_skips_accounts_failing_verification(mocked_payout, _, caplog):
+    other_acc = "ronin:" + "5" * 40
+    scholars = new_scholars(manager_percent=60) + [dict(new_scholars()[0], name="Scholar 2", ronin=other_acc)]
+    plan = PayoutPlan.from_new_payments(scholars, None, {SCHOLAR_ACC: 1000, other_acc: 1000})
+    axp = AxiePaymentsManager({}, {SCHOLAR_ACC: PRIVATE_KEY, other_acc: PRIVATE_KEY}, auto=True)
+    axp.execute_plan(plan)
+    mocked_payout.assert_called_once()
+    assert mocked_payout.call_args[0][0] == "Scholar 2"
+    assert "Account 'Scholar 1' pays 1150 SLP but only has 1000 SLP" in caplog.text
+    assert "Important: Skipping payments for account 'Scholar 1'." in caplog.text
@@ -0,0 +1,65 @@
+from mock import patch
+from web3 import Web3
+
+from axie.calldata import build_transaction, transfer_data
+from axie.signing import TransactionSigner, sign_transaction
+from axie.utils import SLP_CONTRACT
+
+PRIVATE_KEYS = ["0x" + f"{i:02x}" * 32 for i in range(1, 6)]
+
+
+def transactions(number):
+    return [
+        (build_transaction(SLP_CONTRACT, transfer_data("0x" + "cd" * 20, i), i, gas=246437),
+         PRIVATE_KEYS[i % len(PRIVATE_KEYS)])
+        for i in range(number)
+    ]
+
+
+def test_sign_transaction_same_as_web3():
+    tx, key = transactions(1)[0]
+    signed = Web3().eth.account.sign_transaction(tx, private_key=key)
+    assert sign_transaction(tx, key) == (signed.rawTransaction, Web3.toHex(Web3.keccak(signed.rawTransaction)))
+
+
+@patch("axie.signing.threading.active_count", return_value=1)
+def test_signer_pool_keeps_input_order(_):
+    txs = transactions(12)
+    signer = TransactionSigner(workers=2)
+    try:
+        assert signer.sign(txs) == [sign_transaction(tx, key) for tx, key in txs]
+        assert signer.executor is not None
+    finally:
+        signer.shutdown()
+    assert signer.executor is None
+
+
+@patch("axie.signing.ProcessPoolExecutor")
+def test_signer_signs_in_place_without_pool(mocked_executor):
+    txs = transactions(3)
+    assert TransactionSigner(workers=1).sign(txs) == [sign_transaction(tx, key) for tx, key in txs]
+    assert TransactionSigner(workers=4).sign(txs[:1]) == [sign_transaction(*txs[0])]
+    assert TransactionSigner(workers=4).sign([]) == []
+    mocked_executor.assert_not_called()
+
+
+@patch("axie.signing.threading.active_count", return_value=1)
+def test_signer_start_creates_pool_ahead(_):
+    signer = TransactionSigner(workers=2)
+    try:
+        signer.start()
+        assert signer.executor is not None
+        txs = transactions(4)
+        assert signer.sign(txs) == [sign_transaction(tx, key) for tx, key in txs]
+    finally:
+        signer.shutdown()
+
+
+@patch("axie.signing.threading.active_count", return_value=3)
+@patch("axie.signing.ProcessPoolExecutor")
+def test_signer_does_not_fork_while_threads_run(mocked_executor, _):
+    txs = transactions(4)
+    signer = TransactionSigner(workers=4)
+    signer.start()
+    assert signer.sign(txs) == [sign_transaction(tx, key) for tx, key in txs]
+    mocked_executor.assert_not_called()
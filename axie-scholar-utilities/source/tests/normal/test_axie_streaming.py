@@ -0,0 +1,68 @@
+import io
+import json
+
+import pytest
+
+from axie.streaming import JSONStream, SCHOLARS_KEYS, batched, iter_items, read_header
+
+
+PAYMENTS = {
+    "manager": "ronin:<manager_address>",
+    "scholars": [{"name": f"Scholar {i}", "ronin": f"ronin:<account_s{i}_address>", "splits": []}
+                 for i in range(50)],
+    "donations": [{"name": "Entity 1", "ronin": "ronin:<donation_entity_1_address>", "percentage": 0.01}]
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1024])
+def test_json_stream_items(chunk_size):
+    data = [1, 2.5, -30, "a,]b", {"x": [1, {"y": None}]}, [], True, 12345678901234567890]
+    stream = JSONStream(io.StringIO(json.dumps(data, indent=2)), chunk_size)
+    assert list(stream.items()) == data
+
+
+def test_json_stream_empty_containers():
+    assert list(JSONStream(io.StringIO(" [ ] ")).items()) == []
+    assert list(JSONStream(io.StringIO("{}")).members()) == []
+
+
+@pytest.mark.parametrize("text", ['[1, 2', '[1 2]', '{"a" 1}', '[{"a": }]', ''])
+def test_json_stream_bad_json(text):
+    with pytest.raises(ValueError):
+        list(JSONStream(io.StringIO(text), 2).items())
+
+
+@pytest.mark.parametrize("chunk_size", [3, 4096])
+def test_iter_items(tmpdir, chunk_size):
+    f = tmpdir.join("payments.json")
+    f.write(json.dumps(PAYMENTS))
+    assert list(iter_items(str(f), SCHOLARS_KEYS)) == PAYMENTS["scholars"]
+
+
+def test_iter_items_array(tmpdir):
+    f = tmpdir.join("transfers.json")
+    f.write('[{"AccountAddress": "ronin:abc", "Transfers": []}, {"AccountAddress": "ronin:def", "Transfers": []}]')
+    assert [acc["AccountAddress"] for acc in iter_items(str(f))] == ["ronin:abc", "ronin:def"]
+
+
+def test_iter_items_legacy_and_missing(tmpdir):
+    f = tmpdir.join("payments.json")
+    f.write('{"Manager": "ronin:abc", "Scholars": [{"Name": "Scholar 1"}]}')
+    assert list(iter_items(str(f), SCHOLARS_KEYS)) == [{"Name": "Scholar 1"}]
+    f.write('{"Manager": "ronin:abc"}')
+    assert list(iter_items(str(f), SCHOLARS_KEYS)) == []
+
+
+def test_read_header(tmpdir):
+    f = tmpdir.join("payments.json")
+    f.write(json.dumps(PAYMENTS, indent=4))
+    assert read_header(str(f), SCHOLARS_KEYS) == {
+        "manager": PAYMENTS["manager"],
+        "scholars": [],
+        "donations": PAYMENTS["donations"]
+    }
+
+
+def test_batched():
+    assert list(batched(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(batched([], 3)) == []
@@ -1,11 +1,15 @@
+import sys
+import json
 import builtins
 from glob import glob
 
 from mock import patch, call, mock_open
 
-from axie import AxieTransferManager
+import axie.transfers
+from axie import AxieTransferManager, StreamedTransferManager
 from axie.transfers import Transfer, AXIE_CONTRACT
-from tests.test_utils import LOG_FILE_PATH, cleanup_log_file
+from axie.utils import RECEIPT_SUCCESS, nonces
+from tests.test_utils import LOG_FILE_PATH, cleanup_log_file, resolved_future
 
 
 @patch("axie.transfers.load_json")
@@ -21,7 +25,7 @@ def test_transfer_manager_init(mocked_load_json):
     assert atm.secure is True
 
 
-@patch("axie.transfers.Axies.get_axies", return_value=[123, 123123, 234])
+@patch("axie.transfers.get_owned_axies", side_effect=lambda accounts: {acc: {123, 123123, 234} for acc in accounts})
 @patch("axie.transfers.load_json")
 @patch("axie.transfers.AxieTransferManager.execute_transfers")
 def test_transfer_manager_prepare_transfers(mocked_execute_transfers, mocked_load_json, mock_axies):
@@ -38,7 +42,7 @@ def test_transfer_manager_prepare_transfers(mocked_execute_transfers, mocked_loa
     ]}]
     atm.secrets_file = {"ronin:1": "0xsecret1"}
     atm.prepare_transfers()
-    mock_axies.assert_called_once()
+    mock_axies.assert_called_once_with(["ronin:1"])
     assert mocked_execute_transfers.call_count == 1
     transactions_list = mocked_execute_transfers.call_args_list[0][0][0]
     assert len(transactions_list) == 3
@@ -59,7 +63,7 @@ def test_transfer_manager_prepare_transfers(mocked_execute_transfers, mocked_loa
     assert transactions_list[2].axie_id == 234
 
 
-@patch("axie.transfers.Axies.get_axies", return_value=[123])
+@patch("axie.transfers.get_owned_axies", side_effect=lambda accounts: {acc: {123} for acc in accounts})
 @patch("axie.transfers.load_json")
 @patch("axie.transfers.AxieTransferManager.execute_transfers")
 def test_transfer_manager_prepare_transfers_only_available(mocked_execute_transfers, mocked_load_json, mock_axies):
@@ -76,7 +80,7 @@ def test_transfer_manager_prepare_transfers_only_available(mocked_execute_transf
     ]}]
     atm.secrets_file = {"ronin:1": "0xsecret1"}
     atm.prepare_transfers()
-    mock_axies.assert_called_once()
+    mock_axies.assert_called_once_with(["ronin:1"])
     assert mocked_execute_transfers.call_count == 1
     transactions_list = mocked_execute_transfers.call_args_list[0][0][0]
     assert len(transactions_list) == 1
@@ -87,7 +91,7 @@ def test_transfer_manager_prepare_transfers_only_available(mocked_execute_transf
     assert transactions_list[0].axie_id == 123
 
 
-@patch("axie.transfers.Axies.get_axies", return_value=[123, 123123, 234])
+@patch("axie.transfers.get_owned_axies", side_effect=lambda accounts: {acc: {123, 123123, 234} for acc in accounts})
 @patch("axie.transfers.load_json")
 @patch("axie.transfers.AxieTransferManager.execute_transfers")
 def test_transfer_manager_prepare_transfers_secure(mocked_execute_transfers, mocked_load_json, _):
@@ -120,8 +124,10 @@ def test_transfer_manager_prepare_transfers_secure(mocked_execute_transfers, moc
 @patch("web3.Web3.toHex", return_value="transaction_hash")
 @patch("web3.Web3.keccak", return_value='result_of_keccak')
 @patch("web3.eth.Eth.contract")
-@patch("web3.eth.Eth.get_transaction_receipt", return_value={'status': 1})
-def test_execute_calls_web3_functions(mock_transaction_receipt,
+@patch("axie.utils.ReceiptWatcher.watch", return_value=resolved_future(RECEIPT_SUCCESS))
+@patch("axie.transfers.safe_transfer_from_data", return_value="0xdata")
+def test_execute_calls_web3_functions(mock_transfer_data,
+                                      mock_transaction_receipt,
                                       mock_contract,
                                       mock_keccak,
                                       mock_to_hex,
@@ -143,18 +149,15 @@ def test_execute_calls_web3_functions(mock_transaction_receipt,
                       "open",
                       mock_open(read_data='{"foo": "bar"}')) as mock_file:
         t.execute()
-    mock_file.assert_called_with("axie/axie_abi.json", encoding='utf-8')
-    mock_contract.assert_called_with(address='checksum', abi={'foo': 'bar'})
+    mock_file.assert_not_called()
+    mock_contract.assert_not_called()
+    mock_transfer_data.assert_called_with('0xfrom_ronin', '0xto_ronin', 123)
     mock_keccak.assert_called_once()
     mock_to_hex.assert_called_with("result_of_keccak")
     mock_send.assert_called_once()
     mock_sign.assert_called_once()
     assert mock_sign.call_args[1]['private_key'] == "0xsecret"
-    mock_checksum.assert_has_calls(calls=[
-        call(AXIE_CONTRACT),
-        call('0xfrom_ronin'),
-        call('0xfrom_ronin'),
-        call('0xto_ronin')])
+    mock_checksum.assert_called_with(AXIE_CONTRACT)
     mock_transaction_receipt.assert_called_with("transaction_hash")
     mocked_get_transaction_count.assert_called()
     assert ("Axie Transfer of axie (123) from account (ronin:from_ronin) to account "
@@ -164,3 +167,117 @@ def test_execute_calls_web3_functions(mock_transaction_receipt,
         lf = f.readlines()
         assert len(lf) == 1
     cleanup_log_file(log_file)
+
+
+@patch("axie.utils.ReceiptWatcher.watch", side_effect=lambda hash_: resolved_future(RECEIPT_SUCCESS))
+@patch("axie.utils.get_nonce", return_value=4)
+@patch("axie.transfers.load_json")
+def test_transfer_manager_execute_transfers_signs_batch(_, mocked_get_nonce, mocked_watch):
+    from_acc = "ronin:" + "ab" * 20
+    nonces.resync(from_acc)
+    atm = AxieTransferManager("transfers.json", "secrets.json")
+    transfers = [Transfer(from_acc, "0xsecret1", "ronin:" + "cd" * 20, axie_id) for axie_id in [123, 234]]
+    with patch.object(axie.transfers.Transfer, "send_signed") as mocked_send_signed, \
+         patch.object(atm.signer, "sign", return_value=[("raw_1", "hash_1"), ("raw_2", "hash_2")]) as mocked_sign:
+        atm.execute_transfers(transfers)
+    mocked_get_nonce.assert_called_once_with("0x" + "ab" * 20, pending=True)
+    signed_txs = mocked_sign.call_args[0][0]
+    assert [tx["nonce"] for tx, _ in signed_txs] == [4, 5]
+    assert [key for _, key in signed_txs] == ["0xsecret1", "0xsecret1"]
+    mocked_send_signed.assert_has_calls([call("raw_1"), call("raw_2")])
+    mocked_watch.assert_has_calls([call("hash_1"), call("hash_2")])
+    nonces.resync(from_acc)
+
+
+@patch("axie.utils.ReceiptWatcher.watch", side_effect=lambda hash_: resolved_future(RECEIPT_SUCCESS))
+@patch("axie.utils.get_nonce", return_value=4)
+@patch("axie.transfers.load_json")
+def test_transfer_manager_execute_transfers_by_account(_, mocked_get_nonce, mocked_watch, caplog):
+    acc_1, acc_2 = "ronin:" + "ab" * 20, "ronin:" + "ef" * 20
+    nonces.resync(acc_1)
+    nonces.resync(acc_2)
+    atm = AxieTransferManager("transfers.json", "secrets.json", concurrency=2)
+    to_acc = "ronin:" + "cd" * 20
+    transfers = [Transfer(acc_1, "0xsecret1", to_acc, 1), Transfer(acc_2, "0xsecret2", to_acc, 2),
+                 Transfer(acc_1, "0xsecret1", to_acc, 3), Transfer(acc_2, "0xsecret2", to_acc, 4),
+                 Transfer(acc_1, "0xsecret1", to_acc, 5)]
+    signed = [(f"raw_{i}", f"hash_{i}") for i in range(1, 6)]
+
+    def send_signed(raw_tx):
+        if raw_tx == "raw_3":
+            raise ValueError({"code": -32000, "message": "nonce too low"})
+    with patch.object(axie.transfers.Transfer, "send_signed", side_effect=send_signed) as mocked_send_signed, \
+         patch.object(atm.signer, "sign", return_value=signed) as mocked_sign:
+        atm.execute_transfers(transfers)
+    assert [tx["nonce"] for tx, _ in mocked_sign.call_args[0][0]] == [4, 4, 5, 5, 6]
+    # Account 1 stops at the rejected transfer, account 2 is not affected
+    assert sorted(c[0][0] for c in mocked_send_signed.call_args_list) == ["raw_1", "raw_2", "raw_3", "raw_4"]
+    assert sorted(c[0][0] for c in mocked_watch.call_args_list) == ["hash_1", "hash_2", "hash_4"]
+    assert "skipping it and the 1 transfers after it" in caplog.text
+    assert "Axie transfers finished, 3 out of 5 completed" in caplog.text
+    # Only the account with the gap gets its nonce from the chain again
+    assert nonces.next_nonce(acc_1) == 4
+    assert nonces.next_nonce(acc_2) == 6
+    assert mocked_get_nonce.call_count == 3
+    nonces.resync(acc_1)
+    nonces.resync(acc_2)
+
+
+@patch("axie.utils.ReceiptWatcher.watch", side_effect=lambda hash_: resolved_future(RECEIPT_SUCCESS))
+@patch("axie.utils.get_nonce", return_value=4)
+@patch("axie.transfers.load_json")
+def test_transfer_manager_execute_transfers_send_error(_, mocked_get_nonce, mocked_watch, caplog):
+    acc_1, acc_2 = "ronin:" + "ab" * 20, "ronin:" + "ef" * 20
+    nonces.resync(acc_1)
+    nonces.resync(acc_2)
+    atm = AxieTransferManager("transfers.json", "secrets.json", concurrency=2)
+    to_acc = "ronin:" + "cd" * 20
+    transfers = [Transfer(acc_1, "0xsecret1", to_acc, 1), Transfer(acc_1, "0xsecret1", to_acc, 2),
+                 Transfer(acc_2, "0xsecret2", to_acc, 3)]
+    signed = [(f"raw_{i}", f"hash_{i}") for i in range(1, 4)]
+
+    def send_signed(raw_tx):
+        if raw_tx == "raw_1":
+            raise ConnectionError("Connection reset by peer")
+    with patch.object(axie.transfers.Transfer, "send_signed", side_effect=send_signed), \
+         patch.object(atm.signer, "sign", return_value=signed):
+        atm.execute_transfers(transfers)
+    # Account 1 gives up on its queue, account 2 still goes through
+    assert [c[0][0] for c in mocked_watch.call_args_list] == ["hash_3"]
+    assert "it and the 1 transfers after it failed. Error: Connection reset by peer" in caplog.text
+    assert "Axie transfers finished, 1 out of 3 completed" in caplog.text
+    nonces.resync(acc_1)
+    nonces.resync(acc_2)
+
+
+def test_streamed_transfer_manager_verify_inputs(tmpdir, caplog):
+    f1 = tmpdir.join("transfers.json")
+    f1.write(json.dumps([
+        {"AccountAddress": "ronin:abc", "Transfers": [{"AxieId": 123, "ReceiverAddress": "ronin:def"}]},
+        {"AccountAddress": "ronin:xyz", "Transfers": [{"AxieId": "foo", "ReceiverAddress": "ronin:def"}]}
+    ]))
+    f2 = tmpdir.join("secrets.json")
+    f2.write(json.dumps({"ronin:abc": "0x" + "1" * 64}))
+    with patch.object(sys, "exit") as mocked_sys:
+        atm = StreamedTransferManager(str(f1), str(f2))
+        atm.verify_inputs()
+    mocked_sys.assert_called()
+    assert "For attribute in: [1, 'Transfers', 0, 'AxieId']" in caplog.text
+    assert "Account 'ronin:xyz' is not present in secret file, please add it." in caplog.text
+
+
+@patch("axie.transfers.get_owned_axies", side_effect=lambda accounts: {acc: {1, 2, 3} for acc in accounts})
+@patch("axie.transfers.AxieTransferManager.execute_transfers")
+def test_streamed_transfer_manager_prepare_transfers(mocked_execute_transfers, _, tmpdir):
+    f1 = tmpdir.join("transfers.json")
+    f1.write(json.dumps([
+        {"AccountAddress": f"ronin:abc{i}", "Transfers": [{"AxieId": i, "ReceiverAddress": "ronin:def"}]}
+        for i in range(1, 4)
+    ]))
+    f2 = tmpdir.join("secrets.json")
+    f2.write(json.dumps({f"ronin:abc{i}": "0x" + "1" * 64 for i in range(1, 4)}))
+    atm = StreamedTransferManager(str(f1), str(f2), batch_size=2)
+    atm.verify_inputs()
+    atm.prepare_transfers()
+    batches = [[t.axie_id for t in c.args[0]] for c in mocked_execute_transfers.call_args_list]
+    assert batches == [[1, 2], [3]]
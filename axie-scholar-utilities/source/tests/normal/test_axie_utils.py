@@ -1,30 +1,64 @@
+import os
+import json
+import base64
+import logging
+import builtins
+import threading
+from concurrent.futures import Future
+
 import pytest
-from mock import patch, call
+import requests
+import requests_mock
+from mock import patch, call, mock_open
 
 from axie.utils import (
     check_balance,
+    check_balances,
+    check_receipts,
+    rpc_batch,
+    is_nonce_error,
+    NonceManager,
+    ReceiptWatcher,
+    get_contract,
+    load_abi,
+    JWTCache,
+    jwt_cache,
+    ValidationCache,
+    content_hash,
+    AxieGraphQL,
+    jwt_expiry,
+    log_buffer,
+    TokenBucket,
+    RateLimiter,
+    RateLimitedHTTPAdapter,
+    rate_limited_session,
     load_json,
     get_nonce,
+    providers,
+    ProviderRegistry,
+    PooledHTTPProvider,
+    CountingHTTPSConnectionPool,
     RONIN_PROVIDER,
+    RONIN_PROVIDER_FREE,
     SLP_CONTRACT,
     AXS_CONTRACT,
     AXIE_CONTRACT,
     WETH_CONTRACT,
     BALANCE_ABI,
-    USER_AGENT
+    RECEIPT_SUCCESS,
+    RECEIPT_REVERTED,
+    RECEIPT_TIMEOUT,
+    get_web3
 )
 
 
 @patch("web3.eth.Eth.contract.functions.balanceOf.call", return_value=1)
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
 @patch("web3.eth.Eth.contract")
-@patch("web3.Web3.HTTPProvider", return_value='foo')
-def test_check_balance_slp(mock_provider, mock_contract, mock_checksum, _):
+@patch("axie.utils.get_web3", wraps=get_web3)
+def test_check_balance_slp(mocked_get_web3, mock_contract, mock_checksum, _):
     result = check_balance("ronin:abc")
-    mock_provider.assert_called_with(
-        RONIN_PROVIDER,
-        request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-    )
+    mocked_get_web3.assert_called_with(RONIN_PROVIDER)
     mock_checksum.assert_has_calls([call(SLP_CONTRACT), call("0xabc")])
     mock_contract.assert_called_with(address="checksum", abi=BALANCE_ABI)
     assert result == 1
@@ -33,13 +67,10 @@ def test_check_balance_slp(mock_provider, mock_contract, mock_checksum, _):
 @patch("web3.eth.Eth.contract.functions.balanceOf.call", return_value=1)
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
 @patch("web3.eth.Eth.contract")
-@patch("web3.Web3.HTTPProvider", return_value='foo')
-def test_check_balance_slp_explicit(mock_provider, mock_contract, mock_checksum, _):
+@patch("axie.utils.get_web3", wraps=get_web3)
+def test_check_balance_slp_explicit(mocked_get_web3, mock_contract, mock_checksum, _):
     result = check_balance("ronin:abc", 'slp')
-    mock_provider.assert_called_with(
-        RONIN_PROVIDER,
-        request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-    )
+    mocked_get_web3.assert_called_with(RONIN_PROVIDER)
     mock_checksum.assert_has_calls([call(SLP_CONTRACT), call("0xabc")])
     mock_contract.assert_called_with(address="checksum", abi=BALANCE_ABI)
     assert result == 1
@@ -48,13 +79,10 @@ def test_check_balance_slp_explicit(mock_provider, mock_contract, mock_checksum,
 @patch("web3.eth.Eth.contract.functions.balanceOf.call", return_value=1)
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
 @patch("web3.eth.Eth.contract")
-@patch("web3.Web3.HTTPProvider", return_value='foo')
-def test_check_balance_axs(mock_provider, mock_contract, mock_checksum, _):
+@patch("axie.utils.get_web3", wraps=get_web3)
+def test_check_balance_axs(mocked_get_web3, mock_contract, mock_checksum, _):
     result = check_balance("ronin:abc", "axs")
-    mock_provider.assert_called_with(
-        RONIN_PROVIDER,
-        request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-    )
+    mocked_get_web3.assert_called_with(RONIN_PROVIDER)
     mock_checksum.assert_has_calls([call(AXS_CONTRACT), call("0xabc")])
     mock_contract.assert_called_with(address="checksum", abi=BALANCE_ABI)
     assert result == 1
@@ -63,13 +91,10 @@ def test_check_balance_axs(mock_provider, mock_contract, mock_checksum, _):
 @patch("web3.eth.Eth.contract.functions.balanceOf.call", return_value=1000000000000000000)
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
 @patch("web3.eth.Eth.contract")
-@patch("web3.Web3.HTTPProvider", return_value='foo')
-def test_check_balance_weth(mock_provider, mock_contract, mock_checksum, _):
+@patch("axie.utils.get_web3", wraps=get_web3)
+def test_check_balance_weth(mocked_get_web3, mock_contract, mock_checksum, _):
     result = check_balance("ronin:abc", "weth")
-    mock_provider.assert_called_with(
-        RONIN_PROVIDER,
-        request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-    )
+    mocked_get_web3.assert_called_with(RONIN_PROVIDER)
     mock_checksum.assert_has_calls([call(WETH_CONTRACT), call("0xabc")])
     mock_contract.assert_called_with(address="checksum", abi=BALANCE_ABI)
     assert result == 1.0
@@ -78,13 +103,10 @@ def test_check_balance_weth(mock_provider, mock_contract, mock_checksum, _):
 @patch("web3.eth.Eth.contract.functions.balanceOf.call", return_value=1)
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
 @patch("web3.eth.Eth.contract")
-@patch("web3.Web3.HTTPProvider", return_value='foo')
-def test_check_balance_axie(mock_provider, mock_contract, mock_checksum, _):
+@patch("axie.utils.get_web3", wraps=get_web3)
+def test_check_balance_axie(mocked_get_web3, mock_contract, mock_checksum, _):
     result = check_balance("ronin:abc", "axies")
-    mock_provider.assert_called_with(
-        RONIN_PROVIDER,
-        request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-    )
+    mocked_get_web3.assert_called_with(RONIN_PROVIDER)
     mock_checksum.assert_has_calls([call(AXIE_CONTRACT), call("0xabc")])
     mock_contract.assert_called_with(address="checksum", abi=BALANCE_ABI)
     assert result == 1
@@ -93,10 +115,10 @@ def test_check_balance_axie(mock_provider, mock_contract, mock_checksum, _):
 @patch("web3.eth.Eth.contract.functions.balanceOf.call", return_value=1)
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
 @patch("web3.eth.Eth.contract")
-@patch("web3.Web3.HTTPProvider", return_value='foo')
-def test_check_balance_wrong(mock_provider, mock_contract, mock_checksum, _):
+@patch("axie.utils.get_web3", wraps=get_web3)
+def test_check_balance_wrong(mocked_get_web3, mock_contract, mock_checksum, _):
     result = check_balance("ronin:abc", "foo")
-    mock_provider.assert_not_called()
+    mocked_get_web3.assert_not_called()
     mock_checksum.assert_not_called()
     mock_contract.assert_not_called()
     assert result == 0
@@ -131,3 +153,453 @@ def test_get_nonce_calls_w3(mocked_transaction_count, mocked_checksum):
     mocked_checksum.assert_called_with("0xfrom_ronin")
     mocked_transaction_count.assert_called_with("foo")
     assert nonce == 123
+
+
+def test_get_web3_reuses_instance_per_endpoint():
+    providers.reset()
+    w3 = get_web3(RONIN_PROVIDER)
+    assert get_web3(RONIN_PROVIDER) is w3
+    assert get_web3(RONIN_PROVIDER_FREE) is not w3
+    assert isinstance(w3.provider, PooledHTTPProvider)
+    assert w3.provider.session is providers.get_session(RONIN_PROVIDER)
+    assert get_web3(RONIN_PROVIDER_FREE).provider.session is providers.get_session(RONIN_PROVIDER_FREE)
+    providers.reset()
+
+
+def test_provider_registry_pool_sizes():
+    registry = ProviderRegistry()
+    registry.configure(pool_size=4, **{RONIN_PROVIDER_FREE: 32})
+    assert registry.get_session(RONIN_PROVIDER).get_adapter(RONIN_PROVIDER)._pool_maxsize == 4
+    assert registry.get_session(RONIN_PROVIDER_FREE).get_adapter(RONIN_PROVIDER_FREE)._pool_maxsize == 32
+    registry.reset()
+
+
+def test_provider_registry_counts_connections():
+    providers.reset()
+    session = providers.get_session(RONIN_PROVIDER)
+    pool = session.get_adapter(RONIN_PROVIDER).poolmanager.connection_from_url(RONIN_PROVIDER)
+    assert isinstance(pool, CountingHTTPSConnectionPool)
+    pool._new_conn()
+    pool._new_conn()
+    assert providers.connections_opened() == {"api.roninchain.com": 2}
+    providers.reset()
+    assert providers.connections_opened() == {}
+
+
+def fake_rpc_node(balances, block="0x10"):
+    """ Returns a requests_mock json callback answering eth_blockNumber and
+    batched balanceOf eth_calls from the balances dict (0x address -> balance) """
+    def callback(request, context):
+        payload = request.json()
+        if isinstance(payload, dict):
+            return {"jsonrpc": "2.0", "id": payload["id"], "result": block}
+        responses = []
+        for call_ in payload:
+            assert call_["method"] == "eth_call"
+            assert call_["params"][1] == block
+            account = "0x" + call_["params"][0]["data"][-40:]
+            responses.append({"jsonrpc": "2.0", "id": call_["id"], "result": hex(balances[account])})
+        return responses[::-1]
+    return callback
+
+
+def test_rpc_batch_keeps_call_order():
+    providers.reset()
+    with requests_mock.Mocker() as req_mocker:
+        req_mocker.post(RONIN_PROVIDER, json=[
+            {"jsonrpc": "2.0", "id": 1, "result": "0x2"},
+            {"jsonrpc": "2.0", "id": 0, "result": "0x1"}])
+        result = rpc_batch([("eth_blockNumber", []), ("eth_chainId", [])])
+    assert result == [{"jsonrpc": "2.0", "id": 0, "result": "0x1"}, {"jsonrpc": "2.0", "id": 1, "result": "0x2"}]
+    assert req_mocker.last_request.json()[1] == {"jsonrpc": "2.0", "id": 1, "method": "eth_chainId", "params": []}
+    providers.reset()
+
+
+def test_rpc_batch_rejected_batch():
+    providers.reset()
+    error = {"code": -32005, "message": "rate limit exceeded"}
+    with requests_mock.Mocker() as req_mocker:
+        req_mocker.post(RONIN_PROVIDER, json={"jsonrpc": "2.0", "id": None, "error": error})
+        result = rpc_batch([("eth_blockNumber", []), ("eth_chainId", [])])
+    assert result == [{"error": error}, {"error": error}]
+    providers.reset()
+
+
+@patch("axie.utils.check_balance", side_effect=lambda acc, token: 7)
+def test_check_balances_rejected_batch_checks_one_by_one(mocked_check_balance):
+    providers.reset()
+    accounts = [f"ronin:{i:040x}" for i in range(2)]
+    with requests_mock.Mocker() as req_mocker:
+        req_mocker.post(RONIN_PROVIDER, json={"jsonrpc": "2.0", "id": None,
+                                              "error": {"code": -32600, "message": "batch too large"}})
+        result = check_balances(accounts, block="0x10")
+    assert result == {accounts[0]: 7, accounts[1]: 7}
+    assert mocked_check_balance.call_count == 2
+    providers.reset()
+
+
+def test_check_balances_batches_in_chunks():
+    providers.reset()
+    accounts = [f"ronin:{i:040x}" for i in range(5)]
+    balances = {acc.replace("ronin:", "0x"): i * 10 for i, acc in enumerate(accounts)}
+    with requests_mock.Mocker() as req_mocker:
+        req_mocker.post(RONIN_PROVIDER, json=fake_rpc_node(balances))
+        result = check_balances(accounts, chunk_size=2)
+    assert result == {acc: i * 10 for i, acc in enumerate(accounts)}
+    # 1 block number call + 3 batches
+    assert req_mocker.call_count == 4
+    assert [len(r.json()) for r in req_mocker.request_history[1:]] == [2, 2, 1]
+    providers.reset()
+
+
+@patch("axie.utils.check_balance", return_value=7)
+def test_check_balances_retries_failed_calls(mocked_check_balance):
+    providers.reset()
+    with requests_mock.Mocker() as req_mocker:
+        req_mocker.post(RONIN_PROVIDER, [
+            {"json": {"jsonrpc": "2.0", "id": 0, "result": "0x1"}},
+            {"json": [{"jsonrpc": "2.0", "id": 0, "error": {"code": -32000, "message": "boom"}}]}])
+        result = check_balances(["ronin:abc"], "axs")
+    mocked_check_balance.assert_called_with("ronin:abc", "axs")
+    assert result == {"ronin:abc": 7}
+    providers.reset()
+
+
+def test_check_balances_wrong_token():
+    assert check_balances(["ronin:abc"], "foo") == {"ronin:abc": 0}
+
+
+def test_check_receipts():
+    providers.reset()
+    with requests_mock.Mocker() as req_mocker:
+        req_mocker.post(RONIN_PROVIDER_FREE, [
+            {"json": [{"jsonrpc": "2.0", "id": 0, "result": {"status": "0x1"}},
+                      {"jsonrpc": "2.0", "id": 1, "result": {"status": "0x0"}}]},
+            {"json": [{"jsonrpc": "2.0", "id": 0, "result": None},
+                      {"jsonrpc": "2.0", "id": 1, "error": {"code": -32000, "message": "boom"}}]}])
+        result = check_receipts(["0x1", "0x2", "0x3", "0x4", "0x1"], chunk_size=2)
+    # Hashes that failed to be checked are left out
+    assert result == {"0x1": RECEIPT_SUCCESS, "0x2": RECEIPT_REVERTED, "0x3": None}
+    assert [len(r.json()) for r in req_mocker.request_history] == [2, 2]
+    providers.reset()
+
+
+@patch("web3.Web3.toChecksumAddress", return_value="foo")
+@patch("web3.eth.Eth.get_transaction_count", return_value=123)
+def test_get_nonce_pending(mocked_transaction_count, mocked_checksum):
+    nonce = get_nonce("ronin:from_ronin", pending=True)
+    mocked_checksum.assert_called_with("0xfrom_ronin")
+    mocked_transaction_count.assert_called_with("foo", "pending")
+    assert nonce == 123
+
+
+@patch("axie.utils.get_nonce", side_effect=[10, 20, 15])
+def test_nonce_manager(mocked_get_nonce):
+    manager = NonceManager()
+    assert manager.next_nonce("ronin:abc") == 10
+    assert manager.next_nonce("0xABC") == 11
+    assert manager.next_nonce("ronin:def") == 20
+    manager.resync("ronin:abc")
+    assert manager.next_nonce("ronin:abc") == 15
+    mocked_get_nonce.assert_has_calls([
+        call("0xabc", pending=True),
+        call("0xdef", pending=True),
+        call("0xabc", pending=True)])
+
+
+def test_nonce_manager_accounts_fetch_concurrently():
+    # Each fetch waits for the other one, this only finishes if both accounts fetch at the same time
+    barrier = threading.Barrier(2, timeout=5)
+    manager = NonceManager()
+    results = {}
+    with patch("axie.utils.get_nonce", side_effect=lambda key, pending: barrier.wait() and None or 1):
+        threads = [threading.Thread(target=lambda acc=acc: results.update({acc: manager.next_nonce(acc)}))
+                   for acc in ("ronin:abc", "ronin:def")]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    assert results == {"ronin:abc": 1, "ronin:def": 1}
+    assert not barrier.broken
+
+
+@pytest.mark.parametrize("error, expected", [
+    (ValueError({'code': -32000, 'message': 'nonce too low'}), True),
+    (ValueError({'code': -32000, 'message': 'Nonce too high'}), True),
+    (ValueError({'code': -32000, 'message': 'insufficient funds'}), False)])
+def test_is_nonce_error(error, expected):
+    assert is_nonce_error(error) is expected
+
+
+@patch("axie.utils.threading.Thread")
+@patch("axie.utils.rpc_batch", return_value=[
+    {"id": 0, "result": "0x64"},
+    {"id": 1, "result": {"status": "0x1"}},
+    {"id": 2, "result": {"status": "0x0"}},
+    {"id": 3, "result": None}])
+def test_receipt_watcher_poll(mocked_rpc_batch, _):
+    watcher = ReceiptWatcher()
+    ok, reverted, pending = watcher.watch("0xa"), watcher.watch("0xb"), watcher.watch("0xc")
+    watcher.poll()
+    mocked_rpc_batch.assert_called_once_with([
+        ("eth_blockNumber", []),
+        ("eth_getTransactionReceipt", ["0xa"]),
+        ("eth_getTransactionReceipt", ["0xb"]),
+        ("eth_getTransactionReceipt", ["0xc"])], RONIN_PROVIDER_FREE)
+    assert ok.result(0) == RECEIPT_SUCCESS
+    assert reverted.result(0) == RECEIPT_REVERTED
+    assert not pending.done()
+    assert list(watcher.pending) == ["0xc"]
+
+
+@patch("axie.utils.threading.Thread")
+@patch("axie.utils.rpc_batch", return_value=[{"id": 0, "result": "0x64"}, {"id": 1, "result": None}])
+def test_receipt_watcher_poll_times_out(mocked_rpc_batch, _):
+    watcher = ReceiptWatcher()
+    callback_results = []
+    expired = watcher.watch("0xa", timeout=-1, callback=lambda f: callback_results.append(f.result()))
+    watcher.poll()
+    assert expired.result(0) == RECEIPT_TIMEOUT
+    assert callback_results == [RECEIPT_TIMEOUT]
+    assert watcher.pending == {}
+
+
+@patch("axie.utils.threading.Thread")
+@patch("axie.utils.rpc_batch", return_value=[
+    {"id": 0, "result": "not a block"},
+    {"id": 1, "result": {"status": "0x1"}},
+    {"id": 2, "result": {"status": None}}])
+def test_receipt_watcher_poll_malformed_responses(mocked_rpc_batch, _):
+    watcher = ReceiptWatcher()
+    ok, malformed = watcher.watch("0xa"), watcher.watch("0xb")
+    watcher.poll()
+    assert not ok.done() and not malformed.done()
+    mocked_rpc_batch.return_value = [{"id": 0, "result": "0x64"}, {"id": 1, "result": {"status": "0x1"}},
+                                     {"id": 2, "result": {"status": None}}]
+    watcher.poll()
+    assert ok.result(0) == RECEIPT_SUCCESS
+    # Still waiting, it times out like any other transaction without a receipt
+    assert list(watcher.pending) == ["0xb"]
+
+
+@patch("axie.utils.sleep")
+def test_receipt_watcher_survives_poll_errors(_, caplog):
+    watcher = ReceiptWatcher()
+    future = Future()
+    watcher.pending = {"0xa": [(future, 0)]}
+    polls = []
+
+    def poll():
+        polls.append(1)
+        if len(polls) == 1:
+            raise KeyError("status")
+        watcher.resolve("0xa", RECEIPT_SUCCESS)
+
+    with patch.object(watcher, "poll", side_effect=poll):
+        watcher.run()
+    assert len(polls) == 2
+    assert future.result(0) == RECEIPT_SUCCESS
+    assert "Unexpected error polling transaction receipts, will re-try." in caplog.text
+
+
+def test_receipt_watcher_block_time():
+    watcher = ReceiptWatcher()
+    assert watcher.poll_interval == 3
+    watcher.update_block_time(100, 0)
+    watcher.update_block_time(101, 10)
+    assert watcher.block_time == pytest.approx(5.1)
+    # Same block again does not change the estimate
+    watcher.update_block_time(101, 20)
+    assert watcher.block_time == pytest.approx(5.1)
+    watcher.block_time = 60
+    assert watcher.poll_interval == 10
+    watcher.block_time = 0.1
+    assert watcher.poll_interval == 1
+
+
+@patch("axie.utils.monotonic", return_value=100)
+def test_token_bucket_burst_then_rate(_):
+    bucket = TokenBucket(rate=2, burst=3)
+    # The burst goes out right away, then one request every 1/rate seconds
+    assert [bucket.reserve() for _ in range(5)] == [0, 0, 0, 0.5, 1]
+
+
+@patch("axie.utils.sleep")
+@patch("axie.utils.monotonic", side_effect=[100, 100, 100, 110])
+def test_token_bucket_refills(mocked_monotonic, mocked_sleep):
+    bucket = TokenBucket(rate=1, burst=2)
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    mocked_sleep.assert_not_called()
+    # Refilling never goes over the burst size
+    assert bucket.acquire() == 0
+    assert bucket.tokens == 1
+
+
+@patch("axie.utils.sleep")
+def test_rate_limiter_per_host(mocked_sleep):
+    limiter = RateLimiter({"game-api.skymavis.com": (1, 1)})
+    assert limiter.acquire("https://game-api.skymavis.com/game-api/clients/0xfoo/items/1") == 0
+    assert limiter.acquire("https://game-api.skymavis.com/game-api/clients/0xbar/items/1") > 0
+    mocked_sleep.assert_called_once()
+    # Other hosts are not throttled
+    assert limiter.get_bucket("example.com") is None
+    assert limiter.acquire("https://example.com/") == 0
+    limiter.configure("example.com", 10, 5)
+    assert limiter.get_bucket("example.com").burst == 5
+
+
+@patch("axie.utils.rate_limiter.acquire")
+def test_rate_limited_session_waits_for_limiter(mocked_acquire):
+    session = rate_limited_session()
+    assert isinstance(session.get_adapter("https://game-api.skymavis.com"), RateLimitedHTTPAdapter)
+    response = requests.Response()
+    response.status_code = 200
+    with patch("requests.adapters.HTTPAdapter.send", return_value=response) as mocked_send:
+        session.get("https://game-api.skymavis.com/game-api/clients/0xfoo/items/1")
+    mocked_acquire.assert_called_once_with("https://game-api.skymavis.com/game-api/clients/0xfoo/items/1")
+    mocked_send.assert_called_once()
+
+
+def make_jwt(exp):
+    payload = base64.urlsafe_b64encode(json.dumps({"exp": exp}).encode()).decode().rstrip("=")
+    return f"header.{payload}.signature"
+
+
+def test_jwt_expiry():
+    assert jwt_expiry(make_jwt(1234)) == 1234
+    assert jwt_expiry("not_a_jwt") is None
+    assert jwt_expiry(None) is None
+
+
+@patch("axie.utils.time", return_value=1000)
+def test_jwt_cache_expiry(_):
+    cache = JWTCache(margin=300)
+    cache.set("0xFoo", make_jwt(2000))
+    cache.set("0xbar", make_jwt(1200))
+    cache.set("0xbaz", "opaque_token")
+    assert cache.get("0xfoo") == make_jwt(2000)
+    # Expires within the margin, it has to be refreshed
+    assert cache.get("0xbar") is None
+    # Tokens without expiry are never cached
+    assert cache.get("0xbaz") is None
+
+
+@patch("axie.utils.time", return_value=1000)
+def test_jwt_cache_persist(_, tmpdir):
+    path = str(tmpdir.join("tokens.json"))
+    cache = JWTCache()
+    cache.persist(path)
+    cache.set("0xfoo", make_jwt(2000))
+    assert os.stat(path).st_mode & 0o777 == 0o600
+    other = JWTCache()
+    other.persist(path)
+    assert other.get("0xfoo") == make_jwt(2000)
+
+
+def test_content_hash_ignores_key_order():
+    assert content_hash({"a": 1, "b": [1, 2]}) == content_hash({"b": [1, 2], "a": 1})
+    assert content_hash({"a": 1, "b": [1, 2]}) != content_hash({"a": 1, "b": [2, 1]})
+
+
+def test_validation_cache_key():
+    key = ValidationCache.key("transfers", {"foo": "bar"}, {"ronin:foo": "0xkey"})
+    assert key == ValidationCache.key("transfers", {"foo": "bar"}, {"ronin:foo": "0xkey"})
+    assert key != ValidationCache.key("breeding", {"foo": "bar"}, {"ronin:foo": "0xkey"})
+    assert key != ValidationCache.key("transfers", {"foo": "baz"}, {"ronin:foo": "0xkey"})
+    assert key != ValidationCache.key("transfers", {"foo": "bar"}, {"ronin:foo": "0xother"})
+    with patch("axie.utils.SCHEMA_VERSION", "other"):
+        assert key != ValidationCache.key("transfers", {"foo": "bar"}, {"ronin:foo": "0xkey"})
+
+
+def test_validation_cache_inactive_until_persisted():
+    cache = ValidationCache()
+    cache.add("foo")
+    assert not cache.passed("foo")
+
+
+def test_validation_cache_persist(tmpdir):
+    path = str(tmpdir.join("validated.json"))
+    cache = ValidationCache()
+    cache.persist(path)
+    cache.add("foo")
+    assert cache.passed("foo")
+    assert not cache.passed("bar")
+    other = ValidationCache()
+    other.persist(path)
+    assert other.passed("foo")
+    # Only hashes are written
+    with open(path) as f:
+        assert list(json.load(f)) == ["foo"]
+
+
+def test_validation_cache_size(tmpdir):
+    cache = ValidationCache(size=2)
+    cache.persist(str(tmpdir.join("validated.json")))
+    with patch("axie.utils.time", side_effect=[1, 2, 3]):
+        for key in ["foo", "bar", "baz"]:
+            cache.add(key)
+    assert not cache.passed("foo")
+    assert cache.passed("bar") and cache.passed("baz")
+
+
+def test_validation_cache_wrong_file(tmpdir, caplog):
+    f = tmpdir.join("validated.json")
+    f.write("foo")
+    cache = ValidationCache()
+    cache.persist(str(f))
+    assert f"Ignoring validation cache file {f}, it is not a correctly encoded JSON." in caplog.text
+
+
+@patch("axie.utils.AxieGraphQL.create_jwt", return_value=make_jwt(4102444800))
+def test_axie_graphql_get_jwt_reuses_token(mocked_create_jwt):
+    jwt_cache.clear()
+    assert AxieGraphQL(account="ronin:foo").get_jwt() == make_jwt(4102444800)
+    assert AxieGraphQL(account="ronin:foo").get_jwt() == make_jwt(4102444800)
+    mocked_create_jwt.assert_called_once()
+    jwt_cache.clear()
+
+
+def test_load_abi_parses_file_once():
+    with patch.object(builtins, "open", mock_open(read_data='[{"foo": "bar"}]')) as mock_file:
+        assert load_abi("axie/slp_abi.json") == [{"foo": "bar"}]
+        assert load_abi("axie/slp_abi.json") is load_abi("axie/slp_abi.json")
+    mock_file.assert_called_once_with("axie/slp_abi.json", encoding='utf-8')
+
+
+@patch("web3.Web3.toChecksumAddress", return_value="checksum")
+@patch("web3.eth.Eth.contract", side_effect=lambda **kwargs: object())
+def test_get_contract_builds_each_contract_once(mock_contract, mock_checksum):
+    w3 = get_web3(RONIN_PROVIDER_FREE)
+    with patch.object(builtins, "open", mock_open(read_data='{"foo": "bar"}')):
+        slp = get_contract(w3, SLP_CONTRACT, "axie/slp_abi.json")
+        assert get_contract(w3, SLP_CONTRACT.upper().replace("0X", "0x"), "axie/slp_abi.json") is slp
+        assert get_contract(w3, AXIE_CONTRACT, "axie/axie_abi.json") is not slp
+        assert get_contract(get_web3(RONIN_PROVIDER), SLP_CONTRACT, "axie/slp_abi.json") is not slp
+    assert mock_contract.call_count == 3
+    mock_contract.assert_any_call(address="checksum", abi={"foo": "bar"})
+    mock_checksum.assert_any_call(SLP_CONTRACT)
+
+
+def test_log_buffer_keeps_thread_logs_together(caplog):
+    barrier = threading.Barrier(2, timeout=5)
+    main_logged = threading.Event()
+
+    def worker(name):
+        with log_buffer.buffered():
+            for i in range(3):
+                logging.info(f"{name} {i}")
+                barrier.wait()
+            main_logged.wait(5)
+
+    with caplog.at_level(logging.INFO):
+        threads = [threading.Thread(target=worker, args=(name,)) for name in ["a", "b"]]
+        for t in threads:
+            t.start()
+        logging.info("main thread is not buffered")
+        main_logged.set()
+        for t in threads:
+            t.join()
+    messages = [r.getMessage() for r in caplog.records]
+    assert messages[0] == "main thread is not buffered"
+    assert sorted([messages[1:4], messages[4:7]]) == [["a 0", "a 1", "a 2"], ["b 0", "b 1", "b 2"]]
@@ -9,6 +9,8 @@ import requests_mock
 import pytest
 
 import axie_scholar_cli as cli
+from axie.axie_index import AxieIndex
+from axie.signing import SIGNING_WORKERS
 
 
 @pytest.mark.parametrize("params, expected_result",
@@ -16,6 +18,14 @@ import axie_scholar_cli as cli
                             (["payout", "file1", "file2"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None, "--signing-workers": None, "--stream": False,
+                              "--stop-on-revert": False,
+                              "--workers": None,
+                              "--journal": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -38,12 +48,25 @@ import axie_scholar_cli as cli
                               'managed_generate_QR': False,
                               'managed_generate_secrets': False,
                               'managed_payout': False,
+                              'generate_payout_plan': False,
+                              'plan_payout': False,
+                              'resume_payout': False,
+                              '<journal_file>': None,
+                              '<plan_file>': None,
                               "generate_secrets": False,
                               'generate_payments': False,
                               "payout": True}),
                             (["payout", "file1", "file2", "-y"],
                              {"--help": False,
                              "--force": False,
+                             "--jwt-cache": None,
+                             "--axie-index": None,
+                             "--format": "png",
+                             "--output": None,
+                             "--validation-cache": None, "--pool-size": None, "--signing-workers": None, "--stream": False,
+                             "--stop-on-revert": False,
+                             "--workers": None,
+                             "--journal": None,
                               "--version": False,
                               "--yes": True,
                               "--safe-mode": False,
@@ -66,12 +89,25 @@ import axie_scholar_cli as cli
                               'managed_generate_QR': False,
                               'managed_generate_secrets': False,
                               'managed_payout': False,
+                              'generate_payout_plan': False,
+                              'plan_payout': False,
+                              'resume_payout': False,
+                              '<journal_file>': None,
+                              '<plan_file>': None,
                               "generate_secrets": False,
                               'generate_payments': False,
                               "payout": True}),
                             (["payout", "file1", "file2", "--yes"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None, "--signing-workers": None, "--stream": False,
+                              "--stop-on-revert": False,
+                              "--workers": None,
+                              "--journal": None,
                               "--version": False,
                               "--yes": True,
                               "--safe-mode": False,
@@ -94,12 +130,25 @@ import axie_scholar_cli as cli
                               'managed_generate_QR': False,
                               'managed_generate_secrets': False,
                               'managed_payout': False,
+                              'generate_payout_plan': False,
+                              'plan_payout': False,
+                              'resume_payout': False,
+                              '<journal_file>': None,
+                              '<plan_file>': None,
                               "generate_secrets": False,
                               'generate_payments': False,
                               "payout": True}),
                             (["managed_payout", "file1", "secret", "--yes"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None, "--signing-workers": None, "--stream": False,
+                              "--stop-on-revert": False,
+                              "--workers": None,
+                              "--journal": None,
                               "--version": False,
                               "--yes": True,
                               "--safe-mode": False,
@@ -122,12 +171,25 @@ import axie_scholar_cli as cli
                               'managed_generate_QR': False,
                               'managed_generate_secrets': False,
                               'managed_payout': True,
+                              'generate_payout_plan': False,
+                              'plan_payout': False,
+                              'resume_payout': False,
+                              '<journal_file>': None,
+                              '<plan_file>': None,
                               "generate_secrets": False,
                               'generate_payments': False,
                               "payout": False}),
                             (["managed_payout", "file1", "secret", "-y"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None, "--signing-workers": None, "--stream": False,
+                              "--stop-on-revert": False,
+                              "--workers": None,
+                              "--journal": None,
                               "--version": False,
                               "--yes": True,
                               "--safe-mode": False,
@@ -150,12 +212,25 @@ import axie_scholar_cli as cli
                               'managed_generate_QR': False,
                               'managed_generate_secrets': False,
                               'managed_payout': True,
+                              'generate_payout_plan': False,
+                              'plan_payout': False,
+                              'resume_payout': False,
+                              '<journal_file>': None,
+                              '<plan_file>': None,
                               "generate_secrets": False,
                               'generate_payments': False,
                               "payout": False}),
                             (["managed_payout", "file1", "secret"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None, "--signing-workers": None, "--stream": False,
+                              "--stop-on-revert": False,
+                              "--workers": None,
+                              "--journal": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -178,12 +253,25 @@ import axie_scholar_cli as cli
                               'managed_generate_QR': False,
                               'managed_generate_secrets': False,
                               'managed_payout': True,
+                              'generate_payout_plan': False,
+                              'plan_payout': False,
+                              'resume_payout': False,
+                              '<journal_file>': None,
+                              '<plan_file>': None,
                               "generate_secrets": False,
                               'generate_payments': False,
                               "payout": False}),
                             (["claim", "file1", "file2"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None, "--signing-workers": None, "--stream": False,
+                              "--stop-on-revert": False,
+                              "--workers": None,
+                              "--journal": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -206,12 +294,25 @@ import axie_scholar_cli as cli
                               'managed_generate_QR': False,
                               'managed_generate_secrets': False,
                               'managed_payout': False,
+                              'generate_payout_plan': False,
+                              'plan_payout': False,
+                              'resume_payout': False,
+                              '<journal_file>': None,
+                              '<plan_file>': None,
                               "generate_secrets": False,
                               'generate_payments': False,
                               "payout": False}),
                             (["claim", "file1", "file2", "--force"],
                              {"--help": False,
                               "--force": True,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None, "--signing-workers": None, "--stream": False,
+                              "--stop-on-revert": False,
+                              "--workers": None,
+                              "--journal": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -234,12 +335,25 @@ import axie_scholar_cli as cli
                               'managed_generate_QR': False,
                               'managed_generate_secrets': False,
                               'managed_payout': False,
+                              'generate_payout_plan': False,
+                              'plan_payout': False,
+                              'resume_payout': False,
+                              '<journal_file>': None,
+                              '<plan_file>': None,
                               "generate_secrets": False,
                               'generate_payments': False,
                               "payout": False}),
                             (["managed_claim", "file1", "secret", "--force"],
                              {"--help": False,
                               "--force": True,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None, "--signing-workers": None, "--stream": False,
+                              "--stop-on-revert": False,
+                              "--workers": None,
+                              "--journal": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -262,12 +376,25 @@ import axie_scholar_cli as cli
                               'managed_generate_QR': False,
                               'managed_generate_secrets': False,
                               'managed_payout': False,
+                              'generate_payout_plan': False,
+                              'plan_payout': False,
+                              'resume_payout': False,
+                              '<journal_file>': None,
+                              '<plan_file>': None,
                               "generate_secrets": False,
                               'generate_payments': False,
                               "payout": False}),
                             (["managed_claim", "file1", "secret"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None, "--signing-workers": None, "--stream": False,
+                              "--stop-on-revert": False,
+                              "--workers": None,
+                              "--journal": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -290,12 +417,25 @@ import axie_scholar_cli as cli
                               'managed_generate_QR': False,
                               'managed_generate_secrets': False,
                               'managed_payout': False,
+                              'generate_payout_plan': False,
+                              'plan_payout': False,
+                              'resume_payout': False,
+                              '<journal_file>': None,
+                              '<plan_file>': None,
                               "generate_secrets": False,
                               'generate_payments': False,
                               "payout": False}),
                             (["generate_secrets", "file1"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None, "--signing-workers": None, "--stream": False,
+                              "--stop-on-revert": False,
+                              "--workers": None,
+                              "--journal": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -318,12 +458,25 @@ import axie_scholar_cli as cli
                               'managed_generate_QR': False,
                               'managed_generate_secrets': False,
                               'managed_payout': False,
+                              'generate_payout_plan': False,
+                              'plan_payout': False,
+                              'resume_payout': False,
+                              '<journal_file>': None,
+                              '<plan_file>': None,
                               "generate_secrets": True,
                               'generate_payments': False,
                               "payout": False}),
                             (["generate_secrets", "file1", "file2"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None, "--signing-workers": None, "--stream": False,
+                              "--stop-on-revert": False,
+                              "--workers": None,
+                              "--journal": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -346,12 +499,25 @@ import axie_scholar_cli as cli
                               'managed_generate_QR': False,
                               'managed_generate_secrets': False,
                               'managed_payout': False,
+                              'generate_payout_plan': False,
+                              'plan_payout': False,
+                              'resume_payout': False,
+                              '<journal_file>': None,
+                              '<plan_file>': None,
                               "generate_secrets": True,
                               'generate_payments': False,
                               "payout": False}),
                             (["managed_generate_secrets", "file1", "secret"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None, "--signing-workers": None, "--stream": False,
+                              "--stop-on-revert": False,
+                              "--workers": None,
+                              "--journal": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -374,12 +540,25 @@ import axie_scholar_cli as cli
                               'managed_generate_QR': False,
                               'managed_generate_secrets': True,
                               'managed_payout': False,
+                              'generate_payout_plan': False,
+                              'plan_payout': False,
+                              'resume_payout': False,
+                              '<journal_file>': None,
+                              '<plan_file>': None,
                               "generate_secrets": False,
                               'generate_payments': False,
                               "payout": False}),
                             (["transfer_axies", "file1", "file2"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None, "--signing-workers": None, "--stream": False,
+                              "--stop-on-revert": False,
+                              "--workers": None,
+                              "--journal": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -400,6 +579,11 @@ import axie_scholar_cli as cli
                               'managed_generate_QR': False,
                               'managed_generate_secrets': False,
                               'managed_payout': False,
+                              'generate_payout_plan': False,
+                              'plan_payout': False,
+                              'resume_payout': False,
+                              '<journal_file>': None,
+                              '<plan_file>': None,
                               "claim": False,
                               "generate_QR": False,
                               "generate_secrets": False,
@@ -408,6 +592,14 @@ import axie_scholar_cli as cli
                             (["transfer_axies", "file1", "file2", "--safe-mode"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None, "--signing-workers": None, "--stream": False,
+                              "--stop-on-revert": False,
+                              "--workers": None,
+                              "--journal": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": True,
@@ -430,12 +622,25 @@ import axie_scholar_cli as cli
                               'managed_generate_QR': False,
                               'managed_generate_secrets': False,
                               'managed_payout': False,
+                              'generate_payout_plan': False,
+                              'plan_payout': False,
+                              'resume_payout': False,
+                              '<journal_file>': None,
+                              '<plan_file>': None,
                               "generate_secrets": False,
                               'generate_payments': False,
                               "payout": False}),
                             (["mass_update_secrets", "file1", "file2"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None, "--signing-workers": None, "--stream": False,
+                              "--stop-on-revert": False,
+                              "--workers": None,
+                              "--journal": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -458,12 +663,25 @@ import axie_scholar_cli as cli
                               'managed_generate_QR': False,
                               'managed_generate_secrets': False,
                               'managed_payout': False,
+                              'generate_payout_plan': False,
+                              'plan_payout': False,
+                              'resume_payout': False,
+                              '<journal_file>': None,
+                              '<plan_file>': None,
                               "generate_secrets": False,
                               'generate_payments': False,
                               "payout": False}),
                             (["generate_payments", "file1", "file2"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None, "--signing-workers": None, "--stream": False,
+                              "--stop-on-revert": False,
+                              "--workers": None,
+                              "--journal": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -486,12 +704,25 @@ import axie_scholar_cli as cli
                               'managed_generate_QR': False,
                               'managed_generate_secrets': False,
                               'managed_payout': False,
+                              'generate_payout_plan': False,
+                              'plan_payout': False,
+                              'resume_payout': False,
+                              '<journal_file>': None,
+                              '<plan_file>': None,
                               "generate_secrets": False,
                               'generate_payments': True,
                               "payout": False}),
                             (["generate_payments", "file1"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None, "--signing-workers": None, "--stream": False,
+                              "--stop-on-revert": False,
+                              "--workers": None,
+                              "--journal": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -514,12 +745,25 @@ import axie_scholar_cli as cli
                               'managed_generate_QR': False,
                               'managed_generate_secrets': False,
                               'managed_payout': False,
+                              'generate_payout_plan': False,
+                              'plan_payout': False,
+                              'resume_payout': False,
+                              '<journal_file>': None,
+                              '<plan_file>': None,
                               "generate_secrets": False,
                               'generate_payments': True,
                               "payout": False}),
                             (["axie_morphing", "file1", "a,b,c"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None, "--signing-workers": None, "--stream": False,
+                              "--stop-on-revert": False,
+                              "--workers": None,
+                              "--journal": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -542,12 +786,25 @@ import axie_scholar_cli as cli
                               'managed_generate_QR': False,
                               'managed_generate_secrets': False,
                               'managed_payout': False,
+                              'generate_payout_plan': False,
+                              'plan_payout': False,
+                              'resume_payout': False,
+                              '<journal_file>': None,
+                              '<plan_file>': None,
                               "generate_secrets": False,
                               'generate_payments': False,
                               "payout": False}),
                             (["axie_breeding", "file1", "file2"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None, "--signing-workers": None, "--stream": False,
+                              "--stop-on-revert": False,
+                              "--workers": None,
+                              "--journal": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -570,12 +827,25 @@ import axie_scholar_cli as cli
                               'managed_generate_QR': False,
                               'managed_generate_secrets': False,
                               'managed_payout': False,
+                              'generate_payout_plan': False,
+                              'plan_payout': False,
+                              'resume_payout': False,
+                              '<journal_file>': None,
+                              '<plan_file>': None,
                               "generate_secrets": False,
                               'generate_payments': False,
                               "payout": False}),
                             (["generate_QR", "file1", "file2"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None, "--signing-workers": None, "--stream": False,
+                              "--stop-on-revert": False,
+                              "--workers": None,
+                              "--journal": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -598,12 +868,25 @@ import axie_scholar_cli as cli
                               'managed_generate_QR': False,
                               'managed_generate_secrets': False,
                               'managed_payout': False,
+                              'generate_payout_plan': False,
+                              'plan_payout': False,
+                              'resume_payout': False,
+                              '<journal_file>': None,
+                              '<plan_file>': None,
                               "generate_secrets": False,
                               'generate_payments': False,
                               "payout": False}),
                             (["managed_generate_QR", "file1", "secret"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None, "--signing-workers": None, "--stream": False,
+                              "--stop-on-revert": False,
+                              "--workers": None,
+                              "--journal": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -626,12 +909,25 @@ import axie_scholar_cli as cli
                               'managed_generate_QR': True,
                               'managed_generate_secrets': False,
                               'managed_payout': False,
+                              'generate_payout_plan': False,
+                              'plan_payout': False,
+                              'resume_payout': False,
+                              '<journal_file>': None,
+                              '<plan_file>': None,
                               "generate_secrets": False,
                               'generate_payments': False,
                               "payout": False}),
                             (["generate_breedings", "file1", "file2"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None, "--signing-workers": None, "--stream": False,
+                              "--stop-on-revert": False,
+                              "--workers": None,
+                              "--journal": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -654,12 +950,25 @@ import axie_scholar_cli as cli
                               'managed_generate_QR': False,
                               'managed_generate_secrets': False,
                               'managed_payout': False,
+                              'generate_payout_plan': False,
+                              'plan_payout': False,
+                              'resume_payout': False,
+                              '<journal_file>': None,
+                              '<plan_file>': None,
                               "generate_secrets": False,
                               'generate_payments': False,
                               "payout": False}),
                             (["generate_breedings", "file1"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None, "--signing-workers": None, "--stream": False,
+                              "--stop-on-revert": False,
+                              "--workers": None,
+                              "--journal": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -682,12 +991,25 @@ import axie_scholar_cli as cli
                               'managed_generate_QR': False,
                               'managed_generate_secrets': False,
                               'managed_payout': False,
+                              'generate_payout_plan': False,
+                              'plan_payout': False,
+                              'resume_payout': False,
+                              '<journal_file>': None,
+                              '<plan_file>': None,
                               "generate_secrets": False,
                               'generate_payments': False,
                               "payout": False}),
                             (["generate_transfer_axies", "file1", "file2"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None, "--signing-workers": None, "--stream": False,
+                              "--stop-on-revert": False,
+                              "--workers": None,
+                              "--journal": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -710,12 +1032,25 @@ import axie_scholar_cli as cli
                               'managed_generate_QR': False,
                               'managed_generate_secrets': False,
                               'managed_payout': False,
+                              'generate_payout_plan': False,
+                              'plan_payout': False,
+                              'resume_payout': False,
+                              '<journal_file>': None,
+                              '<plan_file>': None,
                               "generate_secrets": False,
                               'generate_payments': False,
                               "payout": False}),
                             (["generate_transfer_axies", "file1"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None, "--signing-workers": None, "--stream": False,
+                              "--stop-on-revert": False,
+                              "--workers": None,
+                              "--journal": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -738,6 +1073,11 @@ import axie_scholar_cli as cli
                               'managed_generate_QR': False,
                               'managed_generate_secrets': False,
                               'managed_payout': False,
+                              'generate_payout_plan': False,
+                              'plan_payout': False,
+                              'resume_payout': False,
+                              '<journal_file>': None,
+                              '<plan_file>': None,
                               "generate_secrets": False,
                               'generate_payments': False,
                               "payout": False})
@@ -1010,7 +1350,10 @@ def test_payout_takes_auto_parameter(mock_prepare_payout, mock_verify_input, moc
     mocked_paymentsmanager.assert_called_with(
         {'Scholars': [{'Name': 'Acc1', 'AccountAddress': 'ronin:<account_s1_address>'}]},
         {'ronin:<account_s1_address>': 'hello'},
-        auto=False
+        auto=False,
+        workers=1,
+        signing_workers=SIGNING_WORKERS,
+        journal=None
     )
 
 
@@ -1029,10 +1372,50 @@ def test_payout_takes_auto_parameter(mock_prepare_payout, mock_verify_input, moc
     mocked_paymentsmanager.assert_called_with(
         {'Scholars': [{'Name': 'Acc1', 'AccountAddress': 'ronin:<account_s1_address>'}]},
         {'ronin:<account_s1_address>': 'hello'},
-        auto=False
+        auto=False,
+        workers=1,
+        signing_workers=SIGNING_WORKERS,
+        journal=None
     )
 
 
+@patch("axie.AxiePaymentsManager.__init__", return_value=None)
+@patch("axie.AxiePaymentsManager.verify_inputs")
+@patch("axie.AxiePaymentsManager.prepare_payout")
+def test_payout_takes_workers_parameter(mock_prepare_payout, mock_verify_inputs, mocked_paymentsmanager, tmpdir):
+    f1 = tmpdir.join("file1.json")
+    f1.write('{"Scholars":[{"Name": "Acc1", "AccountAddress": "ronin:<account_s1_address>"}]}')
+    f2 = tmpdir.join("file2.json")
+    f2.write('{"ronin:<account_s1_address>": "hello"}')
+    with patch.object(sys, 'argv', ["", "payout", str(f1), str(f2), "-y", "--workers", "8"]):
+        cli.run_cli()
+    mock_prepare_payout.assert_called_with()
+    mock_verify_inputs.assert_called_with()
+    mocked_paymentsmanager.assert_called_with(
+        {'Scholars': [{'Name': 'Acc1', 'AccountAddress': 'ronin:<account_s1_address>'}]},
+        {'ronin:<account_s1_address>': 'hello'},
+        auto=True,
+        workers=8,
+        signing_workers=SIGNING_WORKERS,
+        journal=None
+    )
+
+
+@patch("axie.AxiePaymentsManager.__init__", return_value=None)
+@patch("axie.AxiePaymentsManager.prepare_payout")
+def test_payout_wrong_workers_parameter(mock_prepare_payout, mocked_paymentsmanager, tmpdir, caplog):
+    f1 = tmpdir.join("file1.json")
+    f1.write('{"Scholars":[{"Name": "Acc1", "AccountAddress": "ronin:<account_s1_address>"}]}')
+    f2 = tmpdir.join("file2.json")
+    f2.write('{"ronin:<account_s1_address>": "hello"}')
+    with patch.object(sys, 'argv', ["", "payout", str(f1), str(f2), "--workers", "0"]):
+        with pytest.raises(SystemExit):
+            cli.run_cli()
+    mocked_paymentsmanager.assert_not_called()
+    mock_prepare_payout.assert_not_called()
+    assert "Number of workers must be a positive integer, got: 0" in caplog.text
+
+
 @patch("axie.AxiePaymentsManager.__init__", return_value=None)
 @patch("axie.AxiePaymentsManager.verify_inputs")
 @patch("axie.AxiePaymentsManager.prepare_payout")
@@ -1048,7 +1431,10 @@ def test_payout_takes_auto_parameter_yes(mock_prepare_payout, mock_verify_inputs
     mocked_paymentsmanager.assert_called_with(
         {'Scholars': [{'Name': 'Acc1', 'AccountAddress': 'ronin:<account_s1_address>'}]},
         {'ronin:<account_s1_address>': 'hello'},
-        auto=True
+        auto=True,
+        workers=1,
+        signing_workers=SIGNING_WORKERS,
+        journal=None
     )
 
 
@@ -1067,9 +1453,29 @@ def test_claim(mock_verify_inputs, mock_prepare_claims, mock_claimsmanager, tmpd
     mock_claimsmanager.assert_called_with(
         {'ronin:<account_s1_address>': 'hello'},
         {'ronin:<account_s1_address>': 'hello'},
-        False
+        False,
+        concurrency=25
     )
 
+@patch("axie.AxieClaimsManager.__init__", return_value=None)
+@patch("axie.AxieClaimsManager.prepare_claims")
+@patch("axie.AxieClaimsManager.verify_inputs")
+def test_claim_takes_workers_parameter(mock_verify_inputs, mock_prepare_claims, mock_claimsmanager, tmpdir):
+    f1 = tmpdir.join("file1.json")
+    f1.write('{"ronin:<account_s1_address>": "hello"}')
+    f2 = tmpdir.join("file2.json")
+    f2.write('{"ronin:<account_s1_address>": "hello"}')
+    with patch.object(sys, 'argv', ["", "claim", str(f1), str(f2), "--workers", "40"]):
+        cli.run_cli()
+    mock_prepare_claims.assert_called_with()
+    mock_claimsmanager.assert_called_with(
+        {'ronin:<account_s1_address>': 'hello'},
+        {'ronin:<account_s1_address>': 'hello'},
+        False,
+        concurrency=40
+    )
+
+
 @patch("axie.AxieClaimsManager.__init__", return_value=None)
 @patch("axie.AxieClaimsManager.prepare_claims")
 @patch("axie.AxieClaimsManager.verify_inputs")
@@ -1085,10 +1491,100 @@ def test_claim_foced(mock_verify_inputs, mock_prepare_claims, mock_claimsmanager
     mock_claimsmanager.assert_called_with(
         {'ronin:<account_s1_address>': 'hello'},
         {'ronin:<account_s1_address>': 'hello'},
-        True
+        True,
+        concurrency=25
     )
 
 
+@patch("axie_scholar_cli.jwt_cache.persist")
+@patch("axie.AxieClaimsManager.__init__", return_value=None)
+@patch("axie.AxieClaimsManager.prepare_claims")
+@patch("axie.AxieClaimsManager.verify_inputs")
+def test_claim_jwt_cache(mock_verify_inputs, mock_prepare_claims, mock_claimsmanager, mock_persist, tmpdir):
+    f1 = tmpdir.join("file1.json")
+    f1.write('{"ronin:<account_s1_address>": "hello"}')
+    f2 = tmpdir.join("file2.json")
+    f2.write('{"ronin:<account_s1_address>": "hello"}')
+    with patch.object(sys, 'argv', ["", "claim", str(f1), str(f2), '--jwt-cache', 'tokens.json']):
+        cli.run_cli()
+    mock_persist.assert_called_with('tokens.json')
+    mock_prepare_claims.assert_called_with()
+
+
+@patch("axie_scholar_cli.validation_cache.persist")
+@patch("axie.AxieTransferManager.__init__", return_value=None)
+@patch("axie.AxieTransferManager.prepare_transfers")
+@patch("axie.AxieTransferManager.verify_inputs")
+def test_transfer_validation_cache(mock_verify_inputs, mock_prepare_transfers, mock_transfersmanager, mock_persist,
+                                   tmpdir):
+    f1 = tmpdir.join("file1.json")
+    f1.write('{"ronin:<account_s1_address>": "hello"}')
+    f2 = tmpdir.join("file2.json")
+    f2.write('{"ronin:<account_s1_address>": "hello"}')
+    with patch.object(sys, 'argv', ["", "transfer_axies", str(f1), str(f2), '--validation-cache', 'validated.json']):
+        cli.run_cli()
+    mock_persist.assert_called_with('validated.json')
+    mock_verify_inputs.assert_called_with()
+    mock_prepare_transfers.assert_called_with()
+
+
+@patch("axie_scholar_cli.providers.configure")
+@patch("axie.AxieTransferManager.__init__", return_value=None)
+@patch("axie.AxieTransferManager.prepare_transfers")
+@patch("axie.AxieTransferManager.verify_inputs")
+def test_transfer_pool_size(mock_verify_inputs, mock_prepare_transfers, mock_transfersmanager, mock_configure, tmpdir):
+    f1 = tmpdir.join("file1.json")
+    f1.write('{"ronin:<account_s1_address>": "hello"}')
+    f2 = tmpdir.join("file2.json")
+    f2.write('{"ronin:<account_s1_address>": "hello"}')
+    with patch.object(sys, 'argv', ["", "transfer_axies", str(f1), str(f2), '--pool-size', '32']):
+        cli.run_cli()
+    mock_configure.assert_called_with(pool_size=32)
+    mock_prepare_transfers.assert_called_with()
+
+
+@patch("axie_scholar_cli.providers.configure")
+@patch("axie.AxieTransferManager.prepare_transfers")
+def test_transfer_wrong_pool_size(mock_prepare_transfers, mock_configure, tmpdir, caplog):
+    f1 = tmpdir.join("file1.json")
+    f1.write('{"ronin:<account_s1_address>": "hello"}')
+    f2 = tmpdir.join("file2.json")
+    f2.write('{"ronin:<account_s1_address>": "hello"}')
+    with patch.object(sys, 'argv', ["", "transfer_axies", str(f1), str(f2), '--pool-size', 'foo']):
+        with pytest.raises(SystemExit):
+            cli.run_cli()
+    mock_configure.assert_not_called()
+    mock_prepare_transfers.assert_not_called()
+    assert "Pool size must be a positive integer, got: foo" in caplog.text
+
+
+@patch("axie.AxieTransferManager.__init__", return_value=None)
+@patch("axie.AxieTransferManager.prepare_transfers")
+@patch("axie.AxieTransferManager.verify_inputs")
+def test_transfer_signing_workers(mock_verify_inputs, mock_prepare_transfers, mock_transfersmanager, tmpdir):
+    f1 = tmpdir.join("file1.json")
+    f1.write('{"ronin:<account_s1_address>": "hello"}')
+    f2 = tmpdir.join("file2.json")
+    f2.write('{"ronin:<account_s1_address>": "hello"}')
+    with patch.object(sys, 'argv', ["", "transfer_axies", str(f1), str(f2), '--signing-workers', '2']):
+        cli.run_cli()
+    mock_transfersmanager.assert_called_with(str(f1), str(f2), secure=False, signing_workers=2)
+    mock_prepare_transfers.assert_called_with()
+
+
+@patch("axie.AxieTransferManager.prepare_transfers")
+def test_transfer_wrong_signing_workers(mock_prepare_transfers, tmpdir, caplog):
+    f1 = tmpdir.join("file1.json")
+    f1.write('{"ronin:<account_s1_address>": "hello"}')
+    f2 = tmpdir.join("file2.json")
+    f2.write('{"ronin:<account_s1_address>": "hello"}')
+    with patch.object(sys, 'argv', ["", "transfer_axies", str(f1), str(f2), '--signing-workers', '0']):
+        with pytest.raises(SystemExit):
+            cli.run_cli()
+    mock_prepare_transfers.assert_not_called()
+    assert "Number of workers must be a positive integer, got: 0" in caplog.text
+
+
 @patch("axie_scholar_cli.load_payments_file", return_value={"foo": "bar"})
 @patch("axie.AxieClaimsManager.__init__", return_value=None)
 @patch("axie.AxieClaimsManager.prepare_claims")
@@ -1104,7 +1600,8 @@ def test_managed_claim(mock_verify_inputs, mock_prepare_claims, mock_claimsmanag
     mock_claimsmanager.assert_called_with(
         {"foo": "bar"},
         {'ronin:<account_s1_address>': 'hello'},
-        False
+        False,
+        concurrency=25
     )
 
 
@@ -1123,7 +1620,8 @@ def test_managed_claim_forced(mock_verify_inputs, mock_prepare_claims, mock_clai
     mock_claimsmanager.assert_called_with(
         {"foo": "bar"},
         {'ronin:<account_s1_address>': 'hello'},
-        True
+        True,
+        concurrency=25
     )
 
 
@@ -1153,7 +1651,7 @@ def test_transfer(mock_verify_inputs, mock_prepare_transfers, mock_transfersmana
         cli.run_cli()
     mock_verify_inputs.assert_called_with()
     mock_prepare_transfers.assert_called_with()
-    mock_transfersmanager.assert_called_with(str(f1), str(f2), secure=False)
+    mock_transfersmanager.assert_called_with(str(f1), str(f2), secure=False, signing_workers=SIGNING_WORKERS)
 
 
 @patch("axie.AxieTransferManager.__init__", return_value=None)
@@ -1168,7 +1666,59 @@ def test_transfer_secure(mock_verify_inputs, mock_prepare_transfers, mock_transf
         cli.run_cli()
     mock_verify_inputs.assert_called_with()
     mock_prepare_transfers.assert_called_with()
-    mock_transfersmanager.assert_called_with(str(f1), str(f2), secure=True)
+    mock_transfersmanager.assert_called_with(str(f1), str(f2), secure=True, signing_workers=SIGNING_WORKERS)
+
+
+@patch("axie.StreamedTransferManager.__init__", return_value=None)
+@patch("axie.StreamedTransferManager.prepare_transfers")
+@patch("axie.StreamedTransferManager.verify_inputs")
+def test_transfer_stream(mock_verify_inputs, mock_prepare_transfers, mock_transfersmanager, tmpdir):
+    f1 = tmpdir.join("file1.json")
+    f1.write('{"ronin:<account_s1_address>": "hello"}')
+    f2 = tmpdir.join("file2.json")
+    f2.write('{"ronin:<account_s1_address>": "hello"}')
+    with patch.object(sys, 'argv', ["", "transfer_axies", str(f1), str(f2), "--stream"]):
+        cli.run_cli()
+    mock_verify_inputs.assert_called_with()
+    mock_prepare_transfers.assert_called_with()
+    mock_transfersmanager.assert_called_with(str(f1), str(f2), secure=False, signing_workers=SIGNING_WORKERS)
+
+
+@patch("axie.StreamedClaimsManager.__init__", return_value=None)
+@patch("axie.StreamedClaimsManager.prepare_claims")
+@patch("axie.StreamedClaimsManager.verify_inputs")
+def test_claim_stream(mock_verify_inputs, mock_prepare_claims, mock_claimsmanager, tmpdir):
+    f1 = tmpdir.join("file1.json")
+    f1.write('{"ronin:<account_s1_address>": "hello"}')
+    f2 = tmpdir.join("file2.json")
+    f2.write('{"ronin:<account_s1_address>": "hello"}')
+    with patch.object(sys, 'argv', ["", "claim", str(f1), str(f2), "--stream"]):
+        cli.run_cli()
+    mock_verify_inputs.assert_called_with()
+    mock_prepare_claims.assert_called_with()
+    mock_claimsmanager.assert_called_with(str(f1), {'ronin:<account_s1_address>': 'hello'}, False, concurrency=25)
+
+
+@patch("axie.StreamedPaymentsManager.__init__", return_value=None)
+@patch("axie.StreamedPaymentsManager.verify_inputs")
+@patch("axie.StreamedPaymentsManager.prepare_payout")
+def test_payout_stream(mock_prepare_payout, mock_verify_inputs, mocked_paymentsmanager, tmpdir):
+    f1 = tmpdir.join("file1.json")
+    f1.write('{"Scholars":[{"Name": "Acc1", "AccountAddress": "ronin:<account_s1_address>"}]}')
+    f2 = tmpdir.join("file2.json")
+    f2.write('{"ronin:<account_s1_address>": "hello"}')
+    with patch.object(sys, 'argv', ["", "payout", str(f1), str(f2), "--stream"]):
+        cli.run_cli()
+    mock_prepare_payout.assert_called_with()
+    mock_verify_inputs.assert_called_with()
+    mocked_paymentsmanager.assert_called_with(
+        str(f1),
+        {'ronin:<account_s1_address>': 'hello'},
+        auto=False,
+        workers=1,
+        signing_workers=SIGNING_WORKERS,
+        journal=None
+    )
 
 
 def test_axie_morphing_file_check_fail(caplog):
@@ -1179,39 +1729,48 @@ def test_axie_morphing_file_check_fail(caplog):
 
 
 @patch("axie.AxieMorphingManager.__init__", return_value=None)
-@patch("axie.Axies.__init__", return_value=None)
-@patch("axie.Axies.find_axies_to_morph", return_value=[1, 2, 3])
+@patch("axie_scholar_cli.find_axies_to_morph", side_effect=lambda accounts, index: {acc: [1, 2, 3] for acc in accounts})
 @patch("axie.AxieMorphingManager.execute")
 @patch("axie.AxieMorphingManager.verify_inputs")
-def test_axie_morphing(mock_veritfy_inputs, mock_morphing_execute, mock_find_axies, mock_axies_init, mock_morphingmanager, tmpdir): # noqa
+def test_axie_morphing(mock_veritfy_inputs, mock_morphing_execute, mock_find_axies, mock_morphingmanager, tmpdir): # noqa
     f = tmpdir.join("file2.json")
     f.write('{"ronin:<account_s1_address>": "hello"}')
     with patch.object(sys, 'argv', ["", "axie_morphing", str(f), "foo,bar"]):
         cli.run_cli()
-    mock_axies_init.assert_has_calls([call('foo'), call('bar')])
+    mock_find_axies.assert_called_once_with(['foo', 'bar'], None)
     mock_morphingmanager.assert_has_calls([call([1, 2, 3], "foo", str(f)), call([1, 2, 3], "bar", str(f))])
     assert mock_veritfy_inputs.call_count == 2
-    assert mock_find_axies.call_count == 2
     assert mock_morphing_execute.call_count == 2
 
 
 @patch("axie.AxieMorphingManager.__init__", return_value=None)
-@patch("axie.Axies.__init__", return_value=None)
-@patch("axie.Axies.find_axies_to_morph", return_value=[])
+@patch("axie_scholar_cli.find_axies_to_morph", side_effect=lambda accounts, index: {acc: [] for acc in accounts})
 @patch("axie.AxieMorphingManager.execute")
 @patch("axie.AxieMorphingManager.verify_inputs")
-def test_axie_morphing_none(mock_veritfy_inputs, mock_morphing_execute, mock_find_axies, mock_axies_init, mock_morphingmanager, tmpdir): # noqa
+def test_axie_morphing_none(mock_veritfy_inputs, mock_morphing_execute, mock_find_axies, mock_morphingmanager, tmpdir): # noqa
     f = tmpdir.join("file2.json")
     f.write('{"ronin:<account_s1_address>": "hello"}')
     with patch.object(sys, 'argv', ["", "axie_morphing", str(f), "foo,bar,1"]):
         cli.run_cli()
-    mock_axies_init.assert_has_calls([call('foo'), call('bar'), call("1")])
-    assert mock_find_axies.call_count == 3
+    mock_find_axies.assert_called_once_with(['foo', 'bar', '1'], None)
     mock_morphingmanager.assert_not_called()
     mock_veritfy_inputs.assert_not_called()
     mock_morphing_execute.assert_not_called()
 
 
+@patch("axie_scholar_cli.find_axies_to_morph", side_effect=lambda accounts, index: {acc: [] for acc in accounts})
+def test_axie_morphing_axie_index(mock_find_axies, tmpdir):
+    f = tmpdir.join("file2.json")
+    f.write('{"ronin:<account_s1_address>": "hello"}')
+    index_file = str(tmpdir.join("axies.db"))
+    with patch.object(sys, 'argv', ["", "axie_morphing", str(f), "foo", "--axie-index", index_file]):
+        cli.run_cli()
+    index = mock_find_axies.call_args[0][1]
+    assert isinstance(index, AxieIndex)
+    assert index.path == index_file
+    assert os.path.isfile(index_file)
+
+
 def test_axiebreeding_file_check_fail(caplog):
     with patch.object(sys, 'argv', ["", "axie_breeding", "s_file.json", "b_file.json"]):
         cli.run_cli()
@@ -1233,7 +1792,8 @@ def test_breeding(mock_verify_inputs, mock_execute_breeding, mock_breedingmanage
             cli.run_cli()
     mock_verify_inputs.assert_called_with()
     mock_execute_breeding.assert_called_with()
-    mock_breedingmanager.assert_called_with(str(f1), str(f2), acc)
+    mock_breedingmanager.assert_called_with(str(f1), str(f2), acc, stop_on_revert=False,
+                                                  signing_workers=SIGNING_WORKERS)
 
 
 def test_qrcode_file_check_fail(caplog):
@@ -1253,7 +1813,69 @@ def test_qrcode(mock_execute, mock_qrcodemanager, tmpdir):
     with patch.object(sys, 'argv', ["", "generate_QR", str(f1), str(f2)]):
         cli.run_cli()
     mock_execute.assert_called_with()
-    mock_qrcodemanager.assert_called_with({'ronin:<account_s1_address>': 'hello'}, {'ronin:<account_s1_address>': 'bye'}, os.path.dirname(f2))
+    mock_qrcodemanager.assert_called_with({'ronin:<account_s1_address>': 'hello'}, {'ronin:<account_s1_address>': 'bye'}, os.path.dirname(f2), fmt="png", output=None)
+
+
+@patch("axie.QRCodeManager.__init__", return_value=None)
+@patch("axie.QRCodeManager.execute")
+def test_qrcode_format(mock_execute, mock_qrcodemanager, tmpdir):
+    f1 = tmpdir.join("file1.json")
+    f1.write('{"ronin:<account_s1_address>": "hello"}')
+    f2 = tmpdir.join("file2.json")
+    f2.write('{"ronin:<account_s1_address>": "bye"}')
+    with patch.object(sys, 'argv', ["", "generate_QR", str(f1), str(f2), "--format", "svg"]):
+        cli.run_cli()
+    mock_execute.assert_called_with()
+    mock_qrcodemanager.assert_called_with({'ronin:<account_s1_address>': 'hello'}, {'ronin:<account_s1_address>': 'bye'}, os.path.dirname(f2), fmt="svg", output=None)
+
+
+@patch("axie_scholar_cli.sys.exit", side_effect=SystemExit)
+@patch("axie.QRCodeManager.__init__", return_value=None)
+@patch("axie.QRCodeManager.execute")
+def test_qrcode_wrong_format(mock_execute, mock_qrcodemanager, mock_sys, tmpdir, caplog):
+    f1 = tmpdir.join("file1.json")
+    f1.write('{"ronin:<account_s1_address>": "hello"}')
+    f2 = tmpdir.join("file2.json")
+    f2.write('{"ronin:<account_s1_address>": "bye"}')
+    with patch.object(sys, 'argv', ["", "generate_QR", str(f1), str(f2), "--format", "jpg"]):
+        with pytest.raises(SystemExit):
+            cli.run_cli()
+    mock_execute.assert_not_called()
+    assert "QR code format must be one of png, svg, terminal, got: jpg" in caplog.text
+
+
+@patch("axie.QRCodeManager.__init__", return_value=None)
+@patch("axie.QRCodeManager.execute")
+def test_qrcode_output(mock_execute, mock_qrcodemanager, tmpdir):
+    f1 = tmpdir.join("file1.json")
+    f1.write('{"ronin:<account_s1_address>": "hello"}')
+    f2 = tmpdir.join("file2.json")
+    f2.write('{"ronin:<account_s1_address>": "bye"}')
+    with patch.object(sys, 'argv', ["", "generate_QR", str(f1), str(f2), "--output", "codes.pdf"]):
+        cli.run_cli()
+    mock_execute.assert_called_with()
+    mock_qrcodemanager.assert_called_with({'ronin:<account_s1_address>': 'hello'}, {'ronin:<account_s1_address>': 'bye'}, os.path.dirname(f2), fmt="png", output="codes.pdf")
+
+
+@pytest.mark.parametrize("extra_args, error",
+                         [
+                            (["--output", "codes.tar"], "QR codes can only be saved in a .zip or .pdf file, got: codes.tar"),
+                            (["--output", "codes.pdf", "--format", "svg"], "QR codes in svg format can not be saved in codes.pdf"),
+                            (["--output", "codes.zip", "--format", "terminal"], "QR codes in terminal format can not be saved in codes.zip")
+                         ])
+@patch("axie_scholar_cli.sys.exit", side_effect=SystemExit)
+@patch("axie.QRCodeManager.__init__", return_value=None)
+@patch("axie.QRCodeManager.execute")
+def test_qrcode_wrong_output(mock_execute, mock_qrcodemanager, mock_sys, extra_args, error, tmpdir, caplog):
+    f1 = tmpdir.join("file1.json")
+    f1.write('{"ronin:<account_s1_address>": "hello"}')
+    f2 = tmpdir.join("file2.json")
+    f2.write('{"ronin:<account_s1_address>": "bye"}')
+    with patch.object(sys, 'argv', ["", "generate_QR", str(f1), str(f2)] + extra_args):
+        with pytest.raises(SystemExit):
+            cli.run_cli()
+    mock_execute.assert_not_called()
+    assert error in caplog.text
 
 
 def test_load_payments():
@@ -1283,3 +1905,73 @@ def test_load_payments_426(caplog):
     assert r == None
     assert 'You have been doing too many requests to axie.management, please wait 5min before a retry' in caplog.text
     assert 'Could not retrieve your information from axie.management, double check your token' in caplog.text
+
+
+@patch("axie.AxiePaymentsManager.build_plan")
+@patch("axie.AxiePaymentsManager.verify_inputs")
+def test_generate_payout_plan(mock_verify_inputs, mock_build_plan, tmpdir):
+    f1 = tmpdir.join("file1.json")
+    f1.write('{"Scholars":[{"Name": "Acc1", "AccountAddress": "ronin:<account_s1_address>"}]}')
+    f2 = tmpdir.join("file2.json")
+    f2.write('{"ronin:<account_s1_address>": "hello"}')
+    plan_file = tmpdir.join("plan.csv")
+    with patch.object(sys, 'argv', ["", "generate_payout_plan", str(f1), str(f2), str(plan_file)]):
+        cli.run_cli()
+    mock_verify_inputs.assert_called_with()
+    mock_build_plan.return_value.save.assert_called_with(str(plan_file))
+
+
+@patch("axie.AxiePaymentsManager.execute_plan")
+@patch("axie_scholar_cli.PayoutPlan.load", return_value="plan")
+@patch("axie.AxiePaymentsManager.__init__", return_value=None)
+def test_plan_payout(mocked_paymentsmanager, mock_load, mock_execute_plan, tmpdir):
+    f1 = tmpdir.join("plan.json")
+    f1.write('{"accounts": []}')
+    f2 = tmpdir.join("file2.json")
+    f2.write('{"ronin:<account_s1_address>": "hello"}')
+    with patch.object(sys, 'argv', ["", "plan_payout", str(f1), str(f2), "-y", "--workers", "4"]):
+        cli.run_cli()
+    mocked_paymentsmanager.assert_called_with({}, {'ronin:<account_s1_address>': 'hello'}, auto=True, workers=4,
+                                              signing_workers=SIGNING_WORKERS, journal=None)
+    mock_load.assert_called_with(str(f1))
+    mock_execute_plan.assert_called_with("plan")
+
+
+@patch("axie.AxiePaymentsManager.resume_payout")
+@patch("axie_scholar_cli.PayoutJournal", return_value="journal")
+@patch("axie.AxiePaymentsManager.__init__", return_value=None)
+def test_resume_payout(mocked_paymentsmanager, mocked_journal, mock_resume_payout, tmpdir):
+    f1 = tmpdir.join("journal.db")
+    f1.write('')
+    f2 = tmpdir.join("file2.json")
+    f2.write('{"ronin:<account_s1_address>": "hello"}')
+    with patch.object(sys, 'argv', ["", "resume_payout", str(f1), str(f2), "-y"]):
+        cli.run_cli()
+    mocked_journal.assert_called_with(str(f1))
+    mocked_paymentsmanager.assert_called_with({}, {'ronin:<account_s1_address>': 'hello'}, auto=True, workers=1,
+                                              signing_workers=SIGNING_WORKERS,
+                                              journal="journal")
+    mock_resume_payout.assert_called_with()
+
+
+@patch("axie.AxiePaymentsManager.__init__", return_value=None)
+@patch("axie.AxiePaymentsManager.verify_inputs")
+@patch("axie.AxiePaymentsManager.prepare_payout")
+@patch("axie_scholar_cli.PayoutJournal", return_value="journal")
+def test_payout_takes_journal_parameter(mocked_journal, mock_prepare_payout, _, mocked_paymentsmanager, tmpdir):
+    f1 = tmpdir.join("file1.json")
+    f1.write('{"Scholars":[{"Name": "Acc1", "AccountAddress": "ronin:<account_s1_address>"}]}')
+    f2 = tmpdir.join("file2.json")
+    f2.write('{"ronin:<account_s1_address>": "hello"}')
+    with patch.object(sys, 'argv', ["", "payout", str(f1), str(f2), "--journal", "journal.db"]):
+        cli.run_cli()
+    mocked_journal.assert_called_with("journal.db")
+    mock_prepare_payout.assert_called_with()
+    mocked_paymentsmanager.assert_called_with(
+        {'Scholars': [{'Name': 'Acc1', 'AccountAddress': 'ronin:<account_s1_address>'}]},
+        {'ronin:<account_s1_address>': 'hello'},
+        auto=False,
+        workers=1,
+        signing_workers=SIGNING_WORKERS,
+        journal="journal"
+    )
@@ -1,12 +1,13 @@
 import os
 import sys
 import json
+import zipfile
 from datetime import datetime
 
 from mock import patch, call
 
 from axie import QRCodeManager
-from axie.qr_code import QRCode
+from axie.qr_code import QRCode, QR_CONCURRENCY, RENDER_WORKERS, render_qr, render_all, generate_qr_codes
 
 
 @patch("axie.QRCodeManager.load_secrets_and_acc_name", return_value=("foo", "bar"))
@@ -103,9 +104,9 @@ def test_qrcode_manager_verify_input_wrong_private_short(caplog):
     assert f"Private key for account {scholar_acc} is not valid, please review it!" in caplog.text
 
 
-@patch("axie.qr_code.QRCode.generate_qr")
+@patch("axie.qr_code.generate_qr_codes")
 @patch("axie.qr_code.QRCode.__init__", return_value=None)
-def test_qrcode_manager_execute(mocked_qrcode_init, mocked_qrcode_generate_qr):
+def test_qrcode_manager_execute(mocked_qrcode_init, mocked_generate_qr_codes):
     scholar_acc = 'ronin:<account_s1_address>' + "".join([str(x) for x in range(10)]*4)
     scholar_acc_other = 'ronin:<account_s2_address>' + "".join([str(x) for x in range(10)]*4)
     scholar_private_acc = '0x<account_s1_private_address>012345' + "".join([str(x) for x in range(10)]*3)
@@ -130,10 +131,15 @@ def test_qrcode_manager_execute(mocked_qrcode_init, mocked_qrcode_generate_qr):
     qr = QRCodeManager(p_file, s_file, '/')
     qr.execute()
     mocked_qrcode_init.assert_has_calls(calls=[
-        call(account=scholar_acc, private_key=scholar_private_acc, acc_name="Scholar 1", path='/'),
-        call(account=scholar_acc_other, private_key=scholar_private_acc_other, acc_name="Scholar 2", path='/') # noqa
+        call(account=scholar_acc, private_key=scholar_private_acc, acc_name="Scholar 1", path='/', fmt="png"),
+        call(account=scholar_acc_other, private_key=scholar_private_acc_other, acc_name="Scholar 2", path='/', fmt="png") # noqa
     ])
-    assert mocked_qrcode_generate_qr.call_count == 2
+    qrcode_list, fmt, concurrency, render_workers, output = mocked_generate_qr_codes.call_args[0]
+    assert len(qrcode_list) == 2
+    assert fmt == "png"
+    assert concurrency == QR_CONCURRENCY
+    assert render_workers == RENDER_WORKERS
+    assert output is None
 
 
 def test_qrcode_init():
@@ -152,3 +158,73 @@ def test_qr_code_generate(mock_get_jwt, mock_qrmake, tmpdir, caplog):
     mock_get_jwt.assert_called()
     mock_qrmake.assert_called_with("token")
     assert f"Saving QR Code for account test_acc at {q.path}" in caplog.text
+
+
+def test_qrcode_init_svg():
+    q = QRCode(account="ronin:foo", private_key="0xbar", acc_name="test_acc", path="/", fmt="svg")
+    assert q.path == f'/test_acc-{int(datetime.timestamp(datetime.now()))}.svg'
+
+
+def test_render_qr_formats():
+    png = render_qr("token", "png")
+    assert png.startswith(b"\x89PNG")
+    svg = render_qr("token", "svg")
+    assert b"<svg" in svg
+    text = render_qr("token", "terminal")
+    assert isinstance(text, str)
+    assert len(text.splitlines()) > 10
+
+
+@patch("axie.signing.threading.active_count", return_value=1)
+def test_render_all_in_process_and_pool(_):
+    jwts = [f"token{i}" for i in range(6)]
+    expected = [render_qr(jwt, "svg") for jwt in jwts]
+    assert list(render_all(jwts, "svg", workers=1)) == expected
+    assert list(render_all(jwts, "svg", workers=2)) == expected
+
+
+@patch("axie.qr_code.ProcessPoolExecutor")
+@patch("axie.signing.threading.active_count", return_value=3)
+def test_render_all_does_not_fork_while_threads_run(_, mocked_pool):
+    jwts = [f"token{i}" for i in range(3)]
+    assert list(render_all(jwts, "svg", workers=2)) == [render_qr(jwt, "svg") for jwt in jwts]
+    mocked_pool.assert_not_called()
+
+
+@patch("axie.qr_code.QRCode.get_jwt", side_effect=["token1", None, "token3"])
+def test_generate_qr_codes(mock_get_jwt, tmpdir, caplog):
+    qrs = [QRCode(account=f"ronin:foo{i}", private_key="0xbar", acc_name=f"acc{i}", path=str(tmpdir))
+           for i in range(3)]
+    generated = generate_qr_codes(qrs, "png", concurrency=1, render_workers=1)
+    assert generated == 2
+    assert mock_get_jwt.call_count == 3
+    with open(qrs[0].path, "rb") as f:
+        assert f.read() == render_qr("token1")
+    assert not os.path.exists(qrs[1].path)
+    assert "Could not get an access token for account acc1, skipping its QR code" in caplog.text
+    assert "Generated 2 out of 3 QR codes" in caplog.text
+
+
+@patch("axie.qr_code.QRCode.get_jwt", return_value="token")
+def test_generate_qr_codes_terminal(mock_get_jwt, tmpdir, capsys):
+    q = QRCode(account="ronin:foo", private_key="0xbar", acc_name="test_acc", path=str(tmpdir), fmt="terminal")
+    generate_qr_codes([q], "terminal", render_workers=1)
+    assert "QR Code for account test_acc:" in capsys.readouterr().out
+    assert os.listdir(str(tmpdir)) == []
+
+
+@patch("axie.qr_code.QRCode.get_jwt", side_effect=["token1", "token2"])
+def test_generate_qr_codes_zip_output(mock_get_jwt, tmpdir):
+    qrs = [QRCode(account=f"ronin:foo{i}", private_key="0xbar", acc_name=f"Scholar {i}", path=str(tmpdir))
+           for i in range(2)]
+    output = str(tmpdir.join("codes.zip"))
+    assert generate_qr_codes(qrs, "png", concurrency=2, render_workers=1, output=output) == 2
+    with zipfile.ZipFile(output) as z:
+        manifest = json.loads(z.read("manifest.json"))
+        assert manifest["accounts"] == [
+            {"name": "Scholar 0", "account": "0xfoo0", "entry": "scholar-0.png"},
+            {"name": "Scholar 1", "account": "0xfoo1", "entry": "scholar-1.png"}
+        ]
+        assert z.read("scholar-1.png") == render_qr("token2")
+    # Nothing is written per account
+    assert sorted(os.listdir(str(tmpdir))) == ["codes.zip"]
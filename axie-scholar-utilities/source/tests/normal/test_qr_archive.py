@@ -0,0 +1,95 @@
+import io
+import json
+import zipfile
+
+import pytest
+from PIL import Image
+
+from axie.qr_archive import QRZipWriter, QRPdfWriter, archive_format, entry_name, open_qr_archive
+from axie.qr_code import render_qr
+
+
+@pytest.mark.parametrize("path, expected",
+                         [
+                            ("codes.zip", "zip"),
+                            ("/tmp/CODES.PDF", "pdf"),
+                            ("codes.png", None),
+                            ("codes", None)
+                         ])
+def test_archive_format(path, expected):
+    assert archive_format(path) == expected
+
+
+def test_entry_name_unique():
+    used = set()
+    assert entry_name("Scholar 1", "png", used) == "scholar-1.png"
+    assert entry_name("Scholar 1", "png", used) == "scholar-1-2.png"
+    assert entry_name("a/b..c", "svg", used) == "a_b__c.svg"
+    assert entry_name("", "png", used) == "account.png"
+
+
+def test_open_qr_archive(tmpdir):
+    z = open_qr_archive(str(tmpdir.join("codes.zip")))
+    assert isinstance(z, QRZipWriter)
+    z.close()
+    p = open_qr_archive(str(tmpdir.join("codes.pdf")))
+    assert isinstance(p, QRPdfWriter)
+    p.close()
+
+
+def test_zip_writer(tmpdir):
+    path = str(tmpdir.join("codes.zip"))
+    writer = QRZipWriter(path, "svg")
+    assert writer.add("Scholar 1", "0xfoo", render_qr("token1", "svg")) == "scholar-1.svg"
+    assert writer.add("Scholar 1", "0xbar", render_qr("token2", "svg")) == "scholar-1-2.svg"
+    writer.close()
+    with zipfile.ZipFile(path) as z:
+        assert z.namelist() == ["scholar-1.svg", "scholar-1-2.svg", "manifest.json"]
+        assert z.read("scholar-1-2.svg") == render_qr("token2", "svg")
+        manifest = json.loads(z.read("manifest.json"))
+    assert manifest["accounts"] == [
+        {"name": "Scholar 1", "account": "0xfoo", "entry": "scholar-1.svg"},
+        {"name": "Scholar 1", "account": "0xbar", "entry": "scholar-1-2.svg"}
+    ]
+
+
+def test_pdf_writer(tmpdir):
+    path = str(tmpdir.join("codes.pdf"))
+    writer = QRPdfWriter(path)
+    assert writer.add("Scholar (1)", "0xfoo", render_qr("token1")) == 1
+    assert writer.add("Scholar 2", "0xbar", render_qr("token2")) == 2
+    writer.close()
+    with open(path, "rb") as f:
+        data = f.read()
+    assert data.startswith(b"%PDF-1.4")
+    assert data.rstrip().endswith(b"%%EOF")
+    assert data.count(b"/Type /Page ") == 2
+    assert b"(Scholar \\(1\\)) Tj" in data
+    # Every xref entry points at the object it describes
+    xref = int(data[data.rindex(b"startxref") + 10:].split()[0])
+    entries = data[xref:].split(b"\n")[3:3 + writer.next_obj - 1]
+    for number, entry in enumerate(entries, start=1):
+        assert data[int(entry[:10]):].startswith(f"{number} 0 obj".encode())
+    with open(str(tmpdir.join("codes-manifest.json"))) as f:
+        manifest = json.load(f)
+    assert manifest["file"] == "codes.pdf"
+    assert manifest["accounts"] == [
+        {"name": "Scholar (1)", "account": "0xfoo", "page": 1},
+        {"name": "Scholar 2", "account": "0xbar", "page": 2}
+    ]
+
+
+def test_pdf_writer_image(tmpdir):
+    png = render_qr("token1")
+    writer = QRPdfWriter(str(tmpdir.join("codes.pdf")))
+    writer.add("Scholar 1", "0xfoo", png)
+    writer.close()
+    image = Image.open(io.BytesIO(png))
+    with open(str(tmpdir.join("codes.pdf")), "rb") as f:
+        data = f.read()
+    assert f"/Width {image.size[0]} /Height {image.size[1]}".encode() in data
+
+
+def test_pdf_writer_needs_png(tmpdir):
+    with pytest.raises(ValueError):
+        QRPdfWriter(str(tmpdir.join("codes.pdf")), "svg")
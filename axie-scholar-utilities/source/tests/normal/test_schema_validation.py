@@ -2,7 +2,16 @@ import pytest
 from jsonschema import validate
 from jsonschema.exceptions import ValidationError
 
-from axie.schemas import legacy_payments_schema, payments_schema, transfers_schema, breeding_schema
+from axie.schemas import (
+    legacy_payments_schema,
+    payments_schema,
+    transfers_schema,
+    breeding_schema,
+    SCHEMAS,
+    get_validator,
+    schema_errors,
+    payments_format
+)
 
 
 @pytest.mark.parametrize("json_input, expected_error", [
@@ -319,3 +328,31 @@ def test_json_validator_breeding_schema_error(json_input, expected_error):
     with pytest.raises(ValidationError) as e:
         validate(json_input, breeding_schema)
     assert expected_error in str(e.value)
+
+
+@pytest.mark.parametrize("name", list(SCHEMAS))
+def test_get_validator_cached(name):
+    assert get_validator(name) is get_validator(name)
+    assert get_validator(name).schema is SCHEMAS[name]
+
+
+@pytest.mark.parametrize("json_input, expected", [
+        ({"scholars": []}, "new"),
+        ({"Manager": "ronin:abc", "Scholars": []}, "legacy"),
+        ({"Scholars": []}, "legacy"),
+        ({}, "new"),
+        ([], "new")
+])
+def test_payments_format(json_input, expected):
+    assert payments_format(json_input) == expected
+
+
+def test_schema_errors_reports_all():
+    assert schema_errors({"scholars": []}, "payments") == []
+    errors = schema_errors([{"AccountAddress": "foo", "Sire": "0", "Matron": 1},
+                            {"AccountAddress": "ronin:foo", "Sire": 0, "Matron": -1}], "breeding")
+    assert sorted((list(e.path), e.message) for e in errors) == [
+        ([0, "AccountAddress"], "'foo' does not match '^ronin:'"),
+        ([0, "Sire"], "'0' is not of type 'number'"),
+        ([1, "Matron"], "-1 is less than the minimum of 0")
+    ]
@@ -1,3 +1,5 @@
+from concurrent.futures import Future
+
 from hexbytes import HexBytes
 
 
@@ -22,3 +24,10 @@ class MockedSignedMsg:
 
     def __init__(self):
         self.signature = HexBytes(b'123')
+
+
+def resolved_future(result):
+    """ Returns an already finished future, used to mock the receipt watcher """
+    future = Future()
+    future.set_result(result)
+    return future
@@ -6,8 +6,10 @@ from mock import patch, mock_open, call
 
 from trezor import TrezorAxieBreedManager
 from trezor.trezor_breeding import TrezorBreed, AXIE_CONTRACT
+from axie.breeding import BREEDING_AXS_COST
 from axie.payments import CREATOR_FEE_ADDRESS, PaymentsSummary
-from axie.utils import RONIN_PROVIDER_FREE, USER_AGENT
+from axie.utils import RONIN_PROVIDER_FREE, RECEIPT_SUCCESS, get_web3
+from tests.test_utils import resolved_future
 
 
 @patch("trezor.trezor_breeding.load_json", return_value={"foo": "bar"})
@@ -26,7 +28,8 @@ def test_breed_manager_init(mock_load):
     assert abm.breeding_costs == 0
 
 
-def test_breed_manager_verify_inputs_succcess(tmpdir):
+@patch("trezor.trezor_breeding.TrezorAxieBreedManager.preflight")
+def test_breed_manager_verify_inputs_succcess(mocked_preflight, tmpdir):
     acc = 'ronin:<accountfoo_address>' + "".join([str(x) for x in range(10)]*4)
     c_file = tmpdir.join("c.json")
     config_data = {acc: {"passphrase": "", "bip_path": "m/44'/60'/0'/0/0"}}
@@ -41,6 +44,7 @@ def test_breed_manager_verify_inputs_succcess(tmpdir):
     abm = TrezorAxieBreedManager(b_file, c_file, acc)
     abm.verify_inputs()
     assert abm.trezor_config == config_data
+    mocked_preflight.assert_called_once()
 
 
 def test_breed_manager_verify_inputs_fail_validation(tmpdir, caplog):
@@ -157,14 +161,19 @@ def test_breed_manager_calculate_breeding_cost(tmpdir):
     }]
     b_file.write(json.dumps(data))
     abm = TrezorAxieBreedManager(b_file, c_file, acc)
-    assert abm.calculate_breeding_cost() == 0
-    abm.breeding_file = list(range(75))
-    assert abm.calculate_breeding_cost() == 0
+    abm.breed_counts = {1234: 0, 5678: 2, 42: 6}
+    assert abm.calculate_breeding_cost() == 450 + 1125
+    assert abm.account_costs == {acc.lower(): {"slp": 450 + 1125, "axs": BREEDING_AXS_COST}}
+    # Each breed makes the next one of the same axie more expensive
+    abm.breeding_file = [{"Sire": 1234, "Matron": 5678, "AccountAddress": acc},
+                         {"Sire": 1234, "Matron": 5678, "AccountAddress": acc}]
+    assert abm.calculate_breeding_cost() == 450 + 1125 + 675 + 1800
+    assert abm.account_costs[acc.lower()]["axs"] == 2 * BREEDING_AXS_COST
 
 
 @patch("trezor.trezor_breeding.parse_path", return_value="parsed_path")
 @patch("trezor.trezor_breeding.get_default_client", return_value='client')
-@patch("trezor.trezor_breeding.check_balance", return_value=1000)
+@patch("trezor.trezor_breeding.TrezorAxieBreedManager.check_funds", return_value=True)
 @patch("trezor.trezor_breeding.TrezorBreed.execute")
 @patch("trezor.trezor_breeding.TrezorBreed.__init__", return_value=None)
 @patch("trezor.trezor_payments.TrezorPayment.execute")
@@ -173,7 +182,7 @@ def test_breed_manager_execute(mock_payments_init,
                                mock_payments_execute,
                                mock_breed_init,
                                mock_bree_execute,
-                               mock_check_balance,
+                               mock_check_funds,
                                mocked_client,
                                mock_parse,
                                tmpdir):
@@ -196,7 +205,7 @@ def test_breed_manager_execute(mock_payments_init,
     abm.execute()
     mocked_client.assert_called()
     mock_parse.assert_called()
-    mock_check_balance.assert_called_once()
+    mock_check_funds.assert_called_once()
     mock_breed_init.assert_has_calls(calls=[
         call(sire_axie=1234, matron_axie=5678, address=acc, client="client", bip_path="m/44'/60'/0'/0/0"),
         call(sire_axie=123, matron_axie=456, address=acc, client="client", bip_path="m/44'/60'/0'/0/0")
@@ -219,8 +228,8 @@ def test_breed_manager_execute(mock_payments_init,
 @patch("trezor.trezor_breeding.TrezorBreed.execute")
 @patch("trezor.trezor_payments.TrezorPayment.__init__", return_value=None)
 @patch("trezor.trezor_breeding.TrezorBreed.__init__", return_value=None)
-@patch("trezor.trezor_breeding.check_balance", return_value=0)
-def test_breed_manager_execute_not_enough_slp(mock_check_balance, _, __, ___, ____, mocked_client, tmpdir, caplog):
+@patch("trezor.trezor_breeding.TrezorAxieBreedManager.check_funds", return_value=False)
+def test_breed_manager_execute_not_enough_slp(mock_check_funds, _, __, ___, ____, mocked_client, tmpdir, caplog):
     acc = 'ronin:<accountfoo_address>' + "".join([str(x) for x in range(10)]*4)
     c_file = tmpdir.join("c.json")
     config_data = {acc: {"passphrase": "", "bip_path": "m/44'/60'/0'/0/0"}}
@@ -240,7 +249,7 @@ def test_breed_manager_execute_not_enough_slp(mock_check_balance, _, __, ___, __
     with patch.object(sys, "exit") as mocked_sys:
         abm.execute()
     mocked_sys.assert_called_once()
-    mock_check_balance.assert_called_once()
+    mock_check_funds.assert_called_once()
     mocked_client.assert_called()
     assert "Not enough SLP funds to pay for breeding and the fee" in caplog.text
 
@@ -260,14 +269,14 @@ def test_breed_init(mock_parse):
 @patch("web3.Web3.toBytes")
 @patch("web3.Web3.toHex", return_value="transaction_hash")
 @patch("web3.Web3.keccak", return_value='result_of_keccak')
-@patch("web3.eth.Eth.get_transaction_receipt", return_value={'status': 1})
+@patch("axie.utils.ReceiptWatcher.watch", return_value=resolved_future(RECEIPT_SUCCESS))
 @patch("web3.eth.Eth.send_raw_transaction", return_value="raw_tx")
 @patch('trezor.trezor_breeding.ethereum.sign_tx', return_value=(1, b'2xf', b'3fg'))
 @patch("trezor.trezor_breeding.get_nonce", return_value=1)
 @patch("web3.eth.Eth.contract")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("web3.Web3.HTTPProvider", return_value="provider")
-def test_breed_execute(mocked_provider,
+@patch("trezor.trezor_breeding.get_web3", wraps=get_web3)
+def test_breed_execute(mocked_get_web3,
                        mocked_checksum,
                        mocked_contract,
                        mock_get_nonce,
@@ -277,7 +286,8 @@ def test_breed_execute(mocked_provider,
                        mock_keccak,
                        mock_to_hex,
                        mocked_to_bytes,
-                       mock_rlp):
+                       mock_rlp,
+                       caplog):
     acc = 'ronin:<accountfoo_address>' + "".join([str(x) for x in range(10)]*4)
     with patch.object(builtins,
                       "open",
@@ -287,14 +297,12 @@ def test_breed_execute(mocked_provider,
     mocked_to_bytes.assert_called()
     mock_rlp.assert_called()
     mock_get_nonce.assert_called_once()
-    mocked_provider.assert_called_with(
-        RONIN_PROVIDER_FREE,
-        request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-    )
-    mocked_checksum.assert_called_with(AXIE_CONTRACT)
-    mocked_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
+    mocked_get_web3.assert_called_with(RONIN_PROVIDER_FREE)
+    mocked_checksum.assert_not_called()
+    mocked_contract.assert_not_called()
     mocked_sign_transaction.assert_called_once()
     mock_raw_send.assert_called_once()
     mock_keccak.assert_called_once()
     mock_to_hex.assert_called_with("result_of_keccak")
     mock_receipt.assert_called_with("transaction_hash")
+    assert f"Breeding axie 123 with 456 in account {acc} about to start!" in caplog.text
@@ -11,8 +11,8 @@ from hexbytes import HexBytes
 
 from trezor import TrezorAxieClaimsManager
 from trezor.trezor_claims import TrezorClaim
-from axie.utils import SLP_CONTRACT, RONIN_PROVIDER_FREE, USER_AGENT
-from tests.test_utils import async_cleanup_log_file, LOG_FILE_PATH, MockedSignedMsg
+from axie.utils import SLP_CONTRACT, RONIN_PROVIDER_FREE, RECEIPT_SUCCESS, get_web3
+from tests.test_utils import async_cleanup_log_file, LOG_FILE_PATH, MockedSignedMsg, resolved_future
 
 
 @patch("trezor.TrezorAxieClaimsManager.load_trezor_config_and_acc_name", return_value=("foo", "bar"))
@@ -135,19 +135,15 @@ def test_claims_manager_prepare_claims(mocked_claim_execute, mock_client):
 @patch("trezor.trezor_utils.parse_path", return_value="parsed_path")
 @patch("web3.eth.Eth.contract")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("web3.Web3.HTTPProvider", return_value="provider")
-def test_claim_init(mocked_provider, mocked_checksum, mocked_contract, mocked_parse):
+@patch("trezor.trezor_claims.get_web3", wraps=get_web3)
+def test_claim_init(mocked_get_web3, mocked_checksum, mocked_contract, mocked_parse):
     with patch.object(builtins,
                       "open",
                       mock_open(read_data='{"foo": "bar"}')):
         c = TrezorClaim(account="ronin:foo", acc_name="test_acc", bip_path="m/44'/60'/0'/0/0", client="client",
                         force=False)
-    mocked_provider.assert_called_with(
-        RONIN_PROVIDER_FREE,
-        request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-    )
-    mocked_checksum.assert_called_with(SLP_CONTRACT)
-    mocked_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
+    mocked_get_web3.assert_called_with(RONIN_PROVIDER_FREE)
+    mocked_contract.assert_not_called()
     mocked_parse.assert_called_with("m/44'/60'/0'/0/0")
     assert c.bip_path == "parsed_path"
     assert c.client == "client"
@@ -159,19 +155,15 @@ def test_claim_init(mocked_provider, mocked_checksum, mocked_contract, mocked_pa
 @patch("trezor.trezor_utils.parse_path", return_value="parsed_path")
 @patch("web3.eth.Eth.contract")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("web3.Web3.HTTPProvider", return_value="provider")
-def test_claim_init_force(mocked_provider, mocked_checksum, mocked_contract, mocked_parse):
+@patch("trezor.trezor_claims.get_web3", wraps=get_web3)
+def test_claim_init_force(mocked_get_web3, mocked_checksum, mocked_contract, mocked_parse):
     with patch.object(builtins,
                       "open",
                       mock_open(read_data='{"foo": "bar"}')):
         c = TrezorClaim(account="ronin:foo", acc_name="test_acc", bip_path="m/44'/60'/0'/0/0", client="client",
                         force=True)
-    mocked_provider.assert_called_with(
-        RONIN_PROVIDER_FREE,
-        request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-    )
-    mocked_checksum.assert_called_with(SLP_CONTRACT)
-    mocked_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
+    mocked_get_web3.assert_called_with(RONIN_PROVIDER_FREE)
+    mocked_contract.assert_not_called()
     mocked_parse.assert_called_with("m/44'/60'/0'/0/0")
     assert c.bip_path == "parsed_path"
     assert c.client == "client"
@@ -184,8 +176,8 @@ def test_claim_init_force(mocked_provider, mocked_checksum, mocked_contract, moc
 @patch("trezor.trezor_utils.parse_path", return_value="parsed_path")
 @patch("web3.eth.Eth.contract")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("web3.Web3.HTTPProvider", return_value="provider")
-def test_has_unclaimed_slp(mocked_provider, mocked_checksum, mocked_contract, mocked_parse, mocked_check):
+@patch("trezor.trezor_claims.get_web3", wraps=get_web3)
+def test_has_unclaimed_slp(mocked_get_web3, mocked_checksum, mocked_contract, mocked_parse, mocked_check):
     last_claimed_date = datetime.now() - timedelta(days=15)
     with requests_mock.Mocker() as req_mocker:
         req_mocker.get("https://game-api.skymavis.com/game-api/clients/0xfoo/items/1",
@@ -201,20 +193,16 @@ def test_has_unclaimed_slp(mocked_provider, mocked_checksum, mocked_contract, mo
             assert unclaimed == 2
         mocked_check.assert_called_with("0xfoo")
         mocked_parse.assert_called_with("m/44'/60'/0'/0/0")
-        mocked_provider.assert_called_with(
-            RONIN_PROVIDER_FREE,
-            request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-        )
-        mocked_checksum.assert_called_with(SLP_CONTRACT)
-        mocked_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
+        mocked_get_web3.assert_called_with(RONIN_PROVIDER_FREE)
+        mocked_contract.assert_not_called()
 
 
 @patch("trezor.trezor_claims.check_balance", return_value=10)
 @patch("trezor.trezor_utils.parse_path", return_value="parsed_path")
 @patch("web3.eth.Eth.contract")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("web3.Web3.HTTPProvider", return_value="provider")
-def test_has_unclaimed_failed_date(mocked_provider, mocked_checksum, mocked_contract, mocked_parse, mocked_check):
+@patch("trezor.trezor_claims.get_web3", wraps=get_web3)
+def test_has_unclaimed_failed_date(mocked_get_web3, mocked_checksum, mocked_contract, mocked_parse, mocked_check):
     last_claimed_date = datetime.utcnow() - timedelta(days=14) + timedelta(minutes=1)
     with requests_mock.Mocker() as req_mocker:
         req_mocker.get("https://game-api.skymavis.com/game-api/clients/0xfoo/items/1",
@@ -230,20 +218,16 @@ def test_has_unclaimed_failed_date(mocked_provider, mocked_checksum, mocked_cont
             assert unclaimed == None
         mocked_check.assert_not_called()
         mocked_parse.assert_called_with("m/44'/60'/0'/0/0")
-        mocked_provider.assert_called_with(
-            RONIN_PROVIDER_FREE,
-            request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-        )
-        mocked_checksum.assert_called_with(SLP_CONTRACT)
-        mocked_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
+        mocked_get_web3.assert_called_with(RONIN_PROVIDER_FREE)
+        mocked_contract.assert_not_called()
 
 
 @patch("trezor.trezor_claims.check_balance", return_value=10)
 @patch("trezor.trezor_utils.parse_path", return_value="parsed_path")
 @patch("web3.eth.Eth.contract")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("web3.Web3.HTTPProvider", return_value="provider")
-def test_has_unclaimed_date_force(mocked_provider, mocked_checksum, mocked_contract, mocked_parse, mocked_check):
+@patch("trezor.trezor_claims.get_web3", wraps=get_web3)
+def test_has_unclaimed_date_force(mocked_get_web3, mocked_checksum, mocked_contract, mocked_parse, mocked_check):
     last_claimed_date = datetime.utcnow() - timedelta(days=14) + timedelta(minutes=1)
     with requests_mock.Mocker() as req_mocker:
         req_mocker.get("https://game-api.skymavis.com/game-api/clients/0xfoo/items/1",
@@ -259,19 +243,15 @@ def test_has_unclaimed_date_force(mocked_provider, mocked_checksum, mocked_contr
             assert unclaimed == 2
         mocked_check.assert_called_with("0xfoo")
         mocked_parse.assert_called_with("m/44'/60'/0'/0/0")
-        mocked_provider.assert_called_with(
-            RONIN_PROVIDER_FREE,
-            request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-        )
-        mocked_checksum.assert_called_with(SLP_CONTRACT)
-        mocked_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
+        mocked_get_web3.assert_called_with(RONIN_PROVIDER_FREE)
+        mocked_contract.assert_not_called()
 
 
 @patch("trezor.trezor_utils.parse_path", return_value="parsed_path")
 @patch("web3.eth.Eth.contract")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("web3.Web3.HTTPProvider", return_value="provider")
-def test_has_unclaimed_slp_failed_req(mocked_provider, mocked_checksum, mocked_contract, mocked_parse):
+@patch("trezor.trezor_claims.get_web3", wraps=get_web3)
+def test_has_unclaimed_slp_failed_req(mocked_get_web3, mocked_checksum, mocked_contract, mocked_parse):
     with requests_mock.Mocker() as req_mocker:
         req_mocker.get("https://game-api.skymavis.com/game-api/clients/0xfoo/items/1",
                        status_code=500)
@@ -283,12 +263,8 @@ def test_has_unclaimed_slp_failed_req(mocked_provider, mocked_checksum, mocked_c
             unclaimed = c.has_unclaimed_slp()
             assert unclaimed is None
         mocked_parse.assert_called_with("m/44'/60'/0'/0/0")
-        mocked_provider.assert_called_with(
-            RONIN_PROVIDER_FREE,
-            request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-        )
-        mocked_checksum.assert_called_with(SLP_CONTRACT)
-        mocked_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
+        mocked_get_web3.assert_called_with(RONIN_PROVIDER_FREE)
+        mocked_contract.assert_not_called()
 
 
 @patch("trezor.trezor_utils.parse_path", return_value="parsed_path")
@@ -344,8 +320,8 @@ def test_create_random_msg_fail_wrong_data_req(mocked_parse):
 @patch("trezor.trezor_claims.ethereum.sign_message", return_value=MockedSignedMsg())
 @patch("trezor.trezor_claims.TrezorClaim.create_random_msg", return_value="random_msg")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("web3.Web3.HTTPProvider", return_value="provider")
-def test_get_jwt(mocked_provider, mocked_checksum, mocked_random_msg, mock_sign_message, _, mocked_parse):
+@patch("trezor.trezor_claims.get_web3", wraps=get_web3)
+def test_get_jwt(mocked_get_web3, mocked_checksum, mocked_random_msg, mock_sign_message, _, mocked_parse):
     with requests_mock.Mocker() as req_mocker:
         req_mocker.post("https://graphql-gateway.axieinfinity.com/graphql",
                         json={"data": {"createAccessTokenWithSignature": {"accessToken": "test-token"}}})
@@ -369,11 +345,7 @@ def test_get_jwt(mocked_provider, mocked_checksum, mocked_random_msg, mock_sign_
         }
         assert req_mocker.request_history[0].json() == expected_payload
     mocked_parse.assert_called_with("m/44'/60'/0'/0/0")
-    mocked_provider.assert_called_with(
-        RONIN_PROVIDER_FREE,
-        request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-    )
-    mocked_checksum.assert_called_with(SLP_CONTRACT)
+    mocked_get_web3.assert_called_with(RONIN_PROVIDER_FREE)
     mocked_random_msg.assert_called_once()
     mock_sign_message.assert_called()
 
@@ -383,8 +355,8 @@ def test_get_jwt(mocked_provider, mocked_checksum, mocked_random_msg, mock_sign_
 @patch("trezor.trezor_claims.ethereum.sign_message", return_value=MockedSignedMsg())
 @patch("trezor.trezor_claims.TrezorClaim.create_random_msg", return_value="random_msg")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("web3.Web3.HTTPProvider", return_value="provider")
-def test_get_jwt_fail_req(mocked_provider, mocked_checksum, mocked_random_msg, mock_sign_message, _, mocked_parse):
+@patch("trezor.trezor_claims.get_web3", wraps=get_web3)
+def test_get_jwt_fail_req(mocked_get_web3, mocked_checksum, mocked_random_msg, mock_sign_message, _, mocked_parse):
     with requests_mock.Mocker() as req_mocker:
         req_mocker.post("https://graphql-gateway.axieinfinity.com/graphql",
                         status_code=500)
@@ -393,11 +365,7 @@ def test_get_jwt_fail_req(mocked_provider, mocked_checksum, mocked_random_msg, m
         jwt = c.get_jwt()
         assert jwt is None
         mocked_parse.assert_called_with("m/44'/60'/0'/0/0")
-        mocked_provider.assert_called_with(
-            RONIN_PROVIDER_FREE,
-            request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-        )
-        mocked_checksum.assert_called_with(SLP_CONTRACT)
+        mocked_get_web3.assert_called_with(RONIN_PROVIDER_FREE)
         mocked_random_msg.assert_called_once()
         mock_sign_message.assert_called()
         expected_payload = {
@@ -422,8 +390,8 @@ def test_get_jwt_fail_req(mocked_provider, mocked_checksum, mocked_random_msg, m
 @patch("trezor.trezor_claims.ethereum.sign_message", return_value=MockedSignedMsg())
 @patch("trezor.trezor_claims.TrezorClaim.create_random_msg", return_value="random_msg")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("web3.Web3.HTTPProvider", return_value="provider")
-def test_jwq_fail_req_content(mocked_provider, mocked_checksum, mocked_random_msg, mock_sign_message, _, mocked_parse):
+@patch("trezor.trezor_claims.get_web3", wraps=get_web3)
+def test_jwq_fail_req_content(mocked_get_web3, mocked_checksum, mocked_random_msg, mock_sign_message, _, mocked_parse):
     with requests_mock.Mocker() as req_mocker:
         req_mocker.post("https://graphql-gateway.axieinfinity.com/graphql", json={"data": {}})
         c = TrezorClaim(account="ronin:foo", acc_name="test_acc", bip_path="m/44'/60'/0'/0/0", client="client",
@@ -446,11 +414,7 @@ def test_jwq_fail_req_content(mocked_provider, mocked_checksum, mocked_random_ms
         assert jwt is None
         mocked_parse.assert_called_with("m/44'/60'/0'/0/0")
         assert req_mocker.request_history[0].json() == expected_payload
-        mocked_provider.assert_called_with(
-            RONIN_PROVIDER_FREE,
-            request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-        )
-        mocked_checksum.assert_called_with(SLP_CONTRACT)
+        mocked_get_web3.assert_called_with(RONIN_PROVIDER_FREE)
         mocked_random_msg.assert_called_once()
         mock_sign_message.assert_called()
 
@@ -460,8 +424,8 @@ def test_jwq_fail_req_content(mocked_provider, mocked_checksum, mocked_random_ms
 @patch("trezor.trezor_claims.ethereum.sign_message", return_value=MockedSignedMsg())
 @patch("trezor.trezor_claims.TrezorClaim.create_random_msg", return_value="random_msg")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("web3.Web3.HTTPProvider", return_value="provider")
-def test_jwq_fail_req_content_2(mocked_provider,
+@patch("trezor.trezor_claims.get_web3", wraps=get_web3)
+def test_jwq_fail_req_content_2(mocked_get_web3,
                                 mocked_checksum,
                                 mocked_random_msg,
                                 mock_sign_message,
@@ -490,11 +454,7 @@ def test_jwq_fail_req_content_2(mocked_provider,
         assert req_mocker.request_history[0].json() == expected_payload
         assert jwt is None
         mocked_parse.assert_called_with("m/44'/60'/0'/0/0")
-        mocked_provider.assert_called_with(
-            RONIN_PROVIDER_FREE,
-            request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-        )
-        mocked_checksum.assert_called_with(SLP_CONTRACT)
+        mocked_get_web3.assert_called_with(RONIN_PROVIDER_FREE)
         mocked_random_msg.assert_called_once()
         mock_sign_message.assert_called()
 
@@ -505,7 +465,7 @@ def test_jwq_fail_req_content_2(mocked_provider,
 @patch("web3.Web3.toBytes")
 @patch("web3.Web3.toHex", return_value="transaction_hash")
 @patch("web3.Web3.keccak", return_value='result_of_keccak')
-@patch("web3.eth.Eth.get_transaction_receipt", return_value={'status': 1})
+@patch("axie.utils.ReceiptWatcher.watch", return_value=resolved_future(RECEIPT_SUCCESS))
 @patch("web3.eth.Eth.send_raw_transaction", return_value="raw_tx")
 @patch('trezor.trezor_claims.ethereum.sign_tx', return_value=(1, b'2xf', b'3fg'))
 @patch("trezor.trezor_claims.get_nonce", return_value=1)
@@ -514,8 +474,10 @@ def test_jwq_fail_req_content_2(mocked_provider,
 @patch("trezor.trezor_claims.check_balance", return_value=123)
 @patch("web3.eth.Eth.contract")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("web3.Web3.HTTPProvider", return_value="provider")
-async def test_claim_execution(mocked_provider,
+@patch("trezor.trezor_claims.get_web3", wraps=get_web3)
+@patch("trezor.trezor_claims.checkpoint_data", return_value="0xdata")
+async def test_claim_execution(mocked_checkpoint_data,
+                               mocked_get_web3,
                                mocked_checksum,
                                mocked_contract,
                                moocked_check_balance,
@@ -553,14 +515,11 @@ async def test_claim_execution(mocked_provider,
             c = TrezorClaim(account="ronin:foo", acc_name="test_acc", bip_path="m/44'/60'/0'/0/0", client="client",
                             force=False)
             await c.execute()
-    mocked_provider.assert_called_with(
-        RONIN_PROVIDER_FREE,
-        request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-    )
+    mocked_get_web3.assert_called_with(RONIN_PROVIDER_FREE)
     mocked_to_bytes.assert_called()
     mock_rlp.assert_called()
-    mocked_checksum.assert_has_calls([call(SLP_CONTRACT), call("0xfoo")])
-    mocked_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
+    assert mocked_checkpoint_data.call_args[0][0] == "0xfoo"
+    mocked_contract.assert_not_called()
     moocked_check_balance.assert_called_with("0xfoo")
     mocked_unclaimed_slp.assert_called_once()
     mocked_parse.assert_called_with("m/44'/60'/0'/0/0")
@@ -589,7 +548,7 @@ async def test_claim_execution(mocked_provider,
 @patch("web3.Web3.toBytes")
 @patch("web3.Web3.toHex", return_value="transaction_hash")
 @patch("web3.Web3.keccak", return_value='result_of_keccak')
-@patch("web3.eth.Eth.get_transaction_receipt", return_value={'status': 1})
+@patch("axie.utils.ReceiptWatcher.watch", return_value=resolved_future(RECEIPT_SUCCESS))
 @patch("web3.eth.Eth.send_raw_transaction", return_value="raw_tx")
 @patch('trezor.trezor_claims.ethereum.sign_tx')
 @patch("trezor.trezor_claims.get_nonce", return_value=1)
@@ -598,8 +557,10 @@ async def test_claim_execution(mocked_provider,
 @patch("trezor.trezor_claims.check_balance", return_value=123)
 @patch("web3.eth.Eth.contract")
 @patch("web3.Web3.toChecksumAddress", return_value="checksum")
-@patch("web3.Web3.HTTPProvider", return_value="provider")
-async def test_execution_failed_get_blockchain(mocked_provider,
+@patch("trezor.trezor_claims.get_web3", wraps=get_web3)
+@patch("trezor.trezor_claims.checkpoint_data", return_value="0xdata")
+async def test_execution_failed_get_blockchain(mocked_checkpoint_data,
+                                               mocked_get_web3,
                                                mocked_checksum,
                                                mocked_contract,
                                                moocked_check_balance,
@@ -633,12 +594,9 @@ async def test_execution_failed_get_blockchain(mocked_provider,
             c = TrezorClaim(account="ronin:foo", acc_name="test_acc", bip_path="m/44'/60'/0'/0/0", client="client",
                             force=False)
             await c.execute()
-        mocked_provider.assert_called_with(
-            RONIN_PROVIDER_FREE,
-            request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}
-        )
-        mocked_checksum.assert_called_with('0xa8754b9fa15fc18bb59458815510e40a12cd2014')
-        mocked_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
+        mocked_get_web3.assert_called_with(RONIN_PROVIDER_FREE)
+        mocked_checkpoint_data.assert_not_called()
+        mocked_contract.assert_not_called()
         moocked_check_balance.assert_not_called()
         mocked_unclaimed_slp.assert_called_once()
         mocked_parse.assert_called_with("m/44'/60'/0'/0/0")
@@ -15,6 +15,11 @@ import trezor_axie_scholar_cli as cli
                             (["payout", "file1", "file2"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -42,6 +47,11 @@ import trezor_axie_scholar_cli as cli
                             (["payout", "file1", "file2", "-y"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None,
                               "--version": False,
                               "--yes": True,
                               "--safe-mode": False,
@@ -69,6 +79,11 @@ import trezor_axie_scholar_cli as cli
                             (["payout", "file1", "file2", "--yes"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None,
                               "--version": False,
                               "--yes": True,
                               "--safe-mode": False,
@@ -96,6 +111,11 @@ import trezor_axie_scholar_cli as cli
                             (["managed_payout", "file1", "token", "--yes"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None,
                               "--version": False,
                               "--yes": True,
                               "--safe-mode": False,
@@ -123,6 +143,11 @@ import trezor_axie_scholar_cli as cli
                             (["managed_payout", "file1", "token"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -150,6 +175,11 @@ import trezor_axie_scholar_cli as cli
                             (["claim", "file1", "file2"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -177,6 +207,11 @@ import trezor_axie_scholar_cli as cli
                             (["managed_claim", "file1", "token"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -204,6 +239,11 @@ import trezor_axie_scholar_cli as cli
                             (["claim", "file1", "file2", "--force"],
                              {"--help": False,
                               "--force": True,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -231,6 +271,11 @@ import trezor_axie_scholar_cli as cli
                             (["managed_claim", "file1", "token", "--force"],
                              {"--help": False,
                               "--force": True,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -258,6 +303,11 @@ import trezor_axie_scholar_cli as cli
                             (["config_trezor", "file1"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -285,6 +335,11 @@ import trezor_axie_scholar_cli as cli
                             (["config_trezor", "file1", "file2"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -312,6 +367,11 @@ import trezor_axie_scholar_cli as cli
                             (["managed_config_trezor", "file1", "token"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -339,6 +399,11 @@ import trezor_axie_scholar_cli as cli
                             (["transfer_axies", "file1", "file2"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -366,6 +431,11 @@ import trezor_axie_scholar_cli as cli
                             (["transfer_axies", "file1", "file2", "--safe-mode"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": True,
@@ -393,6 +463,11 @@ import trezor_axie_scholar_cli as cli
                             (["generate_payments", "file1", "file2"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -420,6 +495,11 @@ import trezor_axie_scholar_cli as cli
                             (["generate_payments", "file1"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -447,6 +527,11 @@ import trezor_axie_scholar_cli as cli
                             (["axie_morphing", "file1", "a,b,c"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -474,6 +559,11 @@ import trezor_axie_scholar_cli as cli
                             (["axie_breeding", "file1", "file2"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -501,6 +591,11 @@ import trezor_axie_scholar_cli as cli
                             (["generate_QR", "file1", "file2"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -528,6 +623,11 @@ import trezor_axie_scholar_cli as cli
                             (["generate_breedings", "file1", "file2"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -555,6 +655,11 @@ import trezor_axie_scholar_cli as cli
                             (["generate_breedings", "file1"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -582,6 +687,11 @@ import trezor_axie_scholar_cli as cli
                             (["generate_transfer_axies", "file1", "file2"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -609,6 +719,11 @@ import trezor_axie_scholar_cli as cli
                             (["generate_transfer_axies", "file1"],
                              {"--help": False,
                               "--force": False,
+                              "--jwt-cache": None,
+                              "--axie-index": None,
+                              "--format": "png",
+                              "--output": None,
+                              "--validation-cache": None, "--pool-size": None,
                               "--version": False,
                               "--yes": False,
                               "--safe-mode": False,
@@ -958,6 +1073,22 @@ def test_transfer(mock_verify_inputs, mock_prepare_transfers, mock_transfersmana
     mock_transfersmanager.assert_called_with(str(f1), str(f2), secure=False)
 
 
+@patch("trezor_axie_scholar_cli.providers.configure")
+@patch("trezor.TrezorAxieTransferManager.__init__", return_value=None)
+@patch("trezor.TrezorAxieTransferManager.prepare_transfers")
+@patch("trezor.TrezorAxieTransferManager.verify_inputs")
+def test_transfer_pool_size(mock_verify_inputs, mock_prepare_transfers, mock_transfersmanager, mock_configure, tmpdir):
+    f1 = tmpdir.join("file1.json")
+    f1.write('{"ronin:<account_s1_address>": "hello"}')
+    f2 = tmpdir.join("file2.json")
+    config_data = {"ronin:<account_s1_address>": {"passphrase": "", "bip_path": "m/44'/60'/0'/0/48"}}
+    f2.write(json.dumps(config_data))
+    with patch.object(sys, 'argv', ["", "transfer_axies", str(f1), str(f2), "--pool-size", "32"]):
+        cli.run_cli()
+    mock_configure.assert_called_with(pool_size=32)
+    mock_prepare_transfers.assert_called_with()
+
+
 @patch("trezor.TrezorAxieTransferManager.__init__", return_value=None)
 @patch("trezor.TrezorAxieTransferManager.prepare_transfers")
 @patch("trezor.TrezorAxieTransferManager.verify_inputs")
@@ -982,36 +1113,32 @@ def test_axie_morphing_file_check_fail(caplog):
 
 
 @patch("trezor.TrezorAxieMorphingManager.__init__", return_value=None)
-@patch("axie.Axies.__init__", return_value=None)
-@patch("axie.Axies.find_axies_to_morph", return_value=[1, 2, 3])
+@patch("trezor_axie_scholar_cli.find_axies_to_morph", side_effect=lambda accounts, index: {acc: [1, 2, 3] for acc in accounts})
 @patch("trezor.TrezorAxieMorphingManager.execute")
 @patch("trezor.TrezorAxieMorphingManager.verify_inputs")
-def test_axie_morphing(mock_veritfy_inputs, mock_morphing_execute, mock_find_axies, mock_axies_init, mock_morphingmanager, tmpdir): # noqa
+def test_axie_morphing(mock_veritfy_inputs, mock_morphing_execute, mock_find_axies, mock_morphingmanager, tmpdir): # noqa
     f = tmpdir.join("file2.json")
     config_data = {"ronin:<account_s1_address>": {"passphrase": "", "bip_path": "m/44'/60'/0'/0/48"}}
     f.write(json.dumps(config_data))
     with patch.object(sys, 'argv', ["", "axie_morphing", str(f), "foo,bar"]):
         cli.run_cli()
-    mock_axies_init.assert_has_calls([call('foo'), call('bar')])
+    mock_find_axies.assert_called_once_with(['foo', 'bar'], None)
     mock_morphingmanager.assert_has_calls([call([1, 2, 3], "foo", str(f)), call([1, 2, 3], "bar", str(f))])
     assert mock_veritfy_inputs.call_count == 2
-    assert mock_find_axies.call_count == 2
     assert mock_morphing_execute.call_count == 2
 
 
 @patch("trezor.TrezorAxieMorphingManager.__init__", return_value=None)
-@patch("axie.Axies.__init__", return_value=None)
-@patch("axie.Axies.find_axies_to_morph", return_value=[])
+@patch("trezor_axie_scholar_cli.find_axies_to_morph", side_effect=lambda accounts, index: {acc: [] for acc in accounts})
 @patch("trezor.TrezorAxieMorphingManager.execute")
 @patch("trezor.TrezorAxieMorphingManager.verify_inputs")
-def test_axie_morphing_none(mock_veritfy_inputs, mock_morphing_execute, mock_find_axies, mock_axies_init, mock_morphingmanager, tmpdir): # noqa
+def test_axie_morphing_none(mock_veritfy_inputs, mock_morphing_execute, mock_find_axies, mock_morphingmanager, tmpdir): # noqa
     f = tmpdir.join("file2.json")
     config_data = {"ronin:<account_s1_address>": {"passphrase": "", "bip_path": "m/44'/60'/0'/0/48"}}
     f.write(json.dumps(config_data))
     with patch.object(sys, 'argv', ["", "axie_morphing", str(f), "foo,bar,1"]):
         cli.run_cli()
-    mock_axies_init.assert_has_calls([call('foo'), call('bar'), call("1")])
-    assert mock_find_axies.call_count == 3
+    mock_find_axies.assert_called_once_with(['foo', 'bar', '1'], None)
     mock_morphingmanager.assert_not_called()
     mock_veritfy_inputs.assert_not_called()
     mock_morphing_execute.assert_not_called()
@@ -1060,4 +1187,4 @@ def test_qrcode(mock_execute, mock_qrcodemanager, tmpdir):
     with patch.object(sys, 'argv', ["", "generate_QR", str(f1), str(f2)]):
         cli.run_cli()
     mock_execute.assert_called_with()
-    mock_qrcodemanager.assert_called_with({"ronin:<account_s1_address>": "hello"}, config_data, os.path.dirname(f2))
+    mock_qrcodemanager.assert_called_with({"ronin:<account_s1_address>": "hello"}, config_data, os.path.dirname(f2), fmt="png", output=None)
@@ -21,7 +21,7 @@ def test_trezor_setup_init_existing_config():
     assert tas.trezor_config == config_data
     assert tas.payments == f1
 
-def test_trezor_setup_update_already_existing(caplog):
+def test_trezor_setup_update_already_existing(tmpdir, caplog):
     manager_acc = 'ronin:<manager_address>000' + "".join([str(x) for x in range(10)]*2)
     dono_acc = 'ronin:<donations_address>0' + "".join([str(x) for x in range(10)]*2)
     scholar_acc = 'ronin:<account_s1_address>' + "".join([str(x) for x in range(10)]*2)
@@ -44,15 +44,17 @@ def test_trezor_setup_update_already_existing(caplog):
         ]
     }
     config_data = {scholar_acc: {"passphrase": "", "bip_path": "m/44'/60'/0'/0/0"}}
-    tas = TrezorAccountsSetup(p_file, config_data)
+    config_file = tmpdir.join("trezor_config.json")
+    tas = TrezorAccountsSetup(p_file, config_data, str(config_file))
     tas.update_trezor_config()
     assert 'Gathered all accounts config, saving trezor_config file' in caplog.text
     assert 'Trezor_config file saved!' in caplog.text
+    assert json.loads(config_file.read()) == config_data
 
 
 @patch('trezor.trezor_setup.ethereum.get_address', return_value='ronin:<account_s1_address>01234567890123456789')
 @patch('trezor.trezor_setup.get_default_client')
-def test_trezor_setup_update(mock_client, mock_get_address, caplog):
+def test_trezor_setup_update(mock_client, mock_get_address, tmpdir, caplog):
     manager_acc = 'ronin:<manager_address>000' + "".join([str(x) for x in range(10)]*2)
     dono_acc = 'ronin:<donations_address>0' + "".join([str(x) for x in range(10)]*2)
     scholar_acc = 'ronin:<account_s1_address>' + "".join([str(x) for x in range(10)]*2)
@@ -74,10 +76,12 @@ def test_trezor_setup_update(mock_client, mock_get_address, caplog):
             }
         ]
     }
-    tas = TrezorAccountsSetup(p_file)
+    config_file = tmpdir.join("trezor_config.json")
+    tas = TrezorAccountsSetup(p_file, path=str(config_file))
     with patch.object(builtins, 'input', lambda _: 1):
         tas.update_trezor_config()
         mock_client.assert_called()
         mock_get_address.assert_called()
     assert 'Gathered all accounts config, saving trezor_config file' in caplog.text
     assert 'Trezor_config file saved!' in caplog.text
+    assert config_file.check()
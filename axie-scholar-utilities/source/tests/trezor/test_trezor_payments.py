@@ -9,8 +9,8 @@ import pytest
 from trezor import TrezorAxiePaymentsManager
 from trezor.trezor_payments import TrezorPayment
 from axie.payments import PaymentsSummary
-from axie.utils import SLP_CONTRACT
-from tests.test_utils import LOG_FILE_PATH, cleanup_log_file
+from axie.utils import SLP_CONTRACT, RECEIPT_SUCCESS, RECEIPT_REVERTED
+from tests.test_utils import LOG_FILE_PATH, cleanup_log_file, resolved_future
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -246,7 +246,7 @@ def test_payments_manager_prepare_payout(mocked_prepare_payout):
 
 @patch("trezor.trezor_payments.parse_path", return_value="m/44'/60'/0'/0/0")
 @patch("trezor.trezor_payments.get_default_client", return_value="client")
-@patch("trezor.trezor_payments.check_balance", return_value=1000)
+@patch("trezor.trezor_payments.check_balances", side_effect=lambda accounts: {acc: 1000 for acc in accounts})
 @patch("trezor.TrezorAxiePaymentsManager.payout_account")
 @patch("trezor.TrezorAxiePaymentsManager.check_acc_has_enough_balance", return_value=True)
 def test_payments_manager_prepare_payout_check_correct_payments(mocked_enough_balance,
@@ -315,7 +315,7 @@ def test_payments_manager_prepare_payout_check_correct_payments(mocked_enough_ba
 
 
 @patch("trezor.trezor_payments.get_default_client", return_value="client")
-@patch("trezor.trezor_payments.check_balance", return_value=0)
+@patch("trezor.trezor_payments.check_balances", side_effect=lambda accounts: {acc: 0 for acc in accounts})
 @patch("trezor.TrezorAxiePaymentsManager.payout_account")
 @patch("trezor.TrezorAxiePaymentsManager.check_acc_has_enough_balance", return_value=True)
 def test_payments_manager_prepare_payout_check_correct_payments_no_balance(mocked_enough_balance,
@@ -347,9 +347,9 @@ def test_payments_manager_prepare_payout_check_correct_payments_no_balance(mocke
     axp = TrezorAxiePaymentsManager(p_file, config_data)
     axp.verify_inputs()
     axp.prepare_payout()
-    mocked_client.assert_called()
-    mocked_check_balance.assert_called()
-    mocked_enough_balance.assert_called_with(scholar_acc, 0)
+    mocked_client.assert_not_called()
+    mocked_check_balance.assert_called_with([scholar_acc])
+    mocked_enough_balance.assert_not_called()
     mocked_payout.assert_not_called()
 
 
@@ -362,8 +362,10 @@ def test_payments_manager_prepare_payout_check_correct_payments_no_balance(mocke
 @patch("web3.Web3.toHex", return_value="transaction_hash")
 @patch("web3.Web3.keccak", return_value='result_of_keccak')
 @patch("web3.eth.Eth.contract")
-@patch("web3.eth.Eth.get_transaction_receipt", return_value={'status': 1})
-def test_execute_calls_web3_functions(mock_transaction_receipt,
+@patch("axie.utils.ReceiptWatcher.watch", return_value=resolved_future(RECEIPT_SUCCESS))
+@patch("trezor.trezor_payments.transfer_data", return_value="0xdata")
+def test_execute_calls_web3_functions(mock_transfer_data,
+                                      mock_transaction_receipt,
                                       mock_contract,
                                       mock_keccak,
                                       mock_to_hex,
@@ -392,18 +394,16 @@ def test_execute_calls_web3_functions(mock_transaction_receipt,
             10,
             s)
         p.execute()
-    mock_file.assert_called_with("trezor/slp_abi.json", encoding='utf-8')
-    mock_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
+    mock_file.assert_not_called()
+    mock_contract.assert_not_called()
+    mock_transfer_data.assert_called_with('0xto_ronin', 10)
     mock_keccak.assert_called_once()
     mock_to_hex.assert_called_with("result_of_keccak")
     mock_send.assert_called_once()
     mock_sign.assert_called_once()
     mocked_to_bytes.assert_called()
     mock_rlp.assert_called()
-    mock_checksum.assert_has_calls(calls=[
-        call(SLP_CONTRACT),
-        call('0xfrom_ronin'),
-        call('0xto_ronin')])
+    mock_checksum.assert_called_with('0xfrom_ronin')
     mock_transaction_receipt.assert_called_with("transaction_hash")
     assert ('Transaction random_account(ronin:to_ronin) for the amount of 10 SLP completed! Hash: transaction_hash - '
             'Explorer: https://explorer.roninchain.com/tx/transaction_hash' in caplog.text)
@@ -425,9 +425,11 @@ def test_execute_calls_web3_functions(mock_transaction_receipt,
 @patch("web3.Web3.toHex", return_value="transaction_hash")
 @patch("web3.Web3.keccak", return_value='result_of_keccak')
 @patch("web3.eth.Eth.contract")
-@patch("web3.eth.Eth.get_transaction_receipt", return_value={'status': 0})
+@patch("axie.utils.ReceiptWatcher.watch", return_value=resolved_future(RECEIPT_REVERTED))
 @patch("trezor.trezor_payments.TrezorPayment.send_replacement_tx")
-def test_execute_calls_web3_functions_retry(mock_replacement_tx,
+@patch("trezor.trezor_payments.transfer_data", return_value="0xdata")
+def test_execute_calls_web3_functions_retry(mock_transfer_data,
+                                            mock_replacement_tx,
                                             mock_transaction_receipt,
                                             mock_contract,
                                             mock_keccak,
@@ -457,18 +459,16 @@ def test_execute_calls_web3_functions_retry(mock_replacement_tx,
             10,
             s)
         p.execute()
-    mock_file.assert_called_with("trezor/slp_abi.json", encoding='utf-8')
-    mock_contract.assert_called_with(address="checksum", abi={"foo": "bar"})
+    mock_file.assert_not_called()
+    mock_contract.assert_not_called()
+    mock_transfer_data.assert_called_with('0xto_ronin', 10)
     mock_keccak.assert_called_once()
     mock_to_hex.assert_called_with("result_of_keccak")
     mock_send.assert_called_once()
     mock_sign.assert_called_once()
     mocked_to_bytes.assert_called()
     mock_rlp.assert_called()
-    mock_checksum.assert_has_calls(calls=[
-        call(SLP_CONTRACT),
-        call('0xfrom_ronin'),
-        call('0xto_ronin')])
+    mock_checksum.assert_called_with('0xfrom_ronin')
     mock_transaction_receipt.assert_called_with("transaction_hash")
     mock_replacement_tx.assert_called_with(123)
     assert ("Important: Transaction random_account(ronin:to_ronin) for the amount of 10 SLP failed. "
@@ -11,9 +11,9 @@ from trezor.trezor_qr_code import TrezorQRCode
 
 
 @patch("trezor.TrezorQRCodeManager.load_trezor_config_and_acc_name", return_value=("foo", "bar"))
-def test_qrcode_manager_init(mocked_load):
-    config_file = "trezor_config.json"
-    payments_file = "payments.json"
+def test_qrcode_manager_init(mocked_load, tmpdir):
+    config_file = str(tmpdir.join("trezor_config.json"))
+    payments_file = str(tmpdir.join("payments.json"))
     tr_qr_m = TrezorQRCodeManager(payments_file, config_file, '/')
     mocked_load.assert_called_with(config_file, payments_file)
     assert tr_qr_m.trezor_config == "foo"
@@ -63,9 +63,9 @@ def test_qrcode_manager_verify_inputs_wrong_public_ronin(caplog):
 
 
 @patch("trezor.trezor_qr_code.get_default_client", return_value="client")
-@patch("trezor.trezor_qr_code.TrezorQRCode.generate_qr")
+@patch("trezor.trezor_qr_code.generate_qr_codes")
 @patch("trezor.trezor_qr_code.TrezorQRCode.__init__", return_value=None)
-def test_qrcode_manager_execute(mocked_qrcode_init, mocked_qrcode_generate_qr, mocked_client):
+def test_qrcode_manager_execute(mocked_qrcode_init, mocked_generate_qr_codes, mocked_client):
     scholar_acc = 'ronin:<account_s1_address>' + "".join([str(x) for x in range(10)]*4)
     scholar_acc_other = 'ronin:<account_s2_address>' + "".join([str(x) for x in range(10)]*4)
     p_file = {
@@ -96,16 +96,23 @@ def test_qrcode_manager_execute(mocked_qrcode_init, mocked_qrcode_generate_qr, m
             bip_path="m/44'/60'/0'/0/0",
             client="client",
             acc_name="Scholar 1",
-            path='/'),
+            path='/',
+            fmt="png"),
         call(
             account=scholar_acc_other,
             bip_path="m/44'/60'/0'/0/1",
             client="client",
             acc_name="Scholar 2",
-            path='/')
+            path='/',
+            fmt="png")
     ])
     mocked_client.assert_called()
-    assert mocked_qrcode_generate_qr.call_count == 2
+    qrcode_list, fmt, concurrency, _, output = mocked_generate_qr_codes.call_args[0]
+    assert len(qrcode_list) == 2
+    assert fmt == "png"
+    # Device signing is serial
+    assert concurrency == 1
+    assert output is None
 
 
 def test_qrcode_init():
@@ -5,7 +5,8 @@ from mock import patch, call, mock_open
 
 from trezor import TrezorAxieTransferManager
 from trezor.trezor_transfers import TrezorTransfer, AXIE_CONTRACT
-from tests.test_utils import LOG_FILE_PATH, cleanup_log_file
+from axie.utils import RECEIPT_SUCCESS
+from tests.test_utils import LOG_FILE_PATH, cleanup_log_file, resolved_future
 
 
 @patch("trezor.trezor_transfers.load_json")
@@ -23,7 +24,7 @@ def test_transfer_manager_init(mocked_load_json):
 
 @patch("trezor.trezor_transfers.parse_path", return_value="m/44'/60'/0'/0/0")
 @patch("trezor.trezor_transfers.get_default_client", return_value="client")
-@patch("trezor.trezor_transfers.Axies.get_axies", return_value=[123, 123123, 234])
+@patch("trezor.trezor_transfers.get_owned_axies", side_effect=lambda accounts: {acc: {123, 123123, 234} for acc in accounts})
 @patch("trezor.trezor_transfers.load_json")
 @patch("trezor.trezor_transfers.TrezorAxieTransferManager.execute_transfers")
 def test_transfer_manager_prepare_transfers(mocked_execute_transfers,
@@ -44,7 +45,7 @@ def test_transfer_manager_prepare_transfers(mocked_execute_transfers,
     ]}]
     atm.trezor_config = {"ronin:1": {"passphrase": "", "bip_path": "m/44'/60'/0'/0/0"}}
     atm.prepare_transfers()
-    mock_axies.assert_called_once()
+    mock_axies.assert_called_once_with(["ronin:1"])
     mock_client.assert_called()
     mock_parse.assert_has_calls(calls=[
         call("m/44'/60'/0'/0/0"),
@@ -76,7 +77,7 @@ def test_transfer_manager_prepare_transfers(mocked_execute_transfers,
 
 @patch("trezor.trezor_transfers.parse_path", return_value="m/44'/60'/0'/0/0")
 @patch("trezor.trezor_transfers.get_default_client", return_value="client")
-@patch("trezor.trezor_transfers.Axies.get_axies", return_value=[123])
+@patch("trezor.trezor_transfers.get_owned_axies", side_effect=lambda accounts: {acc: {123} for acc in accounts})
 @patch("trezor.trezor_transfers.load_json")
 @patch("trezor.trezor_transfers.TrezorAxieTransferManager.execute_transfers")
 def test_transfer_manager_prepare_transfers_only_available(mocked_execute_transfers,
@@ -97,7 +98,7 @@ def test_transfer_manager_prepare_transfers_only_available(mocked_execute_transf
     ]}]
     atm.trezor_config = {"ronin:1": {"passphrase": "", "bip_path": "m/44'/60'/0'/0/0"}}
     atm.prepare_transfers()
-    mock_axies.assert_called_once()
+    mock_axies.assert_called_once_with(["ronin:1"])
     mock_client.assert_called()
     mock_parse.assert_called_with("m/44'/60'/0'/0/0")
     assert mocked_execute_transfers.call_count == 1
@@ -113,7 +114,7 @@ def test_transfer_manager_prepare_transfers_only_available(mocked_execute_transf
 
 @patch("trezor.trezor_transfers.parse_path", return_value="m/44'/60'/0'/0/0")
 @patch("trezor.trezor_transfers.get_default_client", return_value="client")
-@patch("trezor.trezor_transfers.Axies.get_axies", return_value=[123, 123123, 234])
+@patch("trezor.trezor_transfers.get_owned_axies", side_effect=lambda accounts: {acc: {123, 123123, 234} for acc in accounts})
 @patch("trezor.trezor_transfers.load_json")
 @patch("trezor.trezor_transfers.TrezorAxieTransferManager.execute_transfers")
 def test_transfer_manager_prepare_transfers_secure(mocked_execute_transfers,
@@ -137,7 +138,7 @@ def test_transfer_manager_prepare_transfers_secure(mocked_execute_transfers,
          "ronin:3": {"passphrase": "", "bip_path": "m/44'/60'/0'/0/1"},
     }
     atm.prepare_transfers()
-    mock_axies.assert_called_once()
+    mock_axies.assert_called_once_with(["ronin:1"])
     mock_client.assert_called()
     mock_parse.assert_called_with("m/44'/60'/0'/0/0")
     assert mocked_execute_transfers.call_count == 1
@@ -159,8 +160,10 @@ def test_transfer_manager_prepare_transfers_secure(mocked_execute_transfers,
 @patch("web3.Web3.toHex", return_value="transaction_hash")
 @patch("web3.Web3.keccak", return_value='result_of_keccak')
 @patch("web3.eth.Eth.contract")
-@patch("web3.eth.Eth.get_transaction_receipt", return_value={'status': 1})
-def test_execute_calls_web3_functions(mock_transaction_receipt,
+@patch("axie.utils.ReceiptWatcher.watch", return_value=resolved_future(RECEIPT_SUCCESS))
+@patch("trezor.trezor_transfers.safe_transfer_from_data", return_value="0xdata")
+def test_execute_calls_web3_functions(mock_transfer_data,
+                                      mock_transaction_receipt,
                                       mock_contract,
                                       mock_keccak,
                                       mock_to_hex,
@@ -185,19 +188,16 @@ def test_execute_calls_web3_functions(mock_transaction_receipt,
                       "open",
                       mock_open(read_data='{"foo": "bar"}')) as mock_file:
         t.execute()
-    mock_file.assert_called_with("trezor/axie_abi.json", encoding='utf-8')
-    mock_contract.assert_called_with(address='checksum', abi={'foo': 'bar'})
+    mock_file.assert_not_called()
+    mock_contract.assert_not_called()
+    mock_transfer_data.assert_called_with('0xfrom_ronin', '0xto_ronin', 123)
     mock_keccak.assert_called_once()
     mock_to_hex.assert_called_with("result_of_keccak")
     mock_send.assert_called_once()
     mock_sign.assert_called_once()
     mocked_to_bytes.assert_called()
     mocked_rlp.assert_called()
-    mock_checksum.assert_has_calls(calls=[
-        call(AXIE_CONTRACT),
-        call('0xfrom_ronin'),
-        call('0xfrom_ronin'),
-        call('0xto_ronin')])
+    mock_checksum.assert_called_with('0xfrom_ronin')
     mock_transaction_receipt.assert_called_with("transaction_hash")
     mocked_get_transaction_count.assert_called()
     assert ("Axie Transfer of axie (123) from account (ronin:from_ronin) to account "
@@ -1,29 +1,28 @@
 import sys
-import json
 import rlp
 import logging
-from time import sleep
-from datetime import datetime, timedelta
+from datetime import datetime
 
-from jsonschema import validate
-from jsonschema.exceptions import ValidationError
-from web3 import Web3, exceptions
 from trezorlib.client import get_default_client
 from trezorlib.tools import parse_path
 from trezorlib import ethereum
 
-from axie.schemas import breeding_schema
+from axie.schemas import schema_errors
+from axie.breeding import breeding_costs, has_funds, preflight
+from axie.calldata import breed_axies_data
 from axie.utils import (
     get_nonce,
     load_json,
     RONIN_PROVIDER_FREE,
     AXIE_CONTRACT,
-    check_balance,
-    TIMEOUT_MINS,
-    ImportantLogsFilter
+    RECEIPT_SUCCESS,
+    RECEIPT_TIMEOUT,
+    receipt_watcher,
+    ImportantLogsFilter,
+    get_web3,
+    validation_cache
 )
 from axie.payments import PaymentsSummary, CREATOR_FEE_ADDRESS
-from axie.utils import USER_AGENT
 from trezor.trezor_payments import TrezorPayment
 from trezor.trezor_utils import CustomUI
 
@@ -40,10 +39,7 @@ logger.addHandler(file_handler)
 
 class TrezorBreed:
     def __init__(self, sire_axie, matron_axie, address, client, bip_path):
-        self.w3 = Web3(
-            Web3.HTTPProvider(
-                RONIN_PROVIDER_FREE,
-                request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}))
+        self.w3 = get_web3(RONIN_PROVIDER_FREE)
         self.sire_axie = sire_axie
         self.matron_axie = matron_axie
         self.address = address.replace("ronin:", "0x")
@@ -53,26 +49,10 @@ class TrezorBreed:
         self.gas = 250000
 
     def execute(self):
-        # Prepare transaction
-        with open("axie/axie_abi.json") as f:
-            axie_abi = json.load(f)
-        axie_contract = self.w3.eth.contract(
-            address=Web3.toChecksumAddress(AXIE_CONTRACT),
-            abi=axie_abi
-        )
         # Get Nonce
         nonce = get_nonce(self.address)
         # Build transaction
-        breed_tx = axie_contract.functions.breedAxies(
-            self.sire_axie,
-            self.matron_axie
-        ).buildTransaction({
-            "chainId": 2020,
-            "gas": self.gas,
-            "gasPrice": self.w3.toWei("0", "gwei"),
-            "nonce": nonce
-        })
-        data = self.w3.toBytes(hexstr=breed_tx['data'])
+        data = self.w3.toBytes(hexstr=breed_axies_data(self.sire_axie, self.matron_axie))
         to = self.w3.toBytes(hexstr=AXIE_CONTRACT)
         sig = ethereum.sign_tx(
             self.client,
@@ -95,25 +75,12 @@ class TrezorBreed:
         # get transaction hash
         hash = self.w3.toHex(self.w3.keccak(transaction))
         # Wait for transaction to finish or timeout
-        logging.info("{self} about to start!")
-        start_time = datetime.now()
-        while True:
-            # We will wait for max 10minutes for this tx to respond
-            if datetime.now() - start_time > timedelta(minutes=TIMEOUT_MINS):
-                success = False
-                logging.info(f"Transaction {self}, timed out!")
-                break
-            try:
-                recepit = self.w3.eth.get_transaction_receipt(hash)
-                if recepit["status"] == 1:
-                    success = True
-                else:
-                    success = False
-                break
-            except exceptions.TransactionNotFound:
-                # Sleep 10s while waiting
-                sleep(10)
-                logging.info(f"Waiting for transactions '{self}' to finish (Nonce: {nonce})...")
+        logging.info(f"{self} about to start!")
+        logging.info(f"Waiting for transactions '{self}' to finish (Nonce: {nonce})...")
+        status = receipt_watcher.watch(hash).result()
+        if status == RECEIPT_TIMEOUT:
+            logging.info(f"Transaction {self}, timed out!")
+        success = status == RECEIPT_SUCCESS
 
         if success:
             logging.info(f"Important: {self} completed successfully")
@@ -132,13 +99,18 @@ class TrezorAxieBreedManager:
         self.breeding_file = load_json(breeding_file)
         self.payment_account = payment_account.lower()
         self.breeding_costs = 0
+        self.account_costs = {}
+        self.breed_counts = {}
 
     def verify_inputs(self):
-        validation_error = False
         logging.info("Validating file inputs...")
-        try:
-            validate(self.breeding_file, breeding_schema)
-        except ValidationError as ex:
+        cache_key = validation_cache.key("breeding", self.breeding_file, self.trezor_config, self.payment_account)
+        if validation_cache.passed(cache_key):
+            logging.info("Files did not change since they were last validated, skipping validation.")
+            self.preflight()
+            return
+        validation_error = False
+        for ex in schema_errors(self.breeding_file, "breeding"):
             logging.critical(f'Validation of breeding file failed. Error given: {ex.message}\n'
                              f'For attribute in: {list(ex.path)}')
             validation_error = True
@@ -153,13 +125,33 @@ class TrezorAxieBreedManager:
             validation_error = True
         if validation_error:
             sys.exit()
+        else:
+            validation_cache.add(cache_key)
+            self.preflight()
+
+    def preflight(self):
+        logging.info("Checking breeding pairs...")
+        self.breeding_file, self.breed_counts = preflight(self.breeding_file)
+        if not self.breeding_file:
+            logging.critical("None of the breeding pairs can be bred, nothing to do.")
+            sys.exit()
+        logging.info(f"{len(self.breeding_file)} breeding pairs ready")
 
     def calculate_cost(self):
         return self.calculate_fee_cost() + self.breeding_costs
 
     def calculate_breeding_cost(self):
-        # TODO: We need to calculate how much will all breeding cost, pending for the future!
-        return 0
+        self.account_costs, errors = breeding_costs(self.breeding_file, self.breed_counts)
+        for error in errors:
+            logging.critical(error)
+        self.breeding_costs = sum(costs["slp"] for costs in self.account_costs.values())
+        return self.breeding_costs
+
+    def check_funds(self):
+        self.calculate_breeding_cost()
+        required = {acc: dict(costs) for acc, costs in self.account_costs.items()}
+        required.setdefault(self.payment_account, {"slp": 0, "axs": 0})["slp"] += self.calculate_fee_cost()
+        return has_funds(required)
 
     def calculate_fee_cost(self):
         number_of_breeds = len(self.breeding_file)
@@ -174,7 +166,7 @@ class TrezorAxieBreedManager:
         return cost
 
     def execute(self):
-        if check_balance(self.payment_account) < self.calculate_cost():
+        if not self.check_funds():
             logging.critical("Not enough SLP funds to pay for breeding and the fee")
             sys.exit()
 
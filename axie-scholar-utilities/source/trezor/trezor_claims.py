@@ -1,23 +1,24 @@
 import sys
 import asyncio
-import json
 import rlp
 import logging
 from datetime import datetime, timedelta, timezone
 
 from requests.exceptions import RetryError
-from web3 import Web3, exceptions
-import requests
 from trezorlib.client import get_default_client
 from trezorlib import ethereum
 
+from axie.calldata import checkpoint_data
 from axie.utils import (
     check_balance,
     get_nonce,
     ImportantLogsFilter,
     SLP_CONTRACT,
     RONIN_PROVIDER_FREE,
-    USER_AGENT
+    RECEIPT_SUCCESS,
+    receipt_watcher,
+    get_web3,
+    validation_cache
 )
 from trezor.trezor_utils import TrezorAxieGraphQL, CustomUI
 
@@ -35,18 +36,8 @@ logger.addHandler(file_handler)
 class TrezorClaim(TrezorAxieGraphQL):
     def __init__(self, acc_name, force, **kwargs):
         super().__init__(**kwargs)
-        self.w3 = Web3(
-            Web3.HTTPProvider(
-                RONIN_PROVIDER_FREE,
-                request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}))
-        with open("axie/slp_abi.json", encoding='utf-8') as f:
-            slp_abi = json.load(f)
-        self.slp_contract = self.w3.eth.contract(
-            address=Web3.toChecksumAddress(SLP_CONTRACT),
-            abi=slp_abi
-        )
+        self.w3 = get_web3(RONIN_PROVIDER_FREE)
         self.acc_name = acc_name
-        self.request = requests.Session()
         self.gwei = self.w3.toWei('0', 'gwei')
         self.gas = 492874
         self.force = force
@@ -118,13 +109,12 @@ class TrezorClaim(TrezorAxieGraphQL):
             return
         nonce = get_nonce(self.account)
         # Build claim
-        claim = self.slp_contract.functions.checkpoint(
-            Web3.toChecksumAddress(self.account),
+        data = self.w3.toBytes(hexstr=checkpoint_data(
+            self.account,
             signature['amount'],
             signature['timestamp'],
             signature['signature']
-        ).buildTransaction({'gas': self.gas, 'gasPrice': 0, 'nonce': nonce})
-        data = self.w3.toBytes(hexstr=claim['data'])
+        ))
         to = self.w3.toBytes(hexstr=SLP_CONTRACT)
         sig = ethereum.sign_tx(
             self.client,
@@ -146,19 +136,10 @@ class TrezorClaim(TrezorAxieGraphQL):
         self.w3.eth.send_raw_transaction(transaction)
         hash = self.w3.toHex(self.w3.keccak(transaction))
         # Wait for transaction to finish
-        while True:
-            try:
-                recepit = self.w3.eth.get_transaction_receipt(hash)
-                if recepit["status"] == 1:
-                    success = True
-                else:
-                    success = False
-                break
-            except exceptions.TransactionNotFound:
-                logging.debug(f"Waiting for claim for {self.acc_name} ({self.account.replace('0x', 'ronin:')}) to "
-                              f"finish (Nonce:{nonce}) (Hash: {hash})...")
-                # Sleep 5 seconds not to constantly send requests!
-                await asyncio.sleep(5)
+        logging.debug(f"Waiting for claim for {self.acc_name} ({self.account.replace('0x', 'ronin:')}) to "
+                      f"finish (Nonce:{nonce}) (Hash: {hash})...")
+        status = await asyncio.wrap_future(receipt_watcher.watch(hash))
+        success = status == RECEIPT_SUCCESS
         if success:
             logging.info(f"Important: SLP Claimed! New balance for account {self.acc_name} "
                          f"({self.account.replace('0x', 'ronin:')}) is: {check_balance(self.account)}")
@@ -192,6 +173,10 @@ class TrezorAxieClaimsManager:
         return refined_config, acc_names
 
     def verify_inputs(self):
+        cache_key = validation_cache.key("claims", self.trezor_config)
+        if validation_cache.passed(cache_key):
+            logging.info("Files did not change since they were last validated, skipping validation.")
+            return
         validation_success = True
         if not self.trezor_config:
             logging.warning("No configuration found for trezor")
@@ -202,6 +187,7 @@ class TrezorAxieClaimsManager:
                 validation_success = False
         if not validation_success:
             sys.exit()
+        validation_cache.add(cache_key)
         logging.info("Files correctly validated")
 
     def prepare_claims(self):
@@ -1,28 +1,29 @@
 import sys
-import json
 import rlp
 import logging
 from time import sleep
-from datetime import datetime, timedelta
+from datetime import datetime
 
-from jsonschema import validate
-from jsonschema.exceptions import ValidationError
 from trezorlib.client import get_default_client
 from trezorlib.tools import parse_path
 from trezorlib import ethereum
-from web3 import Web3, exceptions
 
 from axie.payments import PaymentsSummary
-from axie.schemas import payments_schema, legacy_payments_schema
+from axie.schemas import payments_format, schema_errors
+from axie.calldata import transfer_data
 from axie.utils import (
     check_balance,
+    check_balances,
     get_nonce,
     load_json,
     ImportantLogsFilter,
     SLP_CONTRACT,
     RONIN_PROVIDER_FREE,
-    TIMEOUT_MINS,
-    USER_AGENT
+    RECEIPT_SUCCESS,
+    RECEIPT_TIMEOUT,
+    receipt_watcher,
+    get_web3,
+    validation_cache
 )
 from trezor.trezor_utils import CustomUI
 
@@ -42,21 +43,12 @@ logger.addHandler(file_handler)
 class TrezorPayment:
 
     def __init__(self, name, payment_type, client, bip_path, from_acc, to_acc, amount, summary):
-        self.w3 = Web3(
-            Web3.HTTPProvider(
-                RONIN_PROVIDER_FREE,
-                request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}))
+        self.w3 = get_web3(RONIN_PROVIDER_FREE)
         self.name = name
         self.payment_type = payment_type
         self.from_acc = from_acc.replace("ronin:", "0x")
         self.to_acc = to_acc.replace("ronin:", "0x")
         self.amount = amount
-        with open("trezor/slp_abi.json", encoding='utf-8') as f:
-            slb_abi = json.load(f)
-        self.contract = self.w3.eth.contract(
-            address=Web3.toChecksumAddress(SLP_CONTRACT),
-            abi=slb_abi
-        )
         self.client = client
         self.bip_path = bip_path
         self.gwei = self.w3.toWei('0', 'gwei')
@@ -68,16 +60,7 @@ class TrezorPayment:
         if nonce != get_nonce(self.from_acc):
             return
         # build replacement tx
-        replace_tx = self.contract.functions.transfer(
-            Web3.toChecksumAddress(self.from_acc),
-            0
-        ).buildTransaction({
-            "chainId": 2020,
-            "gas": self.gas,
-            "gasPrice": self.w3.toWei("0", "gwei"),
-            "nonce": nonce
-        })
-        data = self.w3.toBytes(hexstr=replace_tx['data'])
+        data = self.w3.toBytes(hexstr=transfer_data(self.from_acc, 0))
         to = self.w3.toBytes(hexstr=SLP_CONTRACT)
         sig = ethereum.sign_tx(
             self.client,
@@ -100,23 +83,11 @@ class TrezorPayment:
         # get transaction hash
         new_hash = self.w3.toHex(self.w3.keccak(replacement_tx))
         # Wait for transaction to finish or timeout
-        start_time = datetime.now()
-        while True:
-            # We will wait for max 5min for this replacement tx to happen
-            if datetime.now() - start_time > timedelta(minutes=TIMEOUT_MINS):
-                success = False
-                logging.info("Replacement transaction, timed out!")
-                break
-            try:
-                receipt = self.w3.eth.get_transaction_receipt(new_hash)
-                if receipt['status'] == 1:
-                    success = True
-                else:
-                    success = False
-                break
-            except exceptions.TransactionNotFound:
-                sleep(10)
-                logging.info(f"Waiting for replacement tx to finish (Nonce: {nonce})")
+        logging.info(f"Waiting for replacement tx to finish (Nonce: {nonce})")
+        status = receipt_watcher.watch(new_hash).result()
+        if status == RECEIPT_TIMEOUT:
+            logging.info("Replacement transaction, timed out!")
+        success = status == RECEIPT_SUCCESS
 
         if success:
             logging.info(f"Successfuly replaced transaction with nonce: {nonce}")
@@ -130,16 +101,7 @@ class TrezorPayment:
         # Get Nonce
         nonce = get_nonce(self.from_acc)
         # Build transaction
-        send_tx = self.contract.functions.transfer(
-            Web3.toChecksumAddress(self.to_acc),
-            self.amount
-        ).buildTransaction({
-            "chainId": 2020,
-            "gas": self.gas,
-            "gasPrice": self.gwei,
-            "nonce": nonce
-        })
-        data = self.w3.toBytes(hexstr=send_tx['data'])
+        data = self.w3.toBytes(hexstr=transfer_data(self.to_acc, self.amount))
         to = self.w3.toBytes(hexstr=SLP_CONTRACT)
         sig = ethereum.sign_tx(
             self.client,
@@ -161,24 +123,11 @@ class TrezorPayment:
         self.w3.eth.send_raw_transaction(transaction)
         hash = self.w3.toHex(self.w3.keccak(transaction))
         # Wait for transaction to finish or timeout
-        start_time = datetime.now()
-        while True:
-            # We will wait for max 10minutes for this tx to respond, if it does not, we will re-try
-            if datetime.now() - start_time > timedelta(minutes=TIMEOUT_MINS):
-                success = False
-                logging.info(f"Transaction {self}, timed out!")
-                break
-            try:
-                recepit = self.w3.eth.get_transaction_receipt(hash)
-                if recepit["status"] == 1:
-                    success = True
-                else:
-                    success = False
-                break
-            except exceptions.TransactionNotFound:
-                # Sleep 10s while waiting
-                sleep(10)
-                logging.info(f"Waiting for transaction '{self}' to finish (Nonce:{nonce})...")
+        logging.info(f"Waiting for transaction '{self}' to finish (Nonce:{nonce})...")
+        status = receipt_watcher.watch(hash).result()
+        if status == RECEIPT_TIMEOUT:
+            logging.info(f"Transaction {self}, timed out!")
+        success = status == RECEIPT_SUCCESS
 
         if success:
             logging.info(f"Important: Transaction {self} completed! Hash: {hash} - "
@@ -205,6 +154,7 @@ class TrezorAxiePaymentsManager:
         self.type = None
         self.auto = auto
         self.summary = PaymentsSummary()
+        self.balances = {}
 
     def legacy_verify(self):
         validation_success = True
@@ -270,37 +220,27 @@ class TrezorAxiePaymentsManager:
 
     def verify_inputs(self):
         logging.info("Validating file inputs...")
+        cache_key = validation_cache.key("payments", self.payments_file, self.trezor_config)
+        if validation_cache.passed(cache_key):
+            self.type = payments_format(self.payments_file)
+            self.load_accounts()
+            logging.info("Files did not change since they were last validated, skipping validation.")
+            return
         validation_success = True
-        # Validate payments file
-        legacy_msg = None
-        new_msg = None
-
-        try:
-            validate(self.payments_file, payments_schema)
-            self.type = "new"
-        except ValidationError as ex:
-            new_msg = ("If you were tyring to pay using the current format:\n"
-                       f"Error given: {ex.message}\n"
-                       f"For attribute in: {list(ex.path)}\n")
+        # Validate payments file, against the schema of the format it is written in
+        payments_type = payments_format(self.payments_file)
+        errors = schema_errors(self.payments_file, "legacy_payments" if payments_type == "legacy" else "payments")
+        if errors:
             validation_success = False
-
-        if not self.type:
-            try:
-                validate(self.payments_file, legacy_payments_schema)
-                self.type = "legacy"
-                validation_success = True
-            except ValidationError as ex:
-                legacy_msg = ("If you were tyring to pay using the legacy format:\n"
-                              f"Error given: {ex.message}\n"
-                              f"For attribute in: {list(ex.path)}\n")
-                validation_success = False
+        else:
+            self.type = payments_type
         
         if not validation_success:
-            msg = "Payments file failed validation. Please review it.\n"
-            if new_msg:
-                msg += new_msg
-            if legacy_msg:
-                msg += legacy_msg
+            msg = ("Payments file failed validation. Please review it.\n"
+                   f"If you were tyring to pay using the {'legacy' if payments_type == 'legacy' else 'current'} "
+                   "format:\n")
+            for ex in errors:
+                msg += f"Error given: {ex.message}\nFor attribute in: {list(ex.path)}\n"
             logging.critical(msg)
             sys.exit()
         
@@ -316,15 +256,24 @@ class TrezorAxiePaymentsManager:
             logging.critical("There is a problem with your trezor_config.json, delete it and re-generate the file starting with an empty file.")
             sys.exit()
         
+        self.load_accounts()
+        validation_cache.add(cache_key)
+        logging.info("Files correctly validated!")
+
+    def load_accounts(self):
         if self.type == "legacy":
             self.manager_acc = self.payments_file["Manager"]
             self.scholar_accounts = self.payments_file["Scholars"]
         elif self.type == "new":
             self.scholar_accounts = self.payments_file["scholars"]
-        logging.info("Files correctly validated!")
+        donations = self.payments_file.get("Donations" if self.type == "legacy" else "donations")
+        if donations:
+            self.donations = donations
 
     def check_acc_has_enough_balance(self, account, balance):
-        account_balance = check_balance(account)
+        account_balance = self.balances.get(account.lower())
+        if account_balance is None:
+            account_balance = check_balance(account)
         if account_balance < balance:
             logging.critical(f"Balance in account {account} is "
                              "inssuficient to cover all planned payments!")
@@ -343,11 +292,16 @@ class TrezorAxiePaymentsManager:
             logging.critical(f"Unexpected error! Unrecognized payments mode")
 
     def prepare_new_payout(self):
+        self.balances = check_balances([acc['ronin'].lower() for acc in self.scholar_accounts])
         for acc in self.scholar_accounts:
+            acc_balance = self.balances[acc['ronin'].lower()]
+            if acc_balance == 0:
+                logging.info(f"Important: Skipping payments for account '{acc['name']}'. "
+                             "Insufficient funds!")
+                continue
             client = get_default_client(
                 ui=CustomUI(passphrase=self.trezor_config[acc['ronin'].lower()]['passphrase']))
             bip_path = parse_path(self.trezor_config[acc['ronin'].lower()]['bip_path'])
-            acc_balance = check_balance(acc['ronin'])
             total_payments = 0
             acc_payments = []
             deductable_fees = 1
@@ -418,11 +372,16 @@ class TrezorAxiePaymentsManager:
         logging.info(f"Important: Transactions Summary:\n {self.summary}")
 
     def prepare_old_payout(self):
+        self.balances = check_balances([acc['AccountAddress'].lower() for acc in self.scholar_accounts])
         for acc in self.scholar_accounts:
+            acc_balance = self.balances[acc['AccountAddress'].lower()]
+            if acc_balance == 0:
+                logging.info(f"Important: Skipping payments for account '{acc['Name']}'. "
+                             "Insufficient funds!")
+                continue
             client = get_default_client(
                 ui=CustomUI(passphrase=self.trezor_config[acc['AccountAddress'].lower()]['passphrase']))
             bip_path = parse_path(self.trezor_config[acc['AccountAddress'].lower()]['bip_path'])
-            acc_balance = check_balance(acc['AccountAddress'].lower())
             total_payments = 0
             acc_payments = []
             # Scholar Payment
@@ -1,35 +1,29 @@
-import os
 import sys
 import logging
-from datetime import datetime
 
 from trezorlib.client import get_default_client
-import qrcode
 
-from axie.utils import load_json
+from axie.qr_code import QRCodeSaver, RENDER_WORKERS, generate_qr_codes
 from trezor.trezor_utils import TrezorAxieGraphQL, CustomUI
 
 
-class TrezorQRCode(TrezorAxieGraphQL):
+class TrezorQRCode(QRCodeSaver, TrezorAxieGraphQL):
 
-    def __init__(self, acc_name, path, **kwargs):
+    def __init__(self, acc_name, path, fmt="png", **kwargs):
         self.acc_name = acc_name
-        self.path = os.path.join(path, f'{self.acc_name.lower()}-{int(datetime.timestamp(datetime.now()))}.png')
+        self.fmt = fmt
+        self.path = self.qr_path(path)
         super().__init__(**kwargs)
 
-    def generate_qr(self):
-        jwt = self.get_jwt()
-        logging.info('Create QR Code')
-        qr = qrcode.make(jwt)
-        logging.info(f'Saving QR Code for account {self.acc_name} at {self.path}')
-        qr.save(self.path)
-
 
 class TrezorQRCodeManager:
 
-    def __init__(self, payments_file, trezor_config, path):
+    def __init__(self, payments_file, trezor_config, path, fmt="png", render_workers=RENDER_WORKERS, output=None):
         self.trezor_config, self.acc_names = self.load_trezor_config_and_acc_name(trezor_config, payments_file)
         self.path = path
+        self.fmt = fmt
+        self.output = output
+        self.render_workers = render_workers
 
     def load_trezor_config_and_acc_name(self, trezor_config, payments_file):
         config = trezor_config
@@ -68,8 +62,9 @@ class TrezorQRCodeManager:
                 account=acc,
                 client=get_default_client(ui=CustomUI(passphrase=self.trezor_config[acc]['passphrase'])),
                 bip_path=self.trezor_config[acc]['bip_path'],
-                path=self.path
+                path=self.path,
+                fmt=self.fmt
             ) for acc in self.trezor_config
         ]
-        for qr in qrcode_list:
-            qr.generate_qr()
+        # Messages are signed on the device one at a time, only rendering runs in parallel
+        generate_qr_codes(qrcode_list, self.fmt, 1, self.render_workers, self.output)
@@ -1,27 +1,26 @@
 import sys
 import logging
-import json
 import rlp
-from datetime import datetime, timedelta
-from time import sleep
+from datetime import datetime
 
-from jsonschema import validate
-from jsonschema.exceptions import ValidationError
-from web3 import Web3, exceptions
 from trezorlib.client import get_default_client
 from trezorlib.tools import parse_path
 from trezorlib import ethereum
 
-from axie.schemas import transfers_schema
-from axie.axies import Axies
+from axie.schemas import schema_errors
+from axie.axies import get_owned_axies
+from axie.calldata import safe_transfer_from_data
 from axie.utils import (
     get_nonce,
     load_json,
     ImportantLogsFilter,
     RONIN_PROVIDER_FREE,
     AXIE_CONTRACT,
-    TIMEOUT_MINS,
-    USER_AGENT
+    RECEIPT_SUCCESS,
+    RECEIPT_TIMEOUT,
+    receipt_watcher,
+    get_web3,
+    validation_cache
 )
 from trezor.trezor_utils import CustomUI
 
@@ -38,10 +37,7 @@ logger.addHandler(file_handler)
 
 class TrezorTransfer:
     def __init__(self, from_acc, client, bip_path, to_acc, axie_id):
-        self.w3 = Web3(
-            Web3.HTTPProvider(
-                RONIN_PROVIDER_FREE,
-                request_kwargs={"headers": {"content-type": "application/json", "user-agent": USER_AGENT}}))
+        self.w3 = get_web3(RONIN_PROVIDER_FREE)
         self.from_acc = from_acc.replace("ronin:", "0x")
         self.to_acc = to_acc.replace("ronin:", "0x")
         self.axie_id = axie_id
@@ -51,28 +47,10 @@ class TrezorTransfer:
         self.gas = 250000
 
     def execute(self):
-        # Load ABI
-        with open('trezor/axie_abi.json', encoding='utf-8') as f:
-            axie_abi = json.load(f)
-        axie_contract = self.w3.eth.contract(
-            address=Web3.toChecksumAddress(AXIE_CONTRACT),
-            abi=axie_abi
-        )
         # Get Nonce
         nonce = get_nonce(self.from_acc)
         # Build transaction
-        transfer_tx = axie_contract.functions.safeTransferFrom(
-            Web3.toChecksumAddress(self.from_acc),
-            Web3.toChecksumAddress(self.to_acc),
-            self.axie_id
-        ).buildTransaction({
-            "chainId": 2020,
-            "gas": self.gas,
-            "gasPrice": self.w3.toWei("0", "gwei"),
-            "value": 0,
-            "nonce": nonce
-        })
-        data = self.w3.toBytes(hexstr=transfer_tx['data'])
+        data = self.w3.toBytes(hexstr=safe_transfer_from_data(self.from_acc, self.to_acc, self.axie_id))
         to = self.w3.toBytes(hexstr=AXIE_CONTRACT)
         sig = ethereum.sign_tx(
             self.client,
@@ -95,24 +73,11 @@ class TrezorTransfer:
         # Get transaction hash
         hash = self.w3.toHex(self.w3.keccak(transaction))
         # Wait for transaction to finish or timeout
-        start_time = datetime.now()
-        while True:
-            # We will wait for max 10min for this trasnfer to happen
-            if datetime.now() - start_time > timedelta(minutes=TIMEOUT_MINS):
-                success = False
-                logging.info(f"Important: Transfer {self}, timed out!")
-                break
-            try:
-                recepit = self.w3.eth.get_transaction_receipt(hash)
-                if recepit["status"] == 1:
-                    success = True
-                else:
-                    success = False
-                break
-            except exceptions.TransactionNotFound:
-                logging.info(f"Waiting for transfer '{self}' to finish (Nonce:{nonce})...")
-                # Sleep 10 seconds not to constantly send requests!
-                sleep(10)
+        logging.info(f"Waiting for transfer '{self}' to finish (Nonce:{nonce})...")
+        status = receipt_watcher.watch(hash).result()
+        if status == RECEIPT_TIMEOUT:
+            logging.info(f"Important: Transfer {self}, timed out!")
+        success = status == RECEIPT_SUCCESS
         if success:
             logging.info(f"Important: {self} completed! Hash: {hash} - "
                          f"Explorer: https://explorer.roninchain.com/tx/{str(hash)}")
@@ -132,11 +97,13 @@ class TrezorAxieTransferManager:
 
     def verify_inputs(self):
         logging.info("Validating file inputs...")
+        cache_key = validation_cache.key("transfers", self.transfers_file, self.trezor_config)
+        if validation_cache.passed(cache_key):
+            logging.info("Files did not change since they were last validated, skipping validation.")
+            return
         validation_success = True
         # Validate transfers file
-        try:
-            validate(self.transfers_file, transfers_schema)
-        except ValidationError as ex:
+        for ex in schema_errors(self.transfers_file, "transfers"):
             logging.critical("Transfers file failed validation. Please review it. "
                              f"Error given: {ex.message}. "
                              f"For attribute in: {list(ex.path)}")
@@ -151,13 +118,15 @@ class TrezorAxieTransferManager:
             logging.critical("Please make sure your transfers.json file looks like the one in the README.md\n"
                              "Find it here: https://ferranmarin.github.io/axie-scholar-utilities/")
             sys.exit()
+        validation_cache.add(cache_key)
         logging.info("Files correctly validated!")
 
     def prepare_transfers(self):
         transfers = []
         logging.info("Preparing transfers")
+        owned_axies = get_owned_axies([acc['AccountAddress'].lower() for acc in self.transfers_file])
         for acc in self.transfers_file:
-            axies_in_acc = Axies(acc['AccountAddress'].lower()).get_axies()
+            axies_in_acc = owned_axies[acc['AccountAddress'].lower()]
             for axie in acc['Transfers']:
                 if not self.secure or (self.secure and axie['ReceiverAddress'].lower() in self.trezor_config):
                     # Check axie in account
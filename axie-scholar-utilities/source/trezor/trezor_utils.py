@@ -1,14 +1,12 @@
 import logging
 
-import requests
-from requests.adapters import HTTPAdapter
 from requests.exceptions import RetryError
 from hexbytes import HexBytes
 from trezorlib import ethereum
 from trezorlib.ui import ClickUI
 from trezorlib.tools import parse_path
 
-from axie.utils import RETRIES, USER_AGENT
+from axie.utils import RETRIES, USER_AGENT, jwt_cache, rate_limited_session
 
 
 class CustomUI(ClickUI):
@@ -24,8 +22,7 @@ class TrezorAxieGraphQL:
 
     def __init__(self, **kwargs):
         self.account = kwargs.get('account').replace("ronin:", "0x")
-        self.request = requests.Session()
-        self.request.mount('https://', HTTPAdapter(max_retries=RETRIES))
+        self.request = rate_limited_session(RETRIES)
         self.user_agent = USER_AGENT
         self.client = kwargs.get('client')
         self.bip_path = parse_path(kwargs.get('bip_path'))
@@ -48,6 +45,13 @@ class TrezorAxieGraphQL:
         return None
 
     def get_jwt(self):
+        jwt = jwt_cache.get(self.account)
+        if not jwt:
+            jwt = self.create_jwt()
+            jwt_cache.set(self.account, jwt)
+        return jwt
+
+    def create_jwt(self):
         msg = self.create_random_msg()
         if not msg:
             return None
@@ -5,18 +5,26 @@ axie_breeding, generate_breedings
 
 Usage:
     trezor_axie_scholar_cli.py payout <payments_file> <config_file> [-y]
+                               [--validation-cache=<file>] [--pool-size=<n>]
     trezor_axie_scholar_cli.py managed_payout <config_file> <token> [-y]
-    trezor_axie_scholar_cli.py claim <payments_file> <config_file> [--force]
-    trezor_axie_scholar_cli.py managed_claim <config_file> <token> [--force]
+                               [--validation-cache=<file>] [--pool-size=<n>]
+    trezor_axie_scholar_cli.py claim <payments_file> <config_file> [--force] [--jwt-cache=<file>]
+                               [--validation-cache=<file>] [--pool-size=<n>]
+    trezor_axie_scholar_cli.py managed_claim <config_file> <token> [--force] [--jwt-cache=<file>]
+                               [--validation-cache=<file>] [--pool-size=<n>]
     trezor_axie_scholar_cli.py config_trezor <payments_file> [<config_file>]
     trezor_axie_scholar_cli.py managed_config_trezor <config_file> <token>
     trezor_axie_scholar_cli.py generate_payments <csv_file> [<payments_file>]
-    trezor_axie_scholar_cli.py generate_QR <payments_file> <config_file>
-    trezor_axie_scholar_cli.py managed_generate_QR <config_file> <token>
-    trezor_axie_scholar_cli.py axie_morphing <config_file> <list_of_accounts>
+    trezor_axie_scholar_cli.py generate_QR <payments_file> <config_file> [--jwt-cache=<file>]
+                               [--format=<format>] [--output=<file>]
+    trezor_axie_scholar_cli.py managed_generate_QR <config_file> <token> [--jwt-cache=<file>]
+                               [--format=<format>] [--output=<file>]
+    trezor_axie_scholar_cli.py axie_morphing <config_file> <list_of_accounts> [--jwt-cache=<file>] [--axie-index=<file>]
     trezor_axie_scholar_cli.py axie_breeding <breedings_file> <config_file>
+                               [--validation-cache=<file>] [--pool-size=<n>]
     trezor_axie_scholar_cli.py generate_breedings <csv_file> [<breedings_file>]
     trezor_axie_scholar_cli.py transfer_axies <transfers_file> <config_file> [--safe-mode]
+                               [--validation-cache=<file>] [--pool-size=<n>]
     trezor_axie_scholar_cli.py generate_transfer_axies <csv_file> [<transfers_file>]
     trezor_axie_scholar_cli.py -h | --help
     trezor_axie_scholar_cli.py --version
@@ -25,6 +33,12 @@ Options:
     -h --help   Shows this extra help options
     -y --yes    Automatically say "yes" to all confirmation promts (they will not appear).
     --force     Forces claim even if last claim was less than 14 days ago. (Used to bypass possible issues)
+    --jwt-cache=<file>  Keeps account access tokens in this file to reuse them across runs.
+    --axie-index=<file>     Keeps axie birth dates and shapes in this file so morph scans skip known axies.
+    --validation-cache=<file>   Remembers validated input files in this file, so unchanged ones are not re-validated.
+    --pool-size=<n>     Connections kept open to each RPC endpoint, 10 if not given.
+    --format=<format>   QR codes are saved as png or svg files, or printed in the terminal [default: png].
+    --output=<file>     Saves all QR codes in this ZIP or PDF file instead of one file per account.
     --version   Show version.
 """
 import os
@@ -33,11 +47,20 @@ import csv
 import json
 import logging
 
-import requests
 from docopt import docopt
 
-from axie import Axies
-from axie.utils import load_json
+from axie.axie_index import AxieIndex
+from axie.axies import find_axies_to_morph
+from axie.qr_archive import archive_format
+from axie.qr_code import QR_FORMATS
+from axie.utils import (
+    load_json,
+    log_connections_opened,
+    rate_limited_session,
+    jwt_cache,
+    validation_cache,
+    providers
+)
 from trezor import (
     TrezorAccountsSetup,
     TrezorAxiePaymentsManager,
@@ -151,7 +174,7 @@ def generate_payments_file(csv_file_path, payments_file_path=None):
 
 def load_payments_file(token):
     url = "https://api.axie.management/external/epithslayer/user/scholars"
-    r = requests.post(url, json={"accessToken": token})
+    r = rate_limited_session().post(url, json={"accessToken": token})
     if r.status_code == 500:
         logging.critical('Something went wrong on axie.management side. Go to their Discord see what is it about!')
     if r.status_code == 426:
@@ -172,9 +195,41 @@ def check_file(file):
     return True
 
 
+def parse_qr_format(fmt):
+    if fmt not in QR_FORMATS:
+        logging.critical(f"QR code format must be one of {', '.join(QR_FORMATS)}, got: {fmt}")
+        sys.exit()
+    return fmt
+
+
+def parse_qr_output(output, fmt):
+    if not output:
+        return None
+    if archive_format(output) is None:
+        logging.critical(f"QR codes can only be saved in a .zip or .pdf file, got: {output}")
+        sys.exit()
+    if fmt == "terminal" or archive_format(output) == "pdf" and fmt != "png":
+        logging.critical(f"QR codes in {fmt} format can not be saved in {output}")
+        sys.exit()
+    return output
+
+
+def parse_pool_size(pool_size):
+    if not pool_size.isdigit() or int(pool_size) < 1:
+        logging.critical(f"Pool size must be a positive integer, got: {pool_size}")
+        sys.exit()
+    return int(pool_size)
+
+
 def run_cli():
     """ Wrapper function for testing purposes"""
     args = docopt(__doc__, version='Trezor Axie Scholar Payments CLI v2.0.3')
+    if args['--jwt-cache']:
+        jwt_cache.persist(args['--jwt-cache'])
+    if args['--validation-cache']:
+        validation_cache.persist(args['--validation-cache'])
+    if args['--pool-size']:
+        providers.configure(pool_size=parse_pool_size(args['--pool-size']))
     if args['payout']:
         logging.info("I shall help you pay!")
         payments_file_path = args['<payments_file>']
@@ -295,8 +350,13 @@ def run_cli():
         config_file_path = args['<config_file>']
         if check_file(config_file_path):
             accs_list = accs.split(',')
+            # Look up the axies of every account at once
+            index = AxieIndex(args['--axie-index']) if args['--axie-index'] else None
+            morphable = find_axies_to_morph(accs_list, index)
+            if index:
+                index.close()
             for acc in accs_list:
-                axies_to_morph = Axies(acc).find_axies_to_morph()
+                axies_to_morph = morphable[acc]
                 if axies_to_morph:
                     axm = TrezorAxieMorphingManager(axies_to_morph, acc, config_file_path)
                     axm.verify_inputs()
@@ -344,7 +404,10 @@ def run_cli():
         payments_file_path = args['<payments_file>']
         config_file_path = args['<config_file>']
         if check_file(payments_file_path) and check_file(config_file_path):
-            qr = TrezorQRCodeManager(load_json(payments_file_path), load_json(config_file_path), os.path.dirname(config_file_path))
+            qr = TrezorQRCodeManager(load_json(payments_file_path), load_json(config_file_path),
+                                     os.path.dirname(config_file_path),
+                                     fmt=parse_qr_format(args['--format']),
+                                     output=parse_qr_output(args['--output'], args['--format']))
             qr.execute()
         else:
             logging.critical("Please review your file paths and re-try.")
@@ -355,7 +418,9 @@ def run_cli():
         payments = load_payments_file(token)
         config_file_path = args['<config_file>']
         if check_file(config_file_path):
-            qr = TrezorQRCodeManager(payments, load_json(config_file_path), os.path.dirname(config_file_path))
+            qr = TrezorQRCodeManager(payments, load_json(config_file_path), os.path.dirname(config_file_path),
+                                     fmt=parse_qr_format(args['--format']),
+                                     output=parse_qr_output(args['--output'], args['--format']))
             qr.execute()
         else:
             logging.critical("Please review your file paths and re-try.")
@@ -363,3 +428,4 @@ def run_cli():
 
 if __name__ == '__main__':
     run_cli()
+    log_connections_opened()